@@ -1,13 +1,16 @@
 import os
 import arcpy
 import sqlite3
-import openpyxl
 from datetime import datetime
 import warnings
 from pathlib import Path
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+# Módulos compartidos del modelo IGAC
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelo_IGAC'))
+from WorkbookSession import WorkbookSession
+
 class MunicipalityDataProcessor:
     def __init__(self):
         self.base_path = self.get_project_root()
@@ -138,22 +141,20 @@ class MunicipalityDataProcessor:
             for excel_path in excel_files:
                 try:
                     print(f"\nProcesando archivo: {os.path.basename(excel_path)}")
-                    workbook = openpyxl.load_workbook(excel_path)
+                    session = WorkbookSession(excel_path)
                     
                     sheet_name = 'Consistencia Topologica'
-                    if sheet_name in workbook.sheetnames:
-                        sheet = workbook[sheet_name]
-                        
+                    if sheet_name in session.sheetnames:
                         try:
-                            sheet['D3'] = depto  # Primera celda del merge D3:F3
-                            sheet['D4'] = municipio  # Primera celda del merge D4:F4
-                            sheet['H4'] = today  # Primera celda del merge H4:K4
+                            session.write(sheet_name, 'D3', depto)  # Primera celda del merge D3:F3
+                            session.write(sheet_name, 'D4', municipio)  # Primera celda del merge D4:F4
+                            session.write(sheet_name, 'H4', today)  # Primera celda del merge H4:K4
                             
                             print(f"Actualizada hoja: {sheet_name}")
                         except Exception as e:
                             print(f"Advertencia al escribir en celdas: {str(e)}")
 
-                    workbook.save(excel_path)
+                    session.commit()
                     print(f"Guardado archivo Excel: {excel_path}")
                     
                 except Exception as e:
@@ -1,11 +1,15 @@
 import os
 import sqlite3
 import shutil
-import openpyxl
 from pathlib import Path
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+# Módulos compartidos del modelo IGAC
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelo_IGAC'))
+from TopologyCounts import count_tables
+from WorkbookSession import WorkbookSession
+
 class TopologyAnalyzer:
     def __init__(self):
         self.base_path = self.get_project_root()
@@ -155,18 +159,20 @@ class TopologyAnalyzer:
             print(f"Excel: {excel_path}")
             print(f"Base de datos: {db_path}")
             
-            workbook = openpyxl.load_workbook(excel_path)
+            session = WorkbookSession(excel_path)
             conn = sqlite3.connect(db_path)
             tables = self.get_table_names(conn)
             
+            # Totales y excepciones de todas las tablas en una sola consulta agregada
+            table_counts = count_tables(conn, tables)
+            
             processed_tables = set()
             
             for sheet_name, ranges in self.cell_ranges.items():
-                if sheet_name not in workbook.sheetnames:
+                if sheet_name not in session.sheetnames:
                     print(f"Advertencia: No se encontró la hoja '{sheet_name}'")
                     continue
                     
-                sheet = workbook[sheet_name]
                 print(f"\nProcesando hoja: {sheet_name}")
                 
                 for start_count, end_count, start_except, start_rule, end_rule in ranges:
@@ -196,12 +202,8 @@ class TopologyAnalyzer:
                             for table_name in matching_tables:
                                 processed_tables.add(table_name)
                                 
-                                cursor = conn.execute(f"SELECT COUNT(*) FROM {table_name}")
-                                table_count = cursor.fetchone()[0]
+                                table_count, table_exceptions = table_counts[table_name]
                                 total_count += table_count
-                                
-                                cursor = conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE isExceptio != 0")
-                                table_exceptions = cursor.fetchone()[0]
                                 exception_count += table_exceptions
                                 
                                 print(f"  - Tabla {table_name}: {table_count} registros, {table_exceptions} excepciones")
@@ -209,16 +211,16 @@ class TopologyAnalyzer:
                             count_cell = f"{count_col}{row}"
                             except_cell = f"{except_col}{row}"
                             
-                            sheet[count_cell] = total_count
-                            sheet[except_cell] = exception_count
+                            session.write(sheet_name, count_cell, total_count)
+                            session.write(sheet_name, except_cell, exception_count)
                             
                             print(f"  Total para R_{rule_number}: {total_count} registros, {exception_count} excepciones")
                         else:
-                            sheet[f"{count_col}{row}"] = 0
-                            sheet[f"{except_col}{row}"] = 0
+                            session.write(sheet_name, f"{count_col}{row}", 0)
+                            session.write(sheet_name, f"{except_col}{row}", 0)
                             print(f"No se encontraron tablas para R_{rule_number}")
             
-            workbook.save(excel_path)
+            session.commit()
             conn.close()
             
             print(f"\nRESUMEN DE PROCESAMIENTO PARA {dataset_type.upper()}:")
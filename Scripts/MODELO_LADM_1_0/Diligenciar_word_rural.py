@@ -14,6 +14,11 @@ from datetime import datetime
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+# Módulos compartidos del modelo IGAC
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelo_IGAC'))
+from WordTemplateRenderer import TemplateRenderer
+from ReportVariableResolver import ReportDataResolver
+
 class WordAutomation:
     def __init__(self):
         """Inicializa la automatización con mejor manejo de archivos temporales"""
@@ -68,6 +73,9 @@ class WordAutomation:
             # Rango para consistencia
             self.consistencia_range = (58, 71)  # R58 - R71
             
+            # Conexiones y consultas compartidas durante la ejecución del reporte
+            self.resolver = ReportDataResolver()
+            
             # Verificar existencia de bases de datos
             print("\nVerificando rutas de bases de datos:")
             missing_dbs = []
@@ -125,50 +133,41 @@ class WordAutomation:
         Obtiene todas las tablas en un rango específico de números de regla
         """
         try:
-            with sqlite3.connect(self.db_paths['registro_errores']) as conn:
-                cursor = conn.cursor()
-                # Obtener todas las tablas de la base de datos
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                all_tables = cursor.fetchall()
-                
-                # Filtrar tablas que están en el rango especificado
-                tables_in_range = []
-                for (table_name,) in all_tables:
-                    # Extraer el número de la regla del nombre de la tabla
-                    match = re.search(r'R_(\d+)_', table_name)
-                    if match:
-                        rule_num = int(match.group(1))
-                        if start_num <= rule_num <= end_num:
-                            tables_in_range.append(table_name)
-                
-                return tables_in_range
+            # La lista de tablas se lee una sola vez por ejecución
+            all_tables = self.resolver.table_names(self.db_paths['registro_errores'])
+            
+            # Filtrar tablas que están en el rango especificado
+            tables_in_range = []
+            for table_name in all_tables:
+                # Extraer el número de la regla del nombre de la tabla
+                match = re.search(r'R_(\d+)_', table_name)
+                if match:
+                    rule_num = int(match.group(1))
+                    if start_num <= rule_num <= end_num:
+                        tables_in_range.append(table_name)
+            
+            return tables_in_range
         except Exception as e:
             print(f"[ERROR] Error obteniendo tablas en rango {start_num}-{end_num}: {e}")
             return []
 
     def count_records_in_tables(self, tables, count_exceptions=False):
         """
-        Cuenta registros en un conjunto de tablas, opcionalmente contando solo excepciones
+        Cuenta registros en un conjunto de tablas, opcionalmente contando solo excepciones.
+        Los totales y las excepciones de cada tabla se obtienen en una sola consulta
+        y se reutilizan entre llamadas.
         """
         total_count = 0
         try:
-            with sqlite3.connect(self.db_paths['registro_errores']) as conn:
-                cursor = conn.cursor()
-                for table in tables:
-                    try:
-                        if count_exceptions:
-                            query = f"SELECT COUNT(*) FROM {table} WHERE isExceptio <> 0"
-                        else:
-                            query = f"SELECT COUNT(*) FROM {table}"
-                        cursor.execute(query)
-                        count = cursor.fetchone()[0]
-                        total_count += count
-                        print(f"  [OK] {table}: {count} {'excepciones' if count_exceptions else 'registros'}")
-                    except Exception as e:
-                        print(f"  [ERROR] Error contando registros en {table}: {e}")
-                        continue
+            counts = self.resolver.table_counts(self.db_paths['registro_errores'], tables)
         except Exception as e:
             print(f"[ERROR] Error en conexión a base de datos: {e}")
+            return total_count
+        for table in tables:
+            total, exceptions = counts[table]
+            count = exceptions if count_exceptions else total
+            total_count += count
+            print(f"  [OK] {table}: {count} {'excepciones' if count_exceptions else 'registros'}")
         return total_count
 
     def get_error_counts(self):
@@ -291,23 +290,15 @@ class WordAutomation:
             raise
 
     def execute_sql_query(self, db_path, query, params=None):
-        """Ejecuta una consulta SQL y retorna el resultado con mejor manejo de errores"""
+        """Ejecuta una consulta SQL con la conexión compartida y retorna el primer valor"""
         try:
-            if not Path(db_path).exists():
-                raise FileNotFoundError(f"Base de datos no encontrada: {db_path}")
+            result = self.resolver.fetchone(db_path, query, params)
                 
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                if params:
-                    result = cursor.execute(query, params).fetchone()
-                else:
-                    result = cursor.execute(query).fetchone()
-                    
-                if result is None:
-                    print(f"[ADVERTENCIA] La consulta no retornó resultados: {query}")
-                    return 0
-                    
-                return result[0] if result else 0
+            if result is None:
+                print(f"[ADVERTENCIA] La consulta no retornó resultados: {query}")
+                return 0
+                
+            return result[0] if result else 0
                 
         except sqlite3.Error as e:
             print(f"[ERROR] Error en la base de datos: {e}")
@@ -444,11 +435,20 @@ class WordAutomation:
         ]
         
         try:
+            # Una sola lectura de la fila de conteos del dataset
             print("\nProcesando variables individuales:")
+            try:
+                row = self.resolver.first_row(self.db_paths['conteo'], dataset)
+            except Exception as e:
+                print(f"[ERROR] Error leyendo conteos de {dataset}: {e}")
+                row = {}
+            row = {column.upper(): value for column, value in row.items()}
+
             for var_name in base_vars:
                 try:
-                    query = f"SELECT {var_name} FROM {dataset} LIMIT 1"
-                    value = self.execute_sql_query(self.db_paths['conteo'], query)
+                    value = row.get(var_name.upper())
+                    if value is None:
+                        raise KeyError(f"sin valor en {dataset}")
                     variables[var_name] = value
                     
                     var_underscore = f"{var_name}_"
@@ -462,18 +462,11 @@ class WordAutomation:
                     variables[f"{var_name}_"] = "Vacía"
 
             try:
-                total_query = f"SELECT ({' + '.join(base_vars)}) FROM {dataset} LIMIT 1"
-                variables['total_conteo'] = self.execute_sql_query(self.db_paths['conteo'], total_query)
+                variables['total_conteo'] = sum(variables[var] for var in base_vars)
                 print(f"\nTotal conteo calculado: {variables['total_conteo']}")
-                
             except Exception as e:
-                print(f"[ERROR] Error calculando total_conteo directo: {e}")
-                try:
-                    variables['total_conteo'] = sum(variables[var] for var in base_vars)
-                    print(f"Total conteo calculado por suma: {variables['total_conteo']}")
-                except Exception as e2:
-                    print(f"[ERROR] Error calculando total_conteo por suma: {e2}")
-                    variables['total_conteo'] = 0
+                print(f"[ERROR] Error calculando total_conteo: {e}")
+                variables['total_conteo'] = 0
             
             return variables
             
@@ -533,7 +526,8 @@ class WordAutomation:
         try:
             print(f"\nProcesando documento Word para dataset {dataset}...")
             
-            variables = self.process_dataset_variables(dataset)
+            variables = self.resolver.remember(
+                ('variables', dataset), lambda: self.process_dataset_variables(dataset))
             
             docx_files = list(self.process_temp_path.glob("*.docx"))
             if not docx_files:
@@ -546,61 +540,9 @@ class WordAutomation:
             temp_output_path = self.process_temp_path / output_name
             final_output_path = self.temp_root / output_name
             
-            doc = Document(template_file)
-            replacements = 0
-
-            def replace_text_in_paragraph(paragraph):
-                nonlocal replacements
-                
-                if not paragraph.runs:
-                    return
-                    
-                full_text = paragraph.text
-                new_text = full_text
-                
-                found_replacements = False
-                for var_name, value in variables.items():
-                    placeholder = f"{{{var_name}}}"
-                    if placeholder in new_text:
-                        try:
-                            new_text = new_text.replace(placeholder, str(value))
-                            replacements += 1
-                            found_replacements = True
-                            print(f"  [OK] Reemplazo: {placeholder} -> {value}")
-                        except Exception as e:
-                            print(f"  [ERROR] Error reemplazando {placeholder}: {e}")
-                
-                if found_replacements:
-                    try:
-                        first_run = paragraph.runs[0]
-                        if first_run:
-                            font_name = first_run.font.name
-                            font_size = first_run.font.size
-                            bold = first_run.font.bold
-                            italic = first_run.font.italic
-                            
-                            for run in paragraph.runs[1:]:
-                                run.text = ""
-                            
-                            first_run.text = new_text
-                            first_run.font.name = font_name
-                            first_run.font.size = font_size
-                            first_run.font.bold = bold
-                            first_run.font.italic = italic
-                        else:
-                            new_run = paragraph.add_run(new_text)
-                            
-                    except Exception as e:
-                        print(f"  [ERROR] Error actualizando formato: {e}")
-
-            for paragraph in doc.paragraphs:
-                replace_text_in_paragraph(paragraph)
-            
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            replace_text_in_paragraph(paragraph)
+            # Reemplazar variables en una sola pasada sobre el índice de la plantilla
+            renderer = TemplateRenderer(template_file, self.temp_root / "word_template_index")
+            doc, replacements = renderer.render(variables)
 
             print(f"\nTotal de reemplazos realizados: {replacements}")
             
@@ -696,6 +638,7 @@ class WordAutomation:
                     print(traceback.format_exc())
             
             self.cleanup_process_files()
+            self.resolver.close()
             
             print(f"\n{'='*50}")
             print("Proceso Rural Finalizado")
@@ -7,6 +7,11 @@ from PySide6.QtWidgets import QApplication, QMessageBox
 import psutil
 
 sys.stdout.reconfigure(encoding='utf-8')
+
+# Módulos compartidos del modelo IGAC
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelo_IGAC'))
+from WorkbookSession import flush_pending
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -288,6 +293,15 @@ class MinisoftOrganizer:
             logger.error(f"Error copiando archivos DOCX: {str(e)}")
             return False
 
+    def apply_pending_workbook_changes(self):
+        """Aplica los cambios de Excel diferidos por las etapas anteriores antes de copiar los formatos"""
+        try:
+            flushed = flush_pending(self.temp_files_path)
+            if flushed:
+                logger.info(f"Cambios pendientes aplicados en {len(flushed)} archivos Excel")
+        except Exception as e:
+            logger.error(f"Error al aplicar cambios pendientes en Excel: {str(e)}")
+
     def run(self):
         """Ejecuta todo el proceso de organización"""
         logger.info("Iniciando proceso de organización de archivos")
@@ -304,6 +318,7 @@ class MinisoftOrganizer:
 
         # Ejecutar todos los procesos
         processes = [
+            self.apply_pending_workbook_changes,
             self.copy_gdb_files,
             self.process_topologia,
             self.process_validaciones_calidad,
@@ -1,4 +1,5 @@
 import arcpy
+import bisect
 import os
 from datetime import datetime
 import concurrent.futures
@@ -71,223 +72,9 @@ except Exception as e:
 
 
 
-# Definición de reglas por topología con los datasets correctos
-TOPOLOGY_RULES = {
-    "URBANO_CTM12_Topology": {
-        "dataset": "URBANO_CTM12",  
-        "must_not_overlap": [
-            "U_TERRENO_CTM12", "U_TERRENO_INFORMAL", "U_MANZANA_CTM12",
-            "U_SECTOR_CTM12", "U_BARRIO_CTM12", "U_PERIMETRO_CTM12",
-            "U_CONSTRUCCION_CTM12", "U_CONSTRUCCION_INFORMAL",
-            "U_ZONA_HOMOGENEA_FISICA_CTM12",
-            "U_ZONA_HOMO_GEOECONOMICA_CTM12",
-    
-        ],
-        "must_not_have_gaps": [
-            "U_TERRENO_CTM12", "U_TERRENO_INFORMAL", "U_MANZANA_CTM12",
-            "U_SECTOR_CTM12", "U_BARRIO_CTM12", "U_PERIMETRO_CTM12",
-            "U_ZONA_HOMOGENEA_FISICA_CTM12", "U_ZONA_HOMO_GEOECONOMICA_CTM12"
-
-        ],
-        "must_be_covered_by": [
-            ("U_SECTOR_CTM12", "U_PERIMETRO_CTM12"),
-            ("U_BARRIO_CTM12", "U_SECTOR_CTM12"),
-            ("U_TERRENO_CTM12", "U_MANZANA_CTM12"),
-            ("U_CONSTRUCCION_CTM12", "U_TERRENO_CTM12"),
-            ("U_CONSTRUCCION_INFORMAL", "U_TERRENO_INFORMAL"),
-            ("U_TERRENO_INFORMAL","U_TERRENO_CTM12"),
-
-
-        ],
-        "must_cover_each_other":[
-            ("U_TERRENO_CTM12", "U_MANZANA_CTM12"),
-            ("U_UNIDAD_CTM12", "U_CONSTRUCCION_CTM12"),
-            ("U_UNIDAD_INFORMAL", "U_CONSTRUCCION_INFORMAL"),
-            ("U_ZONA_HOMO_GEOECONOMICA_CTM12", "U_ZONA_HOMOGENEA_FISICA_CTM12")
-
-        ]
-        
-    },
-    "RURAL_TOPOLOGY": {
-        "dataset": "RURAL",
-        "must_not_overlap": [
-            "R_TERRENO","R_CONSTRUCCION","R_VEREDA","R_SECTOR",
-            "R_ZONA_HOMOGENEA_FISICA","R_ZONA_HOMOGENEA_GEOECONOMICA"
-        ],
-        "must_not_have_gaps": [
-            "R_TERRENO","R_VEREDA","R_SECTOR",
-            "R_ZONA_HOMOGENEA_FISICA","R_ZONA_HOMOGENEA_GEOECONOMICA"
-        ],
-        "must_be_covered_by": [
-            ("R_VEREDA", "R_SECTOR"),
-            ("R_TERRENO", "R_VEREDA"),
-            ("R_CONSTRUCCION", "R_TERRENO"),
-        ],
-        "must_cover_each_other":[
-            ("R_TERRENO", "R_VEREDA"),
-            ("R_UNIDAD", "R_CONSTRUCCION"),
-            ("R_ZONA_HOMOGENEA_GEOECONOMICA", "R_ZONA_HOMOGENEA_FISICA")
-
-        ]
-    },
-    "RURAL_CTM12_Topology": {
-        "dataset": "RURAL_CTM12",  
-        "must_not_overlap": [
-            "R_TERRENO_CTM12", "R_TERRENO_INFORMAL",
-            "R_CONSTRUCCION_CTM12", "R_CONSTRUCCION_INFORMAL",
-            "R_VEREDA_CTM12","R_SECTOR_CTM12",
-            "R_ZONA_HOMOGENEA_FISICA_CTM12",
-            "R_ZONA_HOMO_GEOECONOMICA_CTM12"
-        ],
-        "must_not_have_gaps": [
-            "R_TERRENO_CTM12", "R_TERRENO_INFORMAL",
-            "R_VEREDA_CTM12", "R_SECTOR_CTM12",
-            "R_ZONA_HOMOGENEA_FISICA_CTM12","R_ZONA_HOMO_GEOECONOMICA_CTM12"
-        ],
-        "must_be_covered_by": [
-            ("R_VEREDA_CTM12", "R_SECTOR_CTM12"),
-            ("R_TERRENO_CTM12", "R_VEREDA_CTM12"),
-            ("R_CONSTRUCCION_CTM12", "R_TERRENO_CTM12"),
-            ("R_CONSTRUCCION_INFORMAL", "R_TERRENO_INFORMAL"),
-            ("R_TERRENO_INFORMAL", "R_TERRENO_CTM12"),
-        ],
-        "must_cover_each_other":[
-            ("R_TERRENO_CTM12", "R_VEREDA_CTM12"),
-            ("R_UNIDAD_CTM12", "R_CONSTRUCCION_CTM12"),
-            ("R_UNIDAD_INFORMAL", "R_CONSTRUCCION_INFORMAL"),
-            ("R_ZONA_HOMO_GEOECONOMICA_CTM12", "R_ZONA_HOMOGENEA_FISICA_CTM12")
-
-        ]
-    },
-    "URBANO_Topology": {
-        "dataset": "URBANO",  
-        "must_not_overlap": [
-            "U_TERRENO","U_MANZANA",
-            "U_SECTOR", "U_BARRIO", "U_PERIMETRO",
-            "U_CONSTRUCCION",
-            "U_ZONA_HOMOGENEA_FISICA",
-            "U_ZONA_HOMOGENEA_GEOECONOMICA",
-    
-        ],
-        "must_not_have_gaps": [
-            "U_TERRENO","U_MANZANA",
-            "U_SECTOR", "U_BARRIO", "U_PERIMETRO",
-            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
-
-        ],
-        "must_be_covered_by": [
-            ("U_SECTOR", "U_PERIMETRO"),
-            ("U_BARRIO", "U_SECTOR"),
-            ("U_TERRENO", "U_MANZANA"),
-            ("U_CONSTRUCCION", "U_TERRENO"),
-
-        ],
-        "must_cover_each_other":[
-            ("U_TERRENO", "U_MANZANA"),
-            ("U_UNIDAD", "U_CONSTRUCCION"),
-            ("U_ZONA_HOMOGENEA_GEOECONOMICA", "U_ZONA_HOMOGENEA_FISICA")
-
-        ]
-    },
-    "ZONA_HOMOGENEA_URBANO_Topology": {
-        "dataset": "ZONA_HOMOGENEA_URBANO",  
-        "must_not_overlap": [
-            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
-           
-        ],
-        "must_not_have_gaps":[
-            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
-        ],
-        "must_cover_each_other": [
-            ("U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA")
-        ]
-    },
-    "ZONA_HOMOGENEA_RURAL_CTM12_Topology": {
-        "dataset": "ZONA_HOMOGENEA_RURAL_CTM12",  
-        "must_not_overlap": [
-            "R_ZONA_HOMO_GEOECONOMICA_CTM12",
-            "R_ZONA_HOMOGENEA_FISICA_CTM12"
-        ],
-        "must_not_have_gaps": [
-            "R_ZONA_HOMOGENEA_FISICA_CTM12",
-            "R_ZONA_HOMO_GEOECONOMICA_CTM12"
-        ],
-        "must_cover_each_other": [
-            ("R_ZONA_HOMOGENEA_FISICA_CTM12", "R_ZONA_HOMO_GEOECONOMICA_CTM12")
-        ]
-    },
-    "ZONA_HOMOGENEA_URBANO_CTM12_Topology": {
-        "dataset": "ZONA_HOMOGENEA_URBANO_CTM12",  
-        "must_not_overlap": [
-            "U_ZONA_HOMO_GEOECONOMICA_CTM12",
-            "U_ZONA_HOMOGENEA_FISICA_CTM12"
-        ],
-        "must_not_have_gaps": [
-            "U_ZONA_HOMOGENEA_FISICA_CTM12",
-            "U_ZONA_HOMO_GEOECONOMICA_CTM12"
-        ],
-        "must_cover_each_other": [
-            ("U_ZONA_HOMOGENEA_FISICA_CTM12", "U_ZONA_HOMO_GEOECONOMICA_CTM12")
-        ]
-    },
-    "ZONA_HOMOGENEA_RURAL_Topology": {
-        "dataset": "ZONA_HOMOGENEA_RURAL",  
-        "must_not_overlap": [
-            "R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA"
-           
-        ],
-        "must_not_have_gaps":[
-            "R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA"
-        ],
-        "must_cover_each_other": [
-            ("R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA")
-        ]
-    }
-}
-
-# Nuevo diccionario para reglas de topología de líneas
-LINE_TOPOLOGY_RULES = {
-    "URBANO_CTM12_Topology": {
-        "dataset": "URBANO_CTM12",
-        "features": [
-            {
-                "name": "U_NOMEN_DOMICILIARIA_CTM12",
-                "rules": ["must_not_overlap"]
-            }
-
-        ]
-    },
-    "RURAL_CTM12_Topology": {
-        "dataset": "RURAL_CTM12",
-        "features": [
-            {
-                "name": "R_NOMEN_DOMICILIARIA_CTM12",
-                "rules": ["must_not_overlap"]
-            }
-
-        ]
-    },
-    "URBANO_Topology": {
-        "dataset": "URBANO",
-        "features": [
-            {
-                "name": "U_NOMENCLATURA_DOMICILIARIA",
-                "rules": ["must_not_overlap"]
-            }
-
-        ]
-    },
-    "RURAL_Topology": {
-        "dataset": "RURAL",
-        "features": [
-            {
-                "name": "R_NOMENCLATURA_DOMICILIARIA",
-                "rules": ["must_not_overlap"]
-            }
-
-        ]
-    }
-}
+# Reglas por topología (compartidas con TopologyEngine)
+from TopologyRules import TOPOLOGY_RULES, LINE_TOPOLOGY_RULES
+from TopologyEngine import FEATURES_PER_TILE, plan_grid
 
 
 def filter_topology_rules(rules_dict, active_datasets):
@@ -517,43 +304,89 @@ def repair_geometries(gdb_path, dataset_name):
         log_message(f"Error en reparación de geometrías: {str(e)}")
         return False
 
-def validate_topology_in_parts(topology_path, rules):
+def validate_topology_in_parts(topology_path, dataset_path, features_per_tile=FEATURES_PER_TILE):
     """
-    Valida la topología por partes para reducir la carga de procesamiento
+    Valida la topología por teselas para reducir la carga de procesamiento.
+    La grilla se dimensiona según la densidad de entidades del dataset (misma
+    planificación que TopologyEngine) y cada tesela se valida con
+    Visible_Extent fijando su extensión en el entorno de geoprocesamiento (el
+    parámetro solo admite las palabras clave Full_Extent y Visible_Extent); las
+    teselas sin entidades se omiten. Una topología solo admite una validación a
+    la vez, así que las teselas se procesan en serie. Devuelve False si la
+    validación por teselas falla.
     """
+    original_extent = arcpy.env.extent
     try:
         # Establecer entorno de procesamiento
         arcpy.env.XYResolution = "0.0001 Meters"
         arcpy.env.XYTolerance = "0.001 Meters"
         
-        # Validar por grupos de reglas
-        rule_groups = []
-        current_group = []
+        # Entidades y extensión de las clases que participan en la topología
+        feature_classes = arcpy.Describe(topology_path).featureClassNames
+        feature_paths = [os.path.join(dataset_path, fc) for fc in feature_classes]
+        total_features = sum(int(arcpy.GetCount_management(fc)[0]) for fc in feature_paths)
+        extent = arcpy.Describe(dataset_path).extent
         
-        for rule in rules:
-            current_group.append(rule)
-            if len(current_group) >= 3:  # Procesar en grupos de 3 reglas
-                rule_groups.append(current_group)
-                current_group = []
-        
-        if current_group:  # Añadir el último grupo si existe
-            rule_groups.append(current_group)
+        tiles = plan_grid((extent.XMin, extent.YMin, extent.XMax, extent.YMax),
+                          total_features, features_per_tile)
+        if tiles == [None]:
+            log_message(f"  {total_features} entidades: no requiere teselas, se valida la extensión completa")
+            arcpy.ValidateTopology_management(topology_path, "Full_Extent")
+            return True
         
-        # Validar cada grupo
-        for group in rule_groups:
-            try:
-                log_message(f"  Validando grupo de reglas...")
-                arcpy.ValidateTopology_management(topology_path, "Full_Extent")
-                time.sleep(2)  # Pequeña pausa entre grupos
-            except Exception as e:
-                log_message(f"  Error validando grupo de reglas: {str(e)}")
+        occupied = _occupied_tiles(feature_paths, tiles)
+        log_message(f"  Validando {total_features} entidades en {len(occupied)} de {len(tiles)} teselas")
+        for index, (minx, miny, maxx, maxy, _, _) in enumerate(tiles, 1):
+            if index - 1 not in occupied:
                 continue
+            
+            arcpy.env.extent = arcpy.Extent(minx, miny, maxx, maxy)
+            for attempt in range(1, 4):
+                try:
+                    # Fuera de un mapa, Visible_Extent usa el entorno de extensión
+                    arcpy.ValidateTopology_management(topology_path, "Visible_Extent")
+                    break
+                except Exception as e:
+                    if attempt == 3:
+                        log_message(f"    Error validando tesela {index}: {str(e)}")
+                        raise
+                    log_message(f"    Reintento {attempt} de validación de la tesela {index}...")
         
         return True
         
     except Exception as e:
         log_message(f"Error en validación por partes: {str(e)}")
         return False
+    finally:
+        arcpy.env.extent = original_extent
+
+
+def _occupied_tiles(feature_paths, tiles):
+    """
+    Índices de las teselas que intersecta alguna entidad. Recorre cada clase una
+    sola vez y ubica la extensión de cada entidad en las columnas y filas de la
+    grilla que cubre.
+    """
+    xs = sorted({tile[0] for tile in tiles} | {tile[2] for tile in tiles})
+    ys = sorted({tile[1] for tile in tiles} | {tile[3] for tile in tiles})
+    cols, rows = len(xs) - 1, len(ys) - 1
+    occupied = set()
+    for fc in feature_paths:
+        with arcpy.da.SearchCursor(fc, ["SHAPE@"]) as cursor:
+            for (shape,) in cursor:
+                if shape is None:
+                    continue
+                ext = shape.extent
+                first_col = max(0, bisect.bisect_right(xs, ext.XMin) - 1)
+                last_col = min(cols - 1, bisect.bisect_left(xs, ext.XMax) - 1)
+                first_row = max(0, bisect.bisect_right(ys, ext.YMin) - 1)
+                last_row = min(rows - 1, bisect.bisect_left(ys, ext.YMax) - 1)
+                for row in range(first_row, max(first_row, last_row) + 1):
+                    for col in range(first_col, max(first_col, last_col) + 1):
+                        occupied.add(row * cols + col)
+        if len(occupied) == len(tiles):
+            break
+    return occupied
 
 
 def apply_topology_rules(topology_info):
@@ -658,21 +491,23 @@ def apply_topology_rules(topology_info):
                     log_message(f"    Error en Must Cover Each Other para {feature_class}: {str(e)}")
                     continue
         
-        # Validar la topología con reintentos
+        # Validar la topología por teselas; si falla, validación completa con reintentos
         log_message(f"  Validando topología {topology_name}")
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                arcpy.ValidateTopology_management(topology_path, "Full_Extent")
-                break
-            except Exception as e:
-                retry_count += 1
-                if retry_count == max_retries:
-                    log_message(f"    Error en la validación después de {max_retries} intentos: {str(e)}")
-                else:
-                    log_message(f"    Reintento {retry_count} de validación...")
-                    time.sleep(2)  # Esperar 2 segundos antes de reintentar
+        if not validate_topology_in_parts(topology_path, topology_info["dataset_path"]):
+            log_message(f"    La validación por teselas de {topology_name} falló; se valida la extensión completa")
+            max_retries = 3
+            retry_count = 0
+            while retry_count < max_retries:
+                try:
+                    arcpy.ValidateTopology_management(topology_path, "Full_Extent")
+                    break
+                except Exception as e:
+                    retry_count += 1
+                    if retry_count == max_retries:
+                        log_message(f"    Error en la validación después de {max_retries} intentos: {str(e)}")
+                    else:
+                        log_message(f"    Reintento {retry_count} de validación...")
+                        time.sleep(2)  # Esperar 2 segundos antes de reintentar
         
         return f"Reglas aplicadas exitosamente a {topology_name}"
         
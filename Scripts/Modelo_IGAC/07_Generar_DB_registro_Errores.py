@@ -6,6 +6,7 @@ import logging
 from datetime import datetime
 import json
 import shutil
+import hashlib
 
 import sys
 import subprocess
@@ -31,6 +32,12 @@ POSSIBLE_DATASETS = [
 # Campos a excluir
 EXCLUDED_FIELDS = ['SHAPE', 'SHAPE_Length', 'SHAPE_Area', 'SHAPE.STLength()', 'SHAPE.STArea()']
 
+# Campos del índice de cobertura usado por los conteos del paso 9
+INDEX_FIELDS = ['OriginObjectClassName', 'DestinationObjectClassName', 'RuleDescription', 'isException']
+
+# Registros por lote de inserción
+INSERT_BATCH_SIZE = 5000
+
 def find_project_root():
     """
     Encuentra la raíz del proyecto verificando la estructura de directorios esperada.
@@ -164,8 +171,30 @@ def create_sqlite_table(cursor, table_name, fields):
     cursor.execute(create_table_sql)
 
 
+def record_digest(values):
+    """Huella compacta de 64 bits de los valores clave de un registro"""
+    digest = hashlib.blake2b(repr(values).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big', signed=True)
+
+
+def create_sqlite_indexes(cursor, table_name):
+    """
+    Crea el índice de cobertura usado por los conteos de errores y excepciones
+    (origen, destino, regla, excepción), si la tabla tiene esos campos.
+    """
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = {row[1] for row in cursor.fetchall()}
+    if not all(field in columns for field in INDEX_FIELDS):
+        print(f"La tabla {table_name} no tiene los campos del índice, se omite")
+        return
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{table_name}_conteo "
+        f"ON {table_name} ({', '.join(INDEX_FIELDS)})"
+    )
+
+
 def process_feature_class(cursor, feature_class, table_name):
-    """Procesa un feature class y guarda sus registros en SQLite"""
+    """Procesa un feature class y guarda sus registros en SQLite por lotes"""
     try:
         # Obtener los campos
         fields = arcpy.ListFields(feature_class)
@@ -177,36 +206,43 @@ def process_feature_class(cursor, feature_class, table_name):
         placeholders = ','.join(['?' for _ in field_names])
         insert_sql = f"INSERT INTO {table_name} ({','.join(field_names)}) VALUES ({placeholders})"
         
+        # Posiciones de los campos clave (todos excepto OBJECTID e isException)
+        key_positions = [i for i, name in enumerate(field_names)
+                         if name not in ['OBJECTID', 'isException']]
+        exception_position = field_names.index('isException') if 'isException' in field_names else None
+        
         # Procesar los registros
         print(f"Procesando registros de {os.path.basename(feature_class)}...")
         count = 0
         
-        # Conjunto para rastrear registros ya insertados
-        inserted_records = set()
+        # Huellas de 64 bits de los registros ya insertados
+        inserted_digests = set()
+        batch = []
         
         with arcpy.da.SearchCursor(feature_class, field_names) as cursor_arcpy:
             for row in cursor_arcpy:
                 # Convertir valores según sea necesario
-                processed_row = []
-                for i, value in enumerate(row):
-                    if field_names[i] == 'isException':
-                        processed_row.append(int(value) if value is not None else 0)
-                    elif isinstance(value, (bytes, bytearray)):
-                        processed_row.append(str(value))
-                    else:
-                        processed_row.append(value)
+                processed_row = [str(value) if isinstance(value, (bytes, bytearray)) else value
+                                 for value in row]
+                if exception_position is not None:
+                    value = processed_row[exception_position]
+                    processed_row[exception_position] = int(value) if value is not None else 0
                 
-                # Crear una clave única excluyendo OBJECTID
-                key_fields = [field_names[i] for i in range(len(field_names)) 
-                            if field_names[i] not in ['OBJECTID', 'isException']]
-                key_values = tuple(processed_row[i] for i in range(len(processed_row)) 
-                                 if field_names[i] in key_fields)
+                # Insertar solo la primera aparición de cada combinación de valores clave
+                digest = record_digest(tuple(processed_row[i] for i in key_positions))
+                if digest in inserted_digests:
+                    continue
+                inserted_digests.add(digest)
+                batch.append(processed_row)
                 
-                # Si el registro no existe o es una excepción, insertarlo
-                if key_values not in inserted_records:
-                    cursor.execute(insert_sql, tuple(processed_row))
-                    inserted_records.add(key_values)
-                    count += 1
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    cursor.executemany(insert_sql, batch)
+                    count += len(batch)
+                    batch = []
+        
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            count += len(batch)
         
         print(f"Total de registros procesados: {count}")
         return count
@@ -246,8 +282,12 @@ def main():
             arcpy.env.workspace = topology_gdb
             total_records = 0
             
+            # Toda la carga en una sola transacción
+            cursor.execute("BEGIN")
+            
             for dataset in POSSIBLE_DATASETS:
                 print(f"\nBuscando errores para dataset: {dataset}")
+                table_created = False
                 
                 # Buscar feature classes relacionados
                 for fc_type in ['_poly', '_line', '_point']:
@@ -257,11 +297,16 @@ def main():
                         
                         fields = arcpy.ListFields(fc_name)
                         create_sqlite_table(cursor, dataset, fields)
+                        table_created = True
                         
                         records = process_feature_class(cursor, fc_name, dataset)
                         total_records += records
-                        
-                        conn.commit()
+                
+                # Índices después de la carga, más rápido que mantenerlos fila a fila
+                if table_created:
+                    create_sqlite_indexes(cursor, dataset)
+            
+            conn.commit()
             
             print("\n" + "="*50)
             print(f"PROCESO COMPLETADO")
@@ -1,9 +1,10 @@
 import os
 import sqlite3
 import shutil
-import openpyxl
 from pathlib import Path
 import sys
+from TopologyCounts import RuleCountLookup, detect_rule_language
+from WorkbookSession import WorkbookSession
 sys.stdout.reconfigure(encoding='utf-8')
 
 class TopologyAnalyzer:
@@ -191,22 +192,9 @@ class TopologyAnalyzer:
         # Cargar configuración de datasets
         self.datasets = self.load_datasets_config()
         
-    def get_rule_language(self, conn, folder):
+    def get_rule_language(self, lookup):
         """Determine which language version of rules is used in the database."""
-        sample_query = """
-        SELECT RuleDescription 
-        FROM {}
-        WHERE RuleDescription IN (?, ?)
-        LIMIT 1
-        """.format(folder)
-        
-        cursor = conn.cursor()
-        for eng_rule, esp_rule in self.rule_descriptions.items():
-            cursor.execute(sample_query, (eng_rule, esp_rule))
-            result = cursor.fetchone()
-            if result:
-                return 'en' if result[0] == eng_rule else 'es'
-        return 'en'  # default to English if no matches found
+        return detect_rule_language(self.rule_descriptions, lookup.rule_descriptions())
     
     def load_datasets_config(self):
         config_path = os.path.join(self.base_path, "Files", "Temporary_Files", "array_config.txt")
@@ -288,92 +276,32 @@ class TopologyAnalyzer:
         
         for folder in folders_to_process:
             if folder in self.rules_config:
-                rule_language = self.get_rule_language(conn, folder)
+                # Una sola pasada GROUP BY con totales y excepciones por regla
+                lookup = RuleCountLookup.from_table(conn, folder)
+                rule_language = self.get_rule_language(lookup)
+                
+                updates = {}
+                for rule in self.rules_config[folder]:
+                    origin_class, dest_class, rule_desc, cell_no_exception, cell_exception = rule
+                    db_rule_desc = self.get_rule_description(rule_desc, rule_language)
+                    
+                    # Must Cover Each Other se cuenta en ambas direcciones dentro del lookup
+                    total_count, exception_count = lookup.get(origin_class, dest_class, db_rule_desc)
+                    updates[cell_no_exception] = total_count
+                    updates[cell_exception] = exception_count
+                
                 folder_path = os.path.join(topology_path, folder)
                 excel_path = self.get_excel_file(folder_path)
                 
-                workbook = openpyxl.load_workbook(excel_path)
+                session = WorkbookSession(excel_path)
                 sheet_name = self.sheet_names[folder]
                 
-                if sheet_name not in workbook.sheetnames:
+                if sheet_name not in session.sheetnames:
                     raise Exception(f"No se encontró la hoja '{sheet_name}' en el archivo Excel")
-                sheet = workbook[sheet_name]
-                
-                for rule in self.rules_config[folder]:
-                    origin_class, dest_class, rule_desc, cell_no_exception, cell_exception = rule
-                    db_rule_desc = self.get_rule_description(rule_desc, rule_language)
-                    
-                    # Consulta base modificada para manejar reglas bidireccionales
-                    if rule_desc == "Must Cover Each Other":
-                        # Para Must Cover Each Other, buscar en ambas direcciones
-                        total_query = """
-                        SELECT COUNT(*) as total
-                        FROM {}
-                        WHERE (
-                            (OriginObjectClassName = ? AND DestinationObjectClassName = ? AND RuleDescription = ?)
-                            OR 
-                            (OriginObjectClassName = ? AND DestinationObjectClassName = ? AND RuleDescription = ?)
-                        )
-                        """.format(folder)
-                        
-                        exception_query = """
-                        SELECT COUNT(*) as count
-                        FROM {}
-                        WHERE (
-                            (OriginObjectClassName = ? AND DestinationObjectClassName = ? AND RuleDescription = ?)
-                            OR 
-                            (OriginObjectClassName = ? AND DestinationObjectClassName = ? AND RuleDescription = ?)
-                        )
-                        AND isException != 0
-                        """.format(folder)
-                        
-                        # Ejecutar consultas con parámetros duplicados para ambas direcciones
-                        cursor = conn.execute(total_query, 
-                                        (origin_class, dest_class, db_rule_desc,
-                                            dest_class, origin_class, db_rule_desc))
-                        total_count = cursor.fetchone()[0]
-                        
-                        cursor = conn.execute(exception_query,
-                                        (origin_class, dest_class, db_rule_desc,
-                                            dest_class, origin_class, db_rule_desc))
-                        exception_count = cursor.fetchone()[0]
-                        
-                    else:
-                        # Para otras reglas, mantener la consulta original
-                        total_query = """
-                        SELECT COUNT(*) as total
-                        FROM {}
-                        WHERE OriginObjectClassName = ? 
-                        AND CASE 
-                            WHEN ? = '' THEN DestinationObjectClassName = ''
-                            ELSE DestinationObjectClassName = ?
-                        END
-                        AND RuleDescription = ?
-                        """.format(folder)
-                        
-                        exception_query = """
-                        SELECT COUNT(*) as count
-                        FROM {}
-                        WHERE OriginObjectClassName = ? 
-                        AND CASE 
-                            WHEN ? = '' THEN DestinationObjectClassName = ''
-                            ELSE DestinationObjectClassName = ?
-                        END
-                        AND RuleDescription = ?
-                        AND isException != 0
-                        """.format(folder)
-                        
-                        cursor = conn.execute(total_query, (origin_class, dest_class, dest_class, db_rule_desc))
-                        total_count = cursor.fetchone()[0]
-                        
-                        cursor = conn.execute(exception_query, (origin_class, dest_class, dest_class, db_rule_desc))
-                        exception_count = cursor.fetchone()[0]
-                    
-                    # Actualizar celdas en Excel
-                    sheet[cell_no_exception] = total_count
-                    sheet[cell_exception] = exception_count
                 
-                workbook.save(excel_path)
+                # Actualizar celdas en Excel
+                session.update(sheet_name, updates)
+                session.commit()
         
         conn.close()
 
@@ -1,7 +1,7 @@
 import os
 import arcpy
 import sqlite3
-import openpyxl
+from WorkbookSession import WorkbookSession
 from datetime import datetime
 import warnings
 from pathlib import Path
@@ -170,7 +170,7 @@ class MunicipalityDataProcessor:
                     continue
 
                 excel_path = os.path.join(folder_path, excel_files[0])
-                workbook = openpyxl.load_workbook(excel_path)
+                session = WorkbookSession(excel_path)
                 
                 # Mapeo de carpetas a nombres de hojas
                 sheet_mapping = {
@@ -182,12 +182,13 @@ class MunicipalityDataProcessor:
                 }
                 
                 # Actualizar solo la hoja correspondiente a la carpeta
-                if folder in sheet_mapping and sheet_mapping[folder] in workbook.sheetnames:
-                    sheet = workbook[sheet_mapping[folder]]
-                    sheet['D2'] = depto
-                    sheet['D3'] = municipio
-                    sheet['H3'] = today
-                    workbook.save(excel_path)
+                if folder in sheet_mapping and sheet_mapping[folder] in session.sheetnames:
+                    session.update(sheet_mapping[folder], {
+                        'D2': depto,
+                        'D3': municipio,
+                        'H3': today
+                    })
+                    session.commit()
                     print(f"Actualizado archivo Excel en: {excel_path}")
                 else:
                     warnings.warn(f"Hoja '{sheet_mapping.get(folder, 'desconocida')}' no encontrada en {excel_files[0]}")
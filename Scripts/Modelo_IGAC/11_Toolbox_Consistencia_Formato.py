@@ -1,12 +1,62 @@
 # gdb_validator.py
 import arcpy
 import os
-import pandas as pd
+import io
+import shutil
+import contextlib
+import concurrent.futures
+import traceback
+import numpy as np
 from datetime import datetime
 import json
 import uuid
 import logging
-from collections import defaultdict, Counter
+from ConsistencyRuleEngine import ConsistencyRuleEngine, RuleEvaluationError
+from ExcelStreamWriter import StreamingXlsxWriter
+from FingerprintCache import FingerprintCache, cache_dir_for, rules_digest
+from GeometryEngine import GroupOverlapEngine, find_floor_sequence_errors
+import StageProgress as progress
+
+
+# Datasets que pueden tener duplicados
+DATASETS_PERMITIDOS_DUPLICADOS = {
+    "URBANO",
+    "URBANO_CTM12",
+    "RURAL",
+    "RURAL_CTM12"
+}
+
+# Procesos para la validación en paralelo (1 = modo secuencial). Como el
+# planificador de etapas puede correr esta etapa junto a otras, se usa la mitad
+# de los núcleos con un máximo de 4 (igual que stage_graph.default_max_workers)
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def copiar_registros_por_oid(input_fc, output_fc, descripciones):
+    """
+    Copia al feature class de salida los registros cuyos OID están en `descripciones`
+    (dict OID -> Error_Descripcion) con una sola lectura del origen y un único InsertCursor.
+    """
+    if not descripciones:
+        return 0
+
+    campos = [f.name for f in arcpy.ListFields(input_fc) 
+            if f.type not in ['OID', 'Geometry'] 
+            and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
+    campos.append('SHAPE@')
+
+    pendientes = dict(descripciones)
+    copiados = 0
+    with arcpy.da.InsertCursor(output_fc, campos + ['Error_Descripcion']) as insert_cursor:
+        with arcpy.da.SearchCursor(input_fc, ['OID@'] + campos) as search_cursor:
+            for row in search_cursor:
+                if row[0] not in pendientes:
+                    continue
+                insert_cursor.insertRow(list(row[1:]) + [pendientes.pop(row[0])])
+                copiados += 1
+                if not pendientes:
+                    break
+    return copiados
 
  
 class DetectorDuplicadosUnidades:
@@ -28,12 +78,6 @@ class DetectorDuplicadosUnidades:
             print(f"Error creando índice espacial: {str(e)}")
             raise
             
-    def son_areas_similares(self, area1, area2):
-        if area1 == 0 or area2 == 0:
-            return False
-        diferencia = abs(area1 - area2) / max(area1, area2)
-        return diferencia <= self.area_tolerance
-        
     def crear_fc_temporal(self, template_fc, features):
         temp_name = f"TEMP_{str(uuid.uuid4()).replace('-', '')[:8]}"
         temp_fc = os.path.join("in_memory", temp_name)
@@ -142,7 +186,7 @@ class DetectorDuplicadosUnidades:
                     print(f"Se encontraron {errores} errores en la secuencia de pisos")
 
                 records = {}
-                with arcpy.da.SearchCursor(input_fc, compare_fields + ["SHAPE@AREA", "OID@", "SHAPE@"]) as cursor:
+                with arcpy.da.SearchCursor(input_fc, compare_fields + ["SHAPE@AREA", "OID@", "SHAPE@WKB"]) as cursor:
                     for row in cursor:
                         area = round(row[-3], 2)  # Redondear a 2 decimales
                         key = tuple(str(val) if val is not None else 'None' for val in row[:-3]) + (area,)
@@ -158,37 +202,15 @@ class DetectorDuplicadosUnidades:
                 if not duplicate_groups:
                     return
 
-                mem_fc = "in_memory\\temp_duplicates"
-                if arcpy.Exists(mem_fc):
-                    arcpy.Delete_management(mem_fc)
-
-                arcpy.CreateFeatureclass_management("in_memory", "temp_duplicates", "POLYGON",
-                    spatial_reference=arcpy.Describe(input_fc).spatialReference)
-                arcpy.AddField_management(mem_fc, "GROUP_ID", "TEXT")
-                arcpy.AddField_management(mem_fc, "ORIG_OID", "LONG")
-
-                with arcpy.da.InsertCursor(mem_fc, ["SHAPE@", "GROUP_ID", "ORIG_OID"]) as cursor:
-                    for group_id, features in duplicate_groups.items():
-                        for oid, geom in features:
-                            cursor.insertRow([geom, str(group_id), oid])
-
-                overlap_fc = "in_memory\\overlap"
-                if arcpy.Exists(overlap_fc):
-                    arcpy.Delete_management(overlap_fc)
-                arcpy.Intersect_analysis([mem_fc], overlap_fc)
-
+                # Confirmar superposición dentro de cada grupo con el índice STR-tree
+                motor = GroupOverlapEngine(self.overlap_threshold)
+                superposiciones = motor.find_overlaps(
+                    {key: [oid for oid, _ in features] for key, features in duplicate_groups.items()},
+                    {oid: wkb for features in duplicate_groups.values() for oid, wkb in features}
+                )
                 duplicados_confirmados = set()
-                with arcpy.da.SearchCursor(overlap_fc, ["GROUP_ID", "ORIG_OID", "SHAPE@AREA"]) as cursor:
-                    for row in cursor:
-                        group_id = eval(row[0])
-                        oid = row[1]
-                        overlap_area = row[2]
-                        
-                        for features in records[group_id]:
-                            if features[0] == oid:
-                                if overlap_area > (features[1].area * 0.05):
-                                    duplicados_confirmados.add(oid)
-                                break
+                for miembros in superposiciones.values():
+                    duplicados_confirmados.update(miembros.keys())
 
                 if duplicados_confirmados:
                     if not arcpy.Exists(output_fc):
@@ -200,18 +222,10 @@ class DetectorDuplicadosUnidades:
                         )
                         self.agregar_campos_descripcion(output_fc)
 
-                    fields = [f.name for f in arcpy.ListFields(input_fc) 
-                            if f.type not in ['OID', 'Geometry'] 
-                            and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-                    fields.append('SHAPE@')
-
-                    with arcpy.da.InsertCursor(output_fc, fields + ['Error_Descripcion']) as insert_cursor:
-                        for oid in duplicados_confirmados:
-                            where_clause = f"OBJECTID = {oid}"
-                            with arcpy.da.SearchCursor(input_fc, fields, where_clause) as search_cursor:
-                                for row in search_cursor:
-                                    new_row = list(row) + ["Error: Registro Duplicado"]
-                                    insert_cursor.insertRow(new_row)
+                    copiar_registros_por_oid(
+                        input_fc, output_fc,
+                        {oid: "Error: Registro Duplicado" for oid in duplicados_confirmados}
+                    )
 
                     print(f"Se encontraron {len(duplicados_confirmados)} duplicados en {grupos_encontrados} grupos")
                 return
@@ -240,33 +254,25 @@ class DetectorDuplicadosUnidades:
 
             duplicados_encontrados = 0
             grupos_encontrados = 0
+            oids_duplicados = {}
 
             for key, values in records.items():
                 if len(values) > 1:
                     grupos_encontrados += 1
-                    
-                    if not arcpy.Exists(output_fc):
-                        arcpy.CreateFeatureclass_management(
-                            os.path.dirname(output_fc),
-                            os.path.basename(output_fc),
-                            template=input_fc,
-                            spatial_reference=arcpy.Describe(input_fc).spatialReference
-                        )
-                        self.agregar_campos_descripcion(output_fc)
+                    for oid, geom in values:
+                        oids_duplicados[oid] = "Error: Registro Duplicado"
 
-                    fields = [f.name for f in arcpy.ListFields(input_fc) 
-                            if f.type not in ['OID', 'Geometry'] 
-                            and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-                    fields.append('SHAPE@')
+            if oids_duplicados:
+                if not arcpy.Exists(output_fc):
+                    arcpy.CreateFeatureclass_management(
+                        os.path.dirname(output_fc),
+                        os.path.basename(output_fc),
+                        template=input_fc,
+                        spatial_reference=arcpy.Describe(input_fc).spatialReference
+                    )
+                    self.agregar_campos_descripcion(output_fc)
 
-                    for oid, geom in values:
-                        where_clause = f"OBJECTID = {oid}"
-                        with arcpy.da.SearchCursor(input_fc, fields, where_clause) as search_cursor:
-                            with arcpy.da.InsertCursor(output_fc, fields + ['Error_Descripcion']) as insert_cursor:
-                                for row in search_cursor:
-                                    new_row = list(row) + ["Error: Registro Duplicado"]
-                                    insert_cursor.insertRow(new_row)
-                                    duplicados_encontrados += 1
+                duplicados_encontrados = copiar_registros_por_oid(input_fc, output_fc, oids_duplicados)
 
             if duplicados_encontrados > 0:
                 print(f"Se encontraron {duplicados_encontrados} duplicados en {grupos_encontrados} grupos")
@@ -288,8 +294,12 @@ class DetectorDuplicadosUnidades:
             arcpy.AddField_management(fc, "Excepcion_Descripcion", "TEXT", field_length=1000)   
                                    
 class GDBValidator:
-    def __init__(self, proyecto_dir):
+    def __init__(self, proyecto_dir, max_workers=None):
         self.proyecto_dir = proyecto_dir
+        # Con más de un proceso los feature classes se validan en paralelo
+        self.max_workers = max_workers if max_workers is not None else MAX_WORKERS
+        # Reutilizar resultados de feature classes sin cambios desde la última ejecución
+        self.usar_cache = True
         self.setup_paths()
         self.load_config()
         
@@ -328,8 +338,11 @@ class GDBValidator:
         else:
             print(f"Usando geodatabase de validación existente: {self.output_gdb}")
 
-    def analizar_duplicados_todos_datasets(self, datasets_to_validate, selected_datasets=None):
-        """Procesa los datasets seleccionados para encontrar duplicados"""
+    def analizar_duplicados_todos_datasets(self, datasets_to_validate, selected_datasets=None, omitir=()):
+        """
+        Procesa los datasets seleccionados para encontrar duplicados; omitir es un
+        conjunto de (dataset, fc) que no se analizan (p. ej. los tomados de la caché)
+        """
         print("\nAnalizando duplicados en los datasets...")
         
         if selected_datasets is None:
@@ -338,14 +351,6 @@ class GDBValidator:
         # Limpiar los nombres de datasets - CORREGIDO
         selected_datasets = [ds.strip('[]" \',').strip() for ds in selected_datasets if ds.strip('[]" \',').strip()]
         
-        # Definir los datasets que pueden tener duplicados
-        DATASETS_PERMITIDOS_DUPLICADOS = {
-            "URBANO",
-            "URBANO_CTM12",
-            "RURAL",
-            "RURAL_CTM12"
-        }
-        
         datasets_a_procesar = [dataset for dataset in selected_datasets 
                             if dataset in DATASETS_PERMITIDOS_DUPLICADOS]
         
@@ -356,55 +361,292 @@ class GDBValidator:
         print("\nAnalizando duplicados en los siguientes datasets:")
         print(", ".join(datasets_a_procesar))
         
-        # Guardar el workspace original
-        original_workspace = arcpy.env.workspace
-        
         try:
             for dataset_name in datasets_a_procesar:
-                input_dataset_path = os.path.join(self.input_gdb, dataset_name)
-                if not arcpy.Exists(input_dataset_path):
+                feature_classes = self.listar_fc_duplicados(dataset_name)
+                if feature_classes is None:
                     print(f"El dataset {dataset_name} no existe en la geodatabase de entrada")
                     continue
                 
-                arcpy.env.workspace = input_dataset_path
                 print(f"\nProcesando dataset: {dataset_name}")
                 
-                feature_classes = arcpy.ListFeatureClasses()
-                
                 for fc in feature_classes:
-                    # No procesar capas de PERIMETRO ni nomenclatura
-                    if "PERIMETRO" in fc.upper() or "NOMEN" in fc.upper():
+                    if (dataset_name, fc) in omitir:
                         continue
-                        
-                    output_dataset = os.path.join(self.output_gdb, dataset_name)
-                    output_fc = os.path.join(output_dataset, fc)
-                    
-                    if not arcpy.Exists(output_fc):
-                        try:
-                            input_fc = os.path.join(input_dataset_path, fc)
-                            arcpy.CreateFeatureclass_management(
-                                output_dataset,
-                                fc,
-                                template=input_fc,
-                                spatial_reference=arcpy.Describe(input_fc).spatialReference
-                            )
-                            self.agregar_campos_descripcion(output_fc)
-                        except Exception as e:
-                            print(f"Error creando feature class {fc}: {str(e)}")
-                            continue
-                    
-                    print(f"\nProcesando duplicados en: {fc}")
-                    # CORREGIDO: Pasar input_fc y output_fc directamente
-                    input_fc_path = os.path.join(input_dataset_path, fc)
-                    self.procesar_duplicados_fc(self.input_gdb, self.output_gdb, dataset_name, fc)
+                    self.analizar_duplicados_fc(dataset_name, fc, self.output_gdb)
                     
         except Exception as e:
             print(f"Error en el análisis de duplicados: {str(e)}")
             import traceback
             print(traceback.format_exc())
+        finally:
+            self.limpiar_temp()
+
+    def listar_fc_duplicados(self, dataset_name):
+        """Lista los feature classes del dataset de entrada sujetos al análisis de duplicados"""
+        input_dataset_path = os.path.join(self.input_gdb, dataset_name)
+        if not arcpy.Exists(input_dataset_path):
+            return None
+        
+        original_workspace = arcpy.env.workspace
+        try:
+            arcpy.env.workspace = input_dataset_path
+            feature_classes = arcpy.ListFeatureClasses() or []
         finally:
             arcpy.env.workspace = original_workspace
+        
+        # No procesar capas de PERIMETRO ni nomenclatura
+        return [fc for fc in feature_classes
+                if "PERIMETRO" not in fc.upper() and "NOMEN" not in fc.upper()]
+
+    def analizar_duplicados_fc(self, dataset_name, fc, output_gdb):
+        """Prepara el feature class de salida y analiza los duplicados de un feature class"""
+        output_dataset = os.path.join(output_gdb, dataset_name)
+        output_fc = os.path.join(output_dataset, fc)
+        
+        if not arcpy.Exists(output_fc):
+            try:
+                input_fc = os.path.join(self.input_gdb, dataset_name, fc)
+                arcpy.CreateFeatureclass_management(
+                    output_dataset,
+                    fc,
+                    template=input_fc,
+                    spatial_reference=arcpy.Describe(input_fc).spatialReference
+                )
+                self.agregar_campos_descripcion(output_fc)
+            except Exception as e:
+                print(f"Error creando feature class {fc}: {str(e)}")
+                return
+        
+        print(f"\nProcesando duplicados en: {fc}")
+        self.procesar_duplicados_fc(self.input_gdb, output_gdb, dataset_name, fc)
+
+    def planificar_tareas_paralelas(self, datasets_to_validate, queries):
+        """
+        Arma la lista ordenada de tareas (dataset, fc) del modo paralelo. Cada tarea
+        indica las queries a ejecutar y si se analizan duplicados, en el mismo orden
+        en que el modo secuencial recorre las dos fases.
+        """
+        tareas = {}
+        for dataset, fc_list in datasets_to_validate.items():
+            if dataset not in queries:
+                continue
+            for fc in fc_list:
+                if fc in queries[dataset] and arcpy.Exists(os.path.join(self.input_gdb, dataset, fc)):
+                    tareas[(dataset, fc)] = {'queries': queries[dataset][fc], 'duplicados': False}
+        
+        for dataset in datasets_to_validate:
+            if dataset not in DATASETS_PERMITIDOS_DUPLICADOS:
+                continue
+            for fc in self.listar_fc_duplicados(dataset) or []:
+                tarea = tareas.setdefault((dataset, fc), {'queries': None, 'duplicados': False})
+                tarea['duplicados'] = True
+        
+        return [(dataset, fc, tarea['queries'], tarea['duplicados'])
+                for (dataset, fc), tarea in tareas.items()]
+
+    def ejecutar_en_paralelo(self, datasets_to_validate, queries):
+        """
+        Valida los feature classes en procesos independientes, cada uno sobre su propia
+        geodatabase de staging, y luego fusiona los resultados en la geodatabase de
+        validación en el orden de planificación para que la salida sea determinista.
+        Los feature classes cuya huella no cambió se toman de la caché sin revalidarse.
+        """
+        tareas = self.planificar_tareas_paralelas(datasets_to_validate, queries)
+        if not tareas:
+            print("No hay feature classes para validar.")
+            return
+        
+        staging_dir = os.path.join(self.output_folder, 'staging')
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir, exist_ok=True)
+        
+        cache = self.obtener_cache()
+        resultados = [None] * len(tareas)
+        claves_cache = {}
+        pendientes = []
+        for indice, (dataset, fc, fc_queries, duplicados) in enumerate(tareas):
+            if cache is not None:
+                claves = self.claves_cache(cache, dataset, fc, fc_queries, duplicados)
+                artefacto = cache.lookup(f"{dataset}/{fc}", *claves) if claves else None
+                if artefacto and arcpy.Exists(artefacto):
+                    resultados[indice] = {
+                        'dataset': dataset,
+                        'fc': fc,
+                        'staging_gdb': artefacto,
+                        'log': f"\n{dataset}/{fc}: sin cambios, se usan los resultados en caché\n",
+                        'error': None,
+                        'cache': True
+                    }
+                    continue
+                claves_cache[indice] = claves
+            pendientes.append(indice)
+        
+        if len(pendientes) < len(tareas):
+            print(f"\n{len(tareas) - len(pendientes)} feature classes sin cambios se toman de la caché")
+        
+        try:
+            if pendientes:
+                workers = max(1, min(self.max_workers, len(pendientes)))
+                print(f"\nValidando {len(pendientes)} feature classes con {workers} procesos...")
+                argumentos = {}
+                for indice in pendientes:
+                    dataset, fc, fc_queries, duplicados = tareas[indice]
+                    staging_gdb = os.path.join(staging_dir, f"{dataset}__{fc}.gdb")
+                    argumentos[indice] = (self.proyecto_dir, self.input_gdb, staging_gdb,
+                                          dataset, fc, fc_queries, duplicados)
+                
+                if workers == 1:
+                    errores = 0
+                    for avance, indice in enumerate(pendientes, start=1):
+                        resultados[indice] = validar_feature_class_aislado(*argumentos[indice])
+                        errores += 1 if resultados[indice]['error'] else 0
+                        progress.step("Validación de feature classes", done=avance, total=len(pendientes),
+                                      errores=errores)
+                else:
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                        futuros = {executor.submit(validar_feature_class_aislado, *argumentos[indice]): indice
+                                   for indice in pendientes}
+                        
+                        errores = 0
+                        for avance, futuro in enumerate(concurrent.futures.as_completed(futuros), start=1):
+                            resultado = futuro.result()
+                            estado = "con errores" if resultado['error'] else "completado"
+                            errores += 1 if resultado['error'] else 0
+                            print(f"  {resultado['dataset']}/{resultado['fc']}: {estado}")
+                            resultados[futuros[futuro]] = resultado
+                            progress.step("Validación de feature classes", done=avance, total=len(pendientes),
+                                          errores=errores)
+            
+            print("\nFusionando resultados en la geodatabase de validación...")
+            for indice, resultado in enumerate(resultados):
+                print(resultado['log'], end='')
+                if resultado['error']:
+                    progress.log(f"Error validando {resultado['dataset']}/{resultado['fc']}:\n{resultado['error']}", 'error')
+                self.fusionar_staging(resultado)
+                if cache is not None and not resultado['error'] and claves_cache.get(indice):
+                    self.guardar_en_cache(cache, resultado, claves_cache[indice])
+        finally:
             self.limpiar_temp()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def ejecutar_secuencial(self, datasets_to_validate, queries):
+        """
+        Valida los feature classes en este proceso, directamente sobre la geodatabase
+        de validación: primero las queries y luego los duplicados. Los feature classes
+        cuya huella no cambió se toman de la caché y los demás se guardan en ella al
+        terminar.
+        """
+        cache = self.obtener_cache()
+        en_cache = set()
+        claves_cache = {}
+        if cache is not None:
+            for dataset, fc, fc_queries, duplicados in self.planificar_tareas_paralelas(datasets_to_validate, queries):
+                claves = self.claves_cache(cache, dataset, fc, fc_queries, duplicados)
+                artefacto = cache.lookup(f"{dataset}/{fc}", *claves) if claves else None
+                if artefacto and arcpy.Exists(artefacto):
+                    print(f"\n{dataset}/{fc}: sin cambios, se usan los resultados en caché")
+                    self.fusionar_staging({'dataset': dataset, 'fc': fc, 'staging_gdb': artefacto})
+                    en_cache.add((dataset, fc))
+                elif claves:
+                    claves_cache[(dataset, fc)] = claves
+        
+        for dataset, fc_list in datasets_to_validate.items():
+            print(f"\nProcesando queries para dataset: {dataset}")
+            pendientes = [fc for fc in fc_list if (dataset, fc) not in en_cache]
+            self.procesar_dataset(self.input_gdb, dataset, pendientes, self.output_gdb, queries)
+        
+        # Segunda fase: Análisis de duplicados
+        print("\nIniciando análisis de duplicados...")
+        self.analizar_duplicados_todos_datasets(datasets_to_validate, omitir=en_cache)
+        
+        for (dataset, fc), claves in claves_cache.items():
+            self.guardar_salida_en_cache(cache, dataset, fc, claves)
+
+    def obtener_cache(self):
+        """Caché de resultados por huella de feature class (None si está desactivada)"""
+        if not self.usar_cache:
+            return None
+        try:
+            return FingerprintCache(cache_dir_for(os.path.dirname(self.output_folder)), 'consistencia_formato')
+        except Exception as e:
+            print(f"No se pudo abrir la caché de huellas: {str(e)}")
+            return None
+
+    def claves_cache(self, cache, dataset, fc, fc_queries, duplicados):
+        """Huella del feature class de entrada y de las reglas que se le aplican"""
+        try:
+            inputs_key = cache.inputs_key([os.path.join(self.input_gdb, dataset, fc)])
+        except Exception as e:
+            print(f"No se pudo calcular la huella de {dataset}/{fc}: {str(e)}")
+            return None
+        return inputs_key, rules_digest([fc_queries, duplicados])
+
+    def guardar_en_cache(self, cache, resultado, claves):
+        """Conserva la geodatabase de staging de un feature class como resultado cacheado"""
+        item = f"{resultado['dataset']}/{resultado['fc']}"
+        destino = os.path.join(cache.artefact_dir(), os.path.basename(resultado['staging_gdb']))
+        try:
+            cache.invalidate(item)
+            if os.path.exists(destino):
+                shutil.rmtree(destino)
+            if os.path.exists(resultado['staging_gdb']):
+                shutil.copytree(resultado['staging_gdb'], destino, ignore=shutil.ignore_patterns('*.lock'))
+            else:
+                # Sin geodatabase de staging: se cachea una vacía para recordar que no hubo errores
+                arcpy.CreateFileGDB_management(os.path.dirname(destino), os.path.basename(destino))
+            cache.store(item, claves[0], claves[1], destino)
+        except Exception as e:
+            print(f"No se pudo guardar {item} en la caché: {str(e)}")
+
+    def guardar_salida_en_cache(self, cache, dataset, fc, claves):
+        """Copia a una geodatabase de la caché el feature class de validación de un feature class"""
+        item = f"{dataset}/{fc}"
+        destino = os.path.join(cache.artefact_dir(), f"{dataset}__{fc}.gdb")
+        output_fc = os.path.join(self.output_gdb, dataset, fc)
+        try:
+            cache.invalidate(item)
+            if os.path.exists(destino):
+                shutil.rmtree(destino)
+            # Sin feature class de salida se cachea una geodatabase vacía: no hubo errores
+            arcpy.CreateFileGDB_management(os.path.dirname(destino), os.path.basename(destino))
+            if arcpy.Exists(output_fc):
+                arcpy.CreateFeatureDataset_management(destino, dataset,
+                                                      arcpy.Describe(output_fc).spatialReference)
+                arcpy.CopyFeatures_management(output_fc, os.path.join(destino, dataset, fc))
+            cache.store(item, claves[0], claves[1], destino)
+        except Exception as e:
+            print(f"No se pudo guardar {item} en la caché: {str(e)}")
+
+    def fusionar_staging(self, resultado):
+        """Agrega los registros de una geodatabase de staging al feature class de validación"""
+        dataset, fc = resultado['dataset'], resultado['fc']
+        staging_fc = os.path.join(resultado['staging_gdb'], dataset, fc)
+        if not arcpy.Exists(staging_fc):
+            return
+        
+        output_dataset = os.path.join(self.output_gdb, dataset)
+        output_fc = os.path.join(output_dataset, fc)
+        try:
+            if not arcpy.Exists(output_dataset):
+                arcpy.CreateFeatureDataset_management(
+                    self.output_gdb, dataset,
+                    arcpy.Describe(staging_fc).spatialReference
+                )
+            if not arcpy.Exists(output_fc):
+                arcpy.CreateFeatureclass_management(
+                    output_dataset,
+                    fc,
+                    template=os.path.join(self.input_gdb, dataset, fc),
+                    spatial_reference=arcpy.Describe(staging_fc).spatialReference
+                )
+                self.agregar_campos_descripcion(output_fc)
+            
+            if int(arcpy.GetCount_management(staging_fc)[0]) > 0:
+                arcpy.Append_management(staging_fc, output_fc, "NO_TEST")
+        except Exception as e:
+            print(f"Error fusionando {dataset}/{fc}: {str(e)}")
         
     def setup_paths(self):
         """Configura las rutas necesarias para el proceso"""
@@ -493,14 +735,12 @@ class GDBValidator:
             if not os.path.exists(output_dir):
                 os.makedirs(output_dir)
                 
-            with pd.ExcelWriter(excel_output, engine='openpyxl') as writer:
-                sheets_created = 0
-                
-                # Verificar que la geodatabase existe
-                if not arcpy.Exists(self.output_gdb):
-                    print(f"Error: La geodatabase {self.output_gdb} no existe")
-                    return
-                    
+            # Verificar que la geodatabase existe
+            if not arcpy.Exists(self.output_gdb):
+                print(f"Error: La geodatabase {self.output_gdb} no existe")
+                return
+            
+            with StreamingXlsxWriter(excel_output) as writer:
                 for dataset in self.datasets_to_process:
                     dataset_path = os.path.join(self.output_gdb, dataset)
                     
@@ -534,42 +774,15 @@ class GDBValidator:
                                 print(f"No hay campos válidos para exportar en {fc}")
                                 continue
                             
-                            # Leer datos en lotes
-                            data_list = []
-                            with arcpy.da.SearchCursor(fc, fields) as cursor:
-                                batch = []
-                                for i, row in enumerate(cursor, 1):
-                                    batch.append(row)
-                                    if len(batch) >= 100:  # Procesar en lotes de 100
-                                        df_batch = pd.DataFrame(batch, columns=fields)
-                                        data_list.append(df_batch)
-                                        batch = []
-                                        if i % 1000 == 0:
-                                            print(f"  Procesados {i} registros...")
-                                
-                                if batch:  # Procesar el último lote
-                                    df_batch = pd.DataFrame(batch, columns=fields)
-                                    data_list.append(df_batch)
-                            
-                            if not data_list:
-                                print(f"No se encontraron datos válidos en {fc}")
-                                continue
-                            
-                            # Concatenar todos los lotes
-                            df = pd.concat(data_list, ignore_index=True)
-                            
-                            # Convertir a string y manejar valores nulos
-                            for col in df.columns:
-                                df[col] = df[col].fillna('')
-                                df[col] = df[col].astype(str)
-                                df[col] = df[col].apply(lambda x: x[:32767] if len(x) > 32767 else x)
-                            
                             # Usar nombre válido para la hoja
                             sheet_name = fc[:31].replace('/', '_').replace('\\', '_')
-                            df.to_excel(writer, sheet_name=sheet_name, index=False)
-                            sheets_created += 1
+                            writer.add_sheet(sheet_name, fields)
+                            
+                            # Las filas pasan del cursor al archivo por bloques, sin acumularse
+                            with arcpy.da.SearchCursor(fc, fields) as cursor:
+                                exportados = writer.write_rows(cursor)
                             
-                            print(f"  Exportados {len(df)} registros de {fc}")
+                            print(f"  Exportados {exportados} registros de {fc}")
                             
                         except Exception as e:
                             print(f"Error al exportar {fc}: {str(e)}")
@@ -578,9 +791,9 @@ class GDBValidator:
                             print(traceback.format_exc())
                             continue
                 
-                if sheets_created > 0:
+                if writer.sheets > 0:
                     print(f"\nResultados exportados exitosamente a: {excel_output}")
-                    print(f"Total de feature classes exportados: {sheets_created}")
+                    print(f"Total de feature classes exportados: {writer.sheets}")
                 else:
                     print("\nNo se encontraron datos para exportar a Excel")
                     
@@ -621,8 +834,8 @@ class GDBValidator:
         count = int(arcpy.GetCount_management(temp_layer)[0])
         print(f"- Se copiaron {count} registros duplicados")
 
-    def copiar_registro_duplicado(self, input_fc, output_fc, oid):
-        """Copia un registro específico al feature class de salida"""
+    def copiar_registro_duplicado(self, input_fc, output_fc, oids):
+        """Copia los registros indicados al feature class de salida en una sola pasada"""
         if not arcpy.Exists(output_fc):
             arcpy.CreateFeatureclass_management(
                 os.path.dirname(output_fc), 
@@ -631,19 +844,10 @@ class GDBValidator:
                 spatial_reference=arcpy.Describe(input_fc).spatialReference)
             self.agregar_campos_descripcion(output_fc)
         
-        id_field = self.obtener_campo_id(input_fc)
-        where_clause = f"{id_field} = {oid}"
-        
-        fields = [f.name for f in arcpy.ListFields(input_fc) 
-                if f.type not in ['OID', 'Geometry'] and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-        fields.append('SHAPE@')
-        
-        with arcpy.da.SearchCursor(input_fc, fields, where_clause) as search_cursor:
-            with arcpy.da.InsertCursor(output_fc, fields) as insert_cursor:
-                for row in search_cursor:
-                    insert_cursor.insertRow(row)
-        
-        self.actualizar_descripcion_error(output_fc)
+        return copiar_registros_por_oid(
+            input_fc, output_fc,
+            {oid: "Error: Poligono Duplicado" for oid in oids}
+        )
               
     def analizar_duplicados_atributos_area(self, input_fc, output_fc, grupos_duplicados, es_unidad, campos_comparacion):
         """Analiza duplicados por atributos y área, sin considerar ubicación espacial"""
@@ -695,13 +899,12 @@ class GDBValidator:
             
             print(f"\nProcesando {total_grupos} grupos de atributos y áreas únicas...")
             
+            oids_a_copiar = []
             for grupo_key, oids in grupos_duplicados.items():
                 if len(oids) > 1:  # Si hay más de un registro con los mismos atributos y área
                     grupos_con_duplicados += 1
                     total_duplicados += len(oids) -1
-                    
-                    for oid in oids:
-                        self.copiar_registro_duplicado(temp_layer_all, output_fc, oid)
+                    oids_a_copiar.extend(oids)
                     
                     # Mostrar información del grupo duplicado
                     attrs = grupo_key[:-1]  
@@ -710,6 +913,9 @@ class GDBValidator:
                     print(f"Grupo duplicado encontrado: {atributos_str}, Area={area}")
                     print(f"  OIDs: {', '.join(map(str, oids))}")
             
+            if oids_a_copiar:
+                self.copiar_registro_duplicado(temp_layer_all, output_fc, oids_a_copiar)
+            
             print(f"\nResumen del análisis:")
             print(f"- Total de grupos analizados: {total_grupos}")
             print(f"- Grupos con duplicados: {grupos_con_duplicados}")
@@ -753,27 +959,14 @@ class GDBValidator:
                         grupos[attrs] = []
                     grupos[attrs].append((oid, shape))
             
-            # Copiar duplicados al feature class de salida
-            campos_salida = [f.name for f in arcpy.ListFields(input_fc) 
-                            if f.type not in ['OID', 'Geometry']]
-            campos_salida.append('SHAPE@')
-            
-            with arcpy.da.InsertCursor(output_fc, campos_salida) as insert_cursor:
-                for attrs, registros in grupos.items():
-                    if len(registros) > 1:  # Si hay duplicados
-                        # Obtener los datos originales para cada registro duplicado
-                        for oid, shape in registros:
-                            where_clause = f"OBJECTID = {oid}"
-                            with arcpy.da.SearchCursor(input_fc, campos_salida, where_clause) as search_cursor:
-                                for original_row in search_cursor:
-                                    insert_cursor.insertRow(original_row)
-            
-            # Actualizar campo de descripción
-            with arcpy.da.UpdateCursor(output_fc, ["Error_Descripcion"]) as cursor:
-                for row in cursor:
-                    if not row[0]:
-                        row[0] = "Error: Registro Duplicado"
-                        cursor.updateRow(row)
+            # Copiar duplicados al feature class de salida en una sola pasada
+            oids_duplicados = {}
+            for attrs, registros in grupos.items():
+                if len(registros) > 1:  # Si hay duplicados
+                    for oid, shape in registros:
+                        oids_duplicados[oid] = "Error: Registro Duplicado"
+            
+            copiar_registros_por_oid(input_fc, output_fc, oids_duplicados)
                         
             count = int(arcpy.GetCount_management(output_fc)[0])
             print(f"Se encontraron {count} registros duplicados")
@@ -854,51 +1047,68 @@ class GDBValidator:
                     raise
             
             # Obtener lista de campos excluyendo los de sistema
-            all_fields = [f.name for f in arcpy.ListFields(input_fc) 
+            campos_entrada = [f for f in arcpy.ListFields(input_fc) 
                         if f.type not in ['OID', 'GlobalID'] and 
                         f.name.upper() not in ['SHAPE', 'SHAPE.AREA', 'SHAPE.LEN', 'SHAPE_LENGTH', 'SHAPE_AREA']]
+            all_fields = [f.name for f in campos_entrada]
+            field_types = {f.name: f.type for f in campos_entrada}
             
             # Campos para cursor de búsqueda
             search_fields = ['OID@'] + all_fields + ['SHAPE@']
             
+            # Lectura única del feature class: todas las reglas se evalúan sobre estos datos
+            oids = []
+            filas = []
+            geometrias = []
+            with arcpy.da.SearchCursor(input_fc, search_fields) as cursor:
+                for row in cursor:
+                    oids.append(row[0])
+                    filas.append(row[1:-1])
+                    geometrias.append(row[-1])
+            
+            frame = ConsistencyRuleEngine.build_frame(all_fields, filas, field_types)
+            reglas_compiladas = self.obtener_reglas_compiladas(dataset, fc, queries)
+            
             # Diccionario para almacenar registros con errores
             records_to_copy = {}
             
-            # Procesar cada query
-            for query_index, (query, error_desc) in enumerate(queries):
+            # Evaluar cada regla sobre los datos en memoria
+            for query_index, ((query, error_desc), regla) in enumerate(zip(queries, reglas_compiladas)):
                 try:
-                    temp_layer_name = f"temp_layer_{fc}_{query_index}_{uuid.uuid4().hex[:8]}"
-                    temp_layer = arcpy.MakeFeatureLayer_management(input_fc, temp_layer_name)
+                    mascara = None
+                    if regla is not None:
+                        try:
+                            mascara = ConsistencyRuleEngine.evaluate(regla, frame)
+                        except RuleEvaluationError as e:
+                            print(f"  Regla {query_index + 1} se ejecutará con arcpy: {str(e)}")
+                    
+                    if mascara is None:
+                        mascara = self.seleccionar_con_arcpy(input_fc, fc, query_index, query, oids)
                     
-                    arcpy.SelectLayerByAttribute_management(temp_layer, "NEW_SELECTION", query)
-                    count = int(arcpy.GetCount_management(temp_layer)[0])
+                    indices = np.flatnonzero(mascara)
                     
-                    if count > 0:
+                    if len(indices) > 0:
                         print(f"  {error_desc}")
-                        print(f"  - Registros encontrados: {count}")
+                        print(f"  - Registros encontrados: {len(indices)}")
                         
-                        with arcpy.da.SearchCursor(temp_layer, search_fields) as cursor:
-                            for row in cursor:
-                                oid = row[0]
-                                geometry = row[-1]
-                                attributes = list(row[1:-1])
-                                
-                                if oid in records_to_copy:
-                                    if error_desc not in records_to_copy[oid]['errors']:
-                                        records_to_copy[oid]['errors'].append(error_desc)
-                                else:
-                                    records_to_copy[oid] = {
-                                        'attributes': attributes,
-                                        'geometry': geometry,
-                                        'errors': [error_desc]
-                                    }
-                    
-                    arcpy.Delete_management(temp_layer)
+                        for i in indices:
+                            oid = oids[i]
+                            if oid in records_to_copy:
+                                if error_desc not in records_to_copy[oid]['errors']:
+                                    records_to_copy[oid]['errors'].append(error_desc)
+                            else:
+                                records_to_copy[oid] = {
+                                    'attributes': list(filas[i]),
+                                    'geometry': geometrias[i],
+                                    'errors': [error_desc]
+                                }
                     
                 except Exception as e:
                     print(f"  Error en query: {str(e)}")
                     continue
             
+            del frame, filas, geometrias
+            
             # Verificar que tenemos registros para copiar
             if records_to_copy:
                 # Obtener campos de salida
@@ -945,6 +1155,25 @@ class GDBValidator:
         finally:
             arcpy.Delete_management("in_memory")
                 
+    def obtener_reglas_compiladas(self, dataset, fc, queries):
+        """Obtiene las reglas compiladas del catálogo; compila al vuelo si el motor no existe"""
+        motor = getattr(self, 'motor_reglas', None)
+        if motor is None or (dataset, fc) not in motor.compiled:
+            motor = ConsistencyRuleEngine({dataset: {fc: queries}})
+        return motor.rules_for(dataset, fc)
+
+    def seleccionar_con_arcpy(self, input_fc, fc, query_index, query, oids):
+        """Ejecuta una regla con SelectLayerByAttribute cuando el motor vectorizado no la soporta"""
+        temp_layer_name = f"temp_layer_{fc}_{query_index}_{uuid.uuid4().hex[:8]}"
+        temp_layer = arcpy.MakeFeatureLayer_management(input_fc, temp_layer_name)
+        try:
+            arcpy.SelectLayerByAttribute_management(temp_layer, "NEW_SELECTION", query)
+            with arcpy.da.SearchCursor(temp_layer, ['OID@']) as cursor:
+                seleccionados = {row[0] for row in cursor}
+        finally:
+            arcpy.Delete_management(temp_layer)
+        return np.fromiter((oid in seleccionados for oid in oids), dtype=bool, count=len(oids))
+
     def eliminar_columnas_auxiliares(self):
         """Elimina las columnas auxiliares de todos los feature classes"""
         print("\nEliminando columnas auxiliares...")
@@ -1086,13 +1315,16 @@ class GDBValidator:
             
             # Primera fase: Validación de formato (queries)
             queries = self.definir_queries()
-            for dataset, fc_list in datasets_to_validate.items():
-                print(f"\nProcesando queries para dataset: {dataset}")
-                self.procesar_dataset(self.input_gdb, dataset, fc_list, self.output_gdb, queries)
-            
-            # Segunda fase: Análisis de duplicados
-            print("\nIniciando análisis de duplicados...")
-            self.analizar_duplicados_todos_datasets(datasets_to_validate)
+            self.motor_reglas = ConsistencyRuleEngine(queries)
+            if self.motor_reglas.fallback:
+                total_fallback = sum(len(v) for v in self.motor_reglas.fallback.values())
+                print(f"{total_fallback} reglas no compilables se ejecutarán con arcpy")
+            if self.max_workers > 1:
+                # Queries y duplicados por feature class en paralelo, con fusión determinista
+                self.ejecutar_en_paralelo(datasets_to_validate, queries)
+            else:
+                # Queries y luego duplicados en este proceso
+                self.ejecutar_secuencial(datasets_to_validate, queries)
 
             # Eliminar la columna TEMP_ID y otras columnas en un solo paso
             print("\nEliminando columnas temporales...")
@@ -1189,170 +1421,18 @@ class GDBValidator:
 
     def verificar_secuencia_pisos(self, input_fc, output_fc):
         """
-        Verifica secuencia de pisos con validación adicional para casos especiales (ramadas)
+        Verifica secuencia de pisos con validación adicional para casos especiales (ramadas).
+        Usa un índice espacial por código base en lugar de comparar todas las unidades entre sí.
         """
-        import re
         try:
             print("Analizando secuencia de pisos...")
             
-            # Primera fase: Detectar potenciales errores (código existente)
-            errores_potenciales = []
-            grupos_espaciales = defaultdict(list)
+            # Recolectar unidades en una sola lectura
+            with arcpy.da.SearchCursor(input_fc, ['OID@', 'CODIGO', 'PLANTA', 'SHAPE@WKB']) as cursor:
+                unidades = [tuple(row) for row in cursor]
             
-            # Recolectar unidades y hacer primera validación
-            with arcpy.da.SearchCursor(input_fc, ['CODIGO', 'PLANTA', 'SHAPE@', 'OID@']) as cursor:
-                for row in cursor:
-                    try:
-                        codigo_base = row[0][:24] if row[0] else ''
-                        planta = str(row[1]) if row[1] else ''
-                        
-                        match = re.search(r'(\d+)', planta)
-                        if match and codigo_base:
-                            num_piso = int(match.group(1))
-                            geometry = row[2]
-                            
-                            grupos_espaciales[codigo_base].append({
-                                'oid': row[3],
-                                'piso': num_piso,
-                                'geometry': geometry,
-                                'area': geometry.area,
-                                'planta': planta,
-                                'codigo': row[0]
-                            })
-                    except Exception as e:
-                        print(f"Error procesando registro: {str(e)}")
-                        continue
-
-            # Primera validación (superposición 20%)
-            for codigo_base, unidades in grupos_espaciales.items():
-                if len(unidades) >= 1:
-                    subgrupos = []
-                    unidades_procesadas = set()
-                    
-                    for i, unidad in enumerate(unidades):
-                        if unidad['oid'] in unidades_procesadas:
-                            continue
-                            
-                        subgrupo_actual = [unidad]
-                        unidades_procesadas.add(unidad['oid'])
-                        
-                        for otra_unidad in unidades[i+1:]:
-                            if otra_unidad['oid'] not in unidades_procesadas:
-                                try:
-                                    interseccion = unidad['geometry'].intersect(otra_unidad['geometry'], 4)
-                                    area_interseccion = interseccion.area
-                                    area_menor = min(unidad['area'], otra_unidad['area'])
-                                    porcentaje_superposicion = (area_interseccion / area_menor) * 100
-                                    
-                                    if porcentaje_superposicion > 20:
-                                        subgrupo_actual.append(otra_unidad)
-                                        unidades_procesadas.add(otra_unidad['oid'])
-                                except:
-                                    continue
-                        
-                        if subgrupo_actual:
-                            subgrupos.append(subgrupo_actual)
-                    
-                    for subgrupo in subgrupos:
-                        pisos_disponibles = set(u['piso'] for u in subgrupo)
-                        if pisos_disponibles:
-                            piso_max = max(pisos_disponibles)
-                            if piso_max > 1:
-                                pisos_requeridos = set(range(1, piso_max + 1))
-                                pisos_faltantes = pisos_requeridos - pisos_disponibles
-                                
-                                if pisos_faltantes:
-                                    for unidad in subgrupo:
-                                        if unidad['piso'] > 1:
-                                            errores_potenciales.append({
-                                                'oid': unidad['oid'],
-                                                'piso': unidad['piso'],
-                                                'geometry': unidad['geometry'],
-                                                'codigo_base': codigo_base,
-                                                'pisos_faltantes': sorted(pisos_faltantes)
-                                            })
-
-            # Segunda fase: Validar casos especiales (ramadas)
-            errores_confirmados = []
-            
-            # Crear capa temporal para búsqueda espacial con nombre único
-            temp_layer = f"in_memory\\temp_layer_{str(uuid.uuid4()).replace('-','')}"
-            if arcpy.Exists(temp_layer):
-                arcpy.Delete_management(temp_layer)
-            arcpy.MakeFeatureLayer_management(input_fc, temp_layer)
-            
-            for error in errores_potenciales:
-                # Crear buffer de 1 metro para el polígono
-                buffer_geom = error['geometry'].buffer(1)
-                
-                # Buscar polígonos que tocan el buffer
-                pisos_vecinos = set()
-                try:
-                    # Seleccionar por localización
-                    arcpy.SelectLayerByLocation_management(
-                        temp_layer,
-                        "INTERSECT",
-                        buffer_geom,
-                        "#",
-                        "NEW_SELECTION"
-                    )
-                    
-                    # Filtrar por código base
-                    where_clause = f"SUBSTRING(CODIGO, 1, 24) = '{error['codigo_base']}' AND OBJECTID <> {error['oid']}"
-                    arcpy.SelectLayerByAttribute_management(
-                        temp_layer,
-                        "SUBSET_SELECTION",
-                        where_clause
-                    )
-                    
-                    # Recolectar pisos de vecinos
-                    with arcpy.da.SearchCursor(temp_layer, ['PLANTA']) as cursor:
-                        for row in cursor:
-                            planta = str(row[0]) if row[0] else ''
-                            match = re.search(r'(\d+)', planta)
-                            if match:
-                                pisos_vecinos.add(int(match.group(1)))
-                    
-                    # Verificar si los vecinos tienen la secuencia completa
-                    if pisos_vecinos:
-                        pisos_requeridos = set(range(1, error['piso'] + 1))
-                        todos_los_pisos = pisos_vecinos | set([error['piso']])
-                        
-                        # Si entre este polígono y sus vecinos tienen todos los pisos necesarios,
-                        # entonces NO es un error (es parte de un conjunto válido)
-                        if pisos_requeridos.issubset(todos_los_pisos):
-                            continue
-                            
-                        # Si faltan pisos incluso considerando los vecinos
-                        pisos_faltantes = pisos_requeridos - todos_los_pisos
-                        if pisos_faltantes:
-                            # Verificar si hay suficiente contacto con los vecinos
-                            try:
-                                interseccion = error['geometry'].buffer(1).intersect(buffer_geom, 4)
-                                longitud_contacto = interseccion.length
-                                longitud_minima = min(error['geometry'].length, buffer_geom.length)
-                                
-                                # Si hay suficiente contacto con los vecinos (>20% del perímetro), no es error
-                                if longitud_contacto > (longitud_minima * 0.2):
-                                    continue
-                                    
-                                errores_confirmados.append({
-                                    'oid': error['oid'],
-                                    'pisos_faltantes': sorted(pisos_faltantes)
-                                })
-                            except Exception as e:
-                                print(f"Error calculando contacto: {str(e)}")
-                                continue
-                    else:
-                        # Si no hay vecinos con el mismo código base, mantener como error
-                        errores_confirmados.append({
-                            'oid': error['oid'],
-                            'pisos_faltantes': error['pisos_faltantes']
-                        })
-                        
-                except Exception as e:
-                    print(f"Error en validación de vecinos: {str(e)}")
-                    continue
+            errores_confirmados = find_floor_sequence_errors(unidades)
+            del unidades
 
             # Exportar errores confirmados
             if errores_confirmados:
@@ -1367,24 +1447,14 @@ class GDBValidator:
                     )
                     self.agregar_campos_descripcion(output_fc)
 
-                campos = [f.name for f in arcpy.ListFields(input_fc) 
-                        if f.type not in ['OID', 'Geometry'] 
-                        and f.name not in ['SHAPE_Length', 'SHAPE_Area']]
-                campos.append('SHAPE@')
-                
-                errores_procesados = set()
-                with arcpy.da.InsertCursor(output_fc, campos + ['Error_Descripcion']) as insert_cursor:
-                    for error in errores_confirmados:
-                        if error['oid'] not in errores_procesados:
-                            where_clause = f"OBJECTID = {error['oid']}"
-                            with arcpy.da.SearchCursor(input_fc, campos, where_clause) as search_cursor:
-                                for row in search_cursor:
-                                    pisos_faltantes = sorted(error['pisos_faltantes'])  # Asegurar orden ascendente
-                                    pisos_str = ','.join(map(str, pisos_faltantes))
-                                    error_msg = f"Error: Faltan Capas de Unidad con los pisos {pisos_str}"
-                                    new_row = list(row) + [error_msg]
-                                    insert_cursor.insertRow(new_row)
-                                    errores_procesados.add(error['oid'])
+                mensajes_por_oid = {}
+                for error in errores_confirmados:
+                    if error['oid'] not in mensajes_por_oid:
+                        pisos_faltantes = sorted(error['pisos_faltantes'])  # Asegurar orden ascendente
+                        pisos_str = ','.join(map(str, pisos_faltantes))
+                        mensajes_por_oid[error['oid']] = f"Error: Faltan Capas de Unidad con los pisos {pisos_str}"
+                
+                copiar_registros_por_oid(input_fc, output_fc, mensajes_por_oid)
 
                 return len(errores_confirmados)
             
@@ -1395,30 +1465,6 @@ class GDBValidator:
             import traceback
             print(traceback.format_exc())
             return 0
-        finally:
-            # Limpiar recursos
-            try:
-                # Limpiar todo el workspace in_memory
-                arcpy.Delete_management("in_memory")
-                
-                # Limpiar cualquier selección activa
-                arcpy.ClearSelectionTool_management()
-                
-                # Asegurarse que todas las capas temporales se eliminan
-                for desc in arcpy.Describe("in_memory").children:
-                    try:
-                        arcpy.Delete_management(os.path.join("in_memory", desc.name))
-                    except:
-                        continue
-                        
-            except:
-                pass
-                
-            # Restaurar el entorno de trabajo
-            try:
-                arcpy.ClearWorkspaceCache_management()
-            except:
-                pass     
                           
     def procesar_duplicados_construcciones(self, input_fc, output_fc, dataset_name):
         """
@@ -1478,17 +1524,10 @@ class GDBValidator:
                     )
                     self.agregar_campos_descripcion(output_fc)
                 
-                fields = [f.name for f in arcpy.ListFields(input_fc) 
-                        if f.type not in ['OID', 'Geometry'] 
-                        and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-                fields.append('SHAPE@')
-                
-                where_clause = f"OBJECTID IN ({','.join(map(str, duplicados_confirmados))})"
-                with arcpy.da.SearchCursor(input_fc, fields, where_clause) as search_cursor:
-                    with arcpy.da.InsertCursor(output_fc, fields + ['Error_Descripcion']) as insert_cursor:
-                        for row in search_cursor:
-                            new_row = list(row) + ["Error: Registro Duplicado"]
-                            insert_cursor.insertRow(new_row)
+                copiar_registros_por_oid(
+                    input_fc, output_fc,
+                    {oid: "Error: Registro Duplicado" for oid in duplicados_confirmados}
+                )
                 
                 print("Exportación completada")
             else:
@@ -1609,18 +1648,10 @@ class GDBValidator:
                         self.agregar_campos_descripcion(output_fc)
 
                     # Copiar duplicados verificados
-                    campos = [f.name for f in arcpy.ListFields(input_fc) 
-                            if f.type not in ['OID', 'Geometry'] 
-                            and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-                    campos.append('SHAPE@')
-
-                    with arcpy.da.InsertCursor(output_fc, campos + ['Error_Descripcion']) as insert_cursor:
-                        for duplicado in duplicados_verificados:
-                            where_clause = f"OBJECTID = {duplicado['oid']}"
-                            with arcpy.da.SearchCursor(input_fc, campos, where_clause) as search_cursor:
-                                for row in search_cursor:
-                                    new_row = list(row) + ["Error: Registro Duplicado"]
-                                    insert_cursor.insertRow(new_row)
+                    copiar_registros_por_oid(
+                        input_fc, output_fc,
+                        {duplicado['oid']: "Error: Registro Duplicado" for duplicado in duplicados_verificados}
+                    )
 
                     print(f"Se encontraron {len(duplicados_verificados)} duplicados verificados")
             
@@ -1667,6 +1698,7 @@ class GDBValidator:
                         self.agregar_campos_descripcion(output_fc)
 
                     # Process each group
+                    oids_duplicados = {}
                     for attrs, features in duplicate_groups.items():
                         overlapping_features = set()
                         
@@ -1688,18 +1720,10 @@ class GDBValidator:
                             duplicate_count += len(overlapping_features)
                             
                             # Copy only confirmed duplicates
-                            fields = [f.name for f in arcpy.ListFields(input_fc) 
-                                    if f.type not in ['OID', 'Geometry'] 
-                                    and f.name.upper() not in ['SHAPE_LENGTH', 'SHAPE_AREA']]
-                            fields.append('SHAPE@')
-
                             for oid in overlapping_features:
-                                where_clause = f"OBJECTID = {oid}"
-                                with arcpy.da.SearchCursor(input_fc, fields, where_clause) as search_cursor:
-                                    with arcpy.da.InsertCursor(output_fc, fields + ['Error_Descripcion']) as insert_cursor:
-                                        for row in search_cursor:
-                                            new_row = list(row) + ["Error: Registro Duplicado"]
-                                            insert_cursor.insertRow(new_row)
+                                oids_duplicados[oid] = "Error: Registro Duplicado"
+
+                    copiar_registros_por_oid(input_fc, output_fc, oids_duplicados)
 
                     if duplicate_count > 0:
                         print(f"Se encontraron {duplicate_count} duplicados en {group_count} grupos")
@@ -2356,6 +2380,47 @@ class GDBValidator:
         
     }
 
+def validar_feature_class_aislado(proyecto_dir, input_gdb, staging_gdb, dataset, fc, queries, duplicados):
+    """
+    Tarea de un proceso del pool: valida un feature class (queries y/o duplicados)
+    en una geodatabase de staging propia. Devuelve la salida capturada para que el
+    proceso principal la imprima en orden durante la fusión.
+    """
+    salida = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(salida):
+        try:
+            validator = GDBValidator(proyecto_dir, max_workers=1)
+            validator.usar_cache = False
+            validator.input_gdb = input_gdb
+            validator.output_gdb = staging_gdb
+            
+            arcpy.CreateFileGDB_management(os.path.dirname(staging_gdb), os.path.basename(staging_gdb))
+            arcpy.CreateFeatureDataset_management(
+                staging_gdb, dataset,
+                spatial_reference=arcpy.Describe(os.path.join(input_gdb, dataset)).spatialReference
+            )
+            
+            if queries:
+                validator.procesar_dataset(input_gdb, dataset, [fc], staging_gdb, {dataset: {fc: queries}})
+            if duplicados:
+                validator.analizar_duplicados_fc(dataset, fc, staging_gdb)
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            try:
+                arcpy.Delete_management("in_memory")
+            except:
+                pass
+    
+    return {
+        'dataset': dataset,
+        'fc': fc,
+        'staging_gdb': staging_gdb,
+        'log': salida.getvalue(),
+        'error': error
+    }
+
 def validate_environment():
     """Valida que el ambiente tenga todo lo necesario para ejecutar el script"""
     try:
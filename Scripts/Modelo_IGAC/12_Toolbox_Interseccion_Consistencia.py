@@ -1,6 +1,7 @@
 import arcpy
 import os
-import openpyxl
+from ExcelStreamWriter import StreamingXlsxWriter
+from FingerprintCache import FingerprintCache, cache_dir_for, rules_digest
 import warnings
 import tempfile
 from datetime import datetime
@@ -11,6 +12,8 @@ sys.stdout.reconfigure(encoding='utf-8')  # Para Python 3.7 ( una version anteri
 class IntersectValidator:
     def __init__(self, proyecto_dir):
         self.proyecto_dir = proyecto_dir
+        # Reutilizar intersecciones cuyas capas no cambiaron desde la última ejecución
+        self.use_cache = True
         self.setup_paths()
         self.load_config()
         self.possible_datasets = [
@@ -448,8 +451,7 @@ class IntersectValidator:
         """Crea el archivo Excel con los resultados"""
         if results:
             print(f"Creando archivo Excel: {self.output_excel}")
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Eliminar la hoja por defecto
+            writer = StreamingXlsxWriter(self.output_excel, as_text=False)
 
             for fc in results:
                 try:
@@ -458,32 +460,30 @@ class IntersectValidator:
                         continue
                     
                     sheet_name = self.truncate_sheet_name(os.path.basename(fc))
-                    ws = wb.create_sheet(sheet_name)
+                    fields = [f.name for f in arcpy.ListFields(fc) if f.type not in ['Geometry', 'OID']]
+                    writer.add_sheet(sheet_name, fields)
                     print(f"Creando hoja: {sheet_name}")
 
                     # Verificar si el feature class está vacío
                     count = int(arcpy.GetCount_management(fc)[0])
                     if count == 0:
                         print(f"El feature class {fc} está vacío. Creando hoja con solo encabezados.")
-                        fields = [f.name for f in arcpy.ListFields(fc) if f.type not in ['Geometry', 'OID']]
-                        ws.append(fields)
                         continue
 
-                    fields = [f.name for f in arcpy.ListFields(fc) if f.type not in ['Geometry', 'OID']]
-                    ws.append(fields)
-
                     with arcpy.da.SearchCursor(fc, fields) as cursor:
-                        for row in cursor:
-                            ws.append(row)
+                        writer.write_rows(cursor)
 
                 except Exception as e:
                     print(f"Error al procesar {fc}: {str(e)}")
                     continue  # Continuar con el siguiente feature class en lugar de fallar completamente
 
             try:
+                alt_path = os.path.join(os.path.dirname(self.output_excel), "resultados_backup.xlsx")
                 with warnings.catch_warnings(record=True) as w:
                     warnings.simplefilter("always")
-                    wb.save(self.output_excel)
+                    saved_path = writer.close(fallback_path=alt_path)
+                    if saved_path and os.path.normcase(saved_path) != os.path.normcase(self.output_excel):
+                        print(f"No se pudo escribir {self.output_excel}; resultados guardados en: {saved_path}")
                     if len(w) > 0:
                         print("Se generaron advertencias al guardar el archivo Excel:")
                         for warning in w:
@@ -492,12 +492,84 @@ class IntersectValidator:
                         print("Archivo Excel creado exitosamente sin advertencias.")
             except Exception as e:
                 print(f"Error al guardar el archivo Excel: {str(e)}")
-                # Intentar guardar en una ubicación alternativa
-                alt_path = os.path.join(os.path.dirname(self.output_excel), "resultados_backup.xlsx")
-                print(f"Intentando guardar en ubicación alternativa: {alt_path}")
-                wb.save(alt_path)
         else:
             print("No se creó el archivo Excel porque no se encontraron resultados.")
+    def intersection_name(self, intersection):
+        """Nombre del feature class de resultados de una intersección"""
+        dataset, fc1, fc2 = intersection[:3]
+        return f"INTERSECT_{fc1}_{fc2}"
+
+    def get_cache(self):
+        """Caché de resultados por huella de las capas de entrada (None si está desactivada)"""
+        if not self.use_cache:
+            return None
+        try:
+            return FingerprintCache(cache_dir_for(os.path.dirname(self.output_folder)), 'interseccion_consistencia')
+        except Exception as e:
+            print(f"No se pudo abrir la caché de huellas: {str(e)}")
+            return None
+
+    def get_cache_gdb(self, cache):
+        cache_gdb = os.path.join(cache.artefact_dir(), "resultados.gdb")
+        if not arcpy.Exists(cache_gdb):
+            arcpy.management.CreateFileGDB(os.path.dirname(cache_gdb), os.path.basename(cache_gdb))
+        return cache_gdb
+
+    def restore_cached_intersections(self, cache, all_intersections):
+        """
+        Copia a la geodatabase de salida los resultados cacheados de las intersecciones
+        cuyas dos capas y definición no cambiaron. Devuelve (nombres restaurados,
+        huellas de las intersecciones que deben calcularse).
+        """
+        cached = set()
+        cache_keys = {}
+        if cache is None:
+            return cached, cache_keys
+
+        for intersection in all_intersections:
+            dataset, fc1, fc2 = intersection[:3]
+            name = self.intersection_name(intersection)
+            inputs = [os.path.join(self.input_gdb, dataset, fc) for fc in (fc1, fc2)]
+            if not all(arcpy.Exists(path) for path in inputs):
+                continue
+            try:
+                keys = (cache.inputs_key(inputs), rules_digest(list(intersection)))
+                artefact = cache.lookup(f"{dataset}/{name}", *keys)
+                if artefact and arcpy.Exists(artefact):
+                    out_fc = os.path.join(self.output_gdb, name)
+                    if arcpy.Exists(out_fc):
+                        arcpy.management.Delete(out_fc)
+                    arcpy.management.Copy(artefact, out_fc)
+                    cached.add(name)
+                    print(f"{fc1} con {fc2}: sin cambios, se usan los resultados en caché")
+                else:
+                    cache_keys[name] = (f"{dataset}/{name}", keys)
+            except Exception as e:
+                print(f"No se pudo consultar la caché para {name}: {str(e)}")
+
+        if cached:
+            print(f"{len(cached)} intersecciones restauradas desde la caché")
+        return cached, cache_keys
+
+    def store_cached_intersections(self, cache, computed, cache_keys):
+        """Guarda en la caché los resultados recién calculados junto con sus huellas"""
+        if cache is None:
+            return
+        for out_fc in computed:
+            name = os.path.basename(out_fc)
+            if name not in cache_keys:
+                continue
+            item, (inputs_key, rules_key) = cache_keys[name]
+            try:
+                cache.invalidate(item)
+                cached_fc = os.path.join(self.get_cache_gdb(cache), name)
+                if arcpy.Exists(cached_fc):
+                    arcpy.management.Delete(cached_fc)
+                arcpy.management.Copy(out_fc, cached_fc)
+                cache.store(item, inputs_key, rules_key, cached_fc)
+            except Exception as e:
+                print(f"No se pudo guardar {name} en la caché: {str(e)}")
+
     def run_validation(self):
         """Ejecuta todo el proceso de validación"""
         try:
@@ -535,12 +607,25 @@ class IntersectValidator:
                 print("No se encontraron intersecciones para procesar en los datasets seleccionados.")
                 return
 
+            # Proceso 0: Restaurar desde la caché las intersecciones cuyas entradas no cambiaron
+            all_ints = intersections + special_ints
+            cache = self.get_cache()
+            cached, cache_keys = self.restore_cached_intersections(cache, all_ints)
+            intersections = [i for i in intersections if self.intersection_name(i) not in cached]
+            special_ints = [i for i in special_ints if self.intersection_name(i) not in cached]
+
             # Proceso 1: Crear intersecciones en la geodatabase temporal
             self.process_intersections(intersections, self.input_gdb, self.temp_gdb)
             self.process_special_intersections(special_ints, self.input_gdb, self.temp_gdb)
 
             # Proceso 2: Aplicar selección y exportar a la geodatabase de salida
-            results = self.apply_selection_and_export(intersections + special_ints, self.temp_gdb, self.output_gdb)
+            computed = self.apply_selection_and_export(intersections + special_ints, self.temp_gdb, self.output_gdb)
+            self.store_cached_intersections(cache, computed, cache_keys)
+
+            # Resultados en el orden de definición, mezclando los calculados con los de la caché
+            computed_names = {os.path.basename(fc) for fc in computed}
+            results = [os.path.join(self.output_gdb, self.intersection_name(i)) for i in all_ints
+                       if self.intersection_name(i) in cached or self.intersection_name(i) in computed_names]
 
             # Proceso 3: Procesar nomenclatura solo para los datasets seleccionados que lo requieran
             for dataset in self.datasets_to_process:
@@ -1,10 +1,10 @@
 import os
 import arcpy
 import sqlite3
-import shutil
 from pathlib import Path
 import json
 import sys
+from ShapefileCounter import count_records
 sys.stdout.reconfigure(encoding='utf-8')
 def find_project_root(current_dir):
     """
@@ -154,48 +154,14 @@ def get_shape_column_mapping():
     
 def count_shapefile(shapefile_path):
     """
-    Cuenta registros de un shapefile usando una copia temporal en el mismo directorio.
+    Cuenta los registros no borrados de un shapefile leyendo el .dbf, sin
+    copiar archivos.
     """
     try:
-        # Crear directorio temporal dentro del directorio del shapefile
-        parent_dir = shapefile_path.parent
-        temp_dir = parent_dir / 'temp_count'
-        temp_dir.mkdir(exist_ok=True)
-
-        # Crear nombre simple reemplazando puntos por guiones bajos
-        simple_name = f"temp_{shapefile_path.stem.replace('.', '_')}"
-        temp_shp = temp_dir / f"{simple_name}.shp"
-        
-        # Copiar archivos relacionados
-        base_path = str(shapefile_path).rsplit('.', 1)[0]
-        temp_base = str(temp_shp).rsplit('.', 1)[0]
-        
-        for ext in ['.shp', '.dbf', '.shx', '.prj']:
-            src = base_path + ext
-            if os.path.exists(src):
-                shutil.copy2(src, temp_base + ext)
-
-        # Contar registros usando capa en memoria
-        mem_layer = f"in_memory\\{simple_name}"
-        arcpy.CopyFeatures_management(str(temp_shp), mem_layer)
-        count = int(arcpy.GetCount_management(mem_layer).getOutput(0))
-        arcpy.Delete_management(mem_layer)
-        
-        return count
-
+        return count_records(shapefile_path)
     except Exception as e:
         arcpy.AddWarning(f"Error al contar {shapefile_path.name}: {str(e)}")
         return 0
-        
-    finally:
-        # Limpiar archivos temporales
-        if 'temp_dir' in locals() and temp_dir.exists():
-            try:
-                for file in temp_dir.glob('*'):
-                    file.unlink()
-                temp_dir.rmdir()
-            except Exception as e:
-                arcpy.AddWarning(f"No se pudieron eliminar algunos archivos temporales: {str(e)}")
 
 def process_dataset_counts(base_path, dataset_name, shape_column_mapping, conn):
     """Procesa los conteos de registros para un dataset y los guarda en la BD."""
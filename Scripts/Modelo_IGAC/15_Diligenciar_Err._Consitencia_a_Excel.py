@@ -1,8 +1,7 @@
 import os
 import arcpy
-import pandas as pd
 import sqlite3
-import openpyxl
+from WorkbookSession import WorkbookSession
 from pathlib import Path
 import json
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
@@ -130,26 +129,34 @@ def obtener_excel_topologia(raiz_proyecto, dataset):
     
     return archivos_excel[0]
     
-def obtener_datos_sqlite(raiz_proyecto, dataset, columna):
-    """Obtiene el valor más reciente de la columna específica en la tabla del dataset"""
-    db_path = raiz_proyecto / 'Files' / 'Temporary_Files' / 'MODELO_IGAC'/ 'db' / 'errores_consistencia_formato.db'
-    print(f"Conectando a base de datos: {db_path}")
-    conn = sqlite3.connect(str(db_path))
-    
+def leer_ultimo_registro(conn, tabla):
+    """Obtiene la fila más reciente de la tabla como dict columna→valor (vacío si no hay datos)"""
     query = f"""
-    SELECT {columna} 
-    FROM {dataset} 
+    SELECT * 
+    FROM {tabla} 
     ORDER BY fecha_proceso DESC 
     LIMIT 1
     """
     
     try:
-        resultado = pd.read_sql_query(query, conn)[columna].iloc[0]
-        print(f"Valor para columna {columna}: {resultado}")
-        return resultado
-    except Exception as e:
-        print(f"Error al consultar columna {columna}: {str(e)}")
-        return 0
+        cursor = conn.execute(query)
+        fila = cursor.fetchone()
+    except sqlite3.Error as e:
+        print(f"Error al consultar la tabla {tabla}: {str(e)}")
+        return {}
+    
+    if fila is None:
+        print(f"No se encontraron datos en la tabla {tabla}")
+        return {}
+    return dict(zip([columna[0] for columna in cursor.description], fila))
+
+def obtener_datos_sqlite(raiz_proyecto, dataset):
+    """Obtiene el registro más reciente del dataset en una sola consulta y conexión"""
+    db_path = raiz_proyecto / 'Files' / 'Temporary_Files' / 'MODELO_IGAC'/ 'db' / 'errores_consistencia_formato.db'
+    print(f"Conectando a base de datos: {db_path}")
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return leer_ultimo_registro(conn, dataset)
     finally:
         conn.close()
 
@@ -158,26 +165,32 @@ def procesar_dataset(raiz_proyecto, dataset, mapeo_celdas):
     try:
         print(f"\nIniciando procesamiento de {dataset}")
         
+        # Leer el registro más reciente una sola vez para todas las celdas
+        registro = obtener_datos_sqlite(raiz_proyecto, dataset)
+        
         # Encontrar el archivo Excel
         ruta_excel = obtener_excel_topologia(raiz_proyecto, dataset)
         print(f"Trabajando con Excel: {ruta_excel}")
         
-        # Cargar el archivo Excel usando openpyxl para modificar celdas específicas
-        wb = openpyxl.load_workbook(ruta_excel)
-        hoja = wb['Consistencia Formato']
+        # Sesión de escritura sobre el libro (una sola carga/guardado)
+        sesion = WorkbookSession(ruta_excel)
+        hoja = 'Consistencia Formato'
+        if hoja not in sesion.sheetnames:
+            raise Exception(f"No se encontró la hoja '{hoja}' en {ruta_excel}")
         
         # Procesar cada mapeo de celdas
         for celda, columna in mapeo_celdas[dataset].items():
-            print(f"Procesando celda {celda} para columna {columna}")
-            # Obtener el valor de la base SQLite
-            valor = obtener_datos_sqlite(raiz_proyecto, dataset, columna)
+            if registro and columna not in registro:
+                print(f"Error al consultar columna {columna}: no existe en {dataset}")
+            valor = registro.get(columna, 0)
+            print(f"Celda {celda} ← columna {columna}: {valor}")
             
             # Actualizar la celda específica en el Excel
-            hoja[celda] = valor
+            sesion.write(hoja, celda, valor)
         
         # Guardar los cambios
         print(f"Guardando cambios en {ruta_excel}")
-        wb.save(ruta_excel)
+        sesion.commit()
         print(f"Procesamiento completado para {dataset}")
         
     except Exception as e:
@@ -1,10 +1,10 @@
 import os
 import arcpy
 import sqlite3
-import shutil
 from pathlib import Path
 import json
 import sys
+from ShapefileCounter import count_blank_field
 sys.stdout.reconfigure(encoding='utf-8')
 def find_project_root(current_dir):
     """
@@ -188,119 +188,13 @@ def get_shape_column_mapping():
 
 
 
-def copy_and_count_shapefile(shapefile_path):
-    """
-    Crea una copia temporal del shapefile con nombre simplificado, cuenta registros y elimina la copia.
-    """
-    try:
-        original_name = shapefile_path.name
-        temp_name = original_name.split('.', 1)[0] + '.shp'  # Solo toma el número inicial
-        temp_files = []
-        count = 0
-        
-        # Crear directorio temporal si no existe
-        temp_dir = shapefile_path.parent / 'temp_count'
-        temp_dir.mkdir(exist_ok=True)
-        
-        # Copiar todos los archivos relacionados
-        base_name = shapefile_path.stem
-        temp_base = temp_name.replace('.shp', '')
-        
-        # Copiar cada archivo relacionado (.shp, .dbf, .shx, etc.)
-        for related_file in shapefile_path.parent.glob(f"{base_name}.*"):
-            temp_file = temp_dir / (temp_base + related_file.suffix)
-            shutil.copy2(related_file, temp_file)
-            temp_files.append(temp_file)
-        
-        try:
-            # Contar registros usando el archivo temporal
-            temp_shapefile = temp_dir / temp_name
-            if temp_shapefile.exists():
-                try:
-                    with arcpy.da.SearchCursor(str(temp_shapefile), ['OID@']) as cursor:
-                        for _ in cursor:
-                            count += 1
-                    arcpy.AddMessage(f"Conteo exitoso para {original_name}: {count}")
-                except Exception as cursor_error:
-                    arcpy.AddMessage(f"Error en cursor para {original_name}: {str(cursor_error)}")
-                    try:
-                        result = arcpy.GetCount_management(str(temp_shapefile))
-                        count = int(result.getOutput(0))
-                        arcpy.AddMessage(f"Conteo alternativo exitoso para {original_name}: {count}")
-                    except:
-                        arcpy.AddMessage(f"No se pudo contar registros en {original_name}")
-        
-        finally:
-            # Limpiar archivos temporales
-            for temp_file in temp_files:
-                if temp_file.exists():
-                    temp_file.unlink()
-            
-            # Eliminar directorio temporal si está vacío
-            if temp_dir.exists():
-                try:
-                    temp_dir.rmdir()
-                except:
-                    pass
-        
-        return count
-    
-    except Exception as e:
-        arcpy.AddWarning(f"Error procesando {shapefile_path.name}: {str(e)}")
-        return 0
-
 def count_shapefile(shapefile_path):
     """
     Cuenta registros de un shapefile excluyendo aquellos que tienen contenido
-    en la columna Error_Descripcion.
+    en la columna Excepcion_, leyendo directamente el .dbf sin copiar archivos.
     """
     try:
-        # Crear directorio temporal dentro del directorio del shapefile
-        parent_dir = shapefile_path.parent
-        temp_dir = parent_dir / 'temp_count'
-        temp_dir.mkdir(exist_ok=True)
-
-        # Crear nombre simple reemplazando puntos por guiones bajos
-        simple_name = f"temp_{shapefile_path.stem.replace('.', '_')}"
-        temp_shp = temp_dir / f"{simple_name}.shp"
-        
-        # Copiar archivos relacionados
-        base_path = str(shapefile_path).rsplit('.', 1)[0]
-        temp_base = str(temp_shp).rsplit('.', 1)[0]
-        
-        for ext in ['.shp', '.dbf', '.shx', '.prj']:
-            src = base_path + ext
-            if os.path.exists(src):
-                shutil.copy2(src, temp_base + ext)
-
-        # Contar registros excluyendo aquellos con Excepcion_
-        valid_count = 0
-        total_count = 0
-        
-        # Crear capa en memoria para mejor rendimiento
-        mem_layer = f"in_memory\\{simple_name}"
-        arcpy.CopyFeatures_management(str(temp_shp), mem_layer)
-        
-        # Verificar si existe la columna Excepcion_
-        field_names = [field.name for field in arcpy.ListFields(mem_layer)]
-        has_error_desc = 'Excepcion_' in field_names
-        
-        if has_error_desc:
-            with arcpy.da.SearchCursor(mem_layer, ['OID@', 'Excepcion_']) as cursor:
-                for row in cursor:
-                    total_count += 1
-                    # Verificar si Excepcion_ está vacío o es None
-                    error_desc = row[1]
-                    if error_desc is None or (isinstance(error_desc, str) and error_desc.strip() == ''):
-                        valid_count += 1
-        else:
-            # Si no existe la columna, contar todos los registros
-            with arcpy.da.SearchCursor(mem_layer, ['OID@']) as cursor:
-                for _ in cursor:
-                    valid_count += 1
-                    total_count += 1
-
-        arcpy.Delete_management(mem_layer)
+        total_count, valid_count = count_blank_field(shapefile_path, 'Excepcion_')
         
         arcpy.AddMessage(f"  → Total registros: {total_count}")
         arcpy.AddMessage(f"  → Registros sin descripción de error: {valid_count}")
@@ -311,16 +205,6 @@ def count_shapefile(shapefile_path):
     except Exception as e:
         arcpy.AddWarning(f"Error al contar {shapefile_path.name}: {str(e)}")
         return 0
-        
-    finally:
-        # Limpiar archivos temporales
-        if 'temp_dir' in locals() and temp_dir.exists():
-            try:
-                for file in temp_dir.glob('*'):
-                    file.unlink()
-                temp_dir.rmdir()
-            except Exception as e:
-                arcpy.AddWarning(f"No se pudieron eliminar algunos archivos temporales: {str(e)}")
 
 def process_dataset_counts(base_path, dataset_name, shape_column_mapping, conn):
     """Procesa los conteos de registros para un dataset y los guarda en la BD."""
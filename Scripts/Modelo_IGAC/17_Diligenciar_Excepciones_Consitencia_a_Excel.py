@@ -1,8 +1,7 @@
 import os
 import arcpy
-import pandas as pd
 import sqlite3
-import openpyxl
+from WorkbookSession import WorkbookSession
 from pathlib import Path
 import json
 import sys
@@ -96,46 +95,57 @@ def obtener_excel_topologia(raiz_proyecto, dataset):
         print(f"Error al buscar archivo Excel: {str(e)}")
         raise
 
-def obtener_datos_sqlite(raiz_proyecto, dataset, columna, db_name):
+def leer_ultimo_registro(conn, tabla):
+    """Obtiene la fila más reciente de la tabla como dict columna→valor (vacío si no hay datos)"""
+    query = f"""
+    SELECT * 
+    FROM {tabla} 
+    ORDER BY fecha_proceso DESC 
+    LIMIT 1
     """
-    Obtiene el valor más reciente de la columna específica en la tabla del dataset.
-    Incluye mejor manejo de errores y verificaciones.
+    
+    try:
+        cursor = conn.execute(query)
+        fila = cursor.fetchone()
+    except sqlite3.Error as e:
+        print(f"Error al consultar la tabla {tabla}: {str(e)}")
+        return {}
+    
+    if fila is None:
+        print(f"No se encontraron datos en la tabla {tabla}")
+        return {}
+    return dict(zip([columna[0] for columna in cursor.description], fila))
+
+def obtener_datos_sqlite(raiz_proyecto, dataset, db_names):
     """
+    Obtiene el registro más reciente del dataset en cada base de datos usando
+    una sola conexión (las bases adicionales se adjuntan con ATTACH).
+    Devuelve {db_name: {columna: valor}}; un dict vacío si la base no está disponible.
+    """
+    db_dir = raiz_proyecto / 'Files' / 'Temporary_Files' / 'MODELO_IGAC' / 'db'
+    registros = {db_name: {} for db_name in db_names}
+    conn = sqlite3.connect(':memory:')
+    
     try:
-        db_path = raiz_proyecto / 'Files' / 'Temporary_Files' / 'MODELO_IGAC' / 'db' / db_name
-        print(f"Conectando a base de datos: {db_path}")
-        
-        if not db_path.exists():
-            raise FileNotFoundError(f"No se encontró la base de datos: {db_path}")
+        for i, db_name in enumerate(db_names):
+            db_path = db_dir / db_name
+            print(f"Conectando a base de datos: {db_path}")
             
-        if not os.access(db_path, os.R_OK):
-            raise PermissionError(f"No tiene permisos de lectura en la base de datos: {db_path}")
-        
-        conn = sqlite3.connect(str(db_path))
-        
-        query = f"""
-        SELECT {columna} 
-        FROM {dataset} 
-        ORDER BY fecha_proceso DESC 
-        LIMIT 1
-        """
-        
-        try:
-            resultado = pd.read_sql_query(query, conn)[columna].iloc[0]
-            print(f"Valor para columna {columna} en {db_name}: {resultado}")
-            return resultado
-        except IndexError:
-            print(f"No se encontraron datos para {columna} en {db_name}")
-            return 0
-        except Exception as e:
-            print(f"Error al consultar columna {columna} en {db_name}: {str(e)}")
-            return 0
-        finally:
-            conn.close()
+            if not db_path.exists():
+                print(f"Error en obtener_datos_sqlite: No se encontró la base de datos: {db_path}")
+                continue
+                
+            if not os.access(db_path, os.R_OK):
+                print(f"Error en obtener_datos_sqlite: No tiene permisos de lectura en la base de datos: {db_path}")
+                continue
             
-    except Exception as e:
-        print(f"Error en obtener_datos_sqlite: {str(e)}")
-        return 0
+            esquema = f"db{i}"
+            conn.execute("ATTACH DATABASE ? AS " + esquema, (str(db_path),))
+            registros[db_name] = leer_ultimo_registro(conn, f"{esquema}.{dataset}")
+    finally:
+        conn.close()
+    
+    return registros
 
 def get_active_datasets(root_path):
     """
@@ -180,28 +190,38 @@ def procesar_dataset(raiz_proyecto, dataset, mapeo_celdas):
         ruta_excel = obtener_excel_topologia(raiz_proyecto, dataset)
         print(f"Trabajando con Excel: {ruta_excel}")
         
-        # Cargar el archivo Excel usando openpyxl para modificar celdas específicas
-        wb = openpyxl.load_workbook(ruta_excel)
-        hoja = wb['Consistencia Formato']
+        # Leer el registro más reciente de ambas bases una sola vez para todas las celdas
+        registros = obtener_datos_sqlite(
+            raiz_proyecto, dataset,
+            ['errores_consistencia_formato.db', 'excepciones_consistencia_formato.db']
+        )
+        errores = registros['errores_consistencia_formato.db']
+        excepciones = registros['excepciones_consistencia_formato.db']
+        
+        # Sesión de escritura sobre el libro (una sola carga/guardado)
+        sesion = WorkbookSession(ruta_excel)
+        hoja = 'Consistencia Formato'
+        if hoja not in sesion.sheetnames:
+            raise Exception(f"No se encontró la hoja '{hoja}' en {ruta_excel}")
         
         # Procesar cada mapeo de celdas
         for celda, columnas in mapeo_celdas[dataset].items():
             print(f"Procesando celda {celda} para columnas {columnas}")
             
-            # Obtener valores de ambas bases de datos
-            valor_errores = obtener_datos_sqlite(raiz_proyecto, dataset, columnas[0], 'errores_consistencia_formato.db')
-            valor_excepciones = obtener_datos_sqlite(raiz_proyecto, dataset, columnas[1], 'excepciones_consistencia_formato.db')
+            # Valores de ambas bases de datos (0 si la columna no tiene dato)
+            valor_errores = errores.get(columnas[0]) or 0
+            valor_excepciones = excepciones.get(columnas[1]) or 0
             
             # Calcular la diferencia
             diferencia = valor_errores - valor_excepciones
             
             # Actualizar la celda específica en el Excel
-            hoja[celda] = diferencia
+            sesion.write(hoja, celda, diferencia)
             print(f"Diferencia calculada para {celda}: {diferencia} ({valor_errores} - {valor_excepciones})")
         
         # Guardar los cambios
         print(f"Guardando cambios en {ruta_excel}")
-        wb.save(ruta_excel)
+        sesion.commit()
         print(f"Procesamiento completado para {dataset}")
         
     except Exception as e:
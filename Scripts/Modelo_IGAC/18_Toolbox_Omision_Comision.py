@@ -9,6 +9,15 @@ from datetime import datetime
 from pathlib import Path
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
+from RegistryJoinEngine import (
+    RegistryJoinEngine, as_text, registry_unit_key, geographic_unit_key,
+    CONDICIONES_TERRENO, CONDICIONES_UNIDAD, CONDICIONES_MEJORA
+)
+from RegistryLoader import (
+    load_csv, read_table, write_rejections, TERRENO_COLUMNS, UNIDAD_COLUMNS
+)
+from ResultStore import ResultWriter, remove_results
+import StageProgress as progress
 # Silenciar advertencias y mensajes innecesarios
 import warnings
 warnings.filterwarnings('ignore')
@@ -16,6 +25,9 @@ import logging
 logging.getLogger('pandas').setLevel(logging.ERROR)
 logging.getLogger('arcpy').setLevel(logging.ERROR)
 
+# OIDs por consulta al seleccionar las geometrías de comisión
+OID_SELECTION_CHUNK = 1000
+
 class OmisionComisionProcessor:
     def __init__(self):
         """Inicializa el procesador con configuración básica"""
@@ -32,6 +44,9 @@ class OmisionComisionProcessor:
         
         self.setup_paths()
         self.setup_logging()
+
+        # Atributos de las tablas R1 leídos una sola vez
+        self.registry_frames = {}
         
         # Inicializar workspace
         arcpy.env.workspace = self.paths['gdb']
@@ -66,6 +81,7 @@ class OmisionComisionProcessor:
             'apex_unidad': os.path.join(self.project_root, "Files", "Temporary_Files", "MODELO_IGAC", "INSUMOS", "Apex_Unidad"),
             'config_file': os.path.join(self.project_root, "Files", "Temporary_Files", "array_config.txt")
         }
+        self.paths['registry_db'] = os.path.join(self.paths['output'], "registro_r1.db")
         
         # Crear directorios necesarios si no existen
         for path in ['output', 'apex_terreno', 'apex_unidad']:
@@ -184,123 +200,110 @@ class OmisionComisionProcessor:
     def log_error(self, message):
         """Registra un error en el log"""
         self.logger.error(message)
-        print(f"ERROR: {message}")
+        progress.log(f"ERROR: {message}", 'error')
 
     def log_message(self, message):
         """Registra un mensaje en el log"""
         self.logger.info(message)
-        print(message)
+        progress.log(message)
         
-    def create_r1_tables(self):
-        """Crea las tablas R1_TERRENO y R1_UNIDAD si no existen"""
+    def load_attributes(self, table):
+        """Lee los atributos (sin geometría) de una tabla o capa a un DataFrame en una sola pasada"""
         try:
-            self.log_message("Verificando y creando tablas necesarias...")
-            
-            # Definir la estructura de R1_TERRENO
-            if not arcpy.Exists(os.path.join(self.paths['gdb'], "R1_TERRENO")):
-                self.log_message("Creando tabla R1_TERRENO...")
-                arcpy.CreateTable_management(self.paths['gdb'], "R1_TERRENO")
-                terreno_table = os.path.join(self.paths['gdb'], "R1_TERRENO")
-                
-                # Añadir campos a R1_TERRENO
-                arcpy.AddField_management(terreno_table, "Numero_Predial", "TEXT", field_length=255)
-                arcpy.AddField_management(terreno_table, "Etapa", "TEXT", field_length=255)
-                arcpy.AddField_management(terreno_table, "Destino", "TEXT", field_length=255)
-                arcpy.AddField_management(terreno_table, "Estado", "TEXT", field_length=255)
-                self.log_message("Tabla R1_TERRENO creada exitosamente")
-            else:
-                self.log_message("La tabla R1_TERRENO ya existe")
+            fields = [
+                field.name for field in arcpy.ListFields(table)
+                if field.type not in ('Geometry', 'Blob', 'Raster')
+            ]
+            with arcpy.da.SearchCursor(table, fields) as cursor:
+                return pd.DataFrame.from_records(list(cursor), columns=fields)
+        except Exception as e:
+            self.log_error(f"Error leyendo atributos de {table}: {str(e)}")
+            raise
 
-            # Definir la estructura de R1_UNIDAD
-            if not arcpy.Exists(os.path.join(self.paths['gdb'], "R1_UNIDAD")):
-                self.log_message("Creando tabla R1_UNIDAD...")
-                arcpy.CreateTable_management(self.paths['gdb'], "R1_UNIDAD")
-                unidad_table = os.path.join(self.paths['gdb'], "R1_UNIDAD")
-                
-                # Añadir campos a R1_UNIDAD
-                arcpy.AddField_management(unidad_table, "Municipio_Codigo", "TEXT", field_length=255)
-                arcpy.AddField_management(unidad_table, "Numero_Predial", "TEXT", field_length=255)
-                arcpy.AddField_management(unidad_table, "Estado", "TEXT", field_length=255)
-                arcpy.AddField_management(unidad_table, "Tipo_Construccion", "TEXT", field_length=255)
-                arcpy.AddField_management(unidad_table, "Unidad", "TEXT", field_length=255)
-                arcpy.AddField_management(unidad_table, "Etapa", "TEXT", field_length=255)
-                self.log_message("Tabla R1_UNIDAD creada exitosamente")
-            else:
-                self.log_message("La tabla R1_UNIDAD ya existe")
+    def load_registry(self, table_name):
+        """Tabla R1/R2 del almacén del registro (se lee una sola vez por ejecución)"""
+        if table_name not in self.registry_frames:
+            self.registry_frames[table_name] = read_table(self.paths['registry_db'], table_name)
+        return self.registry_frames[table_name]
+
+    def terreno_engine(self, capa_geografica):
+        """Motor de anti-joins R1_TERRENO ↔ capa geográfica por número predial"""
+        registry = self.load_registry("R1_TERRENO")
+        geographic = self.load_attributes(capa_geografica)
+        return RegistryJoinEngine(
+            registry, "R1_TERRENO", as_text(registry['Numero_Predial']),
+            geographic, os.path.basename(capa_geografica), as_text(geographic['CODIGO'])
+        )
+
+    def unidad_engine(self, capa_geografica):
+        """Motor de anti-joins R1_UNIDAD ↔ capa geográfica por la clave compuesta de unidad"""
+        registry = self.load_registry("R1_UNIDAD")
+        geographic = self.load_attributes(capa_geografica)
+        return RegistryJoinEngine(
+            registry, "R1_UNIDAD", registry_unit_key(registry),
+            geographic, os.path.basename(capa_geografica), geographic_unit_key(geographic)
+        )
+
+    def export_features(self, capa_geografica, oids, output_shp):
+        """Exporta solo los elementos indicados por OID, seleccionándolos por bloques"""
+        oid_field = arcpy.Describe(capa_geografica).OIDFieldName
+        if not oids:
+            arcpy.management.MakeFeatureLayer(capa_geografica, "temp_vista_geografica", "1 = 0")
+        else:
+            arcpy.management.MakeFeatureLayer(capa_geografica, "temp_vista_geografica")
+            for start in range(0, len(oids), OID_SELECTION_CHUNK):
+                chunk = oids[start:start + OID_SELECTION_CHUNK]
+                arcpy.management.SelectLayerByAttribute(
+                    in_layer_or_view="temp_vista_geografica",
+                    selection_type="NEW_SELECTION" if start == 0 else "ADD_TO_SELECTION",
+                    where_clause=f"{oid_field} IN ({','.join(str(oid) for oid in chunk)})"
+                )
+        arcpy.management.CopyFeatures("temp_vista_geografica", output_shp)
+
+    def write_omision(self, engine, zona, condiciones, output_excel, etiqueta=""):
+        """Escribe la omisión de cada subzona en su hoja de resultados (Parquet y Excel)"""
+        subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
+        writer = ResultWriter(output_excel)
+
+        for subzona in subzonas:
+            try:
+                df = engine.omision(subzona, condiciones)
+                writer.write(df, f'Omision_{subzona}')
 
-            return True
+                count = len(df)
+                self.log_message(f"Cantidad de registros de omisión {etiqueta}{subzona}: {count}")
 
-        except Exception as e:
-            self.log_error(f"Error creando las tablas: {str(e)}")
-            return False
+            except Exception as e:
+                self.log_error(f"Error procesando {subzona}: {str(e)}")
+
+        writer.close()
+
+    def write_comision(self, engine, subzona, condiciones, capa_geografica, writer, output_shp, etiqueta=""):
+        """Escribe la comisión de una subzona en sus resultados y exporta sus geometrías"""
+        oid_field = arcpy.Describe(capa_geografica).OIDFieldName
+        df, oids = engine.comision(subzona, condiciones, oid_field)
 
-    def process_table_to_dataframe(self, table_view, fields=None):
-        """Función auxiliar para convertir una tabla o vista a DataFrame manejando valores nulos"""
         try:
-            if not fields:
-                fields = [field.name for field in arcpy.ListFields(table_view)]
-            
-            data = []
-            with arcpy.da.SearchCursor(table_view, fields) as cursor:
-                for row in cursor:
-                    # Reemplazar None con valores vacíos
-                    cleaned_row = ['' if v is None else v for v in row]
-                    data.append(cleaned_row)
-            
-            return pd.DataFrame(data, columns=fields)
-        except Exception as e:
-            self.log_error(f"Error convirtiendo tabla a DataFrame: {str(e)}")
-            raise
+            self.export_features(capa_geografica, oids, output_shp)
+        finally:
+            self.clean_temp_data()
+
+        writer.write(df, f'Comision_{subzona}')
+
+        count = len(df)
+        self.log_message(f"Cantidad de registros de comisión {etiqueta}{subzona}: {count}")
 
     def omision_terrenos(self, zona):
         """Analiza la omisión de terrenos"""
         try:
             self.log_message("Analizando omisión de terrenos...")
-            
-            apex_terreno = os.path.join(self.paths['gdb'], "R1_TERRENO")
+
             capa_geografica = os.path.join(self.paths['gdb'], "TERRENO_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"1_Omision_Terrenos_{zona}.xlsx")
 
-            subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
+            engine = self.terreno_engine(capa_geografica)
+            self.write_omision(engine, zona, CONDICIONES_TERRENO, output_excel)
 
-            for subzona in subzonas:
-                try:
-                    arcpy.MakeTableView_management(apex_terreno, "vista_terreno")
-                    arcpy.MakeTableView_management(capa_geografica, "vista_geografica")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="vista_terreno",
-                        in_field="Numero_Predial",
-                        join_table="vista_geografica",
-                        join_field="CODIGO",
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Estado = 'ACTIVO' AND CODIGO IS NULL AND SUBSTRING(Numero_Predial,22,1) IN ('0','8','2')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="vista_terreno",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    df = self.process_table_to_dataframe("vista_terreno")
-                    df.to_excel(writer, sheet_name=f'Omision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de omisión {subzona}: {count}")
-
-                except Exception as e:
-                    self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    self.clean_temp_data()
-
-            writer.close()
             self.log_message("Análisis de omisión de terrenos completado")
 
         except Exception as e:
@@ -311,56 +314,24 @@ class OmisionComisionProcessor:
         """Analiza la comisión de terrenos"""
         try:
             self.log_message("Analizando comisión de terrenos...")
-            
-            apex_terreno = os.path.join(self.paths['gdb'], "R1_TERRENO")
+
             capa_geografica = os.path.join(self.paths['gdb'], "TERRENO_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"2_Comision_Terrenos_{zona}.xlsx")
 
             subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
+            writer = ResultWriter(output_excel)
+
+            output_subfolder = os.path.join(self.paths['output'], f"2_Shp_Comision_Terrenos_{zona}")
+            if not os.path.exists(output_subfolder):
+                os.makedirs(output_subfolder)
 
+            engine = self.terreno_engine(capa_geografica)
             for subzona in subzonas:
                 try:
-                    arcpy.MakeTableView_management(apex_terreno, "vista_terreno")
-                    arcpy.management.MakeFeatureLayer(capa_geografica, "temp_vista_geografica")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="temp_vista_geografica",
-                        in_field="CODIGO",
-                        join_table="vista_terreno",
-                        join_field="Numero_Predial",
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Numero_Predial IS NULL AND SUBSTRING(CODIGO,22,1) IN ('0','8','2')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="temp_vista_geografica",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    output_subfolder = os.path.join(self.paths['output'], f"2_Shp_Comision_Terrenos_{zona}")
-                    if not os.path.exists(output_subfolder):
-                        os.makedirs(output_subfolder)
-
                     output_shp = os.path.join(output_subfolder, f"2_Comision_Terrenos_{subzona}.shp")
-                    arcpy.management.CopyFeatures("temp_vista_geografica", output_shp)
-
-                    df = self.process_table_to_dataframe("temp_vista_geografica")
-                    df.to_excel(writer, sheet_name=f'Comision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de comisión {subzona}: {count}")
-
+                    self.write_comision(engine, subzona, CONDICIONES_TERRENO, capa_geografica, writer, output_shp)
                 except Exception as e:
                     self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    self.clean_temp_data()
 
             writer.close()
             self.log_message("Análisis de comisión de terrenos completado")
@@ -373,65 +344,13 @@ class OmisionComisionProcessor:
         """Analiza la omisión de unidades"""
         try:
             self.log_message("Analizando omisión de unidades...")
-            
-            apex_unidad = os.path.join(self.paths['gdb'], "R1_UNIDAD")
+
             capa_geografica = os.path.join(self.paths['gdb'], "UNIDAD_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"3_Omision_Unidades_{zona}.xlsx")
 
-            subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
-
-            for subzona in subzonas:
-                try:
-                    arcpy.MakeTableView_management(apex_unidad, "vista_unidad")
-                    arcpy.MakeTableView_management(capa_geografica, "vista_geografica")
-
-                    codigo_nuevo_terr = "codigo_nuevo_terreno"
-                    codigo_nuevo_unidad = "codigo_nuevo_unidad"
-                    
-                    expresion_ter = "!Numero_Predial![0:22]+'0000'+!Numero_Predial![26:30] + '_' + !Unidad! + '_' + !TIPO_CONSTRUCCION!"
-                    expresion_gra = (
-                        "!CODIGO![0:22] + '0000' + !CODIGO![26:30] + '_' + "
-                        "!IDENTIFICADOR! + '_' + ('NO_CONVENCIONAL' if !TIPO_CONSTRUCCION! == 'NO CONVENCIONAL' else !TIPO_CONSTRUCCION!)"
-                    )
-
-                    arcpy.CalculateField_management("vista_unidad", codigo_nuevo_terr, expresion_ter, "PYTHON3")
-                    arcpy.CalculateField_management("vista_geografica", codigo_nuevo_unidad, expresion_gra, "PYTHON3")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="vista_unidad",
-                        in_field=codigo_nuevo_terr,
-                        join_table="vista_geografica",
-                        join_field=codigo_nuevo_unidad,
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Estado = 'ACTIVO' AND codigo_nuevo_unidad IS NULL AND SUBSTRING(Numero_Predial,22,1) IN ('0','2','5','8')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="vista_unidad",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    df = self.process_table_to_dataframe("vista_unidad")
-                    df.to_excel(writer, sheet_name=f'Omision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de omisión {subzona}: {count}")
-
-                except Exception as e:
-                    self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    arcpy.DeleteField_management("vista_unidad", codigo_nuevo_terr)
-                    arcpy.DeleteField_management("vista_geografica", codigo_nuevo_unidad)
-                    self.clean_temp_data()
+            engine = self.unidad_engine(capa_geografica)
+            self.write_omision(engine, zona, CONDICIONES_UNIDAD, output_excel)
 
-            writer.close()
             self.log_message("Análisis de omisión de unidades completado")
 
         except Exception as e:
@@ -442,70 +361,24 @@ class OmisionComisionProcessor:
         """Analiza la comisión de unidades"""
         try:
             self.log_message("Analizando comisión de unidades...")
-            
-            apex_unidad = os.path.join(self.paths['gdb'], "R1_UNIDAD")
+
             capa_geografica = os.path.join(self.paths['gdb'], "UNIDAD_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"4_Comision_Unidades_Construccion_{zona}.xlsx")
 
             subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
+            writer = ResultWriter(output_excel)
 
+            output_subfolder = os.path.join(self.paths['output'], f"4_Shp_Comision_Unidades_{zona}")
+            if not os.path.exists(output_subfolder):
+                os.makedirs(output_subfolder)
+
+            engine = self.unidad_engine(capa_geografica)
             for subzona in subzonas:
                 try:
-                    arcpy.MakeTableView_management(apex_unidad, "vista_unidad")
-                    arcpy.management.MakeFeatureLayer(capa_geografica, "vista_geografica")
-
-                    codigo_nuevo_terr = "codigo_nuevo_terreno"
-                    codigo_nuevo_unidad = "codigo_nuevo_unidad"
-                    
-                    expresion_ter = "!Numero_Predial![0:22]+'0000'+!Numero_Predial![26:30] + '_' + !Unidad! + '_' + !TIPO_CONSTRUCCION!"
-                    expresion_gra = (
-                        "!CODIGO![0:22] + '0000' + !CODIGO![26:30] + '_' + "
-                        "!IDENTIFICADOR! + '_' + ('NO_CONVENCIONAL' if !TIPO_CONSTRUCCION! == 'NO CONVENCIONAL' else !TIPO_CONSTRUCCION!)"
-                    )
-
-                    arcpy.CalculateField_management("vista_unidad", codigo_nuevo_terr, expresion_ter, "PYTHON3")
-                    arcpy.CalculateField_management("vista_geografica", codigo_nuevo_unidad, expresion_gra, "PYTHON3")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="vista_geografica",
-                        in_field=codigo_nuevo_unidad,
-                        join_table="vista_unidad",
-                        join_field=codigo_nuevo_terr,
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Numero_Predial IS NULL AND SUBSTRING(CODIGO,22,1) IN ('0','2','5','8')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="vista_geografica",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    output_subfolder = os.path.join(self.paths['output'], f"4_Shp_Comision_Unidades_{zona}")
-                    if not os.path.exists(output_subfolder):
-                        os.makedirs(output_subfolder)
-
                     output_shp = os.path.join(output_subfolder, f"4_Comision_Unidades_{subzona}.shp")
-                    arcpy.management.CopyFeatures("vista_geografica", output_shp)
-
-                    df = self.process_table_to_dataframe("vista_geografica")
-                    df.to_excel(writer, sheet_name=f'Comision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de comisión {subzona}: {count}")
-
+                    self.write_comision(engine, subzona, CONDICIONES_UNIDAD, capa_geografica, writer, output_shp)
                 except Exception as e:
                     self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    arcpy.DeleteField_management("vista_unidad", codigo_nuevo_terr)
-                    arcpy.DeleteField_management("vista_geografica", codigo_nuevo_unidad)
-                    self.clean_temp_data()
 
             writer.close()
             self.log_message("Análisis de comisión de unidades completado")
@@ -515,149 +388,33 @@ class OmisionComisionProcessor:
             raise
     
     def load_r1_data(self):
-        """Carga los datos de R1 (terrenos y unidades)"""
+        """Carga los datos de R1 (terrenos) y R2 (unidades) en el almacén SQLite del registro"""
         try:
-            # Silenciar los mensajes de Pandas
-            import warnings
-            warnings.filterwarnings('ignore')
-            
-            # Obtener rutas de las tablas
-            fgdb_table_r1 = os.path.join(self.paths['gdb'], 'R1_TERRENO')
-            fgdb_table_r2 = os.path.join(self.paths['gdb'], 'R1_UNIDAD')
-            chunksize = 500000
-
-            def get_column_name(df, possible_names):
-                """Busca una columna que coincida con cualquiera de los nombres posibles"""
-                for name in possible_names:
-                    if name in df.columns:
-                        return name
-                return None
-
-            # Limpiar tablas existentes
-            arcpy.TruncateTable_management(fgdb_table_r1)
-            arcpy.TruncateTable_management(fgdb_table_r2)
-
+            self.registry_frames = {}
             self.log_message("Iniciando carga de datos...")
-            
-            # Cargar datos de terrenos (R1)
-            try:
-                arcpy.SetProgressor("step", "Cargando datos de terrenos...", 0, 100, 1)
-                
-                # Definir tipos de columnas y sus posibles nombres
-                column_types = {
-                    'Numero_Predial': str, 
-                    'Numero Predial': str,
-                    'Etapa': str, 
-                    'Destino': str, 
-                    'Estado': str
-                }
-                
-                # Definir variantes de nombres
-                column_variants = {
-                    'Numero_Predial': ['Numero_Predial', 'Numero Predial'],
-                    'Etapa': ['Etapa'],
-                    'Destino': ['Destino'],
-                    'Estado': ['Estado']
-                }
-                
-                # Leer primera fila para detectar nombres
-                df_sample = pd.read_csv(self.paths['terreno_csv'], nrows=1, encoding="ISO-8859-1")
-                
-                # Crear mapping basado en los nombres encontrados
-                column_mapping = {}
-                field_mapping = {}
-                
-                for target_field, variants in column_variants.items():
-                    found_column = get_column_name(df_sample, variants)
-                    if found_column:
-                        if found_column != target_field:
-                            column_mapping[found_column] = target_field
-                        field_mapping[target_field] = target_field
-                    else:
-                        raise ValueError(f"No se encontró la columna {target_field}")
 
-                for chunk in pd.read_csv(self.paths['terreno_csv'], dtype=column_types, chunksize=chunksize, sep=',', encoding="ISO-8859-1"):
-                    if column_mapping:
-                        chunk = chunk.rename(columns=column_mapping)
-                    
-                    keys = list(field_mapping.keys())
-                    with arcpy.da.InsertCursor(fgdb_table_r1, keys) as insert_cur:
-                        for row in chunk.itertuples(index=False):
-                            try:
-                                new_row = [getattr(row, field_mapping[key]) for key in keys]
-                                insert_cur.insertRow(new_row)
-                            except Exception as e:
-                                pass  # Silenciar errores individuales
-                                
-                count = int(arcpy.GetCount_management(fgdb_table_r1).getOutput(0))
-                self.log_message(f"Total registros en R1: {count}")
-                    
-            except Exception as e:
-                self.log_error(f"Error en carga de terrenos: {str(e)}")
-                raise
+            cargas = [
+                ("terrenos", "R1", self.paths['terreno_csv'], "R1_TERRENO", TERRENO_COLUMNS),
+                ("unidades", "R2", self.paths['unidad_csv'], "R1_UNIDAD", UNIDAD_COLUMNS),
+            ]
 
-            # Cargar datos de unidades (R2)
-            try:
-                arcpy.SetProgressor("step", "Cargando datos de unidades...", 0, 100, 1)
-                
-                # Definir tipos de columnas y sus posibles nombres
-                column_types = {
-                    'Municipio_Codigo': str,
-                    'Municipio Codigo': str,
-                    'Numero_Predial': str,
-                    'Numero Predial': str,
-                    'Estado': str,
-                    'Tipo_Construccion': str,
-                    'Tipo Construccion': str,
-                    'Unidad': str,
-                    'Etapa': str
-                }
-                
-                # Definir variantes de nombres
-                column_variants = {
-                    'Municipio_Codigo': ['Municipio_Codigo', 'Municipio Codigo'],
-                    'Numero_Predial': ['Numero_Predial', 'Numero Predial'],
-                    'Estado': ['Estado'],
-                    'Tipo_Construccion': ['Tipo_Construccion', 'Tipo Construccion'],
-                    'Unidad': ['Unidad'],
-                    'Etapa': ['Etapa']
-                }
-                
-                # Leer primera fila para detectar nombres
-                df_sample = pd.read_csv(self.paths['unidad_csv'], nrows=1, encoding="ISO-8859-1")
-                
-                # Crear mapping basado en los nombres encontrados
-                column_mapping = {}
-                field_mapping = {}
-                
-                for target_field, variants in column_variants.items():
-                    found_column = get_column_name(df_sample, variants)
-                    if found_column:
-                        if found_column != target_field:
-                            column_mapping[found_column] = target_field
-                        field_mapping[target_field] = target_field
-                    else:
-                        raise ValueError(f"No se encontró la columna {target_field}")
+            for descripcion, registro, csv_path, table, columns in cargas:
+                try:
+                    arcpy.SetProgressor("default", f"Cargando datos de {descripcion}...")
 
-                for chunk in pd.read_csv(self.paths['unidad_csv'], dtype=column_types, chunksize=chunksize, sep=',', encoding="ISO-8859-1"):
-                    if column_mapping:
-                        chunk = chunk.rename(columns=column_mapping)
-                    
-                    keys = list(field_mapping.keys())
-                    with arcpy.da.InsertCursor(fgdb_table_r2, keys) as insert_cur:
-                        for row in chunk.itertuples(index=False):
-                            try:
-                                new_row = [getattr(row, field_mapping[key]) for key in keys]
-                                insert_cur.insertRow(new_row)
-                            except Exception as e:
-                                pass  # Silenciar errores individuales
-                                
-                count = int(arcpy.GetCount_management(fgdb_table_r2).getOutput(0))
-                self.log_message(f"Total registros en R2: {count}")
-                    
-            except Exception as e:
-                self.log_error(f"Error en carga de unidades: {str(e)}")
-                raise
+                    count, rejected = load_csv(csv_path, self.paths['registry_db'], table, columns)
+                    self.log_message(f"Total registros en {registro}: {count}")
+
+                    report_path = os.path.join(self.paths['output'], f"Registros_Rechazados_{table}.csv")
+                    if rejected:
+                        write_rejections(report_path, rejected)
+                        self.log_message(f"Filas rechazadas en {registro}: {len(rejected)} (ver {report_path})")
+                    elif os.path.exists(report_path):
+                        os.remove(report_path)
+
+                except Exception as e:
+                    self.log_error(f"Error en carga de {descripcion}: {str(e)}")
+                    raise
 
         except Exception as e:
             self.log_error(f"Error en la carga de datos: {str(e)}")
@@ -666,45 +423,13 @@ class OmisionComisionProcessor:
         """Procesa la comisión de terrenos para un dataset específico"""
         try:
             self.log_message(f"Procesando comisión de terrenos para {subzona}")
-            
-            arcpy.MakeTableView_management(os.path.join(self.paths['gdb'], "R1_TERRENO"), "vista_terreno")
-            arcpy.management.MakeFeatureLayer(capa_geografica, "temp_vista_geografica")
-
-            arcpy.management.AddJoin(
-                in_layer_or_view="temp_vista_geografica",
-                in_field="CODIGO",
-                join_table="vista_terreno",
-                join_field="Numero_Predial",
-                join_type="KEEP_ALL"
-            )
-
-            where_clause = "Numero_Predial IS NULL AND SUBSTRING(CODIGO,22,1) IN ('0','8','2')"
-            if subzona == 'Urbana':
-                where_clause += " AND SUBSTRING(CODIGO,6,2) <>'00'"
-            else:  # Rural
-                where_clause += " AND SUBSTRING(CODIGO,6,2) ='00'"
 
-            arcpy.management.SelectLayerByAttribute(
-                in_layer_or_view="temp_vista_geografica",
-                selection_type="NEW_SELECTION",
-                where_clause=where_clause
-            )
-
-            # Exportar shapefile
+            engine = self.terreno_engine(capa_geografica)
             output_shp = os.path.join(output_shp_folder, f"2_Comision_Terrenos_{subzona}.shp")
-            arcpy.management.CopyFeatures("temp_vista_geografica", output_shp)
-
-            # Exportar a Excel
-            df = self.process_table_to_dataframe("temp_vista_geografica")
-            df.to_excel(writer, sheet_name=f'Comision_{subzona}', index=False)
-
-            count = len(df)
-            self.log_message(f"Registros de comisión {subzona}: {count}")
+            self.write_comision(engine, subzona, CONDICIONES_TERRENO, capa_geografica, writer, output_shp)
 
         except Exception as e:
             self.log_error(f"Error en comisión de terrenos para {subzona}: {str(e)}")
-        finally:
-            self.clean_temp_data()
     def determine_datasets(self):
         """Determina los datasets a procesar basado en el archivo de configuración"""
         try:
@@ -808,7 +533,7 @@ class OmisionComisionProcessor:
             self.omision_terrenos(zona)
             
             # Procesar comisión según zona
-            writer = pd.ExcelWriter(os.path.join(self.paths['output'], f"2_Comision_Terrenos_{zona}.xlsx"), engine='xlsxwriter')
+            writer = ResultWriter(os.path.join(self.paths['output'], f"2_Comision_Terrenos_{zona}.xlsx"))
             output_shp_folder = os.path.join(self.paths['output'], f"2_Shp_Comision_Terrenos_{zona}")
             
             if not os.path.exists(output_shp_folder):
@@ -895,7 +620,7 @@ class OmisionComisionProcessor:
             self.omision_unidades(zona)
             
             # Procesar comisión según zona
-            writer = pd.ExcelWriter(os.path.join(self.paths['output'], f"4_Comision_Unidades_Construccion_{zona}.xlsx"), engine='xlsxwriter')
+            writer = ResultWriter(os.path.join(self.paths['output'], f"4_Comision_Unidades_Construccion_{zona}.xlsx"))
             output_shp_folder = os.path.join(self.paths['output'], f"4_Shp_Comision_Unidades_{zona}")
             
             if not os.path.exists(output_shp_folder):
@@ -916,59 +641,13 @@ class OmisionComisionProcessor:
         """Procesa la comisión de unidades para un dataset específico"""
         try:
             self.log_message(f"Procesando comisión de unidades para {subzona}")
-            
-            arcpy.MakeTableView_management(os.path.join(self.paths['gdb'], "R1_UNIDAD"), "vista_unidad")
-            arcpy.management.MakeFeatureLayer(capa_geografica, "vista_geografica")
-
-            codigo_nuevo_terr = "codigo_nuevo_terreno"
-            codigo_nuevo_unidad = "codigo_nuevo_unidad"
-            
-            expresion_ter = "!Numero_Predial![0:22]+'0000'+!Numero_Predial![26:30] + '_' + !Unidad! + '_' + !TIPO_CONSTRUCCION!"
-            expresion_gra = (
-                "!CODIGO![0:22] + '0000' + !CODIGO![26:30] + '_' + "
-                "!IDENTIFICADOR! + '_' + ('NO_CONVENCIONAL' if !TIPO_CONSTRUCCION! == 'NO CONVENCIONAL' else !TIPO_CONSTRUCCION!)"
-            )
-
-            arcpy.CalculateField_management("vista_unidad", codigo_nuevo_terr, expresion_ter, "PYTHON3")
-            arcpy.CalculateField_management("vista_geografica", codigo_nuevo_unidad, expresion_gra, "PYTHON3")
-
-            arcpy.management.AddJoin(
-                in_layer_or_view="vista_geografica",
-                in_field=codigo_nuevo_unidad,
-                join_table="vista_unidad",
-                join_field=codigo_nuevo_terr,
-                join_type="KEEP_ALL"
-            )
 
-            where_clause = "Numero_Predial IS NULL AND SUBSTRING(CODIGO,22,1) IN ('0','2','5','8')"
-            if subzona == 'Urbana':
-                where_clause += " AND SUBSTRING(CODIGO,6,2) <>'00'"
-            else:  # Rural
-                where_clause += " AND SUBSTRING(CODIGO,6,2) ='00'"
-
-            arcpy.management.SelectLayerByAttribute(
-                in_layer_or_view="vista_geografica",
-                selection_type="NEW_SELECTION",
-                where_clause=where_clause
-            )
-
-            # Exportar shapefile
+            engine = self.unidad_engine(capa_geografica)
             output_shp = os.path.join(output_shp_folder, f"4_Comision_Unidades_{subzona}.shp")
-            arcpy.management.CopyFeatures("vista_geografica", output_shp)
-
-            # Exportar a Excel
-            df = self.process_table_to_dataframe("vista_geografica")
-            df.to_excel(writer, sheet_name=f'Comision_{subzona}', index=False)
-
-            count = len(df)
-            self.log_message(f"Registros de comisión {subzona}: {count}")
+            self.write_comision(engine, subzona, CONDICIONES_UNIDAD, capa_geografica, writer, output_shp)
 
         except Exception as e:
             self.log_error(f"Error en comisión de unidades para {subzona}: {str(e)}")
-        finally:
-            arcpy.DeleteField_management("vista_unidad", codigo_nuevo_terr)
-            arcpy.DeleteField_management("vista_geografica", codigo_nuevo_unidad)
-            self.clean_temp_data()    
         
 
 
@@ -1049,51 +728,13 @@ class OmisionComisionProcessor:
         """Analiza la omisión de mejoras"""
         try:
             self.log_message("Analizando omisión de mejoras...")
-            
-            apex_terreno = os.path.join(self.paths['gdb'], "R1_TERRENO")
+
             capa_geografica = os.path.join(self.paths['gdb'], "MEJORAS_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"5_Omision_Mejoras_{zona}.xlsx")
 
-            subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
-
-            for subzona in subzonas:
-                try:
-                    arcpy.MakeTableView_management(apex_terreno, "vista_terreno")
-                    arcpy.MakeTableView_management(capa_geografica, "vista_geografica")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="vista_terreno",
-                        in_field="Numero_Predial",
-                        join_table="vista_geografica",
-                        join_field="CODIGO",
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Estado = 'ACTIVO' AND CODIGO IS NULL AND SUBSTRING(Numero_Predial,22,1) IN ('5')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(Numero_Predial,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="vista_terreno",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    df = self.process_table_to_dataframe("vista_terreno")
-                    df.to_excel(writer, sheet_name=f'Omision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de omisión mejoras {subzona}: {count}")
+            engine = self.terreno_engine(capa_geografica)
+            self.write_omision(engine, zona, CONDICIONES_MEJORA, output_excel, etiqueta="mejoras ")
 
-                except Exception as e:
-                    self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    self.clean_temp_data()
-
-            writer.close()
             self.log_message("Análisis de omisión de mejoras completado")
 
         except Exception as e:
@@ -1104,56 +745,24 @@ class OmisionComisionProcessor:
         """Analiza la comisión de mejoras"""
         try:
             self.log_message("Analizando comisión de mejoras...")
-            
-            apex_terreno = os.path.join(self.paths['gdb'], "R1_TERRENO")
+
             capa_geografica = os.path.join(self.paths['gdb'], "MEJORAS_TOTAL")
             output_excel = os.path.join(self.paths['output'], f"6_Comision_Mejoras_{zona}.xlsx")
 
             subzonas = ["Urbana", "Rural"] if zona == "Urbana-Rural" else [zona]
-            writer = pd.ExcelWriter(output_excel, engine='xlsxwriter')
+            writer = ResultWriter(output_excel)
 
+            output_subfolder = os.path.join(self.paths['output'], f"6_Shp_Comision_Mejoras_{zona}")
+            if not os.path.exists(output_subfolder):
+                os.makedirs(output_subfolder)
+
+            engine = self.terreno_engine(capa_geografica)
             for subzona in subzonas:
                 try:
-                    arcpy.MakeTableView_management(apex_terreno, "vista_terreno")
-                    arcpy.management.MakeFeatureLayer(capa_geografica, "vista_geografica")
-
-                    arcpy.management.AddJoin(
-                        in_layer_or_view="vista_geografica",
-                        in_field="CODIGO",
-                        join_table="vista_terreno",
-                        join_field="Numero_Predial",
-                        join_type="KEEP_ALL"
-                    )
-
-                    where_clause = "Numero_Predial IS NULL AND SUBSTRING(CODIGO,22,1) IN ('5')"
-                    if subzona == 'Urbana':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) <>'00'"
-                    elif subzona == 'Rural':
-                        where_clause += " AND SUBSTRING(CODIGO,6,2) ='00'"
-
-                    arcpy.management.SelectLayerByAttribute(
-                        in_layer_or_view="vista_geografica",
-                        selection_type="NEW_SELECTION",
-                        where_clause=where_clause
-                    )
-
-                    output_subfolder = os.path.join(self.paths['output'], f"6_Shp_Comision_Mejoras_{zona}")
-                    if not os.path.exists(output_subfolder):
-                        os.makedirs(output_subfolder)
-
                     output_shp = os.path.join(output_subfolder, f"6_Comision_Mejoras_{subzona}.shp")
-                    arcpy.management.CopyFeatures("vista_geografica", output_shp)
-
-                    df = self.process_table_to_dataframe("vista_geografica")
-                    df.to_excel(writer, sheet_name=f'Comision_{subzona}', index=False)
-                    
-                    count = len(df)
-                    self.log_message(f"Cantidad de registros de comisión mejoras {subzona}: {count}")
-
+                    self.write_comision(engine, subzona, CONDICIONES_MEJORA, capa_geografica, writer, output_shp, etiqueta="mejoras ")
                 except Exception as e:
                     self.log_error(f"Error procesando {subzona}: {str(e)}")
-                finally:
-                    self.clean_temp_data()
 
             writer.close()
             self.log_message("Análisis de comisión de mejoras completado")
@@ -1181,6 +790,7 @@ class OmisionComisionProcessor:
                 file_path = os.path.join(self.paths['output'], pattern)
                 if os.path.exists(file_path):
                     os.remove(file_path)
+                remove_results(file_path)
             
             # Eliminar carpetas de shapefiles
             shp_folders = [
@@ -1224,26 +834,26 @@ class OmisionComisionProcessor:
             # Limpiar archivos de salida anteriores
             self.clean_output_files(zona)
             
-            # Crear y cargar tablas R1
-            self.log_message("Creando y cargando tablas R1...")
-            if not self.create_r1_tables():
-                raise Exception("Error en la creación de tablas R1")
-            
             # Cargar datos
             self.log_message("Cargando datos desde archivos CSV...")
+            progress.step("Omisión y comisión", done=0, total=4)
             self.load_r1_data()
             
             # Procesar terrenos
             self.log_message("Iniciando procesamiento de terrenos...")
+            progress.step("Omisión y comisión", done=1, total=4)
             self.process_terrenos(zona)
             
             # Procesar unidades
             self.log_message("Iniciando procesamiento de unidades...")
+            progress.step("Omisión y comisión", done=2, total=4)
             self.process_unidades(zona)
             
             # Procesar mejoras
             self.log_message("Iniciando procesamiento de mejoras...")
+            progress.step("Omisión y comisión", done=3, total=4)
             self.process_mejoras(zona)
+            progress.step("Omisión y comisión", done=4, total=4)
             
             # Limpieza final
             self.clean_temp_data()
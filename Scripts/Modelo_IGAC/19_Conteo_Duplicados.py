@@ -1,7 +1,9 @@
 import os
 import arcpy
-import pandas as pd
 from pathlib import Path
+import pandas as pd
+from ExcelStreamWriter import StreamingXlsxWriter
+from ResultStore import remove_results, write_sheet
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 def find_gdb(root_path):
@@ -66,6 +68,7 @@ def process_duplicates():
         gdb_folder = project_root / "Files" / "Temporary_Files" / "MODELO_IGAC" / "consistencia_formato_temp"
         output_folder = project_root / "Files" / "Temporary_Files" / "MODELO_IGAC" / "Omision_comision_temp"
         output_excel = output_folder / "9_Duplicados.xlsx"
+        remove_results(output_excel)
         
         # Crear directorio para shapefiles
         shp_output_folder = output_folder / "9_Shp_Duplicados"
@@ -117,11 +120,7 @@ def process_duplicates():
                 with arcpy.da.SearchCursor(fc_path, fields_to_retrieve, where_clause) as cursor:
                     for row in cursor:
                         codigo = row[0] if 'CODIGO' in fields else ''
-                        results.append({
-                            'CODIGO': codigo,
-                            'Featureclass': fc_name,
-                            'Dataset': dataset_name
-                        })
+                        results.append((codigo, fc_name, dataset_name))
                         duplicate_count += 1
                 
                 # Si hay duplicados, exportar a shapefile
@@ -141,11 +140,12 @@ def process_duplicates():
                     # Limpiar la capa temporal
                     arcpy.Delete_management(temp_layer)
         
-        # Crear el DataFrame y guardar el Excel
+        # Guardar el Excel
         if results:
-            df = pd.DataFrame(results)
-            with pd.ExcelWriter(str(output_excel), engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Duplicados', index=False)
+            with StreamingXlsxWriter(output_excel) as writer:
+                writer.add_sheet('Duplicados', ['CODIGO', 'Featureclass', 'Dataset'])
+                writer.write_rows(results)
+            write_sheet(output_excel, 'Duplicados', pd.DataFrame(results, columns=['CODIGO', 'Featureclass', 'Dataset']))
             print(f"Excel creado exitosamente en: {output_excel}")
         else:
             print("No se encontraron registros duplicados para procesar")
@@ -5,6 +5,17 @@ from pathlib import Path
 import re
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
+from ResultStore import read_results
+
+# Prefijo del archivo de resultados: (clave del conteo, tipo de hoja)
+RESULT_FILES = {
+    '1_omision_terrenos': ('omision_terrenos', 'Omision'),
+    '2_comision_terrenos': ('comision_terrenos', 'Comision'),
+    '3_omision_unidades': ('omision_unidades', 'Omision'),
+    '4_comision_unidades': ('comision_unidades', 'Comision'),
+    '5_omision_mejoras': ('omision_mejoras', 'Omision'),
+    '6_comision_mejoras': ('comision_mejoras', 'Comision'),
+}
 
 def get_project_root():
     """Encuentra la raíz del proyecto verificando la estructura de directorios esperada."""
@@ -92,10 +103,16 @@ def get_sheet_names(file_name):
     return None
 
 
+def classify_records(numeros_prediales):
+    """Versión vectorizada de classify_record: máscara booleana de los registros RURAL."""
+    predial_str = numeros_prediales.astype(str).str.replace('.0', '', regex=False)
+    return ((predial_str.str.len() >= 7) & (predial_str.str.slice(5, 7) == '00')).to_numpy()
+
 def process_duplicates(df, codigo_column):
     """Procesa y separa los duplicados en rurales y urbanos."""
-    df_rural = df[df[codigo_column].apply(lambda x: classify_record(x) == 'RURAL')].copy()
-    df_urbano = df[df[codigo_column].apply(lambda x: classify_record(x) == 'URBANO')].copy()
+    rural = classify_records(df[codigo_column])
+    df_rural = df[rural].copy()
+    df_urbano = df[~rural].copy()
     return df_rural, df_urbano
 
 def get_correct_sheet_name(file_name, sheet_type):
@@ -210,7 +227,7 @@ def process_excel_files():
             'duplicados': {'rural': None, 'urbano': None}
         }
         
-        print("\nProcesando archivos Excel...")
+        print("\nProcesando archivos de resultados...")
         
         for excel_file in excel_dir.glob('*.xlsx'):
             if excel_file.name == output_file.name:
@@ -218,69 +235,33 @@ def process_excel_files():
                 
             print(f"\nProcesando archivo: {excel_file.name}")
             file_name = excel_file.name.lower()
-            xl = pd.ExcelFile(excel_file)
-            available_sheets = xl.sheet_names
             
             try:
+                # Hojas del libro desde los Parquet de la etapa (o desde el .xlsx)
+                sheets = read_results(excel_file)
+                
                 # Determinar si es rural, urbano o dual
                 is_rural = 'rural' in file_name and 'urbana' not in file_name
                 is_urban = 'urbana' in file_name and 'rural' not in file_name
                 is_dual = 'urbana-rural' in file_name
                 
-                # Procesar cada tipo de archivo
-                if '1_omision_terrenos' in file_name:
-                    if (is_rural or is_dual) and 'Omision_Rural' in available_sheets:
-                        data['omision_terrenos']['rural'] = pd.read_excel(xl, 'Omision_Rural')
-                        print(f"  Procesada hoja Omision_Rural con {len(data['omision_terrenos']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Omision_Urbana' in available_sheets:
-                        data['omision_terrenos']['urbano'] = pd.read_excel(xl, 'Omision_Urbana')
-                        print(f"  Procesada hoja Omision_Urbana con {len(data['omision_terrenos']['urbano'])} registros")
-
-                elif '2_comision_terrenos' in file_name:
-                    if (is_rural or is_dual) and 'Comision_Rural' in available_sheets:
-                        data['comision_terrenos']['rural'] = pd.read_excel(xl, 'Comision_Rural')
-                        print(f"  Procesada hoja Comision_Rural con {len(data['comision_terrenos']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Comision_Urbana' in available_sheets:
-                        data['comision_terrenos']['urbano'] = pd.read_excel(xl, 'Comision_Urbana')
-                        print(f"  Procesada hoja Comision_Urbana con {len(data['comision_terrenos']['urbano'])} registros")
-
-                elif '3_omision_unidades' in file_name:
-                    if (is_rural or is_dual) and 'Omision_Rural' in available_sheets:
-                        data['omision_unidades']['rural'] = pd.read_excel(xl, 'Omision_Rural')
-                        print(f"  Procesada hoja Omision_Rural con {len(data['omision_unidades']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Omision_Urbana' in available_sheets:
-                        data['omision_unidades']['urbano'] = pd.read_excel(xl, 'Omision_Urbana')
-                        print(f"  Procesada hoja Omision_Urbana con {len(data['omision_unidades']['urbano'])} registros")
-
-                elif '4_comision_unidades' in file_name:
-                    if (is_rural or is_dual) and 'Comision_Rural' in available_sheets:
-                        data['comision_unidades']['rural'] = pd.read_excel(xl, 'Comision_Rural')
-                        print(f"  Procesada hoja Comision_Rural con {len(data['comision_unidades']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Comision_Urbana' in available_sheets:
-                        data['comision_unidades']['urbano'] = pd.read_excel(xl, 'Comision_Urbana')
-                        print(f"  Procesada hoja Comision_Urbana con {len(data['comision_unidades']['urbano'])} registros")
-
-                elif '5_omision_mejoras' in file_name:
-                    if (is_rural or is_dual) and 'Omision_Rural' in available_sheets:
-                        data['omision_mejoras']['rural'] = pd.read_excel(xl, 'Omision_Rural')
-                        print(f"  Procesada hoja Omision_Rural con {len(data['omision_mejoras']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Omision_Urbana' in available_sheets:
-                        data['omision_mejoras']['urbano'] = pd.read_excel(xl, 'Omision_Urbana')
-                        print(f"  Procesada hoja Omision_Urbana con {len(data['omision_mejoras']['urbano'])} registros")
-
-                elif '6_comision_mejoras' in file_name:
-                    if (is_rural or is_dual) and 'Comision_Rural' in available_sheets:
-                        data['comision_mejoras']['rural'] = pd.read_excel(xl, 'Comision_Rural')
-                        print(f"  Procesada hoja Comision_Rural con {len(data['comision_mejoras']['rural'])} registros")
-                    if (is_urban or is_dual) and 'Comision_Urbana' in available_sheets:
-                        data['comision_mejoras']['urbano'] = pd.read_excel(xl, 'Comision_Urbana')
-                        print(f"  Procesada hoja Comision_Urbana con {len(data['comision_mejoras']['urbano'])} registros")
-
-                elif '9_duplicados' in file_name:
-                    df = pd.read_excel(xl)
+                if '9_duplicados' in file_name:
+                    df = next(iter(sheets.values()))
                     print(f"  Procesada hoja Duplicados con {len(df)} registros")
-                    data['duplicados']['rural'] = df[df['CODIGO'].apply(lambda x: classify_record(x) == 'RURAL')]
-                    data['duplicados']['urbano'] = df[df['CODIGO'].apply(lambda x: classify_record(x) == 'URBANO')]
+                    data['duplicados']['rural'], data['duplicados']['urbano'] = process_duplicates(df, 'CODIGO')
+                    continue
+                
+                # Procesar cada tipo de archivo
+                for prefix, (key, kind) in RESULT_FILES.items():
+                    if prefix not in file_name:
+                        continue
+                    for zone, sheet_zone, applies in (('rural', 'Rural', is_rural or is_dual),
+                                                      ('urbano', 'Urbana', is_urban or is_dual)):
+                        sheet = f"{kind}_{sheet_zone}"
+                        if applies and sheet in sheets:
+                            data[key][zone] = sheets[sheet]
+                            print(f"  Procesada hoja {sheet} con {len(data[key][zone])} registros")
+                    break
 
             except Exception as e:
                 print(f"Error procesando {file_name}: {str(e)}")
@@ -13,6 +13,8 @@ import arcpy
 from datetime import datetime
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
+from WordTemplateRenderer import TemplateRenderer
+from ReportVariableResolver import ReportDataResolver, RULE_GROUPS, rule_group_counts
 class WordAutomation:
     def __init__(self):
         """Inicializa la automatización con mejor manejo de archivos temporales"""
@@ -59,6 +61,9 @@ class WordAutomation:
                 'registro_errores': self.temp_root / "db" / "registro_errores.db"
             }
             
+            # Conexiones y consultas compartidas durante la ejecución del reporte
+            self.resolver = ReportDataResolver()
+            
             # Verificar existencia de bases de datos
             print("\nVerificando rutas de bases de datos:")
             missing_dbs = []
@@ -174,23 +179,15 @@ class WordAutomation:
             raise
 
     def execute_sql_query(self, db_path, query, params=None):
-        """Ejecuta una consulta SQL y retorna el resultado con mejor manejo de errores"""
+        """Ejecuta una consulta SQL con la conexión compartida y retorna el primer valor"""
         try:
-            if not Path(db_path).exists():
-                raise FileNotFoundError(f"Base de datos no encontrada: {db_path}")
+            result = self.resolver.fetchone(db_path, query, params)
                 
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.cursor()
-                if params:
-                    result = cursor.execute(query, params).fetchone()
-                else:
-                    result = cursor.execute(query).fetchone()
-                    
-                if result is None:
-                    print(f"[ADVERTENCIA] La consulta no retornó resultados: {query}")
-                    return 0
-                    
-                return result[0] if result else 0
+            if result is None:
+                print(f"[ADVERTENCIA] La consulta no retornó resultados: {query}")
+                return 0
+                
+            return result[0] if result else 0
                 
         except sqlite3.Error as e:
             print(f"[ERROR] Error en la base de datos: {e}")
@@ -327,16 +324,22 @@ class WordAutomation:
         ]
         
         try:
-            # Procesar cada variable base y su versión con guion bajo
+            # Una sola lectura de la fila de conteos del dataset
             print("\nProcesando variables individuales:")
+            try:
+                row = self.resolver.first_row(self.db_paths['conteo'], dataset)
+            except Exception as e:
+                print(f"[ERROR] Error leyendo conteos de {dataset}: {e}")
+                row = {}
+            row = {column.upper(): value for column, value in row.items()}
+
             for var_name in base_vars:
                 try:
-                    # Consulta para obtener el valor de la variable
-                    query = f"SELECT {var_name} FROM {dataset} LIMIT 1"
-                    value = self.execute_sql_query(self.db_paths['conteo'], query)
+                    value = row.get(var_name.upper())
+                    if value is None:
+                        raise KeyError(f"sin valor en {dataset}")
                     variables[var_name] = value
                     
-                    # Procesar versión con guion bajo
                     var_underscore = f"{var_name}_"
                     variables[var_underscore] = "" if value > 0 else "Vacía"
                     
@@ -347,17 +350,12 @@ class WordAutomation:
                     variables[var_name] = 0
                     variables[f"{var_name}_"] = "Vacía"
 
-            # Calcular total_conteo
             try:
-                total_query = f"SELECT ({' + '.join(base_vars)}) FROM {dataset} LIMIT 1"
-                variables['total_conteo'] = self.execute_sql_query(self.db_paths['conteo'], total_query)
+                variables['total_conteo'] = sum(variables[var] for var in base_vars)
                 print(f"\nTotal conteo calculado: {variables['total_conteo']}")
-                
             except Exception as e:
                 print(f"[ERROR] Error calculando total_conteo: {e}")
-                # Si falla la consulta, sumar los valores individuales
-                variables['total_conteo'] = sum(variables[var] for var in base_vars)
-                print(f"Total conteo calculado por suma: {variables['total_conteo']}")
+                variables['total_conteo'] = 0
             
             return variables
             
@@ -371,79 +369,18 @@ class WordAutomation:
         results = {}
         
         try:
-            # Consultas para registro_errores.db adaptadas para urbano
-            error_queries = {
-                'no_huecos': """
-                    SELECT COUNT(*) AS cantidad 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Not Have Gaps', 'No debe tener espacios')
-                """,
-                'no_superponer': """
-                    SELECT COUNT(*) AS cantidad 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Not Overlap', 'No debe superponerse')
-                """,
-                'cubierto_por': """
-                    SELECT COUNT(*) AS cantidad 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Be Covered By Feature Class Of', 'Debe ser cubierto por la clase de entidad de')
-                """,
-                'cubrirse_entre': """
-                    SELECT COUNT(*) AS cantidad 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Cover Each Other', 'Deben cubrirse entre ellos')
-                """
-            }
-
-            # Consultas para excepciones adaptadas para urbano
-            exception_queries = {
-                'no_huecos_': """
-                    SELECT COUNT(*) 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Not Have Gaps', 'No debe tener espacios')
-                    AND IsException != 0
-                """,
-                'no_superponer_': """
-                    SELECT COUNT(*) 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Not Overlap', 'No debe superponerse')
-                    AND IsException != 0
-                """,
-                'cubierto_por_': """
-                    SELECT COUNT(*) 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Be Covered By Feature Class Of', 'Debe ser cubierto por la clase de entidad de')
-                    AND IsException != 0
-                """,
-                'cubrirse_entre_': """
-                    SELECT COUNT(*) 
-                    FROM URBANO 
-                    WHERE RuleDescription IN ('Must Cover Each Other', 'Deben cubrirse entre ellos')
-                    AND IsException != 0
-                """
-            }
-            
-            # Procesar errores desde registro_errores.db
-            print("Procesando errores desde registro_errores.db...")
-            for var_name, query in error_queries.items():
-                try:
-                    results[var_name] = self.execute_sql_query(self.db_paths['registro_errores'], query)
-                    print(f"[OK] {var_name}: {results[var_name]}")
-                except Exception as e:
-                    print(f"[ERROR] Error procesando {var_name}: {e}")
-                    results[var_name] = 0
-
-            # Procesar excepciones
-            print("\nProcesando excepciones...")
-            for var_name, query in exception_queries.items():
-                try:
-                    results[var_name] = self.execute_sql_query(self.db_paths['registro_errores'], query)
-                    print(f"[OK] {var_name}: {results[var_name]}")
-                except Exception as e:
-                    print(f"[ERROR] Error procesando {var_name}: {e}")
-                    results[var_name] = 0
-            
+            # Errores y excepciones de registro_errores.db en una sola consulta agrupada por regla
+            print("Procesando errores y excepciones desde registro_errores.db...")
+            try:
+                counts = self.resolver.rule_counts(self.db_paths['registro_errores'], 'URBANO', 'IsException')
+            except Exception as e:
+                print(f"[ERROR] Error consultando registro_errores.db: {e}")
+                counts = {}
             
+            results.update(rule_group_counts(counts))
+            for var_name in RULE_GROUPS:
+                print(f"[OK] {var_name}: {results[var_name]}")
+                print(f"[OK] {var_name}_: {results[f'{var_name}_']}")
 
             # Calcular sumas con validación
             print("\nCalculando sumas...")
@@ -572,7 +509,8 @@ class WordAutomation:
             print(f"\nProcesando documento Word para dataset {dataset}...")
             
             # Obtener variables procesadas
-            variables = self.process_dataset_variables(dataset)
+            variables = self.resolver.remember(
+                ('variables', dataset), lambda: self.process_dataset_variables(dataset))
             
             # Buscar el documento en nuestra carpeta temporal
             docx_files = list(self.process_temp_path.glob("*.docx"))
@@ -587,75 +525,9 @@ class WordAutomation:
             temp_output_path = self.process_temp_path / output_name
             final_output_path = self.temp_root / output_name
             
-            # Cargar el documento
-            doc = Document(template_file)
-            replacements = 0
-
-            def replace_text_in_paragraph(paragraph):
-                """Reemplaza texto en un párrafo completo"""
-                nonlocal replacements
-                
-                if not paragraph.runs:
-                    return
-                    
-                # Obtener texto completo del párrafo
-                full_text = paragraph.text
-                new_text = full_text
-                
-                # Buscar todas las variables en el texto
-                found_replacements = False
-                for var_name, value in variables.items():
-                    placeholder = f"{{{var_name}}}"
-                    if placeholder in new_text:
-                        try:
-                            new_text = new_text.replace(placeholder, str(value))
-                            replacements += 1
-                            found_replacements = True
-                            print(f"  [OK] Reemplazo: {placeholder} -> {value}")
-                        except Exception as e:
-                            print(f"  [ERROR] Error reemplazando {placeholder}: {e}")
-                
-                # Si se encontraron reemplazos, actualizar el párrafo
-                if found_replacements:
-                    try:
-                        # Preservar el formato del primer run
-                        first_run = paragraph.runs[0]
-                        if first_run:
-                            font_name = first_run.font.name
-                            font_size = first_run.font.size
-                            bold = first_run.font.bold
-                            italic = first_run.font.italic
-                            
-                            # Limpiar el párrafo
-                            for run in paragraph.runs[1:]:
-                                run.text = ""
-                            
-                            # Establecer el nuevo texto con el formato preservado
-                            first_run.text = new_text
-                            first_run.font.name = font_name
-                            first_run.font.size = font_size
-                            first_run.font.bold = bold
-                            first_run.font.italic = italic
-                        else:
-                            # Si no hay runs, crear uno nuevo
-                            new_run = paragraph.add_run(new_text)
-                            
-                    except Exception as e:
-                        print(f"  [ERROR] Error actualizando formato: {e}")
-
-            # Procesar párrafos
-            for paragraph in doc.paragraphs:
-                replace_text_in_paragraph(paragraph)
-            
-            # Procesar tablas
-            for table_index, table in enumerate(doc.tables, 1):
-                for row_index, row in enumerate(table.rows, 1):
-                    for cell_index, cell in enumerate(row.cells, 1):
-                        for paragraph in cell.paragraphs:
-                            original_text = paragraph.text
-                            replace_text_in_paragraph(paragraph)
-                            if original_text != paragraph.text:
-                                print(f"  [OK] Reemplazo en tabla {table_index}, fila {row_index}, celda {cell_index}")
+            # Reemplazar variables en una sola pasada sobre el índice de la plantilla
+            renderer = TemplateRenderer(template_file, self.temp_root / "word_template_index")
+            doc, replacements = renderer.render(variables)
 
             print(f"\nTotal de reemplazos realizados: {replacements}")
             
@@ -1072,6 +944,7 @@ class WordAutomation:
             
             # Limpiar archivos temporales del proceso
             self.cleanup_process_files()
+            self.resolver.close()
             
             print(f"\n{'='*50}")
             print("Proceso URBANO Finalizado")
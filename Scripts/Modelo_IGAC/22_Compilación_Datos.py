@@ -5,6 +5,7 @@ import glob
 import logging
 import subprocess
 import sys
+from WorkbookSession import flush_pending
 sys.stdout.reconfigure(encoding='utf-8')
 # Configuración del logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -283,6 +284,15 @@ class MinisoftOrganizer:
             logger.error(f"Error copiando archivos DOCX: {str(e)}")
             return False
 
+    def apply_pending_workbook_changes(self):
+        """Aplica los cambios de Excel diferidos por las etapas anteriores antes de copiar los formatos"""
+        try:
+            flushed = flush_pending(self.temp_files_path)
+            if flushed:
+                logger.info(f"Cambios pendientes aplicados en {len(flushed)} archivos Excel")
+        except Exception as e:
+            logger.error(f"Error al aplicar cambios pendientes en Excel: {str(e)}")
+
     def run(self):
         """Ejecuta todo el proceso de organización"""
         logger.info("Iniciando proceso de organización de archivos")
@@ -299,6 +309,7 @@ class MinisoftOrganizer:
 
         # Ejecutar todos los procesos
         processes = [
+            self.apply_pending_workbook_changes,
             self.copy_gdb_files,
             self.process_omision_comision,
             self.process_topologia,
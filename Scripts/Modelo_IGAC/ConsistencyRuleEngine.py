@@ -0,0 +1,439 @@
+import re
+import numpy as np
+import pandas as pd
+
+
+class RuleCompileError(Exception):
+    """La expresión SQL usa una construcción que el motor no soporta"""
+    pass
+
+
+class RuleEvaluationError(Exception):
+    """La expresión no se puede evaluar sobre los datos (campo faltante, CAST inválido...)"""
+    pass
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<op><>|!=|<=|>=|\|\||[=<>(),])
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_\.]*)
+""", re.VERBOSE)
+
+_KEYWORDS = {'AND', 'OR', 'NOT', 'LIKE', 'IN', 'IS', 'NULL', 'CAST', 'AS', 'BETWEEN'}
+_FUNCTIONS = {'SUBSTRING', 'CHAR_LENGTH', 'CHARACTER_LENGTH', 'UPPER', 'LOWER', 'TRIM'}
+_CAST_TYPES = {'FLOAT', 'DOUBLE', 'REAL', 'INTEGER', 'INT', 'SMALLINT', 'CHAR', 'VARCHAR'}
+
+
+def _tokenize(expression):
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match:
+            raise RuleCompileError(f"Carácter no soportado en posición {pos}: {expression[pos:pos + 10]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'ws':
+            continue
+        if kind == 'string':
+            tokens.append(('string', value[1:-1].replace("''", "'")))
+        elif kind == 'number':
+            tokens.append(('number', float(value) if '.' in value else int(value)))
+        elif kind == 'ident' and value.upper() in _KEYWORDS:
+            tokens.append(('kw', value.upper()))
+        elif kind == 'ident':
+            tokens.append(('ident', value))
+        else:
+            tokens.append(('op', '<>' if value == '!=' else value))
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser:
+    """Parser descendente recursivo para el subconjunto SQL de las reglas de consistencia"""
+
+    def __init__(self, expression):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind, value=None):
+        token = self.next()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise RuleCompileError(f"Se esperaba {value or kind} y se encontró {token[1]!r}")
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] != 'end':
+            raise RuleCompileError(f"Token inesperado: {self.peek()[1]!r}")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept('kw', 'OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept('kw', 'AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept('kw', 'NOT'):
+            return ('not', self.parse_not())
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        left = self.parse_concat()
+        token = self.peek()
+
+        if token[0] == 'op' and token[1] in ('=', '<>', '<', '>', '<=', '>='):
+            self.next()
+            return ('cmp', token[1], left, self.parse_concat())
+
+        if token == ('kw', 'IS'):
+            self.next()
+            negated = self.accept('kw', 'NOT')
+            self.expect('kw', 'NULL')
+            node = ('isnull', left)
+            return ('not', node) if negated else node
+
+        negated = False
+        if token == ('kw', 'NOT') and self.peek(1)[0] == 'kw' and self.peek(1)[1] in ('LIKE', 'IN', 'BETWEEN'):
+            self.next()
+            negated = True
+
+        if self.accept('kw', 'LIKE'):
+            pattern = self.expect('string')[1]
+            node = ('like', left, pattern)
+        elif self.accept('kw', 'IN'):
+            self.expect('op', '(')
+            values = [self.parse_literal()]
+            while self.accept('op', ','):
+                values.append(self.parse_literal())
+            self.expect('op', ')')
+            node = ('in', left, tuple(values))
+        elif self.accept('kw', 'BETWEEN'):
+            lower = self.parse_concat()
+            self.expect('kw', 'AND')
+            upper = self.parse_concat()
+            node = ('and', ('cmp', '>=', left, lower), ('cmp', '<=', left, upper))
+        elif negated:
+            raise RuleCompileError("NOT sin LIKE/IN/BETWEEN")
+        else:
+            return left
+
+        return ('not', node) if negated else node
+
+    def parse_literal(self):
+        token = self.next()
+        if token[0] in ('string', 'number'):
+            return token[1]
+        raise RuleCompileError(f"Se esperaba un literal y se encontró {token[1]!r}")
+
+    def parse_concat(self):
+        node = self.parse_primary()
+        while self.accept('op', '||'):
+            node = ('concat', node, self.parse_primary())
+        return node
+
+    def parse_primary(self):
+        token = self.next()
+        kind, value = token
+
+        if kind == 'op' and value == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if kind == 'string':
+            return ('lit', value)
+        if kind == 'number':
+            return ('lit', value)
+        if kind == 'kw' and value == 'NULL':
+            return ('lit', None)
+        if kind == 'kw' and value == 'CAST':
+            self.expect('op', '(')
+            inner = self.parse_concat()
+            self.expect('kw', 'AS')
+            target = self.expect('ident')[1].upper()
+            if target not in _CAST_TYPES:
+                raise RuleCompileError(f"CAST a tipo no soportado: {target}")
+            self.expect('op', ')')
+            return ('cast', inner, target)
+        if kind == 'ident' and self.peek() == ('op', '('):
+            name = value.upper()
+            if name not in _FUNCTIONS:
+                raise RuleCompileError(f"Función no soportada: {value}")
+            self.next()
+            args = [self.parse_concat()]
+            while self.accept('op', ','):
+                args.append(self.parse_concat())
+            self.expect('op', ')')
+            return ('func', name, tuple(args))
+        if kind == 'ident':
+            return ('col', value)
+        raise RuleCompileError(f"Token inesperado: {value!r}")
+
+
+def _like_to_regex(pattern):
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+def _as_boolean(values, null_mask):
+    result = pd.array(np.asarray(values, dtype=bool), dtype="boolean")
+    if null_mask is not None and null_mask.any():
+        result[np.asarray(null_mask, dtype=bool)] = pd.NA
+    return pd.Series(result)
+
+
+def _as_text(series):
+    """Convierte una serie a texto conservando los nulos"""
+    if series.dtype == object:
+        return series
+    text = series.astype(object).where(series.notna(), None)
+    return text.map(lambda v: v if v is None else _format_number(v))
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _as_number(series):
+    if _is_numeric(series):
+        return series.astype(float)
+    try:
+        values = [np.nan if v is None or v != v else float(v) for v in series]
+    except (ValueError, TypeError) as e:
+        raise RuleEvaluationError(f"Valor no numérico en CAST/comparación: {str(e)}")
+    return pd.Series(np.asarray(values, dtype=float), index=series.index)
+
+
+class CompiledRule:
+    """Regla (where-clause + descripción) compilada a un árbol evaluable sobre un DataFrame"""
+
+    def __init__(self, query, error_desc):
+        self.query = query
+        self.error_desc = error_desc
+        self.tree = _Parser(query).parse()
+
+    def evaluate(self, frame, column_map):
+        """Devuelve una máscara booleana (sin nulos) con los registros que cumplen la expresión"""
+        self._frame = frame
+        self._column_map = column_map
+        try:
+            result = self._eval(self.tree)
+        finally:
+            self._frame = None
+            self._column_map = None
+
+        if not isinstance(result, pd.Series) or str(result.dtype) != 'boolean':
+            raise RuleEvaluationError("La expresión no produce un resultado lógico")
+        return result.fillna(False).to_numpy(dtype=bool)
+
+    def _broadcast(self, value):
+        if isinstance(value, pd.Series):
+            return value
+        if value is None:
+            return pd.Series([None] * len(self._frame), dtype=object)
+        if isinstance(value, str):
+            return pd.Series([value] * len(self._frame), dtype=object)
+        return pd.Series(np.full(len(self._frame), float(value)))
+
+    def _eval(self, node):
+        kind = node[0]
+
+        if kind == 'lit':
+            return node[1]
+
+        if kind == 'col':
+            real_name = self._column_map.get(node[1].upper())
+            if real_name is None:
+                raise RuleEvaluationError(f"Campo inexistente: {node[1]}")
+            return self._frame[real_name]
+
+        if kind == 'or':
+            return self._logical(node[1]) | self._logical(node[2])
+
+        if kind == 'and':
+            return self._logical(node[1]) & self._logical(node[2])
+
+        if kind == 'not':
+            return ~self._logical(node[1])
+
+        if kind == 'isnull':
+            series = self._broadcast(self._eval(node[1]))
+            return pd.Series(pd.array(series.isna().to_numpy(), dtype="boolean"))
+
+        if kind == 'cmp':
+            return self._compare(node[1], self._eval(node[2]), self._eval(node[3]))
+
+        if kind == 'like':
+            series = _as_text(self._broadcast(self._eval(node[1])))
+            null_mask = series.isna().to_numpy()
+            pattern = node[2]
+            filled = series.fillna('')
+            if '%' not in pattern and '_' not in pattern:
+                values = (filled == pattern).to_numpy()
+            else:
+                regex = _like_to_regex(pattern)
+                values = np.fromiter((regex.fullmatch(v) is not None for v in filled), dtype=bool, count=len(filled))
+            return _as_boolean(values, null_mask)
+
+        if kind == 'in':
+            series = self._broadcast(self._eval(node[1]))
+            null_mask = series.isna().to_numpy()
+            options = node[2]
+            if _is_numeric(series):
+                options = [float(v) for v in options]
+            else:
+                series = _as_text(series)
+                options = [v if isinstance(v, str) else _format_number(v) for v in options]
+            return _as_boolean(series.isin(options).to_numpy(), null_mask)
+
+        if kind == 'concat':
+            left = _as_text(self._broadcast(self._eval(node[1])))
+            right = _as_text(self._broadcast(self._eval(node[2])))
+            null_mask = left.isna() | right.isna()
+            joined = left.fillna('') + right.fillna('')
+            return joined.where(~null_mask, None)
+
+        if kind == 'cast':
+            series = self._broadcast(self._eval(node[1]))
+            if node[2] in ('CHAR', 'VARCHAR'):
+                return _as_text(series)
+            return _as_number(series)
+
+        if kind == 'func':
+            return self._function(node[1], [self._eval(arg) for arg in node[2]])
+
+        raise RuleCompileError(f"Nodo no soportado: {kind}")
+
+    def _logical(self, node):
+        value = self._eval(node)
+        if not isinstance(value, pd.Series) or str(value.dtype) != 'boolean':
+            raise RuleEvaluationError("Operando lógico inválido")
+        return value
+
+    def _function(self, name, args):
+        if name in ('CHAR_LENGTH', 'CHARACTER_LENGTH'):
+            series = _as_text(self._broadcast(args[0]))
+            return series.str.len().astype(float)
+        if name == 'SUBSTRING':
+            if len(args) != 3 or not all(isinstance(a, (int, float)) for a in args[1:]):
+                raise RuleEvaluationError("SUBSTRING requiere posición y longitud literales")
+            start = int(args[1]) - 1
+            length = int(args[2])
+            series = _as_text(self._broadcast(args[0]))
+            return series.str.slice(start, start + length).where(series.notna(), None)
+        if name == 'UPPER':
+            return _as_text(self._broadcast(args[0])).str.upper()
+        if name == 'LOWER':
+            return _as_text(self._broadcast(args[0])).str.lower()
+        if name == 'TRIM':
+            return _as_text(self._broadcast(args[0])).str.strip()
+        raise RuleCompileError(f"Función no soportada: {name}")
+
+    def _compare(self, operator, left, right):
+        left = self._broadcast(left)
+        right = self._broadcast(right)
+        null_mask = (left.isna() | right.isna()).to_numpy()
+
+        if _is_numeric(left) or _is_numeric(right):
+            left_values = _as_number(left).fillna(0).to_numpy()
+            right_values = _as_number(right).fillna(0).to_numpy()
+        else:
+            left_values = _as_text(left).fillna('').to_numpy(dtype=object)
+            right_values = _as_text(right).fillna('').to_numpy(dtype=object)
+
+        if operator == '=':
+            values = left_values == right_values
+        elif operator == '<>':
+            values = left_values != right_values
+        elif operator == '<':
+            values = left_values < right_values
+        elif operator == '>':
+            values = left_values > right_values
+        elif operator == '<=':
+            values = left_values <= right_values
+        else:
+            values = left_values >= right_values
+
+        return _as_boolean(values, null_mask)
+
+
+class ConsistencyRuleEngine:
+    """
+    Compila el catálogo de reglas de definir_queries() una sola vez y evalúa
+    todas las reglas de un feature class en una única pasada vectorizada.
+    Las reglas que no se pueden compilar quedan marcadas para ejecutarse con arcpy.
+    """
+
+    def __init__(self, queries):
+        self.compiled = {}
+        self.fallback = {}
+        for dataset, fc_rules in queries.items():
+            for fc, rules in fc_rules.items():
+                compiled_rules = []
+                for query, error_desc in rules:
+                    try:
+                        compiled_rules.append(CompiledRule(query, error_desc))
+                    except RuleCompileError:
+                        compiled_rules.append(None)
+                        self.fallback.setdefault((dataset, fc), []).append(query)
+                self.compiled[(dataset, fc)] = compiled_rules
+
+    def rules_for(self, dataset, fc):
+        return self.compiled.get((dataset, fc), [])
+
+    @staticmethod
+    def build_frame(field_names, rows, field_types=None):
+        """Construye el DataFrame columnar a partir de las filas leídas del cursor"""
+        frame = pd.DataFrame.from_records(rows, columns=field_names) if rows else pd.DataFrame(columns=field_names)
+        for name in field_names:
+            field_type = (field_types or {}).get(name)
+            if field_type in ('SmallInteger', 'Integer', 'BigInteger', 'Double', 'Single'):
+                frame[name] = pd.to_numeric(frame[name], errors='coerce').astype(float)
+            else:
+                column = frame[name].astype(object)
+                frame[name] = column.map(lambda v: v if v is None or isinstance(v, str) else str(v)).where(column.notna(), None)
+        return frame.reset_index(drop=True)
+
+    @staticmethod
+    def evaluate(rule, frame):
+        """Evalúa una regla compilada y devuelve la máscara de registros con error"""
+        column_map = {name.upper(): name for name in frame.columns}
+        return rule.evaluate(frame, column_map)
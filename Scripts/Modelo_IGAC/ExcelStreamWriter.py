@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import xlsxwriter
+import xlsxwriter.exceptions
+
+
+# Máximo de caracteres que Excel admite en una celda
+EXCEL_MAX_CHARS = 32767
+
+
+def coerce_text_block(rows):
+    """
+    Convierte un bloque de filas a texto columna por columna. Las columnas de
+    dtype object pasan por astype(str).str.slice(0, EXCEL_MAX_CHARS) en un solo
+    paso, con los nulos como ''; las columnas numéricas y de fechas no se tocan.
+    Devuelve un DataFrame.
+    """
+    frame = pd.DataFrame.from_records(rows) if len(rows) else pd.DataFrame()
+    for col in frame.columns:
+        series = frame[col]
+        if series.dtype == object:
+            frame[col] = series.astype(str).str.slice(0, EXCEL_MAX_CHARS).where(series.notna(), '')
+    return frame
+
+
+class StreamingXlsxWriter:
+    """
+    Escritor XLSX de solo escritura con memoria constante (XlsxWriter en modo
+    constant_memory). Las filas se escriben por bloques a medida que llegan del
+    cursor, así que el consumo de memoria no depende del número de registros.
+
+    Con as_text=True (por defecto) todos los valores se escriben como texto;
+    con as_text=False se conservan los tipos nativos (números, fechas).
+    El archivo solo se crea si se agrega al menos una hoja.
+    """
+
+    def __init__(self, path, as_text=True, chunk_size=5000):
+        self.path = str(path)
+        self.as_text = as_text
+        self.chunk_size = chunk_size
+        self.sheets = 0
+        self._workbook = None
+        self._worksheet = None
+        self._row = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _open(self):
+        if self._workbook is None:
+            self._workbook = xlsxwriter.Workbook(self.path, {
+                'constant_memory': True,
+                'strings_to_numbers': False,
+                'strings_to_formulas': False,
+                'strings_to_urls': False,
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            })
+            self._header_format = self._workbook.add_format({'bold': True})
+        return self._workbook
+
+    def add_sheet(self, name, columns):
+        """Crea una hoja nueva con su fila de encabezados; las filas siguientes van a esta hoja"""
+        workbook = self._open()
+        self._worksheet = workbook.add_worksheet(name)
+        self._worksheet.write_row(0, 0, [str(c) for c in columns], self._header_format)
+        self._row = 1
+        self.sheets += 1
+        return self._worksheet
+
+    def write_rows(self, rows):
+        """Escribe filas (cualquier iterable de secuencias) en la hoja actual; devuelve cuántas"""
+        if self._worksheet is None:
+            raise RuntimeError("Debe crear una hoja con add_sheet antes de escribir filas")
+
+        written = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                written += self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            written += self._write_chunk(chunk)
+        return written
+
+    def write_frame(self, name, frame):
+        """Escribe un DataFrame completo como una hoja nueva"""
+        self.add_sheet(name, frame.columns)
+        return self.write_rows(frame.itertuples(index=False, name=None))
+
+    def _write_chunk(self, chunk):
+        worksheet = self._worksheet
+        if self.as_text:
+            block = coerce_text_block(chunk)
+            for values in block.itertuples(index=False, name=None):
+                for col, value in enumerate(values):
+                    if isinstance(value, str):
+                        if value:
+                            worksheet.write_string(self._row, col, value)
+                    elif value == value:  # NaN y NaT son distintos de sí mismos
+                        worksheet.write_string(self._row, col, str(value))
+                self._row += 1
+        else:
+            for values in chunk:
+                for col, value in enumerate(values):
+                    if value is None or (isinstance(value, float) and np.isnan(value)):
+                        continue
+                    if isinstance(value, str) and len(value) > EXCEL_MAX_CHARS:
+                        value = value[:EXCEL_MAX_CHARS]
+                    worksheet.write(self._row, col, value)
+                self._row += 1
+        return len(chunk)
+
+    def close(self, fallback_path=None):
+        """
+        Cierra el libro y escribe el archivo. Si el archivo no se puede crear (p. ej.
+        está abierto en Excel) y se indica fallback_path, se guarda allí.
+        Devuelve la ruta escrita o None si no se agregó ninguna hoja.
+        """
+        if self._workbook is None:
+            return None
+        workbook = self._workbook
+        self._workbook = None
+        self._worksheet = None
+        try:
+            workbook.close()
+        except xlsxwriter.exceptions.FileCreateError:
+            if fallback_path is None:
+                raise
+            workbook.filename = str(fallback_path)
+            workbook.close()
+        return workbook.filename
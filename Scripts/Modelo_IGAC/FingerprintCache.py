@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+
+# Cambiar cuando cambie la forma de calcular la huella o el formato de los resultados
+FINGERPRINT_VERSION = 1
+
+_EXCLUDED_FIELDS = ('SHAPE_LENGTH', 'SHAPE_AREA', 'SHAPE.LEN', 'SHAPE.AREA')
+
+
+def cache_dir_for(temp_dir):
+    """
+    Carpeta de la caché de huellas para la carpeta temporal de un modelo
+    (Temporary_Files/MODELO_IGAC -> Temporary_Files/fingerprint_cache/MODELO_IGAC).
+    Queda fuera de la carpeta del modelo porque la interfaz la vacía al
+    empezar una ejecución desde cero, que es cuando la caché hace falta.
+    """
+    temp_dir = os.path.normpath(temp_dir)
+    return os.path.join(os.path.dirname(temp_dir), 'fingerprint_cache', os.path.basename(temp_dir))
+
+
+def rules_digest(rules):
+    """Huella estable de la definición de un conjunto de reglas (listas, dicts, textos)"""
+    payload = json.dumps([FINGERPRINT_VERSION, rules], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def hash_rows(rows, schema=()):
+    """
+    Huella del contenido: cada fila es una secuencia de atributos cuyo último
+    elemento es la geometría en WKB. Devuelve (número de filas, hexdigest).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(tuple(schema)).encode('utf-8'))
+    count = 0
+    for row in rows:
+        digest.update(repr(tuple(row[:-1])).encode('utf-8'))
+        geometry = row[-1]
+        digest.update(bytes(geometry) if geometry is not None else b'\x00')
+        count += 1
+    return count, digest.hexdigest()
+
+
+def fingerprint_feature_class(fc_path):
+    """
+    Huella de un feature class: número de registros, extensión y hash de
+    atributos + WKB (en orden de OID). Devuelve un texto comparable.
+    """
+    import arcpy
+
+    fields = [f for f in arcpy.ListFields(fc_path)
+              if f.type not in ('OID', 'Geometry', 'GlobalID')
+              and f.name.upper() not in _EXCLUDED_FIELDS]
+    schema = [(f.name, f.type, f.length) for f in fields]
+    search_fields = ['OID@'] + [f.name for f in fields] + ['SHAPE@WKB']
+
+    with arcpy.da.SearchCursor(fc_path, search_fields) as cursor:
+        count, content_hash = hash_rows(cursor, schema)
+
+    extent = arcpy.Describe(fc_path).extent
+    bounds = (extent.XMin, extent.YMin, extent.XMax, extent.YMax) if count else ()
+    return f"{count}|{','.join(f'{v:.6f}' for v in bounds)}|{content_hash}"
+
+
+class FingerprintCache:
+    """
+    Resultados cacheados por conjunto de reglas. Cada entrada asocia un elemento
+    (p. ej. "URBANO/U_TERRENO") con la huella de sus entradas, la huella de las
+    reglas aplicadas y la ruta del artefacto producido. Una entrada solo es
+    válida si ambas huellas coinciden con las de la ejecución actual.
+    """
+
+    def __init__(self, cache_dir, rule_set):
+        self.cache_dir = cache_dir
+        self.rule_set = rule_set
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, 'fingerprints.sqlite')
+        self._fingerprints = {}
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    rule_set TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    inputs_key TEXT NOT NULL,
+                    rules_key TEXT NOT NULL,
+                    artefact TEXT NOT NULL,
+                    created TEXT NOT NULL,
+                    PRIMARY KEY (rule_set, item)
+                )
+            """)
+
+    def artefact_dir(self):
+        """Carpeta donde el conjunto de reglas guarda sus artefactos cacheados"""
+        path = os.path.join(self.cache_dir, self.rule_set)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def fingerprint(self, fc_path):
+        """Huella de un feature class, calculada una sola vez por ejecución"""
+        if fc_path not in self._fingerprints:
+            self._fingerprints[fc_path] = fingerprint_feature_class(fc_path)
+        return self._fingerprints[fc_path]
+
+    def inputs_key(self, fc_paths):
+        """Huella combinada de varios feature classes de entrada"""
+        return '||'.join(self.fingerprint(path) for path in fc_paths)
+
+    def lookup(self, item, inputs_key, rules_key):
+        """Ruta del artefacto cacheado si las huellas coinciden, o None"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT inputs_key, rules_key, artefact FROM results WHERE rule_set = ? AND item = ?",
+                (self.rule_set, item)
+            ).fetchone()
+        if row is None or row[0] != inputs_key or row[1] != rules_key:
+            return None
+        return row[2]
+
+    def store(self, item, inputs_key, rules_key, artefact):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (self.rule_set, item, inputs_key, rules_key, artefact,
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+
+    def invalidate(self, item):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "DELETE FROM results WHERE rule_set = ? AND item = ?", (self.rule_set, item)
+            )
@@ -0,0 +1,474 @@
+import math
+import re
+import sqlite3
+import struct
+import numpy as np
+import shapely
+from shapely import wkb as shapely_wkb
+
+
+# Tamaño del envelope según el indicador de la cabecera GeoPackageBinary
+_GPKG_ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+def gpkg_blob_to_wkb(blob):
+    """Extrae el WKB de una geometría almacenada en formato GeoPackageBinary"""
+    if blob is None:
+        return None
+    blob = bytes(blob)
+    if blob[:2] != b'GP':
+        return blob
+    flags = blob[3]
+    envelope_size = _GPKG_ENVELOPE_SIZES.get((flags >> 1) & 0x07)
+    if envelope_size is None:
+        raise ValueError("Cabecera GeoPackage con envelope inválido")
+    return blob[8 + envelope_size:]
+
+
+def gpkg_blob_envelope(blob):
+    """Envelope (minx, miny, maxx, maxy) de la cabecera GeoPackageBinary, o None si no lo trae"""
+    if blob is None or bytes(blob[:2]) != b'GP':
+        return None
+    flags = blob[3]
+    if ((flags >> 1) & 0x07) == 0:
+        return None
+    byte_order = '<' if flags & 0x01 else '>'
+    minx, maxx, miny, maxy = struct.unpack(byte_order + '4d', bytes(blob[8:40]))
+    return minx, miny, maxx, maxy
+
+
+def _gpkg_rtree_table(cursor, table, geometry_column):
+    name = f"rtree_{table}_{geometry_column}"
+    row = cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone()
+    return name if row else None
+
+
+def read_gpkg_features(gpkg_path, table, fields, bbox=None):
+    """
+    Lee una capa de un GeoPackage sin arcpy.
+    Devuelve tuplas (fid, atributos, wkb) en el orden de la tabla.
+    Con `bbox` (minx, miny, maxx, maxy) solo devuelve las entidades cuyo envelope
+    lo intersecta, usando el índice R-tree de la capa cuando existe.
+    """
+    conn = sqlite3.connect(gpkg_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?", (table,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"La tabla {table} no es una capa de geometría del GeoPackage")
+        geometry_column = row[0]
+
+        cursor.execute(f'PRAGMA table_info("{table}")')
+        columns = cursor.fetchall()
+        pk_column = next((c[1] for c in columns if c[5] == 1), 'fid')
+
+        select_fields = ', '.join(f'"{f}"' for f in fields)
+        sql = f'SELECT "{pk_column}"{", " + select_fields if fields else ""}, "{geometry_column}" FROM "{table}"'
+        params = ()
+        rtree = _gpkg_rtree_table(cursor, table, geometry_column) if bbox is not None else None
+        if rtree:
+            sql += (f' WHERE "{pk_column}" IN (SELECT id FROM "{rtree}"'
+                    ' WHERE maxx >= ? AND minx <= ? AND maxy >= ? AND miny <= ?)')
+            params = (bbox[0], bbox[2], bbox[1], bbox[3])
+            sql += f' ORDER BY "{pk_column}"'
+
+        for record in cursor.execute(sql, params):
+            blob = record[-1]
+            if bbox is not None and not rtree and blob is not None:
+                envelope = gpkg_blob_envelope(blob)
+                if envelope is None:
+                    envelope = tuple(shapely.bounds(shapely_wkb.loads(gpkg_blob_to_wkb(blob))).tolist())
+                if (envelope[2] < bbox[0] or envelope[0] > bbox[2]
+                        or envelope[3] < bbox[1] or envelope[1] > bbox[3]):
+                    continue
+            yield record[0], tuple(record[1:-1]), gpkg_blob_to_wkb(blob)
+    finally:
+        conn.close()
+
+
+def gpkg_layer_summary(gpkg_path, table):
+    """Número de entidades y extensión (minx, miny, maxx, maxy) de una capa"""
+    conn = sqlite3.connect(gpkg_path)
+    try:
+        cursor = conn.cursor()
+        geometry_column = cursor.execute(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?", (table,)
+        ).fetchone()[0]
+        count = cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        rtree = _gpkg_rtree_table(cursor, table, geometry_column)
+        if rtree:
+            extent = cursor.execute(
+                f'SELECT MIN(minx), MIN(miny), MAX(maxx), MAX(maxy) FROM "{rtree}"'
+            ).fetchone()
+            if extent[0] is not None:
+                return count, tuple(extent)
+        bounds = [math.inf, math.inf, -math.inf, -math.inf]
+        for (blob,) in cursor.execute(f'SELECT "{geometry_column}" FROM "{table}"'):
+            if blob is None:
+                continue
+            envelope = gpkg_blob_envelope(blob)
+            if envelope is None:
+                envelope = tuple(shapely.bounds(shapely_wkb.loads(gpkg_blob_to_wkb(blob))).tolist())
+            if any(math.isnan(v) for v in envelope):
+                continue
+            bounds = [min(bounds[0], envelope[0]), min(bounds[1], envelope[1]),
+                      max(bounds[2], envelope[2]), max(bounds[3], envelope[3])]
+        return count, (tuple(bounds) if math.isfinite(bounds[0]) else None)
+    finally:
+        conn.close()
+
+
+def read_gpkg_srs(gpkg_path, table):
+    """Devuelve la fila de gpkg_spatial_ref_sys de una capa como dict (o None)"""
+    conn = sqlite3.connect(gpkg_path)
+    try:
+        row = conn.execute(
+            "SELECT s.srs_name, s.srs_id, s.organization, s.organization_coordsys_id, s.definition "
+            "FROM gpkg_geometry_columns g JOIN gpkg_spatial_ref_sys s ON s.srs_id = g.srs_id "
+            "WHERE g.table_name = ?", (table,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    keys = ('srs_name', 'srs_id', 'organization', 'organization_coordsys_id', 'definition')
+    return dict(zip(keys, row))
+
+
+def wkb_to_gpkg_blob(wkb, srs_id, bounds=None):
+    """Arma una geometría GeoPackageBinary (little endian, envelope XY) a partir de WKB"""
+    wkb = bytes(wkb)
+    if bounds is None or any(math.isnan(v) for v in bounds):
+        flags = 0b00010001  # geometría vacía, sin envelope
+        return b'GP\x00' + bytes([flags]) + struct.pack('<i', srs_id) + wkb
+    flags = 0b00000011  # envelope [minx, maxx, miny, maxy], little endian
+    minx, miny, maxx, maxy = bounds
+    return (b'GP\x00' + bytes([flags]) + struct.pack('<i', srs_id)
+            + struct.pack('<4d', minx, maxx, miny, maxy) + wkb)
+
+
+_GPKG_DEFAULT_SRS = [
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined'),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined'),
+]
+
+
+def write_gpkg_layer(gpkg_path, table, fields, rows, geometry_type='GEOMETRY', srs=None):
+    """
+    Escribe (o reemplaza) una capa en un GeoPackage sin arcpy ni GDAL.
+    `fields` es una lista de (nombre, tipo SQL); `rows` un iterable de
+    (wkb, atributos). `srs` es un dict como el que devuelve read_gpkg_srs.
+    Devuelve el número de registros escritos.
+    """
+    srs_id = srs['srs_id'] if srs else -1
+    conn = sqlite3.connect(gpkg_path)
+    try:
+        conn.execute("PRAGMA application_id = 1196444487")
+        conn.execute("PRAGMA user_version = 10200")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+                srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY,
+                organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL,
+                definition TEXT NOT NULL, description TEXT)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS gpkg_contents (
+                table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+                identifier TEXT UNIQUE, description TEXT DEFAULT '',
+                last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+                min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+                srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id))
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+                table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+                geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+                z TINYINT NOT NULL, m TINYINT NOT NULL,
+                CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name))
+        """)
+        conn.executemany(
+            "INSERT OR IGNORE INTO gpkg_spatial_ref_sys "
+            "(srs_name, srs_id, organization, organization_coordsys_id, definition) VALUES (?, ?, ?, ?, ?)",
+            _GPKG_DEFAULT_SRS + ([(srs['srs_name'], srs['srs_id'], srs['organization'],
+                                   srs['organization_coordsys_id'], srs['definition'])] if srs else [])
+        )
+
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (table,))
+        conn.execute("DELETE FROM gpkg_geometry_columns WHERE table_name = ?", (table,))
+
+        columns = ', '.join(f'"{name}" {sql_type}' for name, sql_type in fields)
+        conn.execute(
+            f'CREATE TABLE "{table}" (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom {geometry_type}'
+            f'{", " + columns if columns else ""})'
+        )
+
+        placeholders = ', '.join('?' for _ in range(len(fields) + 1))
+        field_names = ', '.join(['geom'] + [f'"{name}"' for name, _ in fields])
+        insert_sql = f'INSERT INTO "{table}" ({field_names}) VALUES ({placeholders})'
+
+        count = 0
+        extent = [math.inf, math.inf, -math.inf, -math.inf]
+        batch = []
+        for wkb, attributes in rows:
+            bounds = shapely.bounds(shapely_wkb.loads(bytes(wkb))).tolist()
+            if not any(math.isnan(v) for v in bounds):
+                extent = [min(extent[0], bounds[0]), min(extent[1], bounds[1]),
+                          max(extent[2], bounds[2]), max(extent[3], bounds[3])]
+            batch.append((wkb_to_gpkg_blob(wkb, srs_id, bounds),) + tuple(attributes))
+            count += 1
+            if len(batch) >= 5000:
+                conn.executemany(insert_sql, batch)
+                batch = []
+        if batch:
+            conn.executemany(insert_sql, batch)
+
+        extent = extent if count and math.isfinite(extent[0]) else [None] * 4
+        conn.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, min_x, min_y, max_x, max_y, srs_id) "
+            "VALUES (?, 'features', ?, ?, ?, ?, ?, ?)",
+            (table, table, *extent, srs_id)
+        )
+        conn.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', ?, ?, 0, 0)",
+            (table, geometry_type, srs_id)
+        )
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+
+class AreaBucketIndex:
+    """
+    Agrupa registros por clave de atributos y área similar (diferencia relativa
+    <= tolerance) con un número constante de consultas por registro.
+
+    Las áreas se ubican en cubetas logarítmicas de ancho -ln(1 - tolerance): dos
+    áreas similares quedan siempre en la misma cubeta o en una contigua, así que
+    basta revisar tres cubetas. Entre los grupos compatibles se elige el creado
+    primero, igual que el recorrido lineal que reemplaza.
+    """
+
+    def __init__(self, tolerance):
+        if not 0 < tolerance < 1:
+            raise ValueError("La tolerancia de área debe estar entre 0 y 1")
+        self.tolerance = tolerance
+        self._width = -math.log(1 - tolerance)
+        self._buckets = {}
+        self._groups = []
+
+    def similar(self, area1, area2):
+        if area1 == 0 or area2 == 0:
+            return False
+        difference = abs(area1 - area2) / max(area1, area2)
+        return difference <= self.tolerance
+
+    def _bucket(self, area):
+        return math.floor(math.log(area) / self._width)
+
+    def find(self, key, area):
+        """Devuelve la etiqueta del primer grupo con la misma clave y área similar"""
+        if area is None or area <= 0:
+            return None
+        bucket = self._bucket(area)
+        best = None
+        for probe in (bucket - 1, bucket, bucket + 1):
+            for order in self._buckets.get((key, probe), ()):
+                label, group_area = self._groups[order]
+                if self.similar(area, group_area) and (best is None or order < best):
+                    best = order
+        return self._groups[best][0] if best is not None else None
+
+    def assign(self, key, area, label):
+        """Ubica el registro en un grupo existente o crea uno nuevo identificado por `label`"""
+        existing = self.find(key, area)
+        if existing is not None:
+            return existing
+        if area is not None and area > 0:
+            self._buckets.setdefault((key, self._bucket(area)), []).append(len(self._groups))
+        self._groups.append((label, area))
+        return label
+
+
+class GroupOverlapEngine:
+    """
+    Confirma superposiciones dentro de grupos de atributos usando un índice STR-tree.
+    Las geometrías se reciben como WKB, así que funciona igual con cursores de arcpy
+    (SHAPE@WKB) que con capas leídas desde GeoPackage.
+    """
+
+    def __init__(self, overlap_threshold=0.05):
+        self.overlap_threshold = overlap_threshold
+        self.geometries = {}
+
+    def load(self, geometries):
+        """Carga (o reutiliza) las geometrías shapely de un dict OID -> WKB"""
+        for oid, value in geometries.items():
+            if oid in self.geometries or value is None:
+                continue
+            self.geometries[oid] = shapely_wkb.loads(bytes(value))
+
+    def find_overlaps(self, groups, geometries):
+        """
+        Para cada grupo (clave -> lista de OIDs) devuelve un dict OID -> (OID vecino, razón)
+        con los elementos cuya intersección con otro miembro del mismo grupo supera
+        overlap_threshold de su propia área. Se respeta el orden de los miembros.
+        """
+        self.load(geometries)
+
+        oids = []
+        group_ids = []
+        group_keys = list(groups.keys())
+        for group_index, key in enumerate(group_keys):
+            for oid in groups[key]:
+                if oid in self.geometries:
+                    oids.append(oid)
+                    group_ids.append(group_index)
+
+        results = {}
+        if len(oids) < 2:
+            return results
+
+        geoms = np.array([self.geometries[oid] for oid in oids], dtype=object)
+        group_ids = np.asarray(group_ids)
+
+        tree = shapely.STRtree(geoms)
+        left, right = tree.query(geoms, predicate='intersects')
+
+        # Solo pares distintos dentro del mismo grupo de atributos
+        same_group = (group_ids[left] == group_ids[right]) & (left != right)
+        left = left[same_group]
+        right = right[same_group]
+        if len(left) == 0:
+            return results
+
+        overlap_areas = shapely.area(shapely.intersection(geoms[left], geoms[right]))
+        own_areas = shapely.area(geoms[left])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(own_areas > 0, overlap_areas / own_areas, 0.0)
+
+        best = {}
+        for i, j, ratio in zip(left, right, ratios):
+            if ratio > self.overlap_threshold and ratio > best.get(i, (None, -1.0))[1]:
+                best[i] = (j, ratio)
+
+        for i in sorted(best):
+            j, ratio = best[i]
+            key = group_keys[group_ids[i]]
+            results.setdefault(key, {})[oids[i]] = (oids[j], float(ratio))
+        return results
+
+    def iou(self, oid_a, oid_b):
+        """Razón intersección/unión entre dos geometrías ya cargadas"""
+        geom_a = self.geometries.get(oid_a)
+        geom_b = self.geometries.get(oid_b)
+        if geom_a is None or geom_b is None:
+            return 0.0
+        union_area = shapely.area(shapely.union(geom_a, geom_b))
+        if union_area <= 0:
+            return 0.0
+        return float(shapely.area(shapely.intersection(geom_a, geom_b)) / union_area)
+
+    def clear(self):
+        self.geometries = {}
+
+
+def _numero_piso(planta):
+    match = re.search(r'(\d+)', planta)
+    return int(match.group(1)) if match else None
+
+
+def find_floor_sequence_errors(units, overlap_percentage=20, neighbour_distance=1):
+    """
+    Detecta unidades con pisos faltantes en la secuencia 1..N.
+
+    `units` es un iterable de tuplas (oid, codigo, planta, wkb). Se construye un
+    índice STR-tree por código base (primeros 24 caracteres del CODIGO): las
+    unidades que se superponen más de `overlap_percentage` forman un conjunto, y
+    los posibles errores se descartan si unidades vecinas (a menos de
+    `neighbour_distance`) del mismo código base aportan los pisos (ramadas).
+    Devuelve una lista de dicts {'oid', 'pisos_faltantes'}.
+    """
+    grupos = {}
+    for oid, codigo, planta, wkb in units:
+        if not codigo or wkb is None:
+            continue
+        planta = str(planta) if planta else ''
+        grupos.setdefault(codigo[:24], []).append(
+            (oid, _numero_piso(planta), shapely_wkb.loads(bytes(wkb)))
+        )
+
+    errores_confirmados = []
+    for codigo_base, unidades in grupos.items():
+        geoms = np.array([u[2] for u in unidades], dtype=object)
+        areas = shapely.area(geoms)
+        tree = shapely.STRtree(geoms)
+
+        # Primera fase: agrupar unidades superpuestas en una sola pasada por el índice
+        con_piso = [i for i, u in enumerate(unidades) if u[1] is not None]
+        procesadas = set()
+        errores_potenciales = []
+        for i in con_piso:
+            if i in procesadas:
+                continue
+            subgrupo = [i]
+            procesadas.add(i)
+
+            candidatos = tree.query(geoms[i], predicate='intersects')
+            candidatos = [j for j in sorted(candidatos)
+                          if j > i and j not in procesadas and unidades[j][1] is not None]
+            if candidatos:
+                intersecciones = shapely.area(shapely.intersection(geoms[i], geoms[candidatos]))
+                for j, area_interseccion in zip(candidatos, intersecciones):
+                    area_menor = min(areas[i], areas[j])
+                    if area_menor > 0 and (area_interseccion / area_menor) * 100 > overlap_percentage:
+                        subgrupo.append(j)
+                        procesadas.add(j)
+
+            pisos_disponibles = set(unidades[k][1] for k in subgrupo)
+            piso_max = max(pisos_disponibles)
+            if piso_max > 1:
+                pisos_faltantes = set(range(1, piso_max + 1)) - pisos_disponibles
+                if pisos_faltantes:
+                    for k in subgrupo:
+                        if unidades[k][1] > 1:
+                            errores_potenciales.append((k, sorted(pisos_faltantes)))
+
+        # Segunda fase: validar casos especiales (ramadas) con búsquedas en el índice
+        for k, pisos_faltantes_grupo in errores_potenciales:
+            oid, piso, geom = unidades[k]
+            buffer_geom = geom.buffer(neighbour_distance)
+
+            pisos_vecinos = set()
+            for j in tree.query(buffer_geom, predicate='intersects'):
+                if unidades[j][0] != oid and unidades[j][1] is not None:
+                    pisos_vecinos.add(unidades[j][1])
+
+            if not pisos_vecinos:
+                # Sin vecinos con el mismo código base se mantiene como error
+                errores_confirmados.append({'oid': oid, 'pisos_faltantes': pisos_faltantes_grupo})
+                continue
+
+            pisos_requeridos = set(range(1, piso + 1))
+            todos_los_pisos = pisos_vecinos | {piso}
+            if pisos_requeridos.issubset(todos_los_pisos):
+                continue
+
+            # Si hay suficiente contacto con los vecinos (>20% del perímetro), no es error
+            interseccion = geom.buffer(neighbour_distance).intersection(buffer_geom)
+            longitud_minima = min(geom.length, buffer_geom.length)
+            if interseccion.length > (longitud_minima * 0.2):
+                continue
+
+            errores_confirmados.append({
+                'oid': oid,
+                'pisos_faltantes': sorted(pisos_requeridos - todos_los_pisos)
+            })
+
+    return errores_confirmados
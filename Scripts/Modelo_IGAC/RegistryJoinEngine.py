@@ -0,0 +1,133 @@
+"""
+Omisión y comisión entre el registro R1/R2 y las capas geográficas como
+anti-joins de pandas sobre claves normalizadas construidas una sola vez con
+operaciones vectorizadas de texto. No modifica las tablas de origen.
+
+- Omisión: registros del R1/R2 cuya clave no existe en la capa geográfica.
+- Comisión: elementos geográficos cuya clave no existe en el R1/R2.
+"""
+import pandas as pd
+
+
+# Condición del número predial (posición 22) por tipo de elemento
+CONDICIONES_TERRENO = ('0', '8', '2')
+CONDICIONES_UNIDAD = ('0', '2', '5', '8')
+CONDICIONES_MEJORA = ('5',)
+
+
+def as_text(series):
+    """Columna de texto con nulos como NA (sin convertir None en 'None')"""
+    return series.astype('string')
+
+
+def substring(codes, start, length):
+    """Equivalente vectorizado de SUBSTRING(campo, start, length) con start en base 1"""
+    return codes.str.slice(start - 1, start - 1 + length)
+
+
+def subzone_mask(codes, subzona):
+    """Rural: posiciones 6-7 del código en '00'; Urbana: cualquier otro valor"""
+    sector = substring(codes, 6, 2)
+    if subzona == 'Rural':
+        return (sector == '00').fillna(False)
+    if subzona == 'Urbana':
+        return (sector != '00').fillna(False)
+    return codes.notna()
+
+
+def condition_mask(codes, allowed):
+    """Posición 22 del número predial dentro de las condiciones permitidas"""
+    return substring(codes, 22, 1).isin(allowed).fillna(False)
+
+
+def registry_unit_key(frame):
+    """Clave compuesta de unidad en el R2: predial[0:22] + '0000' + predial[26:30] _ unidad _ tipo"""
+    predial = as_text(frame['Numero_Predial'])
+    return (predial.str.slice(0, 22) + '0000' + predial.str.slice(26, 30)
+            + '_' + as_text(frame['Unidad'])
+            + '_' + as_text(frame['Tipo_Construccion']))
+
+
+def geographic_unit_key(frame):
+    """Clave compuesta de unidad en la capa geográfica, con el tipo 'NO CONVENCIONAL' normalizado"""
+    codigo = as_text(frame['CODIGO'])
+    tipo = as_text(frame['TIPO_CONSTRUCCION']).replace('NO CONVENCIONAL', 'NO_CONVENCIONAL')
+    return (codigo.str.slice(0, 22) + '0000' + codigo.str.slice(26, 30)
+            + '_' + as_text(frame['IDENTIFICADOR'])
+            + '_' + tipo)
+
+
+def anti_join_mask(keys, other_keys):
+    """Filas cuya clave no existe en other_keys (las claves nulas nunca coinciden)"""
+    lookup = pd.Index(other_keys.dropna().unique())
+    return ~keys.isin(lookup).fillna(False)
+
+
+def joined_frame(frame, table, other_columns, other_table):
+    """
+    Resultado con la forma de un AddJoin KEEP_ALL sin coincidencia: columnas
+    calificadas 'TABLA.campo' de la tabla base seguidas de las de la tabla
+    unida, vacías.
+    """
+    result = frame.rename(columns={c: f"{table}.{c}" for c in frame.columns})
+    for column in other_columns:
+        result[f"{other_table}.{column}"] = ''
+    return result.fillna('').reset_index(drop=True)
+
+
+class RegistryJoinEngine:
+    """
+    Anti-joins entre una tabla del registro y una capa geográfica.
+    registry_keys y geographic_keys son Series alineadas con cada tabla.
+    """
+
+    def __init__(self, registry, registry_table, registry_keys,
+                 geographic, geographic_table, geographic_keys,
+                 registry_code='Numero_Predial', geographic_code='CODIGO'):
+        self.registry = registry
+        self.registry_table = registry_table
+        self.registry_keys = registry_keys
+        self.geographic = geographic
+        self.geographic_table = geographic_table
+        self.geographic_keys = geographic_keys
+        self.registry_codes = as_text(registry[registry_code])
+        self.geographic_codes = as_text(geographic[geographic_code])
+        self._omitted = None
+        self._committed = None
+
+    def omitted_mask(self):
+        if self._omitted is None:
+            self._omitted = anti_join_mask(self.registry_keys, self.geographic_keys)
+        return self._omitted
+
+    def committed_mask(self):
+        if self._committed is None:
+            self._committed = anti_join_mask(self.geographic_keys, self.registry_keys)
+        return self._committed
+
+    def omision(self, subzona, allowed):
+        """Registros ACTIVO del R1/R2 sin elemento geográfico en la subzona"""
+        mask = (
+            (as_text(self.registry['Estado']) == 'ACTIVO').fillna(False)
+            & self.omitted_mask()
+            & condition_mask(self.registry_codes, allowed)
+            & subzone_mask(self.registry_codes, subzona)
+        )
+        return joined_frame(self.registry[mask], self.registry_table,
+                            self.geographic.columns, self.geographic_table)
+
+    def comision(self, subzona, allowed, oid_field='OBJECTID'):
+        """
+        Elementos geográficos sin registro en el R1/R2 en la subzona.
+        Devuelve (DataFrame, lista de OIDs para exportar las geometrías).
+        """
+        mask = (
+            self.committed_mask()
+            & condition_mask(self.geographic_codes, allowed)
+            & subzone_mask(self.geographic_codes, subzona)
+        )
+        selected = self.geographic[mask]
+        oids = selected[oid_field].astype(int).tolist() if oid_field in selected.columns else []
+        frame = joined_frame(selected, self.geographic_table,
+                             self.registry.columns, self.registry_table)
+        return frame, oids
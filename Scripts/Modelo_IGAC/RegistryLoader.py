@@ -0,0 +1,151 @@
+"""
+Carga columnar de los CSV del registro (R1 terrenos, R2 unidades) en un
+almacén SQLite local con índice por número predial.
+
+Los nombres de columna se normalizan una sola vez a partir del encabezado, el
+CSV se lee por bloques con el motor C de pandas y tipos explícitos, y cada
+bloque se inserta con executemany en una sola transacción. Las filas que no se
+pueden cargar (líneas mal formadas, valores que exceden la longitud del campo)
+se reportan en lugar de descartarse en silencio.
+"""
+import contextlib
+import io
+import sqlite3
+import warnings
+
+import pandas as pd
+
+
+CSV_ENCODING = "ISO-8859-1"
+CHUNK_SIZE = 500000
+
+# Longitud máxima de los campos de texto del registro
+FIELD_LENGTH = 255
+
+# Campo destino: nombres aceptados en el encabezado del CSV
+TERRENO_COLUMNS = {
+    'Numero_Predial': ('Numero_Predial', 'Numero Predial'),
+    'Etapa': ('Etapa',),
+    'Destino': ('Destino',),
+    'Estado': ('Estado',),
+}
+
+UNIDAD_COLUMNS = {
+    'Municipio_Codigo': ('Municipio_Codigo', 'Municipio Codigo'),
+    'Numero_Predial': ('Numero_Predial', 'Numero Predial'),
+    'Estado': ('Estado',),
+    'Tipo_Construccion': ('Tipo_Construccion', 'Tipo Construccion'),
+    'Unidad': ('Unidad',),
+    'Etapa': ('Etapa',),
+}
+
+INDEX_COLUMNS = ('Numero_Predial',)
+
+
+class RegistryLoadError(Exception):
+    """Error en la estructura de un CSV del registro"""
+
+
+def resolve_columns(csv_path, columns):
+    """
+    Mapea las columnas del encabezado a los campos destino. Devuelve
+    {columna en el CSV: campo destino} en el orden de los campos destino.
+    """
+    header = pd.read_csv(csv_path, nrows=0, encoding=CSV_ENCODING).columns
+    mapping = {}
+    for target, variants in columns.items():
+        found = next((name for name in variants if name in header), None)
+        if found is None:
+            raise RegistryLoadError(f"No se encontró la columna {target} en {csv_path}")
+        mapping[found] = target
+    return mapping
+
+
+def _create_table(conn, table, fields):
+    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    columns = ", ".join(f'"{field}" TEXT' for field in fields)
+    conn.execute(f'CREATE TABLE "{table}" (OBJECTID INTEGER PRIMARY KEY, {columns})')
+
+
+def load_csv(csv_path, db_path, table, columns, chunksize=CHUNK_SIZE):
+    """
+    Carga un CSV del registro en la tabla indicada del almacén SQLite,
+    reemplazándola. Devuelve (registros cargados, filas rechazadas), donde cada
+    rechazo es un dict con 'fila', 'motivo' y los valores de la fila.
+    """
+    mapping = resolve_columns(csv_path, columns)
+    fields = list(mapping.values())
+    quoted = ", ".join(f'"{field}"' for field in fields)
+    placeholders = ", ".join("?" for _ in fields)
+    insert = f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})'
+
+    loaded = 0
+    rejected = []
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("BEGIN")
+        _create_table(conn, table, fields)
+
+        # Las líneas mal formadas se omiten y pandas las anuncia como
+        # ParserWarning (2.2+) o directamente en stderr (versiones anteriores)
+        parser_output = io.StringIO()
+        with warnings.catch_warnings(record=True) as caught, contextlib.redirect_stderr(parser_output):
+            warnings.simplefilter('always', pd.errors.ParserWarning)
+            reader = pd.read_csv(
+                csv_path,
+                dtype=str,
+                chunksize=chunksize,
+                sep=',',
+                encoding=CSV_ENCODING,
+                on_bad_lines='warn',
+            )
+            for chunk in reader:
+                chunk = chunk.rename(columns=mapping)[fields]
+
+                too_long = chunk.apply(lambda col: col.str.len() > FIELD_LENGTH).any(axis=1)
+                for position, row in chunk[too_long].iterrows():
+                    rejected.append({
+                        'fila': position + 1,
+                        'motivo': f"Valor con más de {FIELD_LENGTH} caracteres",
+                        **row.to_dict(),
+                    })
+
+                valid = chunk[~too_long].astype(object).where(chunk[~too_long].notna(), None)
+                conn.executemany(insert, valid.itertuples(index=False, name=None))
+                loaded += len(valid)
+
+        messages = [str(w.message) for w in caught if issubclass(w.category, pd.errors.ParserWarning)]
+        messages.append(parser_output.getvalue())
+        for message in messages:
+            for line in message.splitlines():
+                if line.strip().startswith('Skipping line'):
+                    rejected.append({'fila': '', 'motivo': line.strip()})
+
+        for column in INDEX_COLUMNS:
+            if column in fields:
+                conn.execute(f'CREATE INDEX "idx_{table}_{column}" ON "{table}" ("{column}")')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return loaded, rejected
+
+
+def write_rejections(report_path, rejected):
+    """Escribe el reporte de filas rechazadas (CSV)"""
+    pd.DataFrame(rejected).to_csv(report_path, index=False, encoding='utf-8-sig')
+
+
+def read_table(db_path, table):
+    """Lee una tabla del almacén a un DataFrame (nulos como None)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA mmap_size = 268435456")
+        return pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+    finally:
+        conn.close()
@@ -0,0 +1,130 @@
+"""
+Resolución de las variables del reporte final desde las bases SQLite.
+
+Cada base se abre una sola vez por ejecución del reporte y los resultados
+(filas completas, conteos agrupados, listas de tablas) se memorizan mientras
+dure la ejecución: las variables de conteo salen de una sola fila por dataset
+y los conteos de errores de una sola consulta agrupada por base, en lugar de
+una conexión y una consulta por variable.
+"""
+import sqlite3
+from pathlib import Path
+
+from TopologyCounts import count_tables
+
+
+# Variable del reporte: descripciones de la regla (inglés, español)
+RULE_GROUPS = {
+    'no_huecos': ('Must Not Have Gaps', 'No debe tener espacios'),
+    'no_superponer': ('Must Not Overlap', 'No debe superponerse'),
+    'cubierto_por': ('Must Be Covered By Feature Class Of', 'Debe ser cubierto por la clase de entidad de'),
+    'cubrirse_entre': ('Must Cover Each Other', 'Deben cubrirse entre ellos'),
+}
+
+
+def rule_group_counts(counts, groups=RULE_GROUPS):
+    """
+    Suma los conteos {regla: (total, excepciones)} por grupo de reglas.
+    Devuelve {grupo: total, grupo_: excepciones}.
+    """
+    results = {}
+    for name, rules in groups.items():
+        results[name] = sum(counts.get(rule, (0, 0))[0] for rule in rules)
+        results[f"{name}_"] = sum(counts.get(rule, (0, 0))[1] for rule in rules)
+    return results
+
+
+class ReportDataResolver:
+    """
+    Conexiones y consultas memorizadas de una ejecución del reporte. Uso:
+
+        resolver = ReportDataResolver()
+        fila = resolver.first_row(db_conteo, dataset)
+        ...
+        resolver.close()
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._cache = {}
+
+    def connection(self, db_path):
+        """Conexión de solo lectura a la base, abierta en el primer uso"""
+        key = str(db_path)
+        conn = self._connections.get(key)
+        if conn is None:
+            if not Path(db_path).exists():
+                raise FileNotFoundError(f"Base de datos no encontrada: {db_path}")
+            conn = sqlite3.connect(key)
+            self._connections[key] = conn
+        return conn
+
+    def remember(self, key, compute):
+        """Valor memorizado para la clave; se calcula con compute() la primera vez"""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def fetchone(self, db_path, query, params=None):
+        """Primera fila de la consulta (tupla o None)"""
+        params = tuple(params) if params else ()
+        return self.remember(
+            ('fetchone', str(db_path), query, params),
+            lambda: self.connection(db_path).execute(query, params).fetchone(),
+        )
+
+    def first_row(self, db_path, table):
+        """Primera fila completa de la tabla como {columna: valor} ({} si está vacía)"""
+        def compute():
+            cursor = self.connection(db_path).execute(f'SELECT * FROM "{table}" LIMIT 1')
+            row = cursor.fetchone()
+            if row is None:
+                return {}
+            return {column[0]: value for column, value in zip(cursor.description, row)}
+        return self.remember(('first_row', str(db_path), table), compute)
+
+    def rule_counts(self, db_path, table, exception_field='isException'):
+        """
+        Conteos de una tabla de errores topológicos agrupados por descripción de
+        regla en una sola consulta. Devuelve {regla: (total, excepciones)}.
+        """
+        def compute():
+            query = f"""
+            SELECT RuleDescription,
+                   COUNT(*),
+                   SUM(CASE WHEN {exception_field} != 0 THEN 1 ELSE 0 END)
+            FROM "{table}"
+            GROUP BY RuleDescription
+            """
+            return {
+                rule: (total, exceptions or 0)
+                for rule, total, exceptions in self.connection(db_path).execute(query)
+            }
+        return self.remember(('rule_counts', str(db_path), table, exception_field), compute)
+
+    def table_names(self, db_path):
+        """Nombres de las tablas de la base"""
+        return self.remember(
+            ('table_names', str(db_path)),
+            lambda: [name for (name,) in self.connection(db_path).execute(
+                "SELECT name FROM sqlite_master WHERE type='table'")],
+        )
+
+    def table_counts(self, db_path, tables, exception_field='isExceptio'):
+        """
+        Conteos (total, excepciones) de las tablas indicadas; solo se consultan
+        las que no se han contado antes. Devuelve {tabla: (total, excepciones)}.
+        """
+        key = ('table_counts', str(db_path), exception_field)
+        known = self._cache.setdefault(key, {})
+        missing = [table for table in tables if table not in known]
+        if missing:
+            known.update(count_tables(self.connection(db_path), missing, exception_field))
+        return {table: known[table] for table in tables}
+
+    def close(self):
+        """Cierra las conexiones abiertas y descarta los resultados memorizados"""
+        for conn in self._connections.values():
+            conn.close()
+        self._connections = {}
+        self._cache = {}
@@ -0,0 +1,92 @@
+"""
+Resultados intermedios de omisión/comisión en Parquet.
+
+Cada hoja de un libro de resultados se guarda como <libro>.<hoja>.parquet junto
+al .xlsx, y el libro entregable se genera a partir de los mismos DataFrames.
+La etapa de análisis lee los Parquet y solo recurre al .xlsx cuando no existen
+(sin pyarrow disponible o salidas de una versión anterior).
+"""
+from pathlib import Path
+
+import pandas as pd
+
+
+PARQUET_SUFFIX = '.parquet'
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def sheet_path(excel_path, sheet_name):
+    excel_path = Path(excel_path)
+    return excel_path.with_name(f"{excel_path.stem}.{sheet_name}{PARQUET_SUFFIX}")
+
+
+def result_sheets(excel_path):
+    """{hoja: ruta Parquet} de los resultados guardados de un libro"""
+    excel_path = Path(excel_path)
+    prefix = f"{excel_path.stem}."
+    return {
+        path.name[len(prefix):-len(PARQUET_SUFFIX)]: path
+        for path in sorted(excel_path.parent.glob(f"{excel_path.stem}.*{PARQUET_SUFFIX}"))
+    }
+
+
+def remove_results(excel_path):
+    """Elimina los Parquet de una ejecución anterior del libro"""
+    for path in result_sheets(excel_path).values():
+        path.unlink()
+
+
+def write_sheet(excel_path, sheet_name, frame):
+    """
+    Guarda una hoja de resultados en Parquet. Las columnas de texto (object) se
+    guardan como string para que los tipos sean homogéneos por columna.
+    Devuelve la ruta escrita o None si pyarrow no está disponible.
+    """
+    if not parquet_available():
+        return None
+    frame = frame.astype({
+        column: 'string' for column in frame.columns if frame[column].dtype == object
+    })
+    path = sheet_path(excel_path, sheet_name)
+    frame.to_parquet(path, index=False)
+    return path
+
+
+def read_results(excel_path):
+    """
+    {hoja: DataFrame} de un libro de resultados, desde los Parquet si existen;
+    si no, leyendo el .xlsx completo en una sola pasada.
+    """
+    sheets = result_sheets(excel_path)
+    if sheets and parquet_available():
+        return {name: pd.read_parquet(path) for name, path in sheets.items()}
+    return pd.read_excel(excel_path, sheet_name=None)
+
+
+class ResultWriter:
+    """
+    Reemplazo de pd.ExcelWriter para los libros de resultados: cada hoja se
+    guarda en Parquet al escribirla y el .xlsx se genera al cerrar.
+    """
+
+    def __init__(self, excel_path):
+        self.excel_path = str(excel_path)
+        self.frames = {}
+        remove_results(self.excel_path)
+
+    def write(self, frame, sheet_name):
+        self.frames[sheet_name] = frame
+        write_sheet(self.excel_path, sheet_name, frame)
+
+    def close(self):
+        with pd.ExcelWriter(self.excel_path, engine='xlsxwriter') as writer:
+            for sheet_name, frame in self.frames.items():
+                frame.to_excel(writer, sheet_name=sheet_name, index=False)
+        self.frames = {}
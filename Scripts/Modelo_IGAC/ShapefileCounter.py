@@ -0,0 +1,125 @@
+"""
+Conteo de registros de shapefiles leyendo directamente el .dbf (cabecera y
+marca de borrado de cada registro), sin arcpy y sin copiar archivos.
+"""
+import os
+import struct
+
+import numpy as np
+
+
+# Marca de registro borrado en el .dbf
+DBF_DELETED_FLAG = ord('*')
+
+# Bytes que cuentan como campo vacío (espacios, nulos, tabulaciones, saltos de línea)
+_BLANK_BYTES = np.array([0x20, 0x00, 0x09, 0x0A, 0x0D], dtype=np.uint8)
+
+
+class ShapefileCountError(Exception):
+    """Error de lectura de la cabecera de un shapefile"""
+
+
+def _related_path(shapefile_path, extension):
+    base = os.path.splitext(str(shapefile_path))[0]
+    for candidate in (base + extension, base + extension.upper()):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def read_dbf_header(dbf_path):
+    """
+    Lee la cabecera de un .dbf (dBase III). Devuelve un dict con el número de
+    registros, la longitud de la cabecera y del registro, y los campos como
+    {nombre en mayúsculas: (desplazamiento, longitud)} dentro del registro.
+    """
+    with open(dbf_path, 'rb') as f:
+        header = f.read(32)
+        if len(header) < 32:
+            raise ShapefileCountError(f"Cabecera DBF incompleta: {dbf_path}")
+        num_records, header_length, record_length = struct.unpack('<IHH', header[4:12])
+
+        fields = {}
+        offset = 1  # el primer byte de cada registro es la marca de borrado
+        descriptors = f.read(header_length - 32)
+        for start in range(0, len(descriptors) - 31, 32):
+            descriptor = descriptors[start:start + 32]
+            if descriptor[0] == 0x0D:
+                break
+            name = descriptor[:11].split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+            length = descriptor[16]
+            fields[name.upper()] = (offset, length)
+            offset += length
+
+    # Si el archivo quedó truncado, la cabecera no es confiable
+    data_size = os.path.getsize(dbf_path) - header_length
+    if record_length:
+        num_records = min(num_records, max(data_size, 0) // record_length)
+
+    return {
+        'num_records': num_records,
+        'header_length': header_length,
+        'record_length': record_length,
+        'fields': fields,
+    }
+
+
+def _read_records(dbf_path, header):
+    """Matriz (registros x bytes) con el área de datos del .dbf"""
+    count = header['num_records']
+    record_length = header['record_length']
+    with open(dbf_path, 'rb') as f:
+        f.seek(header['header_length'])
+        data = f.read(count * record_length)
+    return np.frombuffer(data, dtype=np.uint8, count=count * record_length).reshape(count, record_length)
+
+
+def count_records(shapefile_path):
+    """
+    Número de registros de un shapefile, como GetCount: los de la cabecera del
+    .dbf menos los marcados como borrados. Solo se lee el primer byte de cada
+    registro.
+    """
+    dbf_path = _related_path(shapefile_path, '.dbf')
+    if dbf_path is None:
+        raise ShapefileCountError(f"No se encontró el .dbf de {shapefile_path}")
+
+    header = read_dbf_header(dbf_path)
+    count = header['num_records']
+    if not count:
+        return 0
+
+    records = np.memmap(dbf_path, dtype=np.uint8, mode='r', offset=header['header_length'],
+                        shape=(count, header['record_length']))
+    try:
+        return int(np.count_nonzero(records[:, 0] != DBF_DELETED_FLAG))
+    finally:
+        del records
+
+
+def count_blank_field(shapefile_path, field_name):
+    """
+    Cuenta (total, vacíos) de los registros no borrados, donde vacíos son los
+    que no tienen contenido en field_name. Si el campo no existe, todos los
+    registros cuentan como vacíos.
+    """
+    dbf_path = _related_path(shapefile_path, '.dbf')
+    if dbf_path is None:
+        raise ShapefileCountError(f"No se encontró el .dbf de {shapefile_path}")
+
+    header = read_dbf_header(dbf_path)
+    if not header['num_records']:
+        return 0, 0
+
+    records = _read_records(dbf_path, header)
+    active = records[records[:, 0] != DBF_DELETED_FLAG]
+    total = len(active)
+
+    field = header['fields'].get(field_name.upper())
+    if field is None:
+        return total, total
+
+    offset, length = field
+    values = active[:, offset:offset + length]
+    blank = np.isin(values, _BLANK_BYTES).all(axis=1)
+    return total, int(np.count_nonzero(blank))
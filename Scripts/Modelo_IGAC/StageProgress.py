@@ -0,0 +1,128 @@
+"""
+Eventos de progreso de una etapa hacia la interfaz.
+
+La interfaz (Scripts/utils/progress_channel.py) escucha en un socket local y
+entrega a cada etapa el puerto y el nombre de la etapa por variables de
+entorno. Cada evento es una línea JSON con la etapa, el tipo ('log' o
+'progress'), la severidad, el mensaje, el paso, el porcentaje y los conteos.
+Uso:
+
+    import StageProgress as progress
+    progress.log("Iniciando validación")
+    progress.step("Validación de feature classes", done=3, total=10)
+    progress.log(f"Error procesando {fc}", 'error')
+
+Sin canal (la etapa se ejecuta por fuera de la interfaz, o la conexión falla)
+los mensajes se imprimen en stdout como siempre.
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+
+# Deben coincidir con Scripts/utils/progress_channel.py
+PROGRESS_PORT_ENV = 'GEOVALIDA_PROGRESS_PORT'
+STAGE_ENV = 'GEOVALIDA_STAGE'
+
+SEVERITIES = ('debug', 'info', 'success', 'warning', 'error')
+
+_lock = threading.Lock()
+_socket = None
+_connected_pid = None
+_disabled = False
+
+
+def _connection():
+    """Socket hacia la interfaz, abierto en el primer evento del proceso (o None)"""
+    global _socket, _connected_pid, _disabled
+    if _disabled:
+        return None
+    # Los procesos hijos (ProcessPoolExecutor) abren su propia conexión
+    if _socket is not None and _connected_pid == os.getpid():
+        return _socket
+    port = os.environ.get(PROGRESS_PORT_ENV)
+    if not port:
+        _disabled = True
+        return None
+    try:
+        _socket = socket.create_connection(('127.0.0.1', int(port)), timeout=5)
+        _connected_pid = os.getpid()
+    except (OSError, ValueError):
+        _socket = None
+        _disabled = True
+    return _socket
+
+
+def emit(event):
+    """Envía un evento a la interfaz. Devuelve False si no hay canal"""
+    global _socket, _disabled
+    event.setdefault('stage', os.environ.get(STAGE_ENV, os.path.basename(sys.argv[0])))
+    event.setdefault('time', time.time())
+    line = (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+    with _lock:
+        conn = _connection()
+        if conn is None:
+            return False
+        try:
+            conn.sendall(line)
+            return True
+        except OSError:
+            _socket = None
+            _disabled = True
+            return False
+
+
+def log(message, severity='info', **counts):
+    """Mensaje para la consola con su severidad"""
+    if severity not in SEVERITIES:
+        severity = 'info'
+    event = {'type': 'log', 'severity': severity, 'message': str(message)}
+    if counts:
+        event['counts'] = counts
+    if not emit(event):
+        print(message)
+
+
+def step(name, percent=None, done=None, total=None, severity='info', **counts):
+    """Avance de un paso de la etapa; el porcentaje se calcula de done/total si no se indica"""
+    if percent is None and done is not None and total:
+        percent = round(100.0 * done / total, 1)
+    event = {'type': 'progress', 'severity': severity, 'step': name}
+    if percent is not None:
+        event['percent'] = percent
+    if done is not None:
+        event['done'] = done
+    if total is not None:
+        event['total'] = total
+    if counts:
+        event['counts'] = counts
+    if not emit(event):
+        print(format_step(event))
+
+
+def format_step(event):
+    """Texto de un evento de progreso: 'Paso: 3/10 (30.0%)'"""
+    text = f"Progreso: {event.get('step', '')}"
+    if event.get('done') is not None and event.get('total') is not None:
+        text += f" {event['done']}/{event['total']}"
+    if event.get('percent') is not None:
+        text += f" ({event['percent']}%)"
+    counts = event.get('counts')
+    if counts:
+        text += " - " + ", ".join(f"{key}: {value}" for key, value in counts.items())
+    return text
+
+
+def close():
+    """Cierra la conexión del proceso"""
+    global _socket
+    with _lock:
+        if _socket is not None:
+            try:
+                _socket.close()
+            except OSError:
+                pass
+            _socket = None
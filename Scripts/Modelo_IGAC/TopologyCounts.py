@@ -0,0 +1,83 @@
+"""
+Conteo agregado de errores y excepciones topológicas desde las bases SQLite
+de registro de errores. Una sola pasada GROUP BY por tabla reemplaza las
+consultas COUNT(*) por regla de los pasos de diligenciamiento en Excel.
+"""
+
+# Regla que se evalúa en ambas direcciones (origen/destino intercambiables)
+SYMMETRIC_RULES = ('Must Cover Each Other', 'Deben cubrirse entre ellos')
+
+# Máximo de SELECT por consulta compuesta (SQLite admite 500)
+_MAX_COMPOUND_SELECT = 400
+
+
+class RuleCountLookup:
+    """
+    Conteos (total, excepciones) de una tabla de errores agrupados por
+    (OriginObjectClassName, DestinationObjectClassName, RuleDescription).
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+
+    @classmethod
+    def from_table(cls, conn, table, exception_field='isException'):
+        """Agrega la tabla completa en una sola consulta"""
+        query = f"""
+        SELECT OriginObjectClassName, DestinationObjectClassName, RuleDescription,
+               COUNT(*),
+               SUM(CASE WHEN {exception_field} != 0 THEN 1 ELSE 0 END)
+        FROM {table}
+        GROUP BY OriginObjectClassName, DestinationObjectClassName, RuleDescription
+        """
+        counts = {
+            (origin, dest, rule): (total, exceptions or 0)
+            for origin, dest, rule, total, exceptions in conn.execute(query)
+        }
+        return cls(counts)
+
+    def rule_descriptions(self):
+        return {rule for _, _, rule in self.counts}
+
+    def get(self, origin, dest, rule):
+        """
+        Devuelve (total, excepciones). Para las reglas simétricas se suman ambas
+        direcciones, sin contar dos veces cuando origen y destino son iguales.
+        """
+        total, exceptions = self.counts.get((origin, dest, rule), (0, 0))
+        if rule in SYMMETRIC_RULES and origin != dest:
+            reverse_total, reverse_exceptions = self.counts.get((dest, origin, rule), (0, 0))
+            total += reverse_total
+            exceptions += reverse_exceptions
+        return total, exceptions
+
+
+def detect_rule_language(rule_descriptions, available):
+    """
+    Idioma de las descripciones de regla presentes en la base ('en' o 'es').
+    rule_descriptions mapea la descripción en inglés a la española.
+    """
+    for eng_rule, esp_rule in rule_descriptions.items():
+        if eng_rule in available:
+            return 'en'
+        if esp_rule in available:
+            return 'es'
+    return 'en'
+
+
+def count_tables(conn, tables, exception_field='isExceptio'):
+    """
+    Conteos (total, excepciones) de varias tablas de errores completas con
+    consultas UNION ALL, una pasada por tabla. Devuelve {tabla: (total, excepciones)}.
+    """
+    tables = list(tables)
+    counts = {}
+    for start in range(0, len(tables), _MAX_COMPOUND_SELECT):
+        chunk = tables[start:start + _MAX_COMPOUND_SELECT]
+        query = " UNION ALL ".join(
+            f"SELECT ?, COUNT(*), SUM(CASE WHEN {exception_field} != 0 THEN 1 ELSE 0 END) FROM \"{table}\""
+            for table in chunk
+        )
+        for table, total, exceptions in conn.execute(query, chunk):
+            counts[table] = (total, exceptions or 0)
+    return counts
@@ -0,0 +1,540 @@
+"""
+Motor de topología sin arcpy para las cuatro familias de reglas de TOPOLOGY_RULES
+(must_not_overlap, must_not_have_gaps, must_be_covered_by, must_cover_each_other).
+
+Lee las capas desde un GeoPackage o una carpeta de GeoParquet, evalúa las reglas
+con índices STR-tree de shapely (en paralelo por regla y por tesela) y escribe los errores en el
+mismo esquema que ExportTopologyErrors: <DATASET>_errors_poly/_line/_point con
+OriginObjectClassName, OriginObjectID, DestinationObjectClassName,
+DestinationObjectID, RuleType, RuleDescription e isException.
+
+Uso:
+    python TopologyEngine.py --source URBANO_CTM12.gpkg --dataset URBANO_CTM12 --output errores.gpkg
+"""
+import argparse
+import concurrent.futures
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import shapely
+from shapely import wkb as shapely_wkb
+
+from GeometryEngine import gpkg_layer_summary, read_gpkg_features, read_gpkg_srs, write_gpkg_layer
+from TopologyRules import TOPOLOGY_RULES
+
+
+# Mismo entorno que 04_Aplicar_Reglas_Topologicas (XYResolution / XYTolerance)
+XY_RESOLUTION = 0.0001
+XY_TOLERANCE = 0.001
+
+# Entidades objetivo por tesela: el tamaño de la grilla se ajusta a la densidad del dataset
+FEATURES_PER_TILE = 20000
+
+# Familia -> (RuleType, RuleDescription) tal como los exporta ArcGIS
+RULE_FAMILIES = {
+    'must_not_overlap': ('esriTRTAreaNoOverlap', 'Must Not Overlap'),
+    'must_not_have_gaps': ('esriTRTAreaNoGaps', 'Must Not Have Gaps'),
+    'must_be_covered_by': ('esriTRTAreaCoveredByAreaClass', 'Must Be Covered By Feature Class Of'),
+    'must_cover_each_other': ('esriTRTAreaAreaCoverEachOther', 'Must Cover Each Other'),
+}
+
+ERROR_FIELDS = [
+    ('OriginObjectClassName', 'TEXT'),
+    ('OriginObjectID', 'INTEGER'),
+    ('DestinationObjectClassName', 'TEXT'),
+    ('DestinationObjectID', 'INTEGER'),
+    ('RuleType', 'TEXT'),
+    ('RuleDescription', 'TEXT'),
+    ('isException', 'INTEGER'),
+]
+
+# Sufijo de capa de errores -> tipo de geometría GeoPackage
+ERROR_LAYERS = {
+    'poly': 'MULTIPOLYGON',
+    'line': 'MULTILINESTRING',
+    'point': 'MULTIPOINT',
+}
+
+
+def log_message(message):
+    """
+    Imprime un mensaje con marca de tiempo
+    """
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+
+class TopologyEngineError(Exception):
+    """Error de lectura de capas o de configuración del motor de topología"""
+
+
+class FeatureSource:
+    """
+    Acceso de solo lectura a las capas de un dataset. `path` puede ser un
+    GeoPackage (.gpkg) o una carpeta con un <capa>.parquet (GeoParquet) por capa.
+    Los nombres de capa se buscan sin distinguir mayúsculas.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_gpkg = os.path.isfile(path) and path.lower().endswith('.gpkg')
+        if not self.is_gpkg and not os.path.isdir(path):
+            raise TopologyEngineError(f"Fuente no soportada: {path} (se espera .gpkg o carpeta GeoParquet)")
+        self._layers = self._list_layers()
+
+    def _list_layers(self):
+        if self.is_gpkg:
+            conn = sqlite3.connect(self.path)
+            try:
+                names = [row[0] for row in conn.execute("SELECT table_name FROM gpkg_geometry_columns")]
+            finally:
+                conn.close()
+        else:
+            names = [os.path.splitext(f)[0] for f in os.listdir(self.path) if f.lower().endswith('.parquet')]
+        return {name.upper(): name for name in names}
+
+    def exists(self, layer):
+        return layer.upper() in self._layers
+
+    def srs(self, layer):
+        """Sistema de referencia de la capa en formato gpkg_spatial_ref_sys (o None)"""
+        if not self.exists(layer):
+            return None
+        if self.is_gpkg:
+            return read_gpkg_srs(self.path, self._layers[layer.upper()])
+        return None
+
+    def summary(self, layer):
+        """Número de entidades y extensión (minx, miny, maxx, maxy) de la capa"""
+        name = self._layers[layer.upper()]
+        if self.is_gpkg:
+            return gpkg_layer_summary(self.path, name)
+        _, geoms = self.read(layer)
+        if len(geoms) == 0:
+            return 0, None
+        return len(geoms), tuple(shapely.total_bounds(geoms).tolist())
+
+    def read(self, layer, bbox=None):
+        """
+        Devuelve (oids, geometrías) como arreglos numpy, sin geometrías nulas o vacías.
+        Con `bbox` solo se leen las entidades cuyo envelope lo intersecta.
+        """
+        if not self.exists(layer):
+            raise TopologyEngineError(f"La capa {layer} no existe en {self.path}")
+        name = self._layers[layer.upper()]
+        if self.is_gpkg:
+            oids, blobs = [], []
+            for fid, _, wkb in read_gpkg_features(self.path, name, [], bbox=bbox):
+                oids.append(fid)
+                blobs.append(wkb)
+        else:
+            oids, blobs = self._read_parquet(name)
+
+        geoms = np.array([shapely_wkb.loads(bytes(b)) if b is not None else None for b in blobs], dtype=object)
+        oids = np.asarray(oids, dtype=np.int64)
+        keep = ~(shapely.is_missing(geoms) | shapely.is_empty(geoms))
+        oids, geoms = oids[keep], geoms[keep]
+        if bbox is not None and not self.is_gpkg and len(geoms):
+            bounds = shapely.bounds(geoms)
+            keep = ((bounds[:, 2] >= bbox[0]) & (bounds[:, 0] <= bbox[2])
+                    & (bounds[:, 3] >= bbox[1]) & (bounds[:, 1] <= bbox[3]))
+            oids, geoms = oids[keep], geoms[keep]
+
+        # Equivalente a RepairGeometry: las geometrías inválidas se corrigen antes de evaluar
+        invalid = ~shapely.is_valid(geoms)
+        if invalid.any():
+            geoms[invalid] = shapely.make_valid(geoms[invalid])
+        return oids, geoms
+
+    def _read_parquet(self, name):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise TopologyEngineError("Se requiere pyarrow para leer GeoParquet")
+
+        table = pq.read_table(os.path.join(self.path, f"{name}.parquet"))
+        metadata = table.schema.metadata or {}
+        geo = json.loads(metadata.get(b'geo', b'{}') or b'{}')
+        geometry_column = geo.get('primary_column', 'geometry')
+        blobs = table.column(geometry_column).to_pylist()
+
+        columns = {c.upper(): c for c in table.column_names}
+        oid_column = next((columns[c] for c in ('OBJECTID', 'FID', 'OID') if c in columns), None)
+        oids = table.column(oid_column).to_pylist() if oid_column else list(range(1, len(blobs) + 1))
+        return oids, blobs
+
+
+def plan_grid(extent, feature_count, features_per_tile=FEATURES_PER_TILE):
+    """
+    Divide la extensión en una grilla de teselas según la densidad de entidades:
+    tantas teselas como hagan falta para no superar features_per_tile en promedio,
+    con celdas de proporción cercana a la de la extensión. Cada tesela es
+    (minx, miny, maxx, maxy, última_columna, última_fila); devuelve [None] si
+    basta con una sola.
+    """
+    if extent is None or feature_count <= features_per_tile:
+        return [None]
+    minx, miny, maxx, maxy = extent
+    width = max(maxx - minx, XY_TOLERANCE)
+    height = max(maxy - miny, XY_TOLERANCE)
+
+    tiles_needed = math.ceil(feature_count / features_per_tile)
+    cols = max(1, round(math.sqrt(tiles_needed * width / height)))
+    rows = max(1, math.ceil(tiles_needed / cols))
+    xs = np.linspace(minx, minx + width, cols + 1)
+    ys = np.linspace(miny, miny + height, rows + 1)
+    return [(float(xs[c]), float(ys[r]), float(xs[c + 1]), float(ys[r + 1]), c == cols - 1, r == rows - 1)
+            for r in range(rows) for c in range(cols)]
+
+
+def owned_by_tile(tile, x, y):
+    """
+    Máscara de los puntos de referencia que pertenecen a la tesela. Los intervalos
+    son semiabiertos (salvo en el último borde), así que cada punto tiene un solo
+    dueño y los errores sobre las costuras entre teselas no se duplican.
+    """
+    if tile is None:
+        return np.ones(len(x), dtype=bool)
+    minx, miny, maxx, maxy, last_col, last_row = tile
+    in_x = (x >= minx) & ((x <= maxx) if last_col else (x < maxx))
+    in_y = (y >= miny) & ((y <= maxy) if last_row else (y < maxy))
+    return in_x & in_y
+
+
+def _polygonal(geoms):
+    """Conserva solo la parte poligonal de cada resultado de overlay"""
+    result = []
+    for geom in geoms:
+        if geom is None or geom.is_empty:
+            result.append(None)
+        elif geom.geom_type in ('Polygon', 'MultiPolygon'):
+            result.append(geom)
+        else:
+            parts = [g for g in shapely.get_parts(geom) if g.geom_type in ('Polygon', 'MultiPolygon')]
+            result.append(shapely.union_all(parts) if parts else None)
+    return result
+
+
+def _significant(geom, min_area):
+    return geom is not None and not geom.is_empty and geom.area > min_area
+
+
+def find_overlaps(oids, geoms, grid_size=XY_RESOLUTION, min_area=XY_TOLERANCE ** 2, tile=None):
+    """
+    Must Not Overlap: un polígono de error por cada par de entidades que se superponen.
+    Con `tile`, solo los pares cuyo punto de referencia (esquina inferior izquierda
+    de la intersección de sus envelopes) cae en la tesela.
+    """
+    if len(geoms) < 2:
+        return []
+    tree = shapely.STRtree(geoms)
+    left, right = tree.query(geoms, predicate='intersects')
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+    if tile is not None and len(left):
+        bounds = shapely.bounds(geoms)
+        ref_x = np.maximum(bounds[left, 0], bounds[right, 0])
+        ref_y = np.maximum(bounds[left, 1], bounds[right, 1])
+        owned = owned_by_tile(tile, ref_x, ref_y)
+        left, right = left[owned], right[owned]
+    if len(left) == 0:
+        return []
+
+    overlaps = _polygonal(shapely.intersection(geoms[left], geoms[right], grid_size=grid_size))
+    errors = []
+    for i, j, geom in zip(left, right, overlaps):
+        if _significant(geom, min_area):
+            a, b = sorted((int(oids[i]), int(oids[j])))
+            errors.append((geom, a, b))
+    return errors
+
+
+def find_gaps(oids, geoms, grid_size=XY_RESOLUTION):
+    """
+    Must Not Have Gaps: líneas de error sobre los bordes de la unión de la capa
+    (anillo exterior y huecos), igual que la regla de ArcGIS.
+    """
+    if len(geoms) == 0:
+        return []
+    return gap_rings(shapely.union_all(geoms, grid_size=grid_size))
+
+
+def gap_rings(dissolved):
+    """Anillos (exterior y huecos) de una unión disuelta como errores de línea"""
+    errors = []
+    for polygon in shapely.get_parts(dissolved):
+        if polygon.geom_type != 'Polygon':
+            continue
+        for ring in [polygon.exterior] + list(polygon.interiors):
+            errors.append((shapely.LineString(ring.coords), 0, 0))
+    return errors
+
+
+def find_not_covered(origin_oids, origin_geoms, dest_geoms, grid_size=XY_RESOLUTION,
+                     min_area=XY_TOLERANCE ** 2):
+    """
+    Must Be Covered By: para cada entidad de origen, la parte no cubierta por la
+    unión de las entidades de destino que la intersectan.
+    """
+    if len(origin_geoms) == 0:
+        return []
+    if len(dest_geoms) == 0:
+        return [(geom, int(oid), 0) for oid, geom in zip(origin_oids, origin_geoms)
+                if _significant(geom, min_area)]
+
+    tree = shapely.STRtree(dest_geoms)
+
+    # Las entidades cubiertas por una sola entidad de destino no requieren overlay
+    covered, _ = tree.query(origin_geoms, predicate='covered_by')
+    covered = set(covered.tolist())
+
+    origin_idx, dest_idx = tree.query(origin_geoms, predicate='intersects')
+    candidates = {}
+    for i, j in zip(origin_idx.tolist(), dest_idx.tolist()):
+        if i not in covered:
+            candidates.setdefault(i, []).append(j)
+
+    errors = []
+    for i in range(len(origin_geoms)):
+        if i in covered:
+            continue
+        geom = origin_geoms[i]
+        if i in candidates:
+            cover = shapely.union_all(dest_geoms[candidates[i]], grid_size=grid_size)
+            geom = shapely.difference(geom, cover, grid_size=grid_size)
+            geom = _polygonal([geom])[0]
+        if _significant(geom, min_area):
+            errors.append((geom, int(origin_oids[i]), 0))
+    return errors
+
+
+def plan_rules(topology_rules, source):
+    """
+    Lista de reglas a evaluar (familia, origen, destino) para una entrada de
+    TOPOLOGY_RULES, omitiendo las capas que no existen en la fuente.
+    """
+    tasks = []
+    for family in RULE_FAMILIES:
+        for entry in topology_rules.get(family, []):
+            origin, destination = (entry, entry) if isinstance(entry, str) else entry
+            missing = [name for name in {origin, destination} if not source.exists(name)]
+            if missing:
+                log_message(f"  Feature class no encontrado para {RULE_FAMILIES[family][1]}: {', '.join(missing)}")
+                continue
+            tasks.append((family, origin, destination))
+    return tasks
+
+
+def evaluate_rule(source_path, family, origin, destination, grid_size=XY_RESOLUTION):
+    """
+    Evalúa una regla y devuelve (tipo de capa, filas de error). Cada fila es
+    (wkb, (OriginObjectClassName, OriginObjectID, DestinationObjectClassName,
+    DestinationObjectID, RuleType, RuleDescription, isException)).
+    Se ejecuta en un proceso del pool, por lo que abre su propia fuente.
+    """
+    source = FeatureSource(source_path)
+    rule_type, description = RULE_FAMILIES[family]
+    min_area = XY_TOLERANCE ** 2
+
+    def rows(found, origin_name, destination_name):
+        return [(shapely.to_wkb(geom), (origin_name, origin_oid, destination_name, destination_oid,
+                                        rule_type, description, 0))
+                for geom, origin_oid, destination_oid in found]
+
+    origin_oids, origin_geoms = source.read(origin)
+    if family == 'must_not_overlap':
+        return 'poly', rows(find_overlaps(origin_oids, origin_geoms, grid_size, min_area), origin, origin)
+    if family == 'must_not_have_gaps':
+        return 'line', rows(find_gaps(origin_oids, origin_geoms, grid_size), origin, origin)
+
+    dest_oids, dest_geoms = source.read(destination)
+    errors = rows(find_not_covered(origin_oids, origin_geoms, dest_geoms, grid_size, min_area),
+                  origin, destination)
+    if family == 'must_cover_each_other':
+        errors += rows(find_not_covered(dest_oids, dest_geoms, origin_geoms, grid_size, min_area),
+                       destination, origin)
+    return 'poly', errors
+
+
+def _owned_mask(geoms, tile):
+    """Entidades cuya esquina inferior izquierda del envelope pertenece a la tesela"""
+    bounds = shapely.bounds(geoms)
+    return owned_by_tile(tile, bounds[:, 0], bounds[:, 1])
+
+
+def _not_covered_in_tile(source, origin, destination, tile, grid_size, min_area):
+    origin_oids, origin_geoms = source.read(origin, tile[:4])
+    owned = _owned_mask(origin_geoms, tile) if len(origin_geoms) else np.zeros(0, dtype=bool)
+    origin_oids, origin_geoms = origin_oids[owned], origin_geoms[owned]
+    if len(origin_geoms) == 0:
+        return []
+    # Destino: todo lo que toque a las entidades de origen de la tesela, aunque salga de ella
+    dest_oids, dest_geoms = source.read(destination, tuple(shapely.total_bounds(origin_geoms).tolist()))
+    return find_not_covered(origin_oids, origin_geoms, dest_geoms, grid_size, min_area)
+
+
+def evaluate_rule_tile(source_path, family, origin, destination, tile, grid_size=XY_RESOLUTION):
+    """
+    Evalúa una regla dentro de una tesela. Devuelve (tipo, resultado): filas de
+    error como evaluate_rule, o ('gaps', WKB de la unión parcial) para
+    must_not_have_gaps, que se completa al unir las teselas.
+    """
+    if tile is None:
+        return evaluate_rule(source_path, family, origin, destination, grid_size)
+
+    source = FeatureSource(source_path)
+    rule_type, description = RULE_FAMILIES[family]
+    min_area = XY_TOLERANCE ** 2
+
+    def rows(found, origin_name, destination_name):
+        return [(shapely.to_wkb(geom), (origin_name, origin_oid, destination_name, destination_oid,
+                                        rule_type, description, 0))
+                for geom, origin_oid, destination_oid in found]
+
+    if family == 'must_not_overlap':
+        oids, geoms = source.read(origin, tile[:4])
+        return 'poly', rows(find_overlaps(oids, geoms, grid_size, min_area, tile), origin, origin)
+
+    if family == 'must_not_have_gaps':
+        _, geoms = source.read(origin, tile[:4])
+        geoms = geoms[_owned_mask(geoms, tile)] if len(geoms) else geoms
+        partial = shapely.union_all(geoms, grid_size=grid_size) if len(geoms) else None
+        return 'gaps', shapely.to_wkb(partial) if partial is not None and not partial.is_empty else None
+
+    errors = rows(_not_covered_in_tile(source, origin, destination, tile, grid_size, min_area),
+                  origin, destination)
+    if family == 'must_cover_each_other':
+        errors += rows(_not_covered_in_tile(source, destination, origin, tile, grid_size, min_area),
+                       destination, origin)
+    return 'poly', errors
+
+
+def plan_tiles(source, tasks, features_per_tile=FEATURES_PER_TILE):
+    """Grilla común para todas las reglas, a partir del total de entidades y la extensión conjunta"""
+    total = 0
+    bounds = [math.inf, math.inf, -math.inf, -math.inf]
+    for layer in sorted({name for _, origin, destination in tasks for name in (origin, destination)}):
+        count, extent = source.summary(layer)
+        total += count
+        if extent is not None:
+            bounds = [min(bounds[0], extent[0]), min(bounds[1], extent[1]),
+                      max(bounds[2], extent[2]), max(bounds[3], extent[3])]
+    extent = tuple(bounds) if math.isfinite(bounds[0]) else None
+    return plan_grid(extent, total, features_per_tile)
+
+
+def _merge_tile_results(family, origin, tile_results):
+    """Une los resultados de las teselas de una regla en el orden de la grilla"""
+    if family != 'must_not_have_gaps':
+        rows = []
+        for _, tile_rows in tile_results:
+            rows.extend(tile_rows)
+        return 'poly', rows
+
+    partials = [shapely_wkb.loads(wkb) for _, wkb in tile_results if wkb is not None]
+    if not partials:
+        return 'line', []
+    rule_type, description = RULE_FAMILIES[family]
+    dissolved = shapely.union_all(np.array(partials, dtype=object), grid_size=XY_RESOLUTION)
+    return 'line', [(shapely.to_wkb(geom), (origin, origin_oid, origin, destination_oid,
+                                            rule_type, description, 0))
+                    for geom, origin_oid, destination_oid in gap_rings(dissolved)]
+
+
+def run_topology(source_path, dataset, output_gpkg, topology_rules=None, max_workers=None,
+                 features_per_tile=FEATURES_PER_TILE):
+    """
+    Evalúa todas las reglas de un dataset y escribe <DATASET>_errors_poly/_line/_point
+    en output_gpkg. Si el dataset supera features_per_tile entidades, cada regla se
+    evalúa por teselas independientes (en paralelo) y los errores se unen sin
+    duplicar los de las costuras. Devuelve un dict con el número de errores por capa.
+    """
+    start_time = time.time()
+    source = FeatureSource(source_path)
+
+    if topology_rules is None:
+        topology_rules = next((rules for rules in TOPOLOGY_RULES.values()
+                               if rules.get('dataset') == dataset), None)
+        if topology_rules is None:
+            raise TopologyEngineError(f"No hay reglas topológicas definidas para {dataset}")
+
+    tasks = plan_rules(topology_rules, source)
+    tiles = plan_tiles(source, tasks, features_per_tile) if tasks else [None]
+    log_message(f"Evaluando {len(tasks)} reglas para {dataset} en {len(tiles)} teselas")
+
+    jobs = [(rule_index, tile) for rule_index in range(len(tasks)) for tile in tiles]
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(jobs) or 1))
+    tile_results = [None] * len(jobs)
+    if workers == 1:
+        for job_index, (rule_index, tile) in enumerate(jobs):
+            tile_results[job_index] = evaluate_rule_tile(source_path, *tasks[rule_index], tile)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(evaluate_rule_tile, source_path, *tasks[rule_index], tile): job_index
+                       for job_index, (rule_index, tile) in enumerate(jobs)}
+            for future in concurrent.futures.as_completed(futures):
+                tile_results[futures[future]] = future.result()
+
+    results = []
+    for rule_index, (family, origin, _) in enumerate(tasks):
+        per_rule = tile_results[rule_index * len(tiles):(rule_index + 1) * len(tiles)]
+        results.append(per_rule[0] if tiles == [None] else _merge_tile_results(family, origin, per_rule))
+
+    # Orden determinista: el de la planificación de reglas
+    errors = {suffix: [] for suffix in ERROR_LAYERS}
+    for (family, origin, destination), (suffix, rows) in zip(tasks, results):
+        log_message(f"  {RULE_FAMILIES[family][1]} {origin}"
+                    f"{'' if origin == destination else ' / ' + destination}: {len(rows)} errores")
+        errors[suffix].extend(rows)
+
+    srs = next((source.srs(origin) for _, origin, _ in tasks if source.srs(origin)), None)
+    counts = {}
+    for suffix, geometry_type in ERROR_LAYERS.items():
+        rows = ((_as_multi(wkb), attributes) for wkb, attributes in errors[suffix])
+        counts[suffix] = write_gpkg_layer(output_gpkg, f"{dataset}_errors_{suffix}",
+                                          ERROR_FIELDS, rows, geometry_type, srs)
+
+    log_message(f"Topología de {dataset} evaluada en {time.time() - start_time:.2f} segundos")
+    return counts
+
+
+def _as_multi(wkb):
+    """Normaliza a Multi* para respetar el tipo declarado de la capa de errores"""
+    geom = shapely_wkb.loads(wkb)
+    if geom.geom_type == 'Polygon':
+        geom = shapely.MultiPolygon([geom])
+    elif geom.geom_type == 'LineString':
+        geom = shapely.MultiLineString([geom])
+    elif geom.geom_type == 'Point':
+        geom = shapely.MultiPoint([geom])
+    return shapely.to_wkb(geom)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de topología sin arcpy")
+    parser.add_argument('--source', required=True, help="GeoPackage o carpeta GeoParquet del dataset")
+    parser.add_argument('--dataset', required=True, help="Nombre del dataset (p. ej. URBANO_CTM12)")
+    parser.add_argument('--output', required=True, help="GeoPackage de salida para las capas de errores")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument('--features-per-tile', type=int, default=FEATURES_PER_TILE,
+                        help="Entidades por tesela para dividir datasets grandes")
+    args = parser.parse_args()
+
+    try:
+        counts = run_topology(args.source, args.dataset, args.output, max_workers=args.workers,
+                              features_per_tile=args.features_per_tile)
+        for suffix, count in counts.items():
+            log_message(f"Errores tipo _{suffix}: {count}")
+    except TopologyEngineError as e:
+        log_message(f"ERROR: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
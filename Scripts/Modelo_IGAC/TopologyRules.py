@@ -0,0 +1,222 @@
+"""
+Reglas topológicas por topología/dataset. Se comparten entre
+04_Aplicar_Reglas_Topologicas (topología de ArcGIS) y TopologyEngine (motor sin arcpy).
+"""
+
+# Definición de reglas por topología con los datasets correctos
+TOPOLOGY_RULES = {
+    "URBANO_CTM12_Topology": {
+        "dataset": "URBANO_CTM12",  
+        "must_not_overlap": [
+            "U_TERRENO_CTM12", "U_TERRENO_INFORMAL", "U_MANZANA_CTM12",
+            "U_SECTOR_CTM12", "U_BARRIO_CTM12", "U_PERIMETRO_CTM12",
+            "U_CONSTRUCCION_CTM12", "U_CONSTRUCCION_INFORMAL",
+            "U_ZONA_HOMOGENEA_FISICA_CTM12",
+            "U_ZONA_HOMO_GEOECONOMICA_CTM12",
+    
+        ],
+        "must_not_have_gaps": [
+            "U_TERRENO_CTM12", "U_TERRENO_INFORMAL", "U_MANZANA_CTM12",
+            "U_SECTOR_CTM12", "U_BARRIO_CTM12", "U_PERIMETRO_CTM12",
+            "U_ZONA_HOMOGENEA_FISICA_CTM12", "U_ZONA_HOMO_GEOECONOMICA_CTM12"
+
+        ],
+        "must_be_covered_by": [
+            ("U_SECTOR_CTM12", "U_PERIMETRO_CTM12"),
+            ("U_BARRIO_CTM12", "U_SECTOR_CTM12"),
+            ("U_TERRENO_CTM12", "U_MANZANA_CTM12"),
+            ("U_CONSTRUCCION_CTM12", "U_TERRENO_CTM12"),
+            ("U_CONSTRUCCION_INFORMAL", "U_TERRENO_INFORMAL"),
+            ("U_TERRENO_INFORMAL","U_TERRENO_CTM12"),
+
+
+        ],
+        "must_cover_each_other":[
+            ("U_TERRENO_CTM12", "U_MANZANA_CTM12"),
+            ("U_UNIDAD_CTM12", "U_CONSTRUCCION_CTM12"),
+            ("U_UNIDAD_INFORMAL", "U_CONSTRUCCION_INFORMAL"),
+            ("U_ZONA_HOMO_GEOECONOMICA_CTM12", "U_ZONA_HOMOGENEA_FISICA_CTM12")
+
+        ]
+        
+    },
+    "RURAL_TOPOLOGY": {
+        "dataset": "RURAL",
+        "must_not_overlap": [
+            "R_TERRENO","R_CONSTRUCCION","R_VEREDA","R_SECTOR",
+            "R_ZONA_HOMOGENEA_FISICA","R_ZONA_HOMOGENEA_GEOECONOMICA"
+        ],
+        "must_not_have_gaps": [
+            "R_TERRENO","R_VEREDA","R_SECTOR",
+            "R_ZONA_HOMOGENEA_FISICA","R_ZONA_HOMOGENEA_GEOECONOMICA"
+        ],
+        "must_be_covered_by": [
+            ("R_VEREDA", "R_SECTOR"),
+            ("R_TERRENO", "R_VEREDA"),
+            ("R_CONSTRUCCION", "R_TERRENO"),
+        ],
+        "must_cover_each_other":[
+            ("R_TERRENO", "R_VEREDA"),
+            ("R_UNIDAD", "R_CONSTRUCCION"),
+            ("R_ZONA_HOMOGENEA_GEOECONOMICA", "R_ZONA_HOMOGENEA_FISICA")
+
+        ]
+    },
+    "RURAL_CTM12_Topology": {
+        "dataset": "RURAL_CTM12",  
+        "must_not_overlap": [
+            "R_TERRENO_CTM12", "R_TERRENO_INFORMAL",
+            "R_CONSTRUCCION_CTM12", "R_CONSTRUCCION_INFORMAL",
+            "R_VEREDA_CTM12","R_SECTOR_CTM12",
+            "R_ZONA_HOMOGENEA_FISICA_CTM12",
+            "R_ZONA_HOMO_GEOECONOMICA_CTM12"
+        ],
+        "must_not_have_gaps": [
+            "R_TERRENO_CTM12", "R_TERRENO_INFORMAL",
+            "R_VEREDA_CTM12", "R_SECTOR_CTM12",
+            "R_ZONA_HOMOGENEA_FISICA_CTM12","R_ZONA_HOMO_GEOECONOMICA_CTM12"
+        ],
+        "must_be_covered_by": [
+            ("R_VEREDA_CTM12", "R_SECTOR_CTM12"),
+            ("R_TERRENO_CTM12", "R_VEREDA_CTM12"),
+            ("R_CONSTRUCCION_CTM12", "R_TERRENO_CTM12"),
+            ("R_CONSTRUCCION_INFORMAL", "R_TERRENO_INFORMAL"),
+            ("R_TERRENO_INFORMAL", "R_TERRENO_CTM12"),
+        ],
+        "must_cover_each_other":[
+            ("R_TERRENO_CTM12", "R_VEREDA_CTM12"),
+            ("R_UNIDAD_CTM12", "R_CONSTRUCCION_CTM12"),
+            ("R_UNIDAD_INFORMAL", "R_CONSTRUCCION_INFORMAL"),
+            ("R_ZONA_HOMO_GEOECONOMICA_CTM12", "R_ZONA_HOMOGENEA_FISICA_CTM12")
+
+        ]
+    },
+    "URBANO_Topology": {
+        "dataset": "URBANO",  
+        "must_not_overlap": [
+            "U_TERRENO","U_MANZANA",
+            "U_SECTOR", "U_BARRIO", "U_PERIMETRO",
+            "U_CONSTRUCCION",
+            "U_ZONA_HOMOGENEA_FISICA",
+            "U_ZONA_HOMOGENEA_GEOECONOMICA",
+    
+        ],
+        "must_not_have_gaps": [
+            "U_TERRENO","U_MANZANA",
+            "U_SECTOR", "U_BARRIO", "U_PERIMETRO",
+            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
+
+        ],
+        "must_be_covered_by": [
+            ("U_SECTOR", "U_PERIMETRO"),
+            ("U_BARRIO", "U_SECTOR"),
+            ("U_TERRENO", "U_MANZANA"),
+            ("U_CONSTRUCCION", "U_TERRENO"),
+
+        ],
+        "must_cover_each_other":[
+            ("U_TERRENO", "U_MANZANA"),
+            ("U_UNIDAD", "U_CONSTRUCCION"),
+            ("U_ZONA_HOMOGENEA_GEOECONOMICA", "U_ZONA_HOMOGENEA_FISICA")
+
+        ]
+    },
+    "ZONA_HOMOGENEA_URBANO_Topology": {
+        "dataset": "ZONA_HOMOGENEA_URBANO",  
+        "must_not_overlap": [
+            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
+           
+        ],
+        "must_not_have_gaps":[
+            "U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA"
+        ],
+        "must_cover_each_other": [
+            ("U_ZONA_HOMOGENEA_FISICA", "U_ZONA_HOMOGENEA_GEOECONOMICA")
+        ]
+    },
+    "ZONA_HOMOGENEA_RURAL_CTM12_Topology": {
+        "dataset": "ZONA_HOMOGENEA_RURAL_CTM12",  
+        "must_not_overlap": [
+            "R_ZONA_HOMO_GEOECONOMICA_CTM12",
+            "R_ZONA_HOMOGENEA_FISICA_CTM12"
+        ],
+        "must_not_have_gaps": [
+            "R_ZONA_HOMOGENEA_FISICA_CTM12",
+            "R_ZONA_HOMO_GEOECONOMICA_CTM12"
+        ],
+        "must_cover_each_other": [
+            ("R_ZONA_HOMOGENEA_FISICA_CTM12", "R_ZONA_HOMO_GEOECONOMICA_CTM12")
+        ]
+    },
+    "ZONA_HOMOGENEA_URBANO_CTM12_Topology": {
+        "dataset": "ZONA_HOMOGENEA_URBANO_CTM12",  
+        "must_not_overlap": [
+            "U_ZONA_HOMO_GEOECONOMICA_CTM12",
+            "U_ZONA_HOMOGENEA_FISICA_CTM12"
+        ],
+        "must_not_have_gaps": [
+            "U_ZONA_HOMOGENEA_FISICA_CTM12",
+            "U_ZONA_HOMO_GEOECONOMICA_CTM12"
+        ],
+        "must_cover_each_other": [
+            ("U_ZONA_HOMOGENEA_FISICA_CTM12", "U_ZONA_HOMO_GEOECONOMICA_CTM12")
+        ]
+    },
+    "ZONA_HOMOGENEA_RURAL_Topology": {
+        "dataset": "ZONA_HOMOGENEA_RURAL",  
+        "must_not_overlap": [
+            "R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA"
+           
+        ],
+        "must_not_have_gaps":[
+            "R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA"
+        ],
+        "must_cover_each_other": [
+            ("R_ZONA_HOMOGENEA_FISICA", "R_ZONA_HOMOGENEA_GEOECONOMICA")
+        ]
+    }
+}
+
+# Nuevo diccionario para reglas de topología de líneas
+LINE_TOPOLOGY_RULES = {
+    "URBANO_CTM12_Topology": {
+        "dataset": "URBANO_CTM12",
+        "features": [
+            {
+                "name": "U_NOMEN_DOMICILIARIA_CTM12",
+                "rules": ["must_not_overlap"]
+            }
+
+        ]
+    },
+    "RURAL_CTM12_Topology": {
+        "dataset": "RURAL_CTM12",
+        "features": [
+            {
+                "name": "R_NOMEN_DOMICILIARIA_CTM12",
+                "rules": ["must_not_overlap"]
+            }
+
+        ]
+    },
+    "URBANO_Topology": {
+        "dataset": "URBANO",
+        "features": [
+            {
+                "name": "U_NOMENCLATURA_DOMICILIARIA",
+                "rules": ["must_not_overlap"]
+            }
+
+        ]
+    },
+    "RURAL_Topology": {
+        "dataset": "RURAL",
+        "features": [
+            {
+                "name": "R_NOMENCLATURA_DOMICILIARIA",
+                "rules": ["must_not_overlap"]
+            }
+
+        ]
+    }
+}
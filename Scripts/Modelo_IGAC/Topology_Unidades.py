@@ -75,7 +75,7 @@ from pathlib import Path
 import logging
 from datetime import datetime
 from collections import defaultdict
-import uuid
+from GeometryEngine import AreaBucketIndex, GroupOverlapEngine
 
 class UnitDuplicateDetector:
     def __init__(self, input_gdb, topology_gdb):
@@ -94,13 +94,8 @@ class UnitDuplicateDetector:
         # PLANTA está incluida intencionalmente para asegurar la diferenciación
         self.compare_fields = ["CODIGO", "TIPO_CONSTRUCCION", "IDENTIFICADOR", "PLANTA"]
         self.area_tolerance = 0.005
-        self.batch_size = 50
-
-    def _are_areas_similar(self, area1, area2):
-        if area1 == 0 or area2 == 0:
-            return False
-        difference = abs(area1 - area2) / max(area1, area2)
-        return difference <= self.area_tolerance
+        self.overlap_threshold = 0.05
+        self.iou_threshold = 0.95
 
     def _find_layer_duplicates(self, fc_path, layer_name):
         spatial_index = None
@@ -112,20 +107,21 @@ class UnitDuplicateDetector:
             arcpy.AddSpatialIndex_management(fc_path)
 
         potential_duplicates = defaultdict(list)
+        area_index = AreaBucketIndex(self.area_tolerance)
         oid_lookup = {}
         
-        with arcpy.da.SearchCursor(fc_path, self.compare_fields + ["SHAPE@AREA", "OID@", "SHAPE@", "SHAPE@XY"]) as cursor:
+        with arcpy.da.SearchCursor(fc_path, self.compare_fields + ["SHAPE@AREA", "OID@", "SHAPE@WKB"]) as cursor:
             for row in cursor:
-                # Obtenemos todos los valores de atributos excepto área, OID, geometría y centroide
-                attr_values = row[:-4]
+                # Obtenemos todos los valores de atributos excepto área, OID y geometría
+                attr_values = row[:-3]
                 if any(val is None for val in attr_values):
                     continue
                 
                 # Creamos la clave base con todos los atributos incluyendo PLANTA
                 base_key = tuple(str(val).strip() for val in attr_values)
-                area = row[-4]
-                oid = row[-3]
-                geom = row[-2]
+                area = row[-3]
+                oid = row[-2]
+                geom = row[-1]
                 
                 oid_lookup[oid] = {
                     'geometry': geom,
@@ -136,19 +132,9 @@ class UnitDuplicateDetector:
                 # La clave completa incluye área al final
                 full_key = base_key + (str(area),)
                 
-                found_group = False
-                for existing_key in list(potential_duplicates.keys()):
-                    # Comparamos todos los atributos excepto el área
-                    existing_base = existing_key[:-1]
-                    if existing_base == base_key:  # Asegura que PLANTA sea igual
-                        existing_area = float(existing_key[-1])
-                        if self._are_areas_similar(area, existing_area):
-                            potential_duplicates[existing_key].append(oid)
-                            found_group = True
-                            break
-                
-                if not found_group:
-                    potential_duplicates[full_key].append(oid)
+                # Grupo existente con los mismos atributos (incluida PLANTA) y área similar
+                group_key = area_index.assign(base_key, area, full_key)
+                potential_duplicates[group_key].append(oid)
 
         # Filtrar grupos que tienen más de un elemento
         duplicate_groups = {k: v for k, v in potential_duplicates.items() if len(v) > 1}
@@ -156,70 +142,31 @@ class UnitDuplicateDetector:
         if not duplicate_groups:
             return []
 
-        final_duplicates = []
-        groups_list = list(duplicate_groups.items())
-        
-        for batch_start in range(0, len(groups_list), self.batch_size):
-            batch_end = min(batch_start + self.batch_size, len(groups_list))
-            batch = groups_list[batch_start:batch_end]
-            
-            temp_name = f"TEMP_{str(uuid.uuid4()).replace('-', '')[:8]}"
-            temp_fc = os.path.join("in_memory", temp_name)
-            
-            try:
-                arcpy.CreateFeatureclass_management(
-                    "in_memory", temp_name, "POLYGON",
-                    spatial_reference=arcpy.Describe(fc_path).spatialReference
-                )
-                arcpy.AddField_management(temp_fc, "GROUP_ID", "TEXT")
-                arcpy.AddField_management(temp_fc, "ORIG_OID", "LONG")
+        # Confirmar superposición (>5% del área propia) solo dentro de cada grupo
+        overlap_engine = GroupOverlapEngine(self.overlap_threshold)
+        overlaps = overlap_engine.find_overlaps(
+            duplicate_groups,
+            {oid: oid_lookup[oid]['geometry'] for oids in duplicate_groups.values() for oid in oids}
+        )
 
-                with arcpy.da.InsertCursor(temp_fc, ["SHAPE@", "GROUP_ID", "ORIG_OID"]) as insert_cursor:
-                    for group_key, oids in batch:
-                        for oid in oids:
-                            feature = oid_lookup[oid]
-                            insert_cursor.insertRow([feature['geometry'], str(group_key), oid])
-
-                overlap_name = f"OVERLAP_{str(uuid.uuid4()).replace('-', '')[:8]}"
-                overlap_fc = os.path.join("in_memory", overlap_name)
-                
-                arcpy.Intersect_analysis([temp_fc], overlap_fc, "ALL")
-
-                processed_groups = set()
-                with arcpy.da.SearchCursor(overlap_fc, ["GROUP_ID", "ORIG_OID", "SHAPE@AREA"]) as cursor:
-                    for row in cursor:
-                        group_key = eval(row[0])
-                        if group_key in processed_groups:
-                            continue
-                            
-                        oid = row[1]
-                        overlap_area = row[2]
-                        if oid not in oid_lookup:
-                            continue
-                        
-                        original_area = oid_lookup[oid]['area']
-                        if overlap_area > (original_area * 0.05):
-                            oids_in_group = duplicate_groups[group_key]
-                            # Solo registrar los duplicados que comparten exactamente los mismos atributos
-                            for feature_oid in oids_in_group[1:]:
-                                if oid_lookup[oid]['attributes'] == oid_lookup[feature_oid]['attributes']:
-                                    final_duplicates.append({
-                                        'layer': layer_name,
-                                        'attributes': group_key[:-1],
-                                        'oid': feature_oid,
-                                        'geometry': oid_lookup[feature_oid]['geometry'],
-                                        'original_oid': oid
-                                    })
-                            processed_groups.add(group_key)
+        final_duplicates = []
+        for group_key, overlapping in overlaps.items():
+            # El primer miembro con superposición actúa como registro original
+            original_oid = next(iter(overlapping))
+            for feature_oid in duplicate_groups[group_key]:
+                if feature_oid == original_oid:
+                    continue
+                # Solo registrar los duplicados que comparten exactamente los mismos atributos
+                if oid_lookup[original_oid]['attributes'] == oid_lookup[feature_oid]['attributes']:
+                    final_duplicates.append({
+                        'layer': layer_name,
+                        'attributes': group_key[:-1],
+                        'oid': feature_oid,
+                        'geometry': oid_lookup[feature_oid]['geometry'],
+                        'original_oid': original_oid
+                    })
 
-            finally:
-                if arcpy.Exists(temp_fc):
-                    arcpy.Delete_management(temp_fc)
-                if arcpy.Exists(overlap_fc):
-                    arcpy.Delete_management(overlap_fc)
-            final_duplicates = self._verify_final_duplicates(final_duplicates, fc_path)
-        
-        return final_duplicates
+        return self._verify_final_duplicates(final_duplicates, overlap_engine)
 
     def clean_in_memory(self):
         try:
@@ -242,56 +189,17 @@ class UnitDuplicateDetector:
             
         return duplicates
 
-    def _verify_final_duplicates(self, duplicates, fc_path):
-        """Verificación final estricta usando solo los campos que determinan un duplicado"""
+    def _verify_final_duplicates(self, duplicates, overlap_engine):
+        """Verificación final estricta: los pares deben superponerse más del 95% (intersección/unión)"""
         verified_duplicates = []
         
-        fields_to_verify = self.compare_fields + ["SHAPE@", "OID@"]
-        
-        features_info = {}
-        with arcpy.da.SearchCursor(fc_path, fields_to_verify) as cursor:
-            for row in cursor:
-                oid = row[-1]
-                features_info[oid] = {
-                    'CODIGO': str(row[0]).strip(),
-                    'TIPO_CONSTRUCCION': str(row[1]).strip(),
-                    'IDENTIFICADOR': str(row[2]).strip(),
-                    'PLANTA': str(row[3]).strip(),
-                    'geometry': row[-2]
-                }
-        
         for duplicate in duplicates:
             oid = duplicate['oid']
             original_oid = duplicate.get('original_oid')
             
-            if oid not in features_info or original_oid not in features_info:
-                continue
-                
-            dup_feature = features_info[oid]
-            orig_feature = features_info[original_oid]
-            
-            # Verificar campos clave
-            is_duplicate = (
-                dup_feature['CODIGO'] == orig_feature['CODIGO'] and
-                dup_feature['TIPO_CONSTRUCCION'] == orig_feature['TIPO_CONSTRUCCION'] and
-                dup_feature['IDENTIFICADOR'] == orig_feature['IDENTIFICADOR'] and
-                dup_feature['PLANTA'] == orig_feature['PLANTA']
-            )
-            
-            # Verificar superposición geométrica usando equals o intersect
-            if is_duplicate:
-                # Verificamos si son iguales o si tienen intersección significativa
-                geom1 = dup_feature['geometry']
-                geom2 = orig_feature['geometry']
-                
-                # Calcular área de intersección
-                intersection = geom1.intersect(geom2, 4)
-                union = geom1.union(geom2)
-                
-                if union.area > 0:
-                    overlap_ratio = intersection.area / union.area
-                    if overlap_ratio > 0.95:  # 95% de superposición
-                        verified_duplicates.append(duplicate)
+            # Los atributos ya coinciden por construcción del grupo; se verifica la geometría
+            if overlap_engine.iou(oid, original_oid) > self.iou_threshold:
+                verified_duplicates.append(duplicate)
         
         return verified_duplicates
 class TopologyErrorRecorder:
@@ -310,7 +218,7 @@ class TopologyErrorRecorder:
             self.logger.error(f"No se encontró la capa de errores para {dataset_name}")
             return
             
-        fields = ["SHAPE@", "OriginObjectClassName", "OriginObjectID",
+        fields = ["SHAPE@WKB", "OriginObjectClassName", "OriginObjectID",
                  "DestinationObjectClassName", "DestinationObjectID",
                  "RuleType", "RuleDescription", "isException"]
         
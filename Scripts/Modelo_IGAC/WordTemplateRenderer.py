@@ -0,0 +1,195 @@
+"""
+Relleno de plantillas Word (.docx) con variables {nombre} en una sola pasada.
+
+El índice de una plantilla (ubicación de los párrafos que contienen marcadores
+y los nombres encontrados) se calcula una sola vez por contenido de archivo y
+se guarda en memoria y, si se indica cache_dir, en disco; así se reutiliza
+entre datasets y municipios. Al renderizar solo se visitan los párrafos
+indexados, y el conjunto de variables se compila en una sola expresión
+regular que reemplaza todos los marcadores de un párrafo de una vez.
+"""
+import hashlib
+import json
+import os
+import re
+
+from docx import Document
+
+
+# Cambiar cuando cambie el formato del índice
+INDEX_VERSION = 1
+
+PLACEHOLDER_PATTERN = re.compile(r'\{([^{}]+)\}')
+
+# Índices ya calculados en este proceso, por huella del contenido
+_index_cache = {}
+
+
+def template_digest(template_path):
+    """Huella del contenido del archivo de plantilla"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(template_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_paragraphs(doc):
+    """
+    Recorre los párrafos del cuerpo y de las celdas de tabla. Devuelve pares
+    (ubicación, párrafo); la ubicación es ['p', i] o ['t', tabla, fila, celda, párrafo].
+    """
+    for i, paragraph in enumerate(doc.paragraphs):
+        yield ['p', i], paragraph
+    for t, table in enumerate(doc.tables):
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                for i, paragraph in enumerate(cell.paragraphs):
+                    yield ['t', t, r, c, i], paragraph
+
+
+def build_index(doc):
+    """Lista de {'loc', 'names'} de los párrafos que contienen marcadores"""
+    index = []
+    for location, paragraph in iter_paragraphs(doc):
+        names = PLACEHOLDER_PATTERN.findall(paragraph.text)
+        if names:
+            index.append({'loc': location, 'names': sorted(set(names))})
+    return index
+
+
+def load_index(template_path, cache_dir=None):
+    """Índice de la plantilla desde la memoria, la caché en disco o calculado"""
+    digest = template_digest(template_path)
+    if digest in _index_cache:
+        return _index_cache[digest]
+
+    cache_file = os.path.join(str(cache_dir), f"{digest}.json") if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == INDEX_VERSION:
+                _index_cache[digest] = cached['index']
+                return cached['index']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    index = build_index(Document(template_path))
+    _index_cache[digest] = index
+
+    if cache_file:
+        try:
+            os.makedirs(str(cache_dir), exist_ok=True)
+            temp_file = cache_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'index': index}, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            print(f"  [ADVERTENCIA] No se pudo guardar el índice de la plantilla: {e}")
+    return index
+
+
+def compile_variables(variables):
+    """Una sola expresión regular con todos los marcadores {nombre} de las variables"""
+    if not variables:
+        return None
+    names = sorted(variables, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(f"{{{name}}}") for name in names))
+
+
+class _ParagraphResolver:
+    """Localiza en un documento los párrafos indicados por el índice"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._paragraphs = None
+        self._tables = None
+
+    def __call__(self, location):
+        if location[0] == 'p':
+            if self._paragraphs is None:
+                self._paragraphs = self.doc.paragraphs
+            return self._paragraphs[location[1]]
+        if self._tables is None:
+            self._tables = self.doc.tables
+        _, t, r, c, i = location
+        return self._tables[t].rows[r].cells[c].paragraphs[i]
+
+
+def _set_paragraph_text(paragraph, text):
+    """Escribe el texto en el primer run conservando su formato y vacía los demás"""
+    first_run = paragraph.runs[0]
+    font_name = first_run.font.name
+    font_size = first_run.font.size
+    bold = first_run.font.bold
+    italic = first_run.font.italic
+
+    for run in paragraph.runs[1:]:
+        run.text = ""
+
+    first_run.text = text
+    first_run.font.name = font_name
+    first_run.font.size = font_size
+    first_run.font.bold = bold
+    first_run.font.italic = italic
+
+
+class TemplateRenderer:
+    """
+    Plantilla Word indexada. Uso:
+
+        renderer = TemplateRenderer(plantilla, cache_dir)
+        doc, reemplazos = renderer.render(variables)
+        doc.save(salida)
+    """
+
+    def __init__(self, template_path, cache_dir=None):
+        self.template_path = template_path
+        self.index = load_index(template_path, cache_dir)
+
+    @property
+    def names(self):
+        """Nombres de las variables presentes en la plantilla"""
+        return {name for entry in self.index for name in entry['names']}
+
+    def render(self, variables):
+        """
+        Carga la plantilla y reemplaza los marcadores de las variables en los
+        párrafos indexados. Devuelve (documento, número de reemplazos).
+        """
+        doc = Document(self.template_path)
+        values = {f"{{{name}}}": str(value) for name, value in variables.items()}
+        pattern = compile_variables(variables)
+        replacements = 0
+        if pattern is None:
+            return doc, replacements
+
+        resolve = _ParagraphResolver(doc)
+        for entry in self.index:
+            location = entry['loc']
+            paragraph = resolve(location)
+            if not paragraph.runs:
+                continue
+
+            original_text = paragraph.text
+            found = []
+            new_text = pattern.sub(lambda m: found.append(m.group(0)) or values[m.group(0)], original_text)
+            if not found:
+                continue
+
+            for placeholder in dict.fromkeys(found):
+                replacements += 1
+                print(f"  [OK] Reemplazo: {placeholder} -> {values[placeholder]}")
+
+            try:
+                _set_paragraph_text(paragraph, new_text)
+            except Exception as e:
+                print(f"  [ERROR] Error actualizando formato: {e}")
+                continue
+
+            if location[0] == 't':
+                _, t, r, c, _ = location
+                print(f"  [OK] Reemplazo en tabla {t + 1}, fila {r + 1}, celda {c + 1}")
+
+        return doc, replacements
@@ -0,0 +1,179 @@
+"""
+Sesión de escritura sobre los libros de Excel del formato de consistencia.
+
+Las etapas que diligencian el mismo libro (encabezado, conteos topológicos,
+consistencia de formato, excepciones) registran sus celdas en un diario de
+cambios pendientes junto al libro, agrupado por hoja y celda. Los cambios se
+aplican con una sola carga/guardado del libro:
+
+- en modo inmediato (por defecto), al confirmar la sesión de cada etapa;
+- en modo diferido (variable de entorno GEOVALIDA_DEFER_WORKBOOK_WRITES=1,
+  activada por el gestor de procesos cuando la ejecución incluye la etapa de
+  compilación), al final de la ejecución con flush_pending.
+"""
+import json
+import os
+import re
+import zipfile
+
+import openpyxl
+
+
+DEFER_ENV = 'GEOVALIDA_DEFER_WORKBOOK_WRITES'
+JOURNAL_SUFFIX = '.pending.json'
+
+
+def defer_enabled():
+    """Indica si la ejecución actual difiere la escritura de los libros"""
+    return os.environ.get(DEFER_ENV, '') == '1'
+
+
+def journal_path(workbook_path):
+    return f"{workbook_path}{JOURNAL_SUFFIX}"
+
+
+def read_sheet_names(workbook_path):
+    """Nombres de las hojas leyendo solo xl/workbook.xml, sin cargar el libro"""
+    with zipfile.ZipFile(workbook_path) as archive:
+        xml = archive.read('xl/workbook.xml').decode('utf-8')
+    names = re.findall(r'<(?:\w+:)?sheet\b[^>]*\bname="([^"]*)"', xml)
+    return [
+        name.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
+            .replace('&quot;', '"').replace('&apos;', "'")
+        for name in names
+    ]
+
+
+def _load_journal(workbook_path):
+    path = journal_path(workbook_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_journal(workbook_path, journal):
+    path = journal_path(workbook_path)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(journal, f, ensure_ascii=False, indent=1, default=str)
+    os.replace(temp_path, path)
+
+
+def _merge(journal, updates):
+    for sheet, cells in updates.items():
+        journal.setdefault(sheet, {}).update(cells)
+    return journal
+
+
+def _apply(workbook_path, journal):
+    """Aplica el diario al libro con una sola carga y un solo guardado"""
+    workbook = openpyxl.load_workbook(workbook_path)
+    applied = 0
+    for sheet_name, cells in journal.items():
+        if sheet_name not in workbook.sheetnames:
+            print(f"Advertencia: No se encontró la hoja '{sheet_name}' en {workbook_path}")
+            continue
+        sheet = workbook[sheet_name]
+        for cell, value in cells.items():
+            sheet[cell] = value
+            applied += 1
+    workbook.save(workbook_path)
+    return applied
+
+
+def flush_workbook(workbook_path):
+    """Aplica los cambios pendientes de un libro y elimina su diario. Devuelve las celdas escritas"""
+    workbook_path = str(workbook_path)
+    journal = _load_journal(workbook_path)
+    if not journal:
+        return 0
+    applied = _apply(workbook_path, journal)
+    os.remove(journal_path(workbook_path))
+    print(f"Aplicados {applied} cambios pendientes en {workbook_path}")
+    return applied
+
+
+def flush_pending(root_dir):
+    """Aplica todos los diarios pendientes bajo root_dir. Devuelve los libros actualizados"""
+    flushed = []
+    for current_dir, _, files in os.walk(root_dir):
+        for name in files:
+            if not name.endswith(JOURNAL_SUFFIX):
+                continue
+            workbook_path = os.path.join(current_dir, name[:-len(JOURNAL_SUFFIX)])
+            if not os.path.exists(workbook_path):
+                print(f"Advertencia: diario sin libro, se descarta: {name}")
+                os.remove(os.path.join(current_dir, name))
+                continue
+            flush_workbook(workbook_path)
+            flushed.append(workbook_path)
+    return flushed
+
+
+def _plain(value):
+    """Convierte escalares numpy/pandas a tipos nativos serializables"""
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            return value.item()
+        except (AttributeError, ValueError):
+            pass
+    return value
+
+
+class WorkbookSession:
+    """
+    Cambios de celdas de una etapa sobre un libro. Uso:
+
+        with WorkbookSession(ruta_excel) as session:
+            session.write('Consistencia Formato', 'G5', 10)
+
+    Al salir sin errores se confirma la sesión (ver commit).
+    """
+
+    def __init__(self, workbook_path, defer=None):
+        self.workbook_path = str(workbook_path)
+        self.defer = defer_enabled() if defer is None else defer
+        self.pending = {}
+        self._sheet_names = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    @property
+    def sheetnames(self):
+        if self._sheet_names is None:
+            self._sheet_names = read_sheet_names(self.workbook_path)
+        return self._sheet_names
+
+    def write(self, sheet, cell, value):
+        self.pending.setdefault(sheet, {})[cell] = _plain(value)
+
+    def update(self, sheet, values):
+        for cell, value in values.items():
+            self.write(sheet, cell, value)
+
+    def commit(self):
+        """
+        Registra los cambios en el diario del libro. En modo inmediato además
+        aplica el diario completo (incluidos cambios pendientes de etapas
+        anteriores) con una sola carga/guardado.
+        """
+        if not self.pending:
+            return
+        journal = _merge(_load_journal(self.workbook_path), self.pending)
+        self.pending = {}
+
+        if self.defer:
+            _save_journal(self.workbook_path, journal)
+            print(f"Cambios registrados para aplicar al final de la ejecución: {self.workbook_path}")
+            return
+
+        _apply(self.workbook_path, journal)
+        if os.path.exists(journal_path(self.workbook_path)):
+            os.remove(journal_path(self.workbook_path))
@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout
-from utils.rich_text_edit import RichTextEdit
+from utils.log_console import LogConsole
 from utils.status_indicator import StatusIndicator
 import shutil  # Añadir esta línea
 
@@ -23,10 +23,10 @@ class BaseModelTab(QWidget):
         self.console = None
         self.status_indicators = {}
 
-    def add_log(self, message):
-        """Añade mensaje al log"""
+    def add_log(self, message, severity=None, stage=""):
+        """Añade mensaje al log con su severidad y la etapa que lo generó"""
         if hasattr(self, 'console') and self.console:
-            self.console.append_styled(message)
+            self.console.append_log(message, severity, stage)
 
     def clear_console(self):
         """Limpia la consola"""
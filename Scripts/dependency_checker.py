@@ -141,7 +141,8 @@ class DependencyChecker:
             'PySide6': None,
             'rich': None,
             'python-docx': None,
-            'XlsxWriter': None
+            'XlsxWriter': None,
+            'shapely': None
             #'qt_material': None
         }
     
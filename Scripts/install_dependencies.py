@@ -22,7 +22,8 @@ class DependencyInstaller:
             'PySide6': 'PySide6',
             'rich': 'rich',
             'python-docx': 'python-docx',
-            'XlsxWriter': 'XlsxWriter'
+            'XlsxWriter': 'XlsxWriter',
+            'shapely': 'shapely'
         }
         
         self.root = tk.Tk()
@@ -395,7 +396,8 @@ if __name__ == "__main__":
             "   - PySide6 (Interfaz gráfica)\n"
             "   - rich (Formato de texto)\n"
             "   - python-docx (Manejo de documentos)\n"
-            "   - XlsxWriter (Manejo de Excel)\n\n"
+            "   - XlsxWriter (Manejo de Excel)\n"
+            "   - shapely (Geometrías e índices espaciales)\n\n"
             "¿Desea proceder con la instalación?"
         )
     else:
@@ -406,7 +408,8 @@ if __name__ == "__main__":
             "   - PySide6 (Interfaz gráfica)\n"
             "   - rich (Formato de texto)\n"
             "   - python-docx (Manejo de documentos)\n"
-            "   - XlsxWriter (Manejo de Excel)\n\n"
+            "   - XlsxWriter (Manejo de Excel)\n"
+            "   - shapely (Geometrías e índices espaciales)\n\n"
             "¿Desea proceder con la instalación?"
         )
 
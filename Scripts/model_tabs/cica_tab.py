@@ -4,10 +4,9 @@ from PySide6.QtWidgets import (QPushButton, QLabel, QFrame, QVBoxLayout,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon, QPixmap
 import os
-import shutil
 from base_tab import BaseModelTab
 from utils.process_manager import ProcessManager
-from utils.rich_text_edit import RichTextEdit
+from utils.log_console import LogConsole
 from utils.status_indicator import StatusIndicator
 from utils.config_dialog import ConfigDialog
 from utils.zones_dialog import ZonesDialog
@@ -452,33 +451,6 @@ class CICAModelTab(BaseModelTab):
                             "Debe configurar los insumos y zonas antes de ejecutar procesos.")
             return
 
-        # Verificar archivos existentes
-        temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-        modelo_igac_dir = os.path.join(temp_dir, "MODELO_IGAC")
-        
-        if os.path.exists(modelo_igac_dir) and any(os.scandir(modelo_igac_dir)):
-            response = QMessageBox.warning(
-                self,
-                "Archivos existentes",
-                "Se eliminarán archivos anteriores para iniciar este proceso. ¿Desea Continuar?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            
-            if response == QMessageBox.No:
-                return
-                
-            try:
-                for item in os.listdir(modelo_igac_dir):
-                    item_path = os.path.join(modelo_igac_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                    elif os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                self.add_log("Contenido de MODELO_IGAC eliminado exitosamente")
-            except Exception as e:
-                self.add_log(f"Error al limpiar MODELO_IGAC: {str(e)}")
-                return
         
         batch_processor = BatchProcessor(self.process_manager)
         batch_processor.execute_all()
@@ -489,33 +461,6 @@ class CICAModelTab(BaseModelTab):
             if self.process_manager.is_running:
                 return False
                     
-            # Verificar directorio MODELO_IGAC (no MODELO_INTERNO_1_0)
-            temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-            modelo_dir = os.path.join(temp_dir, "MODELO_IGAC")  # Cambiado
-            
-            if os.path.exists(modelo_dir) and any(os.scandir(modelo_dir)):
-                response = QMessageBox.warning(
-                    self,
-                    "Archivos existentes",
-                    "Se eliminarán archivos anteriores para iniciar este proceso. ¿Desea Continuar?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
-                )
-                
-                if response == QMessageBox.No:
-                    return False
-                    
-                try:
-                    for item in os.listdir(modelo_dir):
-                        item_path = os.path.join(modelo_dir, item)
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-                    self.add_log("Contenido de MODELO_IGAC eliminado exitosamente")
-                except Exception as e:
-                    self.add_log(f"Error al limpiar MODELO_IGAC: {str(e)}")
-                    return False
 
             # Usar los scripts correctos de CICA
             scripts = [
@@ -530,6 +475,9 @@ class CICAModelTab(BaseModelTab):
             scripts_dir = os.path.join(self.project_root, "Scripts", "Modelo_IGAC")
             script_paths = [(i+1, os.path.join(scripts_dir, script)) for i, script in enumerate(scripts)]
             
+            if not self.process_manager.prepare_run(script_paths):
+                return False
+            
             self.process_manager.script_queue = script_paths
             self.process_manager.is_running = True
             self.process_manager.execute_next_script()
@@ -659,7 +607,7 @@ class CICAModelTab(BaseModelTab):
         console_label.setStyleSheet("color: white;")
         console_layout.addWidget(console_label)
         
-        self.console = RichTextEdit()
+        self.console = LogConsole()
         console_layout.addWidget(self.console)
         
         # Agregar los frames al layout principal con proporciones
@@ -4,10 +4,9 @@ from PySide6.QtWidgets import (QPushButton, QLabel, QFrame, QVBoxLayout,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon, QPixmap
 import os
-import shutil
 from base_tab import BaseModelTab
 from utils.process_manager import ProcessManager
-from utils.rich_text_edit import RichTextEdit
+from utils.log_console import LogConsole
 from utils.status_indicator import StatusIndicator
 from utils.config_dialog import ConfigDialog
 from utils.zones_dialog import ZonesDialog
@@ -504,33 +503,6 @@ class LADM10ModelTab(BaseModelTab):
                             "Debe configurar los insumos antes de ejecutar procesos.")
             return
 
-        # Verificar archivos existentes
-        temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-        modelo_dir = os.path.join(temp_dir, "MODELO_LADM_1_0")
-        
-        if os.path.exists(modelo_dir) and any(os.scandir(modelo_dir)):
-            response = QMessageBox.warning(
-                self,
-                "Archivos existentes",
-                "Se eliminarán archivos anteriores para iniciar este proceso. ¿Desea Continuar?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            
-            if response == QMessageBox.No:
-                return
-                
-            try:
-                for item in os.listdir(modelo_dir):
-                    item_path = os.path.join(modelo_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                    elif os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                self.add_log("Contenido de MODELO_LADM_1_0 eliminado exitosamente")
-            except Exception as e:
-                self.add_log(f"Error al limpiar MODELO_LADM_1_0: {str(e)}")
-                return
 
         # Configurar todos los scripts
         try:
@@ -551,6 +523,9 @@ class LADM10ModelTab(BaseModelTab):
             script_paths = [(i+1, os.path.join(scripts_dir, script)) 
                         for i, script in enumerate(scripts)]
             
+            if not self.process_manager.prepare_run(script_paths):
+                return False
+            
             self.process_manager.script_queue = script_paths
             self.process_manager.is_running = True
             self.process_manager.execute_next_script()
@@ -565,33 +540,6 @@ class LADM10ModelTab(BaseModelTab):
             if self.process_manager.is_running:
                 return False
                     
-            # Verificar directorio MODELO_LADM_1_0
-            temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-            modelo_dir = os.path.join(temp_dir, "MODELO_LADM_1_0")
-            
-            if os.path.exists(modelo_dir) and any(os.scandir(modelo_dir)):
-                response = QMessageBox.warning(
-                    self,
-                    "Archivos existentes",
-                    "Se eliminarán los archivos dentro de MODELO_LADM_1_0 para iniciar este proceso. ¿Desea Continuar?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
-                )
-                
-                if response == QMessageBox.No:
-                    return False
-                
-                try:
-                    for item in os.listdir(modelo_dir):
-                        item_path = os.path.join(modelo_dir, item)
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-                    self.add_log("Contenido de MODELO_LADM_1_0 eliminado exitosamente")
-                except Exception as e:
-                    self.add_log(f"Error al limpiar MODELO_LADM_1_0: {str(e)}")
-                    return False
 
             scripts = [
                 "01_Copiar_Archivos_necesarios.py",
@@ -604,6 +552,9 @@ class LADM10ModelTab(BaseModelTab):
             scripts_dir = os.path.join(self.project_root, "Scripts", "MODELO_LADM_1_0")
             script_paths = [(i+1, os.path.join(scripts_dir, script)) for i, script in enumerate(scripts)]
             
+            if not self.process_manager.prepare_run(script_paths):
+                return False
+            
             self.process_manager.script_queue = script_paths
             self.process_manager.is_running = True
             self.process_manager.execute_next_script()
@@ -745,7 +696,7 @@ class LADM10ModelTab(BaseModelTab):
         console_label.setStyleSheet("color: white;")
         console_layout.addWidget(console_label)
         
-        self.console = RichTextEdit()
+        self.console = LogConsole()
         console_layout.addWidget(self.console)
         
         # Agregar los frames al layout principal con proporciones
@@ -4,10 +4,9 @@ from PySide6.QtWidgets import (QPushButton, QLabel, QFrame, QVBoxLayout,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon, QPixmap
 import os
-import shutil
 from base_tab import BaseModelTab
 from utils.process_manager import ProcessManager
-from utils.rich_text_edit import RichTextEdit
+from utils.log_console import LogConsole
 from utils.status_indicator import StatusIndicator
 from utils.config_dialog import ConfigDialog
 from utils.zones_dialog import ZonesDialog
@@ -502,33 +501,6 @@ class LADM12ModelTab(BaseModelTab):
                             "Debe configurar los insumos antes de ejecutar procesos.")
             return
 
-        # Verificar archivos existentes
-        temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-        modelo_ladm_dir = os.path.join(temp_dir, "MODELO_LADM_1_2")  # Cambiado de MODELO_INTERNO_1_0
-        
-        if os.path.exists(modelo_ladm_dir) and any(os.scandir(modelo_ladm_dir)):
-            response = QMessageBox.warning(
-                self,
-                "Archivos existentes",
-                "Se eliminarán archivos anteriores del modelo LADM 1.2 para iniciar este proceso. ¿Desea Continuar?",
-                QMessageBox.Yes | QMessageBox.No,
-                QMessageBox.No
-            )
-            
-            if response == QMessageBox.No:
-                return
-                
-            try:
-                for item in os.listdir(modelo_ladm_dir):
-                    item_path = os.path.join(modelo_ladm_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                    elif os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                self.add_log("Contenido de MODELO_LADM_1_2 eliminado exitosamente")
-            except Exception as e:
-                self.add_log(f"Error al limpiar MODELO_LADM_1_2: {str(e)}")
-                return
 
         # Configurar scripts para LADM 1.2
         try:
@@ -549,6 +521,9 @@ class LADM12ModelTab(BaseModelTab):
             script_paths = [(i+1, os.path.join(scripts_dir, script)) 
                         for i, script in enumerate(scripts)]
             
+            if not self.process_manager.prepare_run(script_paths):
+                return False
+            
             self.process_manager.script_queue = script_paths
             self.process_manager.is_running = True
             self.process_manager.execute_next_script()
@@ -562,33 +537,6 @@ class LADM12ModelTab(BaseModelTab):
             if self.process_manager.is_running:
                 return False
                     
-            # Verificar directorio específico para cada modelo LADM
-            temp_dir = os.path.join(self.project_root, "Files", "Temporary_Files")
-            modelo_dir = os.path.join(temp_dir, "MODELO_LADM_1_2")  # o MODELO_LADM_1_0 según corresponda
-            
-            if os.path.exists(modelo_dir) and any(os.scandir(modelo_dir)):
-                response = QMessageBox.warning(
-                    self,
-                    "Archivos existentes",
-                    f"Se eliminarán los archivos dentro de {os.path.basename(modelo_dir)} para iniciar este proceso. ¿Desea Continuar?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
-                )
-                
-                if response == QMessageBox.No:
-                    return False
-
-                try:
-                    for item in os.listdir(modelo_dir):
-                        item_path = os.path.join(modelo_dir, item)
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-                    self.add_log(f"Contenido de {os.path.basename(modelo_dir)} eliminado exitosamente")
-                except Exception as e:
-                    self.add_log(f"Error al limpiar {os.path.basename(modelo_dir)}: {str(e)}")
-                    return False
 
             # Usar los scripts específicos de LADM
             scripts = [
@@ -602,6 +550,9 @@ class LADM12ModelTab(BaseModelTab):
             scripts_dir = os.path.join(self.project_root, "Scripts", "MODELO_LADM_1_2")  # o MODELO_LADM_1_0
             script_paths = [(i+1, os.path.join(scripts_dir, script)) for i, script in enumerate(scripts)]
             
+            if not self.process_manager.prepare_run(script_paths):
+                return False
+            
             self.process_manager.script_queue = script_paths
             self.process_manager.is_running = True
             self.process_manager.execute_next_script()
@@ -743,7 +694,7 @@ class LADM12ModelTab(BaseModelTab):
         console_label.setStyleSheet("color: white;")
         console_layout.addWidget(console_label)
         
-        self.console = RichTextEdit()
+        self.console = LogConsole()
         console_layout.addWidget(self.console)
         
         # Agregar los frames al layout principal con proporciones
@@ -0,0 +1,188 @@
+"""
+Consola de log de las pestañas de modelo.
+
+Cada línea se guarda como registro (hora, etapa, severidad, texto) en un búfer
+circular de MAX_LINES líneas; la severidad es un dato del registro y define
+el formato al dibujarla, sin HTML. Las líneas nuevas se acumulan y se agregan
+al QPlainTextEdit (también limitado a MAX_LINES bloques) en un solo bloque de
+edición por cuadro. Los filtros por etapa y severidad redibujan la vista desde
+el búfer.
+"""
+import datetime
+from collections import deque
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPlainTextEdit
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+
+
+# Líneas que conserva la consola
+MAX_LINES = 20000
+
+# Intervalo entre agregados a la vista (un cuadro)
+FLUSH_INTERVAL_MS = 50
+
+SEVERITY_LEVELS = {'debug': 0, 'info': 1, 'success': 1, 'warning': 2, 'error': 3}
+
+SEVERITY_COLORS = {
+    'debug': "#8a8a8a",    # Gris
+    'info': "#ffffff",     # Blanco
+    'success': "#00ff00",  # Verde
+    'warning': "#FFFF00",  # Amarillo
+    'error': "#DB0000",    # Rojo
+}
+
+# Filtro de severidad: texto del combo y nivel mínimo
+SEVERITY_FILTERS = [
+    ("Todos los mensajes", 0),
+    ("Información", 1),
+    ("Advertencias y errores", 2),
+    ("Solo errores", 3),
+]
+
+ALL_STAGES = "Todas las etapas"
+
+
+def default_severity(text):
+    """Severidad de un mensaje de la interfaz que no la indica"""
+    return 'error' if text.startswith("Error") else 'info'
+
+
+class LogConsole(QWidget):
+    def __init__(self, parent=None, max_lines=MAX_LINES):
+        super().__init__(parent)
+        self.records = deque(maxlen=max_lines)
+        self.pending = []
+        self.stages = set()
+        self.stage_filter = None
+        self.min_level = 0
+
+        self.formats = {}
+        for severity, color in SEVERITY_COLORS.items():
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            self.formats[severity] = text_format
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        filters = QHBoxLayout()
+        self.stage_combo = QComboBox()
+        self.stage_combo.addItem(ALL_STAGES)
+        self.stage_combo.currentIndexChanged.connect(self.apply_filters)
+        self.severity_combo = QComboBox()
+        for label, _ in SEVERITY_FILTERS:
+            self.severity_combo.addItem(label)
+        self.severity_combo.currentIndexChanged.connect(self.apply_filters)
+        for combo in (self.stage_combo, self.severity_combo):
+            combo.setStyleSheet("""
+                QComboBox {
+                    background-color: #2d2d2d;
+                    color: #ffffff;
+                    border: 1px solid #555555;
+                    padding: 2px 6px;
+                }
+            """)
+            filters.addWidget(combo)
+        filters.addStretch()
+        layout.addLayout(filters)
+
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setUndoRedoEnabled(False)
+        self.view.setMaximumBlockCount(max_lines)
+        self.view.setStyleSheet("""
+            QPlainTextEdit {
+                background-color: #1e1e1e;
+                color: #ffffff;
+                font-family: 'Consolas', monospace;
+                font-size: 10pt;
+                border: none;
+                padding: 5px;
+            }
+        """)
+        layout.addWidget(self.view)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def append_log(self, text, severity=None, stage=""):
+        """Agrega un mensaje (puede tener varias líneas); se dibuja en el siguiente cuadro"""
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='replace')
+        text = str(text)
+        if severity not in SEVERITY_LEVELS:
+            severity = default_severity(text)
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        for line in text.splitlines() or [""]:
+            record = (timestamp, stage, severity, line)
+            self.records.append(record)
+            self.pending.append(record)
+        if stage and stage not in self.stages:
+            self.stages.add(stage)
+            self.stage_combo.addItem(stage)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def accepts(self, record):
+        _, stage, severity, _ = record
+        if SEVERITY_LEVELS[severity] < self.min_level:
+            return False
+        return self.stage_filter is None or stage == self.stage_filter
+
+    def flush(self):
+        """Agrega a la vista las líneas pendientes en un solo bloque de edición"""
+        self.flush_timer.stop()
+        pending, self.pending = self.pending, []
+        # Solo las últimas max_lines pueden quedar visibles
+        pending = pending[-self.records.maxlen:]
+        self.write_records([record for record in pending if self.accepts(record)])
+
+    def write_records(self, records):
+        if not records:
+            return
+        scrollbar = self.view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+
+        document = self.view.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        first = document.isEmpty()
+        for timestamp, _, severity, text in records:
+            if not first:
+                cursor.insertBlock()
+            first = False
+            cursor.insertText(f"[{timestamp}] {text}", self.formats[severity])
+        cursor.endEditBlock()
+
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def apply_filters(self, *_):
+        """Redibuja la vista con los registros que cumplen los filtros"""
+        stage = self.stage_combo.currentText()
+        self.stage_filter = None if stage == ALL_STAGES or not stage else stage
+        index = max(0, self.severity_combo.currentIndex())
+        self.min_level = SEVERITY_FILTERS[index][1]
+        self.pending = []
+        self.flush_timer.stop()
+        self.view.clear()
+        self.write_records([record for record in self.records if self.accepts(record)])
+        scrollbar = self.view.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        """Vacía la consola y los filtros de etapa"""
+        self.records.clear()
+        self.pending = []
+        self.flush_timer.stop()
+        self.view.clear()
+        self.stages.clear()
+        self.stage_combo.blockSignals(True)
+        self.stage_combo.clear()
+        self.stage_combo.addItem(ALL_STAGES)
+        self.stage_combo.blockSignals(False)
+        self.stage_filter = None
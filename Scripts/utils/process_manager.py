@@ -1,4 +1,4 @@
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
+from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QPushButton, QLabel, QFileDialog,
                             QMessageBox, QLineEdit, QFrame, QCheckBox, QDialog,
                             QTextEdit, QScrollArea, QGridLayout)
@@ -18,20 +18,43 @@ from batch_processor import BatchProcessor
 import shutil
 from dependency_checker import DependencyChecker
 from .python_version_manager import PythonVersionManager
+from .stage_graph import StageScheduler, default_max_workers
+from .worker_pool import WorkerPool, parse_end_marker, warm_workers_enabled
+from .progress_channel import ProgressChannel, format_event, uses_progress_channel
+from .run_manifest import RunManifest, source_paths, stage_artefacts
 import sys
 sys.stdout.reconfigure(encoding='utf-8')
 
+# Variable de entorno que difiere la escritura de los Excel de formato hasta la
+# etapa de compilación (ver Scripts/Modelo_IGAC/WorkbookSession.py)
+WORKBOOK_DEFER_ENV = 'GEOVALIDA_DEFER_WORKBOOK_WRITES'
+COMPILATION_SCRIPT = 'Compilación_Datos'
+
+# Pestaña: (carpeta de scripts, carpeta temporal, JSON de rutas de insumos)
+MODEL_PATHS = {
+    'interno_tab': ("MODELO_INTERNO_1_0", "MODELO_INTERNO_1_0", "rutas_archivos_interno.json"),
+    'ladm_10_tab': ("MODELO_LADM_1_0", "MODELO_LADM_1_0", "rutas_archivos_ladm_1_0.json"),
+    'ladm_12_tab': ("MODELO_LADM_1_2", "MODELO_LADM_1_2", "rutas_archivos_ladm_1_2.json"),
+    'cica_tab': ("Modelo_IGAC", "MODELO_IGAC", "rutas_archivos.json"),
+}
+
 class ScriptRunner(QThread):
     progress = Signal(str)
     status_update = Signal(int, str)
     script_finished = Signal(int, bool)
 
-    def __init__(self, script_path, script_index, script_name, python_version_manager):
+    def __init__(self, script_path, script_index, script_name, python_version_manager, env=None,
+                 worker_pool=None, channel=None):
         super().__init__()
         self.script_path = script_path
         self.script_index = script_index
         self.script_name = script_name
         self.python_manager = python_version_manager
+        self.env = env
+        self.worker_pool = worker_pool
+        self.channel = channel
+        # Las etapas con StageProgress informan sus errores por el canal
+        self.uses_channel = channel is not None and uses_progress_channel(script_path)
         self.process = None
         self.should_stop = False
 
@@ -46,110 +69,42 @@ class ScriptRunner(QThread):
         ]
         return any(indicator in text for indicator in normal_indicators)
 
-    def clean_message(self, message):
-        """Limpia el mensaje de prefijos innecesarios"""
-        # Eliminar el prefijo de timestamp si existe
-        if " - " in message:
-            parts = message.split(" - ", 1)
-            if len(parts) > 1 and any(level in parts[1] for level in ["INFO", "DEBUG"]):
-                message = parts[1]
-
-        # Si el mensaje comienza con "Error: " y parece ser un log normal, eliminar el prefijo
-        if message.startswith("Error: ") and self.is_log_message(message):
-            message = message[7:]
-
-        return message
+    def report(self, message, severity='info'):
+        """Mensaje del runner: por el canal de progreso si existe, si no por la señal progress"""
+        if self.channel is not None:
+            self.channel.post_line(self.script_name, message, severity)
+        else:
+            self.progress.emit(message)
 
     def run(self):
         try:
             self.status_update.emit(self.script_index, "running")
-            self.progress.emit(f"Iniciando script: {self.script_name}")
+            self.report(f"Iniciando script: {self.script_name}")
 
             python_path = self.python_manager.get_python_path(self.script_name)
             if not python_path:
                 raise ValueError(f"No se encontró versión de Python para el script: {self.script_name}")
 
-            self.progress.emit(f"Usando Python: {python_path}")
-            
-            # Buffer grande y modo línea por línea
-            self.process = subprocess.Popen(
-                [python_path, self.script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                bufsize=1,  # Modo línea por línea
-                universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            def read_output(pipe, is_error=False):
-                buffer = []
-                buffer_size = 0
-                max_buffer_size = 50  # Número de líneas antes de emitir
-
-                def flush_buffer():
-                    nonlocal buffer, buffer_size
-                    if buffer:
-                        message = "\n".join(buffer)
-                        self.progress.emit(message)
-                        buffer = []
-                        buffer_size = 0
-                    QApplication.processEvents()
-
-                try:
-                    while True:
-                        line = pipe.readline()
-                        if not line and self.process.poll() is not None:
-                            flush_buffer()  # Asegurar que se emita el último buffer
-                            break
-                        
-                        if line:
-                            line = line.strip()
-                            if line:
-                                if is_error and not self.is_log_message(line):
-                                    self.progress.emit(f"Error: {line}")
-                                else:
-                                    buffer.append(line)
-                                    buffer_size += 1
-                                    
-                                    if buffer_size >= max_buffer_size:
-                                        flush_buffer()
-
-                except Exception as e:
-                    self.progress.emit(f"Error en lectura de salida: {str(e)}")
-                    flush_buffer()
-
-            import threading
-            stdout_thread = threading.Thread(target=read_output, args=(self.process.stdout,))
-            stderr_thread = threading.Thread(target=read_output, args=(self.process.stderr, True))
-            
-            stdout_thread.daemon = True
-            stderr_thread.daemon = True
-            
-            stdout_thread.start()
-            stderr_thread.start()
-            
-            stdout_thread.join()
-            stderr_thread.join()
+            self.report(f"Usando Python: {python_path}", 'debug')
             
-            return_code = self.process.wait()
+            if self.worker_pool is not None:
+                return_code = self.run_in_worker(python_path)
+            else:
+                return_code = self.run_in_process(python_path)
             success = return_code == 0
 
             if success:
                 self.status_update.emit(self.script_index, "completed")
-                self.progress.emit(f"Script completado exitosamente: {self.script_name}")
+                self.report(f"Script completado exitosamente: {self.script_name}", 'success')
             else:
                 self.status_update.emit(self.script_index, "error")
                 if return_code != 0:
-                    self.progress.emit(f"Script terminado con código de error: {return_code}")
+                    self.report(f"Script terminado con código de error: {return_code}", 'error')
 
-            self.process = None
             self.script_finished.emit(self.script_index, success)
 
         except Exception as e:
-            self.progress.emit(f"Error al ejecutar script {self.script_name}: {str(e)}")
+            self.report(f"Error al ejecutar script {self.script_name}: {str(e)}", 'error')
             self.status_update.emit(self.script_index, "error")
             self.script_finished.emit(self.script_index, False)
             
@@ -160,8 +115,110 @@ class ScriptRunner(QThread):
                 except:
                     pass
 
+    def run_in_process(self, python_path):
+        """Ejecuta la etapa en un proceso nuevo. Devuelve el código de salida"""
+        # Buffer grande y modo línea por línea
+        self.process = subprocess.Popen(
+            [python_path, self.script_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,  # Modo línea por línea
+            universal_newlines=True,
+            env=self.env,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        self.read_outputs()
+        return_code = self.process.wait()
+        self.process = None
+        return return_code
+
+    def run_in_worker(self, python_path):
+        """
+        Ejecuta la etapa en un proceso persistente del grupo. Devuelve el código
+        de salida; si el proceso muere sin anunciar el fin de la etapa, se descarta.
+        """
+        worker = self.worker_pool.acquire(python_path)
+        try:
+            worker.submit(self.script_path, self.env)
+        except OSError:
+            # El proceso libre terminó mientras esperaba: usar uno nuevo
+            worker.kill()
+            worker = self.worker_pool.acquire(python_path)
+            worker.submit(self.script_path, self.env)
+
+        self.process = worker.process
+        result = self.read_outputs()
+        if 'code' in result:
+            return_code = result['code']
+            worker.recycle = bool(result.get('recycle')) or self.should_stop
+        else:
+            return_code = worker.process.wait() or 1
+            worker.recycle = True
+
+        self.process = None
+        self.worker_pool.release(worker)
+        return return_code
+
+    def read_outputs(self):
+        """
+        Lee stdout y stderr de la etapa en hilos separados. Devuelve el resultado
+        anunciado por el proceso persistente ({} en un proceso nuevo).
+        """
+        import threading
+        result = {}
+        stdout_thread = threading.Thread(target=self.read_output, args=(self.process.stdout, 'info', result))
+        stderr_severity = 'warning' if self.uses_channel else None
+        stderr_thread = threading.Thread(target=self.read_output, args=(self.process.stderr, stderr_severity, {}))
+        
+        stdout_thread.daemon = True
+        stderr_thread.daemon = True
+        
+        stdout_thread.start()
+        stderr_thread.start()
+        
+        stdout_thread.join()
+        stderr_thread.join()
+        return result
+
+    def read_output(self, pipe, severity='info', result=None):
+        """
+        Pasa la salida de texto de la etapa al canal de progreso hasta que el
+        proceso termina o anuncia el fin de la etapa. En las etapas que usan el
+        canal la severidad depende solo del flujo (stderr = advertencia), porque
+        sus errores llegan como eventos; en las demás (severity=None) cada línea
+        de stderr es un error salvo que parezca un log normal.
+        """
+        try:
+            for line in iter(pipe.readline, ''):
+                end = parse_end_marker(line)
+                if end is not None:
+                    if result is not None:
+                        result.update(end)
+                    break
+                
+                line = line.rstrip()
+                if not line:
+                    continue
+                if severity is not None:
+                    self.report(line, severity)
+                elif self.is_log_message(line):
+                    self.report(line, 'info')
+                else:
+                    self.report(f"Error: {line}", 'error')
+
+        except Exception as e:
+            self.report(f"Error en lectura de salida: {str(e)}", 'error')
+
     def stop(self):
         self.should_stop = True
+        if self.process:
+            try:
+                self.process.terminate()
+            except Exception:
+                pass
 
 
 class ProcessManager:
@@ -173,6 +230,23 @@ class ProcessManager:
         self.is_running = False
         self.python_manager = PythonVersionManager()
         
+        # Planificador de la ejecución en curso; las etapas independientes
+        # de la cola se ejecutan en paralelo hasta max_parallel_stages
+        self.scheduler = None
+        self.max_parallel_stages = default_max_workers()
+        
+        # Procesos persistentes por intérprete con los módulos pesados ya cargados
+        self.worker_pool = WorkerPool() if warm_workers_enabled() else None
+        
+        # Eventos de progreso y salida de las etapas, entregados en lotes al hilo de la interfaz
+        self.progress_channel = ProgressChannel()
+        self.progress_channel.events.connect(self.show_progress_events)
+        
+        # Manifiesto de la ejecución (huellas por etapa) para reanudar
+        self.run_plan = None
+        self.manifest = None
+        self.stage_keys = {}
+        
         # Inicialización de estructuras de datos
         self.process_status = {}  # Diccionario para mantener el estado de cada proceso
         self.last_process_number = 0
@@ -224,52 +298,11 @@ class ProcessManager:
             if not self.validate_environment():
                 return False
 
-            # Determinar el tipo de modelo
-            model_type = str(type(self.parent)).lower()
-            
-            # Mapeo de modelos a directorios
-            model_mapping = {
-                'interno_tab': ("MODELO_INTERNO_1_0", "MODELO_INTERNO_1_0"),
-                'ladm_10_tab': ("MODELO_LADM_1_0", "MODELO_LADM_1_0"),
-                'ladm_12_tab': ("MODELO_LADM_1_2", "MODELO_LADM_1_2"),
-                'cica_tab': ("Modelo_IGAC", "MODELO_IGAC")
-            }
-            
-            # Obtener la configuración del modelo actual
-            model_key = next((key for key in model_mapping.keys() if key in model_type), 'cica_tab')
-            scripts_subdir, temp_subdir = model_mapping[model_key]
+            # Carpeta de scripts del modelo actual
+            scripts_subdir, _, _ = self.model_paths()
             
             scripts_dir = os.path.join(self.parent.project_root, "Scripts", scripts_subdir)
             
-            # Solo verificar y limpiar si el primer script está en la selección
-            if "01_Copiar_Archivos_necesarios.py" in selected_processes:
-                temp_dir = os.path.join(self.parent.project_root, "Files", "Temporary_Files")
-                model_temp_dir = os.path.join(temp_dir, temp_subdir)
-                
-                if os.path.exists(model_temp_dir) and any(os.scandir(model_temp_dir)):
-                    response = QMessageBox.warning(
-                        self.parent,
-                        "Archivos existentes",
-                        f"Se eliminarán los archivos dentro de {temp_subdir} para iniciar este proceso. ¿Desea Continuar?",
-                        QMessageBox.Yes | QMessageBox.No,
-                        QMessageBox.No
-                    )
-                    
-                    if response == QMessageBox.No:
-                        return False
-                    
-                    try:
-                        for item in os.listdir(model_temp_dir):
-                            item_path = os.path.join(model_temp_dir, item)
-                            if os.path.isfile(item_path):
-                                os.remove(item_path)
-                            elif os.path.isdir(item_path):
-                                shutil.rmtree(item_path)
-                        self.parent.add_log(f"Contenido de {temp_subdir} eliminado exitosamente")
-                    except Exception as e:
-                        self.parent.add_log(f"Error al limpiar {temp_subdir}: {str(e)}")
-                        return False
-            
             # Preparar la cola de scripts
             script_paths = []
             for i, script_name in enumerate(selected_processes, start=1):
@@ -282,6 +315,9 @@ class ProcessManager:
                 self.parent.add_log("No se encontraron scripts válidos para ejecutar")
                 return False
             
+            if not self.prepare_run(script_paths):
+                return False
+            
             # Iniciar la ejecución
             self.script_queue = script_paths
             self.is_running = True
@@ -297,6 +333,8 @@ class ProcessManager:
         try:
             self.is_running = False
             self.script_queue.clear()
+            self.scheduler = None
+            self.run_plan = None
             
             # Marcar todos los procesos activos como pendientes
             active_processes = self.get_active_processes()
@@ -314,6 +352,7 @@ class ProcessManager:
                     self.parent.add_log(f"Error al detener runner: {str(e)}")
             
             self.current_runners.clear()
+            self.progress_channel.stop()
             self.parent.add_log("Todos los procesos han sido detenidos")
             
         except Exception as e:
@@ -325,6 +364,8 @@ class ProcessManager:
             # Limpiar estados
             self.process_status.clear()
             self.current_runners.clear()
+            self.scheduler = None
+            self.run_plan = None
             
             # Resetear indicadores visuales
             if hasattr(self.parent, 'status_indicators'):
@@ -457,36 +498,6 @@ class ProcessManager:
             # Verificar si estamos en el modelo interno
             is_internal_model = isinstance(self.parent, InternoModelTab)
             
-            # Seleccionar el directorio correcto
-            temp_dir = os.path.join(self.parent.project_root, "Files", "Temporary_Files")
-            model_dir = "MODELO_INTERNO_1_0" if is_internal_model else "MODELO_IGAC"
-            working_dir = os.path.join(temp_dir, model_dir)
-            
-            if os.path.exists(working_dir) and any(os.scandir(working_dir)):
-                response = QMessageBox.warning(
-                    self.parent,
-                    "Archivos existentes",
-                    f"Se eliminarán los archivos dentro de {model_dir} para iniciar este proceso. ¿Desea Continuar?",
-                    QMessageBox.Yes | QMessageBox.No,
-                    QMessageBox.No
-                )
-                
-                if response == QMessageBox.No:
-                    return False
-                    
-                try:
-                    for item in os.listdir(working_dir):
-                        item_path = os.path.join(working_dir, item)
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                        elif os.path.isdir(item_path):
-                            import shutil
-                            shutil.rmtree(item_path)
-                    self.parent.add_log(f"Contenido de {model_dir} eliminado exitosamente")
-                except Exception as e:
-                    self.parent.add_log(f"Error al limpiar {model_dir}: {str(e)}")
-                    return False
-
             # Definir scripts según el modelo
             if is_internal_model:
                 scripts_dir = os.path.join(self.parent.project_root, "Scripts", "MODELO_INTERNO_1_0")
@@ -511,11 +522,14 @@ class ProcessManager:
                 ]
             
             # Crear la cola de scripts
-            self.script_queue = [
+            script_queue = [
                 (i, os.path.join(scripts_dir, script_name)) 
                 for i, script_name in enumerate(process_scripts, start=1)
             ]
+            if not self.prepare_run(script_queue):
+                return False
             
+            self.script_queue = script_queue
             self.is_running = True
             self.execute_next_script()
             return True
@@ -670,75 +684,276 @@ class ProcessManager:
             self.parent.add_log(f"Error al iniciar el proceso 5: {str(e)}")
             return False
         
-    def execute_next_script(self):
-        """Ejecuta el siguiente script en la cola"""
-        if not self.script_queue:
-            if self.is_running:
-                self.is_running = False
-                self.parent.add_log("Todos los procesos han finalizado")
-                # Verificar si el proceso 29 está entre los completados
-                completed_processes = self.get_completed_processes()
-                self.show_completion_message(show_folder=29 in completed_processes)
+    def model_paths(self):
+        """(carpeta de scripts, carpeta temporal, JSON de insumos) del modelo de la pestaña"""
+        model_type = str(type(self.parent)).lower()
+        model_key = next((key for key in MODEL_PATHS if key in model_type), 'cica_tab')
+        return MODEL_PATHS[model_key]
+
+    def model_dirs(self):
+        """Carpeta temporal del modelo y carpeta de reportes donde las etapas dejan artefactos"""
+        _, temp_subdir, _ = self.model_paths()
+        root = self.parent.project_root
+        return (os.path.join(root, "Files", "Temporary_Files", temp_subdir),
+                os.path.join(root, "Reportes", temp_subdir))
+
+    def resume_plan(self, script_queue):
+        """Manifiesto, huellas por posición de la cola y posiciones que pueden omitirse"""
+        _, temp_subdir, config_file = self.model_paths()
+        sources = source_paths(self.parent.project_root, temp_subdir, config_file)
+        manifest = RunManifest(self.model_dirs()[0])
+        keys, reusable = manifest.plan(script_queue, sources)
+        return manifest, keys, reusable
+
+    def prepare_run(self, script_queue):
+        """
+        Decide cómo iniciar la cola. Si una ejecución anterior dejó etapas cuyas
+        huellas no cambiaron, ofrece reanudar desde la primera etapa invalidada.
+        La carpeta temporal del modelo solo se vacía si el usuario elige empezar
+        de nuevo una cola que incluye la copia de archivos (etapa 01).
+        Devuelve False si el usuario cancela.
+        """
+        self.run_plan = None
+        model_dir, _ = self.model_dirs()
+        _, temp_subdir, _ = self.model_paths()
+        copies_inputs = any(os.path.basename(path).startswith("01_") for _, path in script_queue)
+        try:
+            plan = self.resume_plan(script_queue)
+        except Exception as e:
+            self.parent.add_log(f"No se pudo leer el manifiesto de ejecución: {str(e)}", 'warning')
+            plan = None
+
+        if plan and plan[2]:
+            reusable = len(plan[2])
+            response = QMessageBox.question(
+                self.parent,
+                "Reanudar ejecución",
+                f"{reusable} de {len(script_queue)} procesos no tienen cambios desde la ejecución anterior.\n\n"
+                "Sí: reanudar desde el primer proceso con cambios.\n"
+                "No: ejecutar todos los procesos de nuevo.",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+                QMessageBox.Yes
+            )
+            if response == QMessageBox.Cancel:
+                return False
+            if response == QMessageBox.Yes:
+                self.run_plan = plan
+                return True
+            if copies_inputs:
+                return self.clean_model_dir(model_dir, temp_subdir)
+            return True
+
+        if copies_inputs and os.path.exists(model_dir) and any(os.scandir(model_dir)):
+            response = QMessageBox.warning(
+                self.parent,
+                "Archivos existentes",
+                f"Se eliminarán los archivos dentro de {temp_subdir} para iniciar este proceso. ¿Desea Continuar?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if response == QMessageBox.No:
+                return False
+            return self.clean_model_dir(model_dir, temp_subdir)
+        return True
+
+    def clean_model_dir(self, model_dir, name):
+        """Vacía la carpeta temporal del modelo (incluido el manifiesto)"""
+        if not os.path.exists(model_dir):
+            return True
+        try:
+            for item in os.listdir(model_dir):
+                item_path = os.path.join(model_dir, item)
+                if os.path.isfile(item_path):
+                    os.remove(item_path)
+                elif os.path.isdir(item_path):
+                    shutil.rmtree(item_path)
+            self.parent.add_log(f"Contenido de {name} eliminado exitosamente")
+            return True
+        except Exception as e:
+            self.parent.add_log(f"Error al limpiar {name}: {str(e)}")
+            return False
+
+    def start_manifest(self, script_queue):
+        """
+        Prepara el registro de huellas de la ejecución y da por completadas las
+        etapas que el usuario decidió no repetir.
+        """
+        plan, self.run_plan = self.run_plan, None
+        try:
+            if plan is None:
+                self.manifest, self.stage_keys, _ = self.resume_plan(script_queue)
+                return
+            self.manifest, self.stage_keys, reusable = plan
+        except Exception as e:
+            self.parent.add_log(f"No se registrarán huellas de esta ejecución: {str(e)}", 'warning')
+            self.manifest = None
+            self.stage_keys = {}
             return
 
+        for key in sorted(reusable):
+            script_name = os.path.basename(script_queue[key][1])
+            self.scheduler.mark_completed(key)
+            self.update_process_status(script_name, "completed")
+            self.parent.add_log(f"Proceso sin cambios, se reutilizan sus resultados: {script_name}")
+
+    def record_stage(self, key, script_name, success):
+        """Registra en el manifiesto la huella y los artefactos de una etapa terminada"""
+        if self.manifest is None or key not in self.stage_keys:
+            return
         try:
-            process_number, script_path = self.script_queue.pop(0)
-            script_name = os.path.basename(script_path)
-            
-            self.parent.add_log(f"="*50)
-            self.parent.add_log(f"Ejecutando proceso {script_name}")
-            self.parent.add_log(f"="*50)
-            
-            runner = ScriptRunner(script_path, process_number, script_name, self.python_manager)
-            runner.progress.connect(self.parent.add_log)
-            runner.status_update.connect(lambda idx, status: self.update_process_status(script_name, status))
-            runner.script_finished.connect(lambda idx, success: self.handle_script_completion(script_name, success))
-            
-            self.current_runners.append(runner)
-            self.update_process_status(script_name, "running")
-            runner.start()
+            if success:
+                artefacts = stage_artefacts(self.script_queue[key][1], *self.model_dirs())
+                self.manifest.record(script_name, self.stage_keys[key], artefacts)
+            else:
+                self.manifest.invalidate(script_name)
+        except Exception as e:
+            self.parent.add_log(f"No se pudo actualizar el manifiesto de ejecución: {str(e)}", 'warning')
+
+    def execute_next_script(self):
+        """
+        Lanza las etapas de la cola cuyas dependencias ya terminaron, hasta el
+        máximo de etapas simultáneas. La cola se entrega al planificador en la
+        primera llamada de cada ejecución.
+        """
+        if self.scheduler is None:
+            if not self.script_queue:
+                if self.is_running:
+                    self.is_running = False
+                    self.parent.add_log("Todos los procesos han finalizado")
+                    # Verificar si el proceso 29 está entre los completados
+                    completed_processes = self.get_completed_processes()
+                    self.show_completion_message(show_folder=29 in completed_processes)
+                return
+            self.scheduler = StageScheduler(self.script_queue, self.max_parallel_stages)
+            self.start_manifest(self.script_queue)
+            self.script_queue = []
+            if self.max_parallel_stages > 1:
+                self.parent.add_log(f"Etapas independientes en paralelo: hasta {self.max_parallel_stages} a la vez")
+            if self.scheduler.is_finished():
+                self.finish_run()
+                return
+
+        try:
+            for key, process_number, script_path in self.scheduler.take_ready():
+                self.start_runner(key, process_number, script_path)
 
         except Exception as e:
             self.parent.add_log(f"Error al ejecutar siguiente script: {str(e)}")
             self.stop_all()
 
+    def start_runner(self, key, process_number, script_path):
+        """Inicia el ScriptRunner de una etapa del planificador"""
+        script_name = os.path.basename(script_path)
+        
+        self.parent.add_log(f"="*50)
+        self.parent.add_log(f"Ejecutando proceso {script_name}")
+        self.parent.add_log(f"="*50)
+        
+        runner = ScriptRunner(script_path, process_number, script_name, self.python_manager,
+                              env=self.script_environment(script_path), worker_pool=self.worker_pool,
+                              channel=self.progress_channel)
+        runner.progress.connect(self.parent.add_log)
+        runner.status_update.connect(lambda idx, status: self.update_process_status(script_name, status))
+        runner.script_finished.connect(lambda idx, success: self.handle_script_completion(script_name, success, key))
+        
+        self.current_runners.append(runner)
+        self.update_process_status(script_name, "running")
+        runner.start()
+
+    def script_environment(self, script_path=None):
+        """
+        Entorno del siguiente script. Si la etapa de compilación sigue pendiente,
+        los cambios sobre los Excel de formato se acumulan en un diario y se
+        aplican una sola vez al compilar. Incluye el puerto del canal de progreso
+        y el nombre de la etapa.
+        """
+        env = os.environ.copy()
+        if script_path:
+            env.update(self.progress_channel.environment(os.path.basename(script_path)))
+        pending = self.scheduler.pending_paths() if self.scheduler else [path for _, path in self.script_queue]
+        defer = any(COMPILATION_SCRIPT in os.path.basename(path) for path in pending)
+        env[WORKBOOK_DEFER_ENV] = '1' if defer else '0'
+        return env
+
+    def show_progress_events(self, events):
+        """
+        Muestra un lote de eventos del canal de progreso en la consola, con su
+        severidad y etapa; el avance de cada paso se refleja también en el
+        indicador de la etapa.
+        """
+        for event in events:
+            if event.get('type') == 'progress':
+                self.show_stage_progress(event)
+            text = format_event(event)
+            if text:
+                self.parent.add_log(text, event.get('severity'), event.get('stage', ""))
+
+    def show_stage_progress(self, event):
+        """Tooltip del indicador de la etapa con el último avance recibido"""
+        indicators = getattr(self.parent, 'status_indicators', None)
+        if not indicators:
+            return
+        indicator = indicators.get(self.extract_process_number(event.get('stage', '')))
+        if indicator is not None:
+            indicator.setToolTip(format_event(event))
+
     def update_status(self, index, status):
         """Actualiza el estado de un proceso en la interfaz"""
         if hasattr(self.parent, 'status_indicators'):
             self.parent.status_indicators[index].set_status(status)
 
-    def handle_script_completion(self, script_name, success):
-        """Maneja la finalización de un script"""
+    def handle_script_completion(self, script_name, success, key=None):
+        """
+        Maneja la finalización de un script. Una falla solo descarta las etapas
+        que dependen de él; las ramas independientes continúan.
+        """
         try:
-            # Importar aquí para evitar importación circular
-            from model_tabs.interno_tab import InternoModelTab
+            if self.scheduler is None:
+                return
             
-            process_number = self.extract_process_number(script_name)
-            is_internal_model = isinstance(self.parent, InternoModelTab)
+            # Mostrar la salida pendiente de la etapa antes de su resultado
+            self.progress_channel.dispatch()
             
             if success:
                 self.update_process_status(script_name, "completed")
-                
-                # Verificar si es el último proceso según el modelo
-                is_last_process = (process_number == 10 if is_internal_model else process_number == 22)
-                is_last_in_queue = not self.script_queue
-                
-                if is_last_in_queue or is_last_process:
-                    self.is_running = False
-                    self.parent.add_log("Todos los procesos han finalizado")
-                    
-                    # Mostrar diálogo y abrir carpeta si es el último proceso
-                    self.show_completion_message(show_folder=is_last_process)
-                else:
-                    self.execute_next_script()
             else:
                 self.update_process_status(script_name, "error")
-                self.stop_all()
+            
+            self.record_stage(key, script_name, success)
+            skipped = self.scheduler.finish(key, success)
+            if skipped:
+                names = ", ".join(os.path.basename(path) for _, path in skipped)
+                self.parent.add_log(f"Procesos omitidos por falla en {script_name}: {names}")
+            
+            if not self.scheduler.is_finished():
+                self.execute_next_script()
+                return
+            
+            self.finish_run()
 
         except Exception as e:
             self.parent.add_log(f"Error al manejar finalización del script: {str(e)}")
             self.stop_all()
 
+    def finish_run(self):
+        """Cierra la ejecución cuando el planificador ya no tiene etapas"""
+        # Importar aquí para evitar importación circular
+        from model_tabs.interno_tab import InternoModelTab
+        
+        # Verificar si el último proceso del modelo terminó
+        is_internal_model = isinstance(self.parent, InternoModelTab)
+        last_process = 10 if is_internal_model else 22
+        succeeded = self.scheduler.succeeded()
+        self.scheduler = None
+        self.manifest = None
+        self.is_running = False
+        
+        if succeeded:
+            self.parent.add_log("Todos los procesos han finalizado")
+            self.show_completion_message(show_folder=self.is_process_completed(last_process))
+        else:
+            self.parent.add_log("Procesos finalizados con errores")
+
     def reset_status(self):
         """Reinicia los contadores de estado"""
         self.completed_processes = 0
@@ -0,0 +1,199 @@
+"""
+Canal de progreso entre las etapas y la interfaz.
+
+Las etapas envían eventos JSON por línea (ver Scripts/Modelo_IGAC/StageProgress.py)
+a un socket local que escucha ProgressServer. Los hilos de lectura solo
+encolan los eventos; ProgressChannel los retira desde el hilo de la interfaz
+con un QTimer, agrupa los avances repetidos de un mismo paso y los entrega en
+lotes por la señal events. La salida de texto de las etapas (stdout/stderr)
+entra a la misma cola como eventos 'log'.
+
+Evento: {'stage', 'type': 'log' | 'progress', 'severity', 'message', 'step',
+'percent', 'done', 'total', 'counts', 'time'}
+"""
+import json
+import queue
+import socket
+import threading
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+# Deben coincidir con Scripts/Modelo_IGAC/StageProgress.py
+PROGRESS_PORT_ENV = 'GEOVALIDA_PROGRESS_PORT'
+STAGE_ENV = 'GEOVALIDA_STAGE'
+
+SEVERITIES = ('debug', 'info', 'success', 'warning', 'error')
+
+# Intervalo de entrega a la interfaz y máximo de eventos por entrega
+DISPATCH_INTERVAL_MS = 100
+MAX_BATCH = 2000
+
+
+def uses_progress_channel(script_path):
+    """Indica si la etapa importa StageProgress, es decir, si envía sus propios eventos"""
+    try:
+        with open(script_path, 'r', encoding='utf-8', errors='replace') as f:
+            return 'import StageProgress' in f.read()
+    except OSError:
+        return False
+
+
+def log_event(stage, message, severity='info'):
+    """Evento 'log' para una línea de texto de la etapa"""
+    return {'stage': stage, 'type': 'log', 'severity': severity,
+            'message': message, 'time': time.time()}
+
+
+def normalize_event(event):
+    """Completa los campos mínimos de un evento recibido; None si no es válido"""
+    if not isinstance(event, dict):
+        return None
+    event.setdefault('type', 'log')
+    if event.get('severity') not in SEVERITIES:
+        event['severity'] = 'info'
+    event.setdefault('stage', '')
+    event.setdefault('time', time.time())
+    return event
+
+
+def format_event(event):
+    """Texto de un evento para la consola"""
+    if event.get('type') != 'progress':
+        return str(event.get('message', ''))
+    text = f"Progreso: {event.get('step', '')}"
+    if event.get('done') is not None and event.get('total') is not None:
+        text += f" {event['done']}/{event['total']}"
+    if event.get('percent') is not None:
+        text += f" ({event['percent']}%)"
+    counts = event.get('counts')
+    if counts:
+        text += " - " + ", ".join(f"{key}: {value}" for key, value in counts.items())
+    return text
+
+
+def coalesce(events):
+    """
+    Conserva todos los 'log' en orden y, de los 'progress', solo el último de
+    cada (etapa, paso), en la posición de ese último evento.
+    """
+    last = {}
+    for index, event in enumerate(events):
+        if event.get('type') == 'progress':
+            last[(event.get('stage'), event.get('step'))] = index
+    return [
+        event for index, event in enumerate(events)
+        if event.get('type') != 'progress'
+        or last[(event.get('stage'), event.get('step'))] == index
+    ]
+
+
+class ProgressServer:
+    """Socket local que recibe eventos JSON por línea y los pasa a sink(evento)"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        self.closed = False
+        thread = threading.Thread(target=self.accept_connections, daemon=True)
+        thread.start()
+
+    def accept_connections(self):
+        while not self.closed:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                break
+            thread = threading.Thread(target=self.read_events, args=(conn,), daemon=True)
+            thread.start()
+
+    def read_events(self, conn):
+        try:
+            with conn, conn.makefile('r', encoding='utf-8', errors='replace') as stream:
+                for line in stream:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        event = normalize_event(json.loads(line))
+                    except ValueError:
+                        event = None
+                    if event is not None:
+                        self.sink(event)
+        except OSError:
+            pass
+
+    def close(self):
+        self.closed = True
+        try:
+            self.listener.close()
+        except OSError:
+            pass
+
+
+class ProgressChannel(QObject):
+    """
+    Cola de eventos de todas las etapas en ejecución. post() puede llamarse
+    desde cualquier hilo; events se emite en el hilo de la interfaz, como
+    máximo una vez por intervalo.
+    """
+    events = Signal(list)
+
+    def __init__(self, parent=None, interval_ms=DISPATCH_INTERVAL_MS):
+        super().__init__(parent)
+        self.queue = queue.SimpleQueue()
+        self.server = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.dispatch)
+
+    def start(self):
+        """Abre el socket (una vez) e inicia las entregas. Devuelve el puerto o None"""
+        if self.server is None:
+            try:
+                self.server = ProgressServer(self.post)
+            except OSError:
+                self.server = None
+        if not self.timer.isActive():
+            self.timer.start()
+        return self.server.port if self.server else None
+
+    def environment(self, stage):
+        """Variables de entorno que identifican el canal y la etapa"""
+        env = {STAGE_ENV: stage}
+        port = self.start()
+        if port:
+            env[PROGRESS_PORT_ENV] = str(port)
+        return env
+
+    def post(self, event):
+        self.queue.put(event)
+
+    def post_line(self, stage, message, severity='info'):
+        self.queue.put(log_event(stage, message, severity))
+
+    def dispatch(self):
+        """Retira los eventos pendientes y los entrega en un solo lote"""
+        batch = []
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.events.emit(coalesce(batch))
+
+    def stop(self):
+        """Entrega lo pendiente y detiene el temporizador (el socket sigue abierto)"""
+        self.dispatch()
+        self.timer.stop()
+
+    def close(self):
+        self.stop()
+        if self.server is not None:
+            self.server.close()
+            self.server = None
@@ -0,0 +1,277 @@
+"""
+Manifiesto de ejecución para reanudar el pipeline de un modelo.
+
+Por cada etapa completada se guarda una huella de sus entradas y los
+artefactos que produjo. La huella combina:
+
+- el código de la etapa, de los scripts que lanza (mismo prefijo numérico,
+  p. ej. 21_Reporte_final_*) y de los módulos compartidos (Modelo_IGAC y los
+  de la carpeta del modelo que no son etapas),
+- solo los insumos externos que la etapa declara en stage_graph.py (sources):
+  el JSON de rutas de insumos y los archivos o carpetas que referencia (GDB,
+  GPKG, CSV...), array_config.txt o las plantillas de Files/Templates que
+  usa; cambiar una plantilla del reporte no invalida la topología,
+- las huellas de las etapas de las que depende según el grafo de etapas.
+
+Cada registro lleva además un identificador de ejecución y el de cada etapa
+de la que depende en el momento de registrarse. Una etapa puede omitirse si
+su huella coincide con la registrada, sus artefactos siguen existiendo, las
+etapas de las que depende no se han vuelto a ejecutar desde entonces y
+ninguna de ellas se repite en la ejecución actual: si se repite una etapa
+anterior (por ejemplo la copia de la GDB), incluso sola, se repiten también
+las siguientes. Los artefactos son los archivos y carpetas de las salidas que
+la etapa declara en stage_graph.py, de modo que las etapas que corren en
+paralelo no se atribuyen archivos ajenos. Su vigencia se comprueba por
+existencia, porque las etapas posteriores modifican legítimamente salidas
+compartidas como la GDB de trabajo.
+
+Las huellas de archivos y carpetas usan tamaño y fecha de modificación; la
+del código usa el contenido.
+"""
+import glob
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+from .stage_graph import (STAGE_GRAPHS, SOURCES, RUTAS_INSUMOS, ZONAS, PLANTILLAS_EXCEL,
+                          PLANTILLAS_REPORTE, PLANTILLA_GDB, TOOLBOX, REPORTES,
+                          artefact_patterns, conflicts, stage_spec)
+
+
+# Cambiar cuando cambie la forma de calcular las huellas o el formato del manifiesto
+MANIFEST_VERSION = 3
+MANIFEST_NAME = 'run_manifest.json'
+
+
+def digest(parts):
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def path_fingerprint(path):
+    """Huella de un archivo o carpeta (p. ej. una GDB) por tamaño y fecha de sus archivos"""
+    if not path or not os.path.exists(path):
+        return 'missing'
+    if os.path.isfile(path):
+        return file_stat(path)
+    entries = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            try:
+                entries.append([os.path.relpath(full_path, path)] + file_stat(full_path))
+            except OSError:
+                continue
+    return digest(entries)
+
+
+def content_fingerprint(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return 'missing'
+
+
+def stage_artefacts(script_path, model_dir, reports_dir):
+    """
+    Artefactos {ruta: [tamaño, fecha]} de las salidas declaradas por la etapa que
+    existen en la carpeta temporal del modelo o en su carpeta de reportes
+    """
+    artefacts = {}
+    for pattern in artefact_patterns(script_path):
+        if pattern == REPORTES:
+            paths = [reports_dir] if os.path.exists(reports_dir) else []
+        else:
+            paths = glob.glob(os.path.join(glob.escape(model_dir), *pattern.split('/')))
+        for path in sorted(paths):
+            try:
+                artefacts[path] = file_stat(path)
+            except OSError:
+                continue
+    return artefacts
+
+
+def source_paths(project_root, model_folder, config_file):
+    """
+    Rutas de cada insumo externo del modelo {insumo: [rutas]} (ver
+    stage_graph.SOURCES); model_folder es la carpeta del modelo en
+    Temporary_Files y en Files/Templates.
+    """
+    temp_dir = os.path.join(project_root, "Files", "Temporary_Files")
+    templates_dir = os.path.join(project_root, "Files", "Templates", model_folder)
+    config_path = os.path.join(temp_dir, "Ruta_Insumos", config_file)
+    rutas = [config_path]
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = {}
+    values = config.values() if isinstance(config, dict) else []
+    for value in values:
+        if isinstance(value, str) and os.path.exists(value):
+            rutas.append(value)
+    return {
+        RUTAS_INSUMOS: rutas,
+        ZONAS: [os.path.join(temp_dir, "array_config.txt")],
+        PLANTILLAS_EXCEL: [os.path.join(templates_dir, "02_TOPOLOGIA")],
+        PLANTILLAS_REPORTE: [os.path.join(templates_dir, "04_REPORTE_FINAL")],
+        PLANTILLA_GDB: [os.path.join(templates_dir, "GDB")],
+        TOOLBOX: [os.path.join(templates_dir, "VALIDACIONESCALIDAD.atbx")],
+    }
+
+
+def code_files(script_path):
+    """La etapa, los scripts con su mismo prefijo numérico y los módulos compartidos"""
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+    shared_dirs = [script_dir, os.path.join(os.path.dirname(script_dir), 'Modelo_IGAC')]
+    files = [script_path]
+    prefix = os.path.basename(script_path).split('_', 1)[0] + '_'
+    for name in sorted(os.listdir(script_dir)):
+        path = os.path.join(script_dir, name)
+        if name.endswith('.py') and name.startswith(prefix) and name != os.path.basename(script_path):
+            files.append(path)
+    for folder in dict.fromkeys(os.path.normpath(d) for d in shared_dirs):
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.py') and not name[:1].isdigit():
+                files.append(os.path.join(folder, name))
+    return files
+
+
+class RunManifest:
+    """
+    Manifiesto JSON de la carpeta temporal de un modelo. Uso:
+
+        manifest = RunManifest(carpeta_modelo)
+        claves, reutilizables = manifest.plan(cola, source_paths(raiz, carpeta, json_insumos))
+        ...
+        manifest.record(nombre, claves[key], artefactos)
+    """
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.path = os.path.join(model_dir, MANIFEST_NAME)
+        self.stages = {}
+        self.dependencies = {}
+        self._code = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('version') == MANIFEST_VERSION:
+            self.stages = data.get('stages', {})
+        else:
+            self.stages = {}
+
+    def save(self):
+        os.makedirs(self.model_dir, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'stages': self.stages}, f,
+                      indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def code_key(self, script_path):
+        parts = []
+        for path in code_files(script_path):
+            if path not in self._code:
+                self._code[path] = content_fingerprint(path)
+            parts.append([os.path.basename(path), self._code[path]])
+        return digest(parts)
+
+    def plan(self, entries, sources):
+        """
+        Huellas de las etapas de la cola [(número, ruta), ...] y posiciones de
+        las que pueden omitirse. sources es {insumo: [rutas]} (source_paths);
+        cada etapa usa solo los insumos que declara, y una etapa fuera del
+        grafo, todos. Las dependencias salen del grafo completo del modelo, de
+        modo que la huella de una etapa no depende de qué otras etapas se
+        seleccionaron.
+        """
+        source_keys = {}
+
+        def sources_key(spec):
+            names = sorted(spec['sources'] if spec is not None else SOURCES)
+            for name in names:
+                if name not in source_keys:
+                    source_keys[name] = digest([[path, path_fingerprint(path)]
+                                                for path in sources.get(name, ())])
+            return [[name, source_keys[name]] for name in names]
+
+        paths = [path for _, path in entries]
+        if paths:
+            scripts_dir = os.path.dirname(paths[0])
+            graph = STAGE_GRAPHS.get(os.path.basename(scripts_dir), {})
+            graph_paths = [os.path.join(scripts_dir, name) for name in graph]
+            paths = [path for path in graph_paths if os.path.exists(path)] + \
+                    [path for path in paths if path not in graph_paths]
+
+        specs = [stage_spec(path) for path in paths]
+        queued = {os.path.basename(path) for _, path in entries}
+        keys = {}
+        rerun = set()
+        for index, path in enumerate(paths):
+            name = os.path.basename(path)
+            deps = [os.path.basename(paths[prev]) for prev in range(index)
+                    if conflicts(specs[prev], specs[index])]
+            self.dependencies[name] = deps
+            keys[name] = digest([MANIFEST_VERSION, name, self.code_key(path),
+                                 sources_key(specs[index]), [keys[dep] for dep in deps]])
+            if name in queued and (any(dep in rerun for dep in deps)
+                                   or not self.is_valid(name, keys[name])):
+                rerun.add(name)
+
+        stage_keys = {}
+        reusable = set()
+        for key, (_, path) in enumerate(entries):
+            name = os.path.basename(path)
+            stage_keys[key] = keys[name]
+            if name not in rerun:
+                reusable.add(key)
+        return stage_keys, reusable
+
+    def run_id(self, name):
+        """Identificador de la última ejecución registrada de la etapa (None si no hay)"""
+        return self.stages.get(name, {}).get('run')
+
+    def is_valid(self, name, stage_key):
+        """
+        La etapa está al día: misma huella, artefactos presentes y etapas de las
+        que depende sin ejecuciones posteriores a la suya
+        """
+        entry = self.stages.get(name)
+        if not entry or entry.get('key') != stage_key:
+            return False
+        upstream = entry.get('upstream', {})
+        if any(self.run_id(dep) != upstream.get(dep) for dep in self.dependencies.get(name, ())):
+            return False
+        return all(os.path.exists(path) for path in entry.get('artefacts', {}))
+
+    def record(self, name, stage_key, artefacts):
+        """Registra una ejecución completada de la etapa con los identificadores de sus dependencias"""
+        self.stages[name] = {
+            'key': stage_key,
+            'run': uuid.uuid4().hex,
+            'upstream': {dep: self.run_id(dep) for dep in self.dependencies.get(name, ())},
+            'artefacts': artefacts,
+            'completed': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.save()
+
+    def invalidate(self, name):
+        if self.stages.pop(name, None) is not None:
+            self.save()
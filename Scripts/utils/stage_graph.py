@@ -0,0 +1,254 @@
+"""
+Grafo declarativo de las etapas de cada modelo y planificador de ejecución.
+
+Cada etapa declara los recursos que lee (inputs) y los que escribe (outputs).
+Dos etapas de una misma cola quedan ordenadas cuando una escribe algo que la
+otra lee o escribe; las demás pueden ejecutarse en paralelo. Los recursos son
+nombres lógicos (la GDB de trabajo, una base SQLite, el Excel de formato...),
+no rutas. Una etapa que no está en el grafo, o que declara ALL como entrada,
+espera a todas las anteriores de la cola y bloquea a todas las siguientes.
+
+Cada etapa declara también los insumos externos que lee (sources), con los
+que run_manifest.py calcula su huella: el JSON de rutas de insumos y lo que
+referencia, array_config.txt y las plantillas de Files/Templates/<modelo>.
+Los artefactos de una etapa son los archivos y carpetas de sus salidas
+(ARTEFACTS), con patrones relativos a la carpeta temporal del modelo.
+"""
+import os
+
+
+# Entrada comodín: la etapa depende de todo lo anterior
+ALL = '*'
+
+# Variable de entorno con el máximo de etapas simultáneas
+MAX_WORKERS_ENV = 'GEOVALIDA_MAX_PARALLEL_STAGES'
+
+
+# Insumos externos (ver run_manifest.source_paths)
+RUTAS_INSUMOS = 'rutas_insumos'            # Ruta_Insumos/<json> y los archivos que referencia
+ZONAS = 'zonas'                            # Temporary_Files/array_config.txt
+PLANTILLAS_EXCEL = 'plantillas_excel'      # Templates/<modelo>/02_TOPOLOGIA
+PLANTILLAS_REPORTE = 'plantillas_reporte'  # Templates/<modelo>/04_REPORTE_FINAL
+PLANTILLA_GDB = 'plantilla_gdb'            # Templates/<modelo>/GDB
+TOOLBOX = 'toolbox'                        # Templates/<modelo>/VALIDACIONESCALIDAD.atbx
+SOURCES = (RUTAS_INSUMOS, ZONAS, PLANTILLAS_EXCEL, PLANTILLAS_REPORTE, PLANTILLA_GDB, TOOLBOX)
+
+
+def stage(inputs=(), outputs=(), sources=(ZONAS,)):
+    return {'inputs': frozenset(inputs), 'outputs': frozenset(outputs), 'sources': frozenset(sources)}
+
+
+# Modelo IGAC (Scripts/Modelo_IGAC). Los Excel de formato (02_TOPOLOGIA) se
+# escriben con WorkbookSession, cuyo diario se lee y reescribe completo: las
+# etapas que los diligencian comparten la salida 'excel_formato' y no se solapan.
+IGAC_STAGES = {
+    "01_Copiar_Archivos_necesarios.py": stage(outputs=('gdb', 'insumos'), sources=(RUTAS_INSUMOS, ZONAS)),
+    "02_Procesar_Conteo_de_Elementos.py": stage(('gdb',), ('db_conteo',)),
+    "03_Crear_Topologías.py": stage(('gdb', 'db_conteo'), ('gdb',)),
+    "04_Aplicar_Reglas_Topologicas.py": stage(('gdb',), ('gdb',)),
+    "05_Exportar_Erro.Topológicos_a_SHP_1_2.py": stage(('gdb',), ('errores_topologicos',)),
+    "06_Exportar_Erro.Topológicos_a_SHP_2_2.py": stage(('gdb', 'errores_topologicos'), ('errores_topologicos',)),
+    "07_Generar_DB_registro_Errores.py": stage(('errores_topologicos',), ('db_registro_errores',)),
+    "08_Exportar_Err.Topologicos_segun_reglas_a_SHP.py": stage(('gdb', 'errores_topologicos'), ('shp_topologicos',)),
+    "09_Diligenciar_Err._y_Excep._a_Excel.py": stage(('db_registro_errores', 'shp_topologicos', 'insumos'), ('excel_formato',),
+                                                     (ZONAS, PLANTILLAS_EXCEL)),
+    "10_Encabecado_Formato_Consitencia_Logica.py": stage(('gdb',), ('excel_formato',)),
+    "11_Toolbox_Consistencia_Formato.py": stage(('gdb',), ('consistencia_formato',)),
+    "12_Toolbox_Interseccion_Consistencia.py": stage(('gdb',), ('consistencia_geoespacial',)),
+    "13_Generar_shp_Consistencia_Formato.py": stage(('consistencia_formato', 'consistencia_geoespacial'), ('shp_consistencia',)),
+    "14_Generar_DB_registro_Errores_Consistencia.py": stage(('shp_consistencia',), ('db_errores_consistencia',)),
+    "15_Diligenciar_Err._Consitencia_a_Excel.py": stage(('shp_consistencia', 'db_errores_consistencia'), ('excel_formato',),
+                                                     (ZONAS, PLANTILLAS_EXCEL)),
+    "16_Generar_DB_registro_Excepciones_Consistencia.py": stage(('shp_consistencia',), ('db_excepciones_consistencia',)),
+    "17_Diligenciar_Excepciones_Consitencia_a_Excel.py": stage(('db_errores_consistencia', 'db_excepciones_consistencia'), ('excel_formato',)),
+    "18_Toolbox_Omision_Comision.py": stage(('gdb', 'insumos'), ('omision_comision',)),
+    "19_Conteo_Duplicados.py": stage(('consistencia_formato',), ('omision_comision',)),
+    "20_Análisis_Omision_Comision.py": stage(('omision_comision',), ('omision_comision', 'db_omision_comision')),
+    "21_Reportes_Finales.py": stage(
+        ('db_conteo', 'db_registro_errores', 'db_errores_consistencia',
+         'db_excepciones_consistencia', 'db_omision_comision', 'insumos'),
+        ('reporte_final',), (ZONAS, PLANTILLAS_REPORTE)),
+    "22_Compilación_Datos.py": stage((ALL,), ('entregable',)),
+}
+
+# Modelos LADM 1.0, LADM 1.2 e INTERNO 1.0 (misma secuencia de etapas)
+LADM_STAGES = {
+    "01_Copiar_Archivos_necesarios.py": stage(outputs=('gpkg', 'insumos'),
+                                              sources=(RUTAS_INSUMOS, ZONAS, PLANTILLA_GDB)),
+    "02_convertir_gpkg_a_gdb.py": stage(('gpkg', 'insumos'), ('gdb',), ()),
+    "03_Procesar_Conteo_de_Elementos.py": stage(('gpkg', 'gdb'), ('db_conteo',)),
+    "04_Toolbox_validaciones.py": stage(('gdb',), ('validaciones',), (ZONAS, TOOLBOX)),
+    "05_Habilitar_column_excepciones.py": stage(('validaciones',), ('validaciones',), ()),
+    "06_Generar_DB_registro_Errores.py": stage(('validaciones',), ('db_registro_errores',)),
+    "07_Diligenciar_Err._y_Excep._a_Excel.py": stage(('db_registro_errores', 'insumos'), ('excel_formato',),
+                                                     (ZONAS, PLANTILLAS_EXCEL)),
+    "08_Encabecado_Formato_Consitencia_Logica.py": stage(('gdb',), ('excel_formato',), ()),
+    "09_Reportes_Finales.py": stage(('db_conteo', 'db_registro_errores', 'insumos'), ('reporte_final',),
+                                    (ZONAS, PLANTILLAS_REPORTE)),
+    "10_Compilación_Datos.py": stage((ALL,), ('entregable',)),
+}
+
+# Patrón que designa la carpeta Reportes/<modelo>
+REPORTES = '<reportes>'
+
+# Archivos y carpetas de cada salida (patrones glob relativos a la carpeta
+# temporal del modelo)
+IGAC_ARTEFACTS = {
+    'gdb': ('*.gdb',),
+    'insumos': ('INSUMOS',),
+    'db_conteo': ('db/conteo_elementos.db',),
+    'errores_topologicos': ('Topology_Errors',),
+    'db_registro_errores': ('db/registro_errores.db',),
+    'shp_topologicos': ('03_INCONSISTENCIAS/CONSISTENCIA_TOPOLOGICA',),
+    'excel_formato': ('02_TOPOLOGIA',),
+    'consistencia_formato': ('consistencia_formato_temp',),
+    'consistencia_geoespacial': ('consistencia_geoespacial_temp',),
+    'shp_consistencia': ('03_INCONSISTENCIAS/CONSISTENCIA_FORMATO',),
+    'db_errores_consistencia': ('db/errores_consistencia_formato.db',),
+    'db_excepciones_consistencia': ('db/excepciones_consistencia_formato.db',),
+    'omision_comision': ('Omision_comision_temp',),
+    'db_omision_comision': ('db/omision_comision.db',),
+    'reporte_final': ('RESULTADOS_*',),
+    'entregable': (REPORTES,),
+}
+
+LADM_ARTEFACTS = {
+    'gpkg': ('*.gpkg',),
+    'insumos': ('GPKG_ORIGINAL',),
+    'gdb': ('*.gdb',),
+    'db_conteo': ('db/conteo_elementos.db',),
+    'validaciones': ('Validaciones_Calidad',),
+    'db_registro_errores': ('db/registro_errores_*.db',),
+    'excel_formato': ('02_TOPOLOGIA',),
+    'reporte_final': ('RESULTADOS_*',),
+    'entregable': (REPORTES,),
+}
+
+# Grafo y artefactos por carpeta de scripts
+STAGE_GRAPHS = {
+    "Modelo_IGAC": IGAC_STAGES,
+    "MODELO_LADM_1_0": LADM_STAGES,
+    "MODELO_LADM_1_2": LADM_STAGES,
+    "MODELO_INTERNO_1_0": LADM_STAGES,
+}
+
+STAGE_ARTEFACTS = {
+    "Modelo_IGAC": IGAC_ARTEFACTS,
+    "MODELO_LADM_1_0": LADM_ARTEFACTS,
+    "MODELO_LADM_1_2": LADM_ARTEFACTS,
+    "MODELO_INTERNO_1_0": LADM_ARTEFACTS,
+}
+
+
+def stage_spec(script_path):
+    """Declaración de la etapa según su carpeta y nombre, o None si no está en el grafo"""
+    graph = STAGE_GRAPHS.get(os.path.basename(os.path.dirname(script_path)), {})
+    return graph.get(os.path.basename(script_path))
+
+
+def artefact_patterns(script_path):
+    """Patrones de los artefactos de las salidas declaradas por la etapa (vacío si no está en el grafo)"""
+    spec = stage_spec(script_path)
+    if spec is None:
+        return []
+    artefacts = STAGE_ARTEFACTS.get(os.path.basename(os.path.dirname(script_path)), {})
+    return [pattern for output in sorted(spec['outputs']) for pattern in artefacts.get(output, ())]
+
+
+def conflicts(earlier, later):
+    """Indica si la etapa later debe esperar a earlier"""
+    if earlier is None or later is None:
+        return True
+    if ALL in earlier['inputs'] or ALL in later['inputs']:
+        return True
+    return bool(
+        later['inputs'] & earlier['outputs']
+        or later['outputs'] & earlier['outputs']
+        or later['outputs'] & earlier['inputs']
+    )
+
+
+def default_max_workers():
+    """Máximo de etapas simultáneas: la variable de entorno o la mitad de los núcleos (1 a 4)"""
+    value = os.environ.get(MAX_WORKERS_ENV)
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            pass
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+class StageScheduler:
+    """
+    Planificador de una cola de etapas [(número de proceso, ruta), ...]. Las
+    entradas se identifican por su posición en la cola. Uso:
+
+        scheduler = StageScheduler(cola, max_workers)
+        for key, number, path in scheduler.take_ready(): lanzar...
+        omitidas = scheduler.finish(key, exito)
+    """
+
+    def __init__(self, entries, max_workers=1):
+        self.entries = list(entries)
+        self.max_workers = max(1, max_workers)
+        specs = [stage_spec(path) for _, path in self.entries]
+        self.dependencies = {
+            key: {prev for prev in range(key) if conflicts(specs[prev], specs[key])}
+            for key in range(len(self.entries))
+        }
+        self.pending = list(range(len(self.entries)))
+        self.running = set()
+        self.completed = set()
+        self.failed = set()
+        self.skipped = set()
+
+    def take_ready(self):
+        """Etapas listas para lanzar (dependencias completadas), hasta llenar los cupos"""
+        ready = []
+        for key in list(self.pending):
+            if len(self.running) >= self.max_workers:
+                break
+            if self.dependencies[key] <= self.completed:
+                self.pending.remove(key)
+                self.running.add(key)
+                number, path = self.entries[key]
+                ready.append((key, number, path))
+        return ready
+
+    def finish(self, key, success):
+        """
+        Registra el fin de una etapa. Si falló, descarta las etapas que dependen
+        de ella directa o indirectamente y las devuelve como [(número, ruta)].
+        """
+        self.running.discard(key)
+        if success:
+            self.completed.add(key)
+            return []
+
+        self.failed.add(key)
+        blocked = {key}
+        skipped = []
+        for other in list(self.pending):
+            if self.dependencies[other] & blocked:
+                blocked.add(other)
+                self.pending.remove(other)
+                self.skipped.add(other)
+                skipped.append(self.entries[other])
+        return skipped
+
+    def mark_completed(self, key):
+        """Da por completada una etapa pendiente sin lanzarla (ejecución reanudada)"""
+        if key in self.pending:
+            self.pending.remove(key)
+            self.completed.add(key)
+
+    def pending_paths(self):
+        """Rutas de las etapas que aún no se han lanzado"""
+        return [self.entries[key][1] for key in self.pending]
+
+    def is_finished(self):
+        return not self.running and not self.pending
+
+    def succeeded(self):
+        return not self.failed and not self.skipped
@@ -0,0 +1,222 @@
+"""
+Proceso de trabajo persistente para las etapas del pipeline.
+
+Se ejecuta con el intérprete de las etapas (ArcGIS Pro), importa una sola vez
+los módulos pesados y luego ejecuta, una tras otra, las etapas que recibe por
+stdin como líneas JSON {"script": ruta, "env": {...}}. Cada etapa corre como
+__main__ con globales propios; al terminar se descargan los módulos del
+proyecto que importó y se restauran el entorno, sys.path, sys.argv, el
+directorio de trabajo, el logging y el entorno de arcpy.
+
+El fin de cada etapa se anuncia en stdout y en stderr con una línea
+END_MARKER seguida de {"code": código de salida, "recycle": bool}. Con
+recycle el proceso termina después del anuncio: tras una excepción no
+controlada, si la etapa abrió una QApplication o si la memoria supera el
+límite configurado.
+
+No debe importar nada de la interfaz: corre fuera del proceso de la GUI.
+"""
+import gc
+import importlib
+import json
+import logging
+import os
+import runpy
+import sys
+import traceback
+
+
+END_MARKER = "##GEOVALIDA_STAGE_END## "
+
+# Módulos que se importan al iniciar el proceso (los que falten se omiten)
+PRELOAD_MODULES = ('arcpy', 'pandas', 'numpy', 'openpyxl', 'rich')
+
+# Límite de memoria residente antes de reciclar el proceso
+MAX_MEMORY_ENV = 'GEOVALIDA_WORKER_MAX_MEMORY_MB'
+DEFAULT_MAX_MEMORY_MB = 2048
+
+
+def preload():
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def memory_mb():
+    """Memoria residente del proceso en MB, o None si psutil no está disponible"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def max_memory_mb():
+    try:
+        return float(os.environ.get(MAX_MEMORY_ENV, DEFAULT_MAX_MEMORY_MB))
+    except ValueError:
+        return DEFAULT_MAX_MEMORY_MB
+
+
+# Carpeta Scripts del proyecto: solo se descargan los módulos que viven aquí
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def is_project_module(module, scripts_dir=SCRIPTS_DIR):
+    """Módulos cuyo archivo está bajo la carpeta Scripts del proyecto"""
+    path = getattr(module, '__file__', None)
+    if not path:
+        return False
+    path = os.path.normcase(os.path.abspath(path))
+    return path.startswith(os.path.normcase(scripts_dir) + os.sep)
+
+
+class StageState:
+    """Estado global del proceso que una etapa puede modificar"""
+
+    def __init__(self):
+        self.environ = dict(os.environ)
+        self.path = list(sys.path)
+        self.argv = list(sys.argv)
+        self.cwd = os.getcwd()
+        self.modules = set(sys.modules)
+        self.loggers = set(logging.root.manager.loggerDict)
+        self.root_handlers = list(logging.root.handlers)
+        self.root_level = logging.root.level
+        self.stdin = sys.stdin
+        self.stdout = sys.stdout
+        self.stderr = sys.stderr
+
+    def restore(self):
+        if sys.stdin is not self.stdin:
+            try:
+                sys.stdin.close()
+            except Exception:
+                pass
+        sys.stdin = self.stdin
+        sys.stdout = self.stdout
+        sys.stderr = self.stderr
+        os.environ.clear()
+        os.environ.update(self.environ)
+        sys.path[:] = self.path
+        sys.argv[:] = self.argv
+        try:
+            os.chdir(self.cwd)
+        except OSError:
+            pass
+        self._restore_logging()
+        self._restore_arcpy()
+        for name in set(sys.modules) - self.modules:
+            module = sys.modules.get(name)
+            if module is not None and is_project_module(module):
+                del sys.modules[name]
+        gc.collect()
+
+    def _restore_logging(self):
+        for handler in list(logging.root.handlers):
+            if handler not in self.root_handlers:
+                logging.root.removeHandler(handler)
+                handler.close()
+        logging.root.setLevel(self.root_level)
+        manager = logging.root.manager
+        for name in set(manager.loggerDict) - self.loggers:
+            logger = manager.loggerDict.pop(name)
+            for handler in list(getattr(logger, 'handlers', [])):
+                logger.removeHandler(handler)
+                handler.close()
+
+    def _restore_arcpy(self):
+        arcpy = sys.modules.get('arcpy')
+        if arcpy is None:
+            return
+        try:
+            arcpy.ResetEnvironments()
+            arcpy.ClearWorkspaceCache_management()
+            arcpy.Delete_management("in_memory")
+        except Exception:
+            pass
+
+
+def run_stage(script_path, env):
+    """Ejecuta una etapa. Devuelve (código de salida, reciclar)"""
+    state = StageState()
+    os.environ.update(env or {})
+    sys.argv[:] = [script_path]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    # stdin lleva las solicitudes del proceso; la etapa no debe consumirlas
+    sys.stdin = open(os.devnull, 'r')
+    had_qt_app = _qt_application_exists()
+
+    code = 0
+    recycle = False
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+        recycle = True
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        state.restore()
+
+    if not had_qt_app and _qt_application_exists():
+        recycle = True
+    usage = memory_mb()
+    if usage is not None and usage > max_memory_mb():
+        recycle = True
+    return code, recycle
+
+
+def _qt_application_exists():
+    widgets = sys.modules.get('PySide6.QtWidgets')
+    return widgets is not None and widgets.QApplication.instance() is not None
+
+
+def announce(code, recycle):
+    message = END_MARKER + json.dumps({'code': code, 'recycle': recycle})
+    for stream in (sys.stderr, sys.stdout):
+        stream.write(message + "\n")
+        stream.flush()
+
+
+def main():
+    for stream in (sys.stdout, sys.stderr):
+        stream.reconfigure(encoding='utf-8', errors='replace', line_buffering=True)
+    sys.stdin.reconfigure(encoding='utf-8')
+    preload()
+
+    requests = sys.stdin
+    while True:
+        line = requests.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            code, recycle = run_stage(request['script'], request.get('env'))
+        except Exception:
+            traceback.print_exc()
+            code, recycle = 1, True
+        announce(code, recycle)
+        if recycle:
+            break
+
+
+if __name__ == "__main__":
+    main()
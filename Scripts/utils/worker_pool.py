@@ -0,0 +1,113 @@
+"""
+Procesos de trabajo persistentes por intérprete (ver stage_worker.py).
+
+WorkerPool mantiene, para cada ruta de Python de PythonVersionManager, los
+procesos libres que ya tienen cargados arcpy, pandas, openpyxl y rich. Una
+etapa toma un proceso libre (o se crea uno) y lo devuelve al terminar; los
+procesos que murieron o que anunciaron su reciclaje se descartan.
+"""
+import json
+import os
+import subprocess
+import threading
+
+from .stage_worker import END_MARKER
+
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stage_worker.py')
+
+# Variable de entorno para desactivar los procesos persistentes ('0')
+WARM_WORKERS_ENV = 'GEOVALIDA_WARM_WORKERS'
+
+
+def warm_workers_enabled():
+    return os.environ.get(WARM_WORKERS_ENV, '1') != '0'
+
+
+def parse_end_marker(line):
+    """Resultado {'code', 'recycle'} si la línea es el fin de etapa, si no None"""
+    if not line.startswith(END_MARKER):
+        return None
+    try:
+        return json.loads(line[len(END_MARKER):])
+    except ValueError:
+        return {'code': 1, 'recycle': True}
+
+
+class StageWorker:
+    """Un proceso de trabajo persistente"""
+
+    def __init__(self, python_path):
+        self.python_path = python_path
+        self.recycle = False
+        self.process = subprocess.Popen(
+            [python_path, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def submit(self, script_path, env=None):
+        """Envía una etapa al proceso; la salida llega por stdout/stderr hasta END_MARKER"""
+        request = {'script': script_path, 'env': dict(env) if env else {}}
+        self.process.stdin.write(json.dumps(request, ensure_ascii=False) + "\n")
+        self.process.stdin.flush()
+
+    def close(self):
+        """Termina el proceso (cerrar stdin basta si está esperando una etapa)"""
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except Exception:
+            self.kill()
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+
+
+class WorkerPool:
+    """Procesos de trabajo libres por ruta de intérprete"""
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, python_path):
+        """Proceso libre y vivo para el intérprete, o uno nuevo"""
+        with self._lock:
+            idle = self._idle.setdefault(python_path, [])
+            while idle:
+                worker = idle.pop()
+                if worker.is_alive():
+                    return worker
+        return StageWorker(python_path)
+
+    def release(self, worker):
+        """Devuelve el proceso al grupo, o lo termina si debe reciclarse"""
+        if worker.recycle or not worker.is_alive():
+            worker.close()
+            return
+        with self._lock:
+            self._idle.setdefault(worker.python_path, []).append(worker)
+
+    def shutdown(self):
+        """Termina los procesos libres"""
+        with self._lock:
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            self._idle = {}
+        for worker in workers:
+            worker.close()
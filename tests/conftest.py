@@ -0,0 +1,14 @@
+"""
+Pruebas de los motores en Python puro (sin arcpy ni PySide6). Los módulos de
+Modelo_IGAC se importan como lo hacen las etapas, con su carpeta en sys.path;
+los de utils, como paquete desde Scripts.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(ROOT, 'Scripts')
+
+for path in (SCRIPTS_DIR, os.path.join(SCRIPTS_DIR, 'Modelo_IGAC')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
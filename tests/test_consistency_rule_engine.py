@@ -0,0 +1,65 @@
+import pytest
+
+from ConsistencyRuleEngine import (CompiledRule, ConsistencyRuleEngine, RuleCompileError,
+                                   RuleEvaluationError)
+
+
+FIELDS = ['CODIGO', 'NUMERO_PISOS']
+ROWS = [('12345', 1), (None, 5), ('1 345', None), ('19', 4)]
+
+
+@pytest.fixture
+def frame():
+    return ConsistencyRuleEngine.build_frame(FIELDS, ROWS, {'NUMERO_PISOS': 'Integer'})
+
+
+def mask(query, frame):
+    return ConsistencyRuleEngine.evaluate(CompiledRule(query, "Error"), frame).tolist()
+
+
+def test_build_frame_types(frame):
+    assert frame['NUMERO_PISOS'].dtype == float
+    assert frame['CODIGO'].tolist() == ['12345', None, '1 345', '19']
+
+
+def test_build_frame_without_rows():
+    frame = ConsistencyRuleEngine.build_frame(FIELDS, [])
+    assert list(frame.columns) == FIELDS and len(frame) == 0
+
+
+def test_null_and_like(frame):
+    assert mask("CODIGO IS NULL OR CODIGO LIKE '% %'", frame) == [False, True, True, False]
+
+
+def test_functions_follow_sql_null_semantics(frame):
+    # CHAR_LENGTH(NULL) <> 5 es desconocido, no verdadero
+    assert mask("CHAR_LENGTH(CODIGO) <> 5", frame) == [False, False, False, True]
+    assert mask("SUBSTRING(CODIGO, 2, 1) = '9'", frame) == [False, False, False, True]
+
+
+def test_numeric_comparison_and_not(frame):
+    assert mask("NUMERO_PISOS > 3 AND NOT NUMERO_PISOS IS NULL", frame) == [False, True, False, True]
+
+
+def test_field_names_are_case_insensitive(frame):
+    assert mask("codigo is null", frame) == [False, True, False, False]
+
+
+def test_unknown_field_raises(frame):
+    with pytest.raises(RuleEvaluationError):
+        mask("FOO = 1", frame)
+
+
+def test_uncompilable_rules_fall_back_to_arcpy():
+    queries = {'URBANO': {'U_TERRENO': [
+        ("CODIGO IS NULL", "Error: nulo"),
+        ("CODIGO IN (SELECT X FROM T)", "Error: subconsulta"),
+    ]}}
+    engine = ConsistencyRuleEngine(queries)
+    rules = engine.rules_for('URBANO', 'U_TERRENO')
+    assert rules[0].error_desc == "Error: nulo"
+    assert rules[1] is None
+    assert engine.fallback == {('URBANO', 'U_TERRENO'): ["CODIGO IN (SELECT X FROM T)"]}
+    assert engine.rules_for('URBANO', 'OTRA') == []
+    with pytest.raises(RuleCompileError):
+        CompiledRule("CODIGO IN (SELECT X FROM T)", "")
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from RegistryJoinEngine import (CONDICIONES_TERRENO, RegistryJoinEngine, anti_join_mask,
+                                condition_mask, geographic_unit_key, registry_unit_key,
+                                subzone_mask, substring)
+
+
+def predial(sector, condicion, unidad='0001'):
+    """Número predial de 30 posiciones con el sector (6-7) y la condición (22) indicados"""
+    return '25001' + sector + '0' * 14 + condicion + '0000' + unidad
+
+
+def test_substring_is_one_based():
+    codes = pd.Series(['ABCDEFG', None], dtype='string')
+    assert substring(codes, 2, 3).tolist()[0] == 'BCD'
+    assert pd.isna(substring(codes, 2, 3).tolist()[1])
+
+
+def test_subzone_and_condition_masks():
+    codes = pd.Series([predial('00', '0'), predial('01', '9'), None], dtype='string')
+    assert subzone_mask(codes, 'Rural').tolist() == [True, False, False]
+    assert subzone_mask(codes, 'Urbana').tolist() == [False, True, False]
+    assert condition_mask(codes, CONDICIONES_TERRENO).tolist() == [True, False, False]
+
+
+def test_anti_join_ignores_null_keys():
+    keys = pd.Series(['a', 'b', None], dtype='string')
+    other = pd.Series(['b', None], dtype='string')
+    assert anti_join_mask(keys, other).tolist() == [True, False, True]
+
+
+def test_unit_keys_match_between_registry_and_layer():
+    code = predial('01', '0', '0007')
+    registry = pd.DataFrame({'Numero_Predial': [code], 'Unidad': ['A'], 'Tipo_Construccion': ['NO_CONVENCIONAL']})
+    layer = pd.DataFrame({'CODIGO': [code], 'IDENTIFICADOR': ['A'], 'TIPO_CONSTRUCCION': ['NO CONVENCIONAL']})
+    assert registry_unit_key(registry).tolist() == geographic_unit_key(layer).tolist()
+
+
+def engine():
+    registry = pd.DataFrame({
+        'Numero_Predial': [predial('00', '0'), predial('00', '0', '0002'), predial('01', '0'), predial('00', '9')],
+        'Estado': ['ACTIVO', 'ACTIVO', 'ACTIVO', 'ACTIVO'],
+    })
+    layer = pd.DataFrame({
+        'CODIGO': [predial('00', '0'), predial('00', '8'), predial('01', '0')],
+        'OBJECTID': [10, 11, 12],
+    })
+    return RegistryJoinEngine(registry, 'R1', registry['Numero_Predial'].astype('string'),
+                              layer, 'U_TERRENO', layer['CODIGO'].astype('string'))
+
+
+def test_omision_returns_active_registry_rows_without_geometry():
+    result = engine().omision('Rural', CONDICIONES_TERRENO)
+    assert result['R1.Numero_Predial'].tolist() == [predial('00', '0', '0002')]
+    assert result['U_TERRENO.CODIGO'].tolist() == ['']
+
+
+def test_comision_returns_geometry_without_registry_rows():
+    result, oids = engine().comision('Rural', CONDICIONES_TERRENO)
+    assert oids == [11]
+    assert result['U_TERRENO.CODIGO'].tolist() == [predial('00', '8')]
+    assert list(result.columns[-2:]) == ['R1.Numero_Predial', 'R1.Estado']
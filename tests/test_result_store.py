@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import ResultStore
+from ResultStore import (ResultWriter, read_results, remove_results, result_sheets, sheet_path,
+                         write_sheet)
+
+
+def test_sheet_path_sits_next_to_the_workbook(tmp_path):
+    path = sheet_path(tmp_path / 'Omision_Comision.xlsx', 'Terrenos')
+    assert path == tmp_path / 'Omision_Comision.Terrenos.parquet'
+
+
+def test_result_sheets_and_remove_results(tmp_path):
+    excel_path = tmp_path / 'libro.xlsx'
+    for name in ('b', 'a'):
+        sheet_path(excel_path, name).write_bytes(b'')
+    (tmp_path / 'otro.a.parquet').write_bytes(b'')
+
+    assert list(result_sheets(excel_path)) == ['a', 'b']
+    remove_results(excel_path)
+    assert result_sheets(excel_path) == {}
+    assert (tmp_path / 'otro.a.parquet').exists()
+
+
+def test_write_sheet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResultStore, 'parquet_available', lambda: False)
+    assert write_sheet(tmp_path / 'libro.xlsx', 'hoja', pd.DataFrame({'a': [1]})) is None
+    assert result_sheets(tmp_path / 'libro.xlsx') == {}
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    excel_path = tmp_path / 'libro.xlsx'
+    frame = pd.DataFrame({'codigo': ['1', None], 'total': [1, 2]})
+    write_sheet(excel_path, 'hoja', frame)
+    result = read_results(excel_path)['hoja']
+    assert result['codigo'].dtype == 'string'
+    assert result['total'].tolist() == [1, 2]
+
+
+def test_read_results_falls_back_to_the_workbook(tmp_path):
+    pytest.importorskip('openpyxl')
+    excel_path = tmp_path / 'libro.xlsx'
+    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+        pd.DataFrame({'a': [1, 2]}).to_excel(writer, sheet_name='hoja', index=False)
+    assert read_results(excel_path)['hoja']['a'].tolist() == [1, 2]
+
+
+def test_result_writer_replaces_previous_results(tmp_path):
+    pytest.importorskip('xlsxwriter')
+    excel_path = tmp_path / 'libro.xlsx'
+    sheet_path(excel_path, 'anterior').write_bytes(b'')
+
+    writer = ResultWriter(excel_path)
+    assert result_sheets(excel_path) == {}
+    writer.write(pd.DataFrame({'a': [1]}), 'hoja')
+    writer.close()
+    assert excel_path.exists()
+    assert writer.frames == {}
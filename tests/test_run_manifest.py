@@ -0,0 +1,177 @@
+import os
+
+import pytest
+
+from utils.run_manifest import (RunManifest, code_files, digest, path_fingerprint,
+                                source_paths, stage_artefacts)
+
+
+STAGES = ("01_Copiar_Archivos_necesarios.py",
+          "02_Procesar_Conteo_de_Elementos.py",
+          "03_Crear_Topologías.py")
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Proyecto mínimo con las tres primeras etapas IGAC, un módulo compartido e insumos"""
+    root = str(tmp_path)
+    scripts_dir = os.path.join(root, 'Scripts', 'Modelo_IGAC')
+    for name in STAGES:
+        write(os.path.join(scripts_dir, name), f"print('{name}')\n")
+    write(os.path.join(scripts_dir, 'Compartido.py'), "VALOR = 1\n")
+    write(os.path.join(root, 'Files', 'Temporary_Files', 'array_config.txt'), "URBANO\n")
+    write(os.path.join(root, 'Files', 'Temporary_Files', 'Ruta_Insumos', 'rutas_archivos.json'), "{}")
+    model_dir = os.path.join(root, 'Files', 'Temporary_Files', 'MODELO_IGAC')
+    os.makedirs(model_dir)
+    return root, scripts_dir, model_dir
+
+
+def queue(scripts_dir):
+    return [(number, os.path.join(scripts_dir, name)) for number, name in enumerate(STAGES, start=1)]
+
+
+def sources(root):
+    return source_paths(root, 'MODELO_IGAC', 'rutas_archivos.json')
+
+
+def run_all(manifest, entries, root, artefacts=None):
+    """Planifica la cola y registra todas las etapas como completadas"""
+    keys, reusable = manifest.plan(entries, sources(root))
+    for key, (_, path) in enumerate(entries):
+        name = os.path.basename(path)
+        manifest.record(name, keys[key], (artefacts or {}).get(name, {}))
+    return keys, reusable
+
+
+def reused(manifest, entries, root):
+    _, reusable = manifest.plan(entries, sources(root))
+    return sorted(entries[key][0] for key in reusable)
+
+
+def test_fingerprints():
+    assert digest(['a', 1]) == digest(['a', 1])
+    assert digest(['a', 1]) != digest(['a', 2])
+    assert path_fingerprint(None) == 'missing'
+
+
+def test_path_fingerprint_changes_with_folder_contents(tmp_path):
+    folder = str(tmp_path / 'datos.gdb')
+    write(os.path.join(folder, 'a.table'), "1")
+    before = path_fingerprint(folder)
+    write(os.path.join(folder, 'b.table'), "2")
+    assert path_fingerprint(folder) != before
+
+
+def test_code_files_include_shared_modules_but_not_other_stages(project):
+    _, scripts_dir, _ = project
+    names = [os.path.basename(path) for path in code_files(os.path.join(scripts_dir, STAGES[1]))]
+    assert names[0] == STAGES[1]
+    assert 'Compartido.py' in names
+    assert STAGES[0] not in names
+
+
+def test_unchanged_run_is_fully_reusable(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    _, reusable = run_all(RunManifest(model_dir), entries, root)
+    assert reusable == set()
+    assert reused(RunManifest(model_dir), entries, root) == [1, 2, 3]
+
+
+def test_code_change_invalidates_the_stage_and_its_dependants(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    run_all(RunManifest(model_dir), entries, root)
+    write(os.path.join(scripts_dir, STAGES[1]), "print('cambio')\n")
+    assert reused(RunManifest(model_dir), entries, root) == [1]
+
+
+def test_shared_module_change_invalidates_every_stage(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    run_all(RunManifest(model_dir), entries, root)
+    write(os.path.join(scripts_dir, 'Compartido.py'), "VALOR = 2\n")
+    assert reused(RunManifest(model_dir), entries, root) == []
+
+
+def test_only_declared_sources_count(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    run_all(RunManifest(model_dir), entries, root)
+    # Ninguna de estas etapas declara la toolbox
+    write(os.path.join(root, 'Files', 'Templates', 'MODELO_IGAC', 'VALIDACIONESCALIDAD.atbx'), "x")
+    assert reused(RunManifest(model_dir), entries, root) == [1, 2, 3]
+    write(os.path.join(root, 'Files', 'Temporary_Files', 'array_config.txt'), "URBANO\nRURAL\n")
+    assert reused(RunManifest(model_dir), entries, root) == []
+
+
+def test_missing_artefact_invalidates_the_stage(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    db_path = os.path.join(model_dir, 'db', 'conteo_elementos.db')
+    write(db_path, "")
+    run_all(RunManifest(model_dir), entries, root, {STAGES[1]: {db_path: [0, 0]}})
+    os.remove(db_path)
+    assert reused(RunManifest(model_dir), entries, root) == [1]
+
+
+def test_upstream_rerun_invalidates_downstream_stages(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    run_all(RunManifest(model_dir), entries, root)
+
+    # La copia de archivos se repite sola
+    manifest = RunManifest(model_dir)
+    keys, _ = manifest.plan(entries[:1], sources(root))
+    manifest.record(STAGES[0], keys[0], {})
+    assert reused(RunManifest(model_dir), entries, root) == [1]
+
+
+def test_rerun_of_a_queued_dependency_invalidates_the_stage(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    manifest = RunManifest(model_dir)
+    keys, _ = manifest.plan(entries, sources(root))
+    manifest.record(STAGES[1], keys[1], {})
+    manifest.record(STAGES[2], keys[2], {})
+    # 01 nunca se registró: se repite y arrastra a las demás
+    assert reused(RunManifest(model_dir), entries, root) == []
+
+
+def test_invalidate_and_version_change(project):
+    root, scripts_dir, model_dir = project
+    entries = queue(scripts_dir)
+    manifest = RunManifest(model_dir)
+    run_all(manifest, entries, root)
+    manifest.invalidate(STAGES[2])
+    assert reused(RunManifest(model_dir), entries, root) == [1, 2]
+
+    write(manifest.path, '{"version": 0, "stages": {}}')
+    assert RunManifest(model_dir).stages == {}
+
+
+def test_stage_artefacts_come_from_declared_outputs(project):
+    _, scripts_dir, model_dir = project
+    reports_dir = os.path.join(os.path.dirname(model_dir), 'Reportes')
+    write(os.path.join(model_dir, 'db', 'conteo_elementos.db'), "")
+    write(os.path.join(model_dir, 'db', 'registro_errores.db'), "")
+    os.makedirs(os.path.join(model_dir, 'municipio.gdb'))
+    os.makedirs(os.path.join(model_dir, 'INSUMOS'))
+
+    artefacts = stage_artefacts(os.path.join(scripts_dir, STAGES[1]), model_dir, reports_dir)
+    assert list(artefacts) == [os.path.join(model_dir, 'db', 'conteo_elementos.db')]
+
+    artefacts = stage_artefacts(os.path.join(scripts_dir, STAGES[0]), model_dir, reports_dir)
+    assert sorted(os.path.basename(path) for path in artefacts) == ['INSUMOS', 'municipio.gdb']
+
+
+def test_stage_outside_the_graph_has_no_artefacts(project):
+    _, scripts_dir, model_dir = project
+    write(os.path.join(model_dir, 'otro.txt'), "")
+    assert stage_artefacts(os.path.join(scripts_dir, '99_Otro.py'), model_dir, model_dir) == {}
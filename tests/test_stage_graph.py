@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from utils.stage_graph import (ALL, IGAC_ARTEFACTS, IGAC_STAGES, LADM_ARTEFACTS, LADM_STAGES,
+                               MAX_WORKERS_ENV, StageScheduler, artefact_patterns, default_max_workers)
+
+
+def igac_queue(*numbers):
+    """Cola [(número, ruta)] con las etapas IGAC de los números indicados"""
+    names = {name[:2]: name for name in IGAC_STAGES}
+    return [(int(number), os.path.join('Scripts', 'Modelo_IGAC', names[f"{number:02d}"]))
+            for number in numbers]
+
+
+def launched(scheduler):
+    return [number for _, number, _ in scheduler.take_ready()]
+
+
+@pytest.mark.parametrize('graph', [IGAC_STAGES, LADM_STAGES], ids=['igac', 'ladm'])
+def test_inputs_are_produced_by_earlier_stages(graph):
+    # Una entrada producida solo por una etapa posterior sería un ciclo en la cola
+    produced = set()
+    for name, spec in graph.items():
+        missing = spec['inputs'] - produced - {ALL}
+        assert not missing, f"{name} lee {sorted(missing)} antes de que se produzca"
+        produced |= spec['outputs']
+
+
+@pytest.mark.parametrize('graph, artefacts', [(IGAC_STAGES, IGAC_ARTEFACTS), (LADM_STAGES, LADM_ARTEFACTS)],
+                         ids=['igac', 'ladm'])
+def test_every_output_has_artefacts(graph, artefacts):
+    outputs = set().union(*(spec['outputs'] for spec in graph.values()))
+    assert outputs <= set(artefacts)
+
+
+def test_artefact_patterns_follow_declared_outputs():
+    [(_, path)] = igac_queue(2)
+    assert artefact_patterns(path) == ['db/conteo_elementos.db']
+    assert artefact_patterns(os.path.join('Scripts', 'Modelo_IGAC', 'otro.py')) == []
+
+
+def test_dependencies_only_point_backwards():
+    scheduler = StageScheduler(igac_queue(*range(1, 23)), max_workers=4)
+    for key, dependencies in scheduler.dependencies.items():
+        assert all(dep < key for dep in dependencies)
+
+
+def test_independent_stages_run_in_parallel_up_to_the_cap():
+    scheduler = StageScheduler(igac_queue(11, 12, 13), max_workers=2)
+    assert launched(scheduler) == [11, 12]
+    assert launched(scheduler) == []
+
+
+def test_parallel_cap_of_one_runs_in_order():
+    scheduler = StageScheduler(igac_queue(11, 12, 13), max_workers=1)
+    assert launched(scheduler) == [11]
+    scheduler.finish(0, True)
+    assert launched(scheduler) == [12]
+
+
+def test_stage_waits_for_all_its_dependencies():
+    scheduler = StageScheduler(igac_queue(11, 12, 13), max_workers=4)
+    assert launched(scheduler) == [11, 12]
+    scheduler.finish(0, True)
+    assert launched(scheduler) == []
+    scheduler.finish(1, True)
+    assert launched(scheduler) == [13]
+    scheduler.finish(2, True)
+    assert scheduler.is_finished() and scheduler.succeeded()
+
+
+def test_failure_skips_only_dependent_stages():
+    scheduler = StageScheduler(igac_queue(11, 12, 13, 14, 18), max_workers=4)
+    assert launched(scheduler) == [11, 12, 18]
+    skipped = scheduler.finish(0, False)
+    assert [number for number, _ in skipped] == [13, 14]
+    scheduler.finish(1, True)
+    scheduler.finish(4, True)
+    assert scheduler.is_finished()
+    assert not scheduler.succeeded()
+
+
+def test_stage_outside_the_graph_is_a_barrier():
+    queue = igac_queue(11) + [(99, os.path.join('Scripts', 'Modelo_IGAC', '99_Otro.py'))] + igac_queue(12)
+    scheduler = StageScheduler(queue, max_workers=4)
+    assert launched(scheduler) == [11]
+    scheduler.finish(0, True)
+    assert launched(scheduler) == [99]
+    scheduler.finish(1, True)
+    assert launched(scheduler) == [12]
+
+
+def test_compilation_waits_for_everything():
+    scheduler = StageScheduler(igac_queue(11, 12, 22), max_workers=4)
+    assert scheduler.dependencies[2] == {0, 1}
+
+
+def test_mark_completed_releases_dependants():
+    scheduler = StageScheduler(igac_queue(11, 12, 13), max_workers=4)
+    scheduler.mark_completed(0)
+    scheduler.mark_completed(1)
+    assert launched(scheduler) == [13]
+    assert scheduler.pending_paths() == []
+
+
+def test_default_max_workers(monkeypatch):
+    monkeypatch.setenv(MAX_WORKERS_ENV, '3')
+    assert default_max_workers() == 3
+    monkeypatch.setenv(MAX_WORKERS_ENV, '0')
+    assert default_max_workers() == 1
+    monkeypatch.setenv(MAX_WORKERS_ENV, 'x')
+    assert 1 <= default_max_workers() <= 4